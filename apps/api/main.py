@@ -8,7 +8,9 @@ from apps.api.routes.leads_routes import router as leads_router
 from apps.api.routes.detetive_routes import router as detetive_router  # ✅ adicionado
 
 
-from apps.api.routes import admin_routes
+from apps.api.routes import admin_routes, admin_banco_routes
+from packages.database.metricas import MetricasDBMiddleware
+from packages.detectors import provedores_http
 
 settings = get_settings()
 
@@ -26,6 +28,9 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricasDBMiddleware)
+# sessões aiohttp (keep-alive) dos provedores externos
+app.router.add_event_handler("shutdown", provedores_http.fechar_async)
 
 # 👇 aqui estão suas rotas registradas
 app.include_router(health_router, prefix="/v1")
@@ -33,3 +38,4 @@ app.include_router(leads_router, prefix="/v1")
 app.include_router(health_router, prefix="/v1")
 app.include_router(detetive_router)  # ✅ isso habilita a rota do modo detetive
 app.include_router(admin_routes.router)
+app.include_router(admin_banco_routes.router)
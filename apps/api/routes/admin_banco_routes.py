@@ -1,24 +1,30 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from packages.database.session import get_session
+from packages.database.metricas import REGISTRO
+from packages.database.session import engine, get_session_admin, settings
+from apps.api.services import admin_service
 
 router = APIRouter(prefix="/v1/admin", tags=["Admin/DB"])
 
 @router.post("/db/refresh")
-async def refresh_materializadas(db: AsyncSession = Depends(get_session)):
-    await db.execute(text("REFRESH MATERIALIZED VIEW intel_lead.mv_lead_completo_detalhado"))
-    await db.execute(text("REFRESH MATERIALIZED VIEW intel_lead.resumo_leads_distribuidora"))
-    await db.execute(text("REFRESH MATERIALIZED VIEW intel_lead.resumo_energia_municipio"))
-    await db.execute(text("REFRESH MATERIALIZED VIEW intel_lead.resumo_leads_ano_camada"))
-    await db.commit()
-    return {"status": "ok"}
+async def refresh_materializadas(
+    mv: Optional[List[str]] = Query(None, description="MVs a atualizar (com as dependentes); vazio = todas"),
+    db: AsyncSession = Depends(get_session_admin),
+):
+    return await admin_service.refresh_materializadas(db, mv)
+
+@router.get("/db/refresh/historico")
+async def historico_refresh(limite: int = Query(100, ge=1, le=1000), db: AsyncSession = Depends(get_session_admin)):
+    return await admin_service.historico_refresh_materializadas(db, limite)
 
 @router.get("/db/queue")
-async def listar_fila(db: AsyncSession = Depends(get_session)):
+async def listar_fila(db: AsyncSession = Depends(get_session_admin)):
     rs = await db.execute(text("""
         SELECT id, status, tries, priority, worker_id, created_at, started_at, finished_at,
                (payload->>'script') AS script
@@ -27,3 +33,19 @@ async def listar_fila(db: AsyncSession = Depends(get_session)):
         LIMIT 100
     """))
     return [dict(r._mapping) for r in rs.fetchall()]
+
+@router.get("/db/metricas")
+async def metricas_banco(zerar: bool = Query(False, description="Zera as métricas por rota depois de ler")):
+    """Tempo de banco, queries e espera por conexão por rota, e o estado atual do pool."""
+    rotas = REGISTRO.resumo()
+    if zerar:
+        REGISTRO.zerar()
+    return {
+        "pool": {
+            **engine.pool.estado(),
+            "max_conexoes": settings.db_pool_size + settings.db_max_overflow,
+            "timeout_s": settings.db_pool_timeout,
+        },
+        "statement_timeout_ms": settings.statement_timeouts,
+        "rotas": rotas,
+    }
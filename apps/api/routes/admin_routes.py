@@ -1,11 +1,12 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from packages.database.session import get_session
+from packages.database.session import get_session_admin
+from packages.detectors import cache_geocode, provedores_http
 from packages.jobs.queue import enqueue
 from apps.api.services import admin_service
 
@@ -55,7 +56,7 @@ async def download_dataset(payload: DownloadPayload):
     return {"status": "queued", "job_id": job_id}
 
 @router.get("/download/status")
-async def status_download(distribuidora: str, ano: int, db: AsyncSession = Depends(get_session)):
+async def status_download(distribuidora: str, ano: int, db: AsyncSession = Depends(get_session_admin)):
     """
     Último status do download em intel_lead.download_log.
     """
@@ -76,22 +77,29 @@ async def status_download(distribuidora: str, ano: int, db: AsyncSession = Depen
 # ===== Métricas / Listagens rápidas =====
 
 @router.get("/import-status")
-async def listar_importacoes(db: AsyncSession = Depends(get_session)):
+async def listar_importacoes(db: AsyncSession = Depends(get_session_admin)):
     """
     Mostra os últimos jobs da fila.
     """
     return await admin_service.listar_status_importacoes(db)
 
+@router.get("/import-progress")
+async def progresso_importacoes(db: AsyncSession = Depends(get_session_admin)):
+    """
+    Progresso (%) de cada importação, pelo checkpoint gravado a cada chunk.
+    """
+    return await admin_service.listar_progresso_importacoes(db)
+
 @router.get("/leads/status-count")
-async def status_count(db: AsyncSession = Depends(get_session)):
+async def status_count(db: AsyncSession = Depends(get_session_admin)):
     return await admin_service.contagem_por_status(db)
 
 @router.get("/leads/distribuidoras-count")
-async def count_por_distribuidora(db: AsyncSession = Depends(get_session)):
+async def count_por_distribuidora(db: AsyncSession = Depends(get_session_admin)):
     return await admin_service.contagem_por_distribuidora(db)
 
 @router.get("/leads/raw")
-async def listar_leads_raw(db: AsyncSession = Depends(get_session)):
+async def listar_leads_raw(db: AsyncSession = Depends(get_session_admin)):
     return await admin_service.listar_leads_raw(db)
 
 
@@ -109,9 +117,33 @@ async def enrich_google(payload: EnrichPayload):
 async def enrich_cnpj(payload: EnrichPayload):
     return await admin_service.enriquecer_cnpj(payload)
 
+@router.get("/provedores/metricas")
+async def metricas_provedores(zerar: bool = Query(False, description="Zera as métricas depois de ler")):
+    """Chamadas, retries, status e histograma de latência por provedor externo e operação (deste processo)."""
+    metricas = provedores_http.METRICAS.resumo()
+    if zerar:
+        provedores_http.METRICAS.zerar()
+    return metricas
+
+@router.get("/geocode/cache/metricas")
+async def metricas_cache_geocode(zerar: bool = Query(False, description="Zera os contadores depois de ler")):
+    """Acertos (memória/banco/negativos), faltas e chamadas ao Google do cache de geocodificação (deste processo)."""
+    metricas = cache_geocode.METRICAS.resumo()
+    if zerar:
+        cache_geocode.METRICAS.zerar()
+    return metricas
+
 
 # ===== Ops de banco (materializadas) =====
 
 @router.post("/dashboard/refresh")
-async def refresh_materializadas(db: AsyncSession = Depends(get_session)):
+async def refresh_materializadas(db: AsyncSession = Depends(get_session_admin)):
     return await admin_service.refresh_materializadas(db)
+
+@router.get("/dashboard/resumo")
+async def resumo_dashboard(limite_municipios: int = 100, db: AsyncSession = Depends(get_session_admin)):
+    return await admin_service.resumo_dashboard(db, limite_municipios)
+
+@router.post("/dashboard/resumo/verificar")
+async def verificar_resumos(db: AsyncSession = Depends(get_session_admin)):
+    return await admin_service.verificar_resumos(db)
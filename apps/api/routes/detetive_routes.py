@@ -1,19 +1,53 @@
 # apps/api/routes/detetive_routes.py
 
-import asyncio
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.ext.asyncio import AsyncSession
-from packages.database.session import get_session
-from packages.detectors.detetive_core import montar_dossie_detetive
-from apps.api.schemas.lead_schema import DetetiveResponse 
+import json
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from packages.database.session import AsyncSessionLocal
+from packages.detectors import detetive_lote
+from apps.api.schemas.lead_schema import DetetiveResponse
 
 router = APIRouter(prefix="/v1/detetive", tags=["Modo Detetive"])
 
 
+async def _executar_db(fn):
+    """Roda uma função síncrona de packages/detectors (match, diagnóstico) numa sessão própria."""
+    async with AsyncSessionLocal() as session:
+        return await session.run_sync(fn)
+
+
 @router.post("/analisar", response_model=DetetiveResponse)
-async def analisar_dados_cliente(payload: dict, db: AsyncSession = Depends(get_session)):
+async def analisar_dados_cliente(payload: dict):
     try:
-        result = await asyncio.to_thread(montar_dossie_detetive, payload, db)
-        return result
+        return await detetive_lote.analisar_prospect(payload, detetive_lote.Contexto(_executar_db))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/lote")
+async def analisar_lote(request: Request):
+    """
+    Lote de prospects: JSON (lista ou {"prospects": [...]}), CSV no corpo (text/csv) ou
+    arquivo em multipart (campo "arquivo"). Resposta em NDJSON, uma linha por prospect na
+    ordem em que terminam ("indice" = posição na entrada) e uma linha final com o "resumo".
+    """
+    tipo = request.headers.get("content-type", "")
+    if tipo.startswith("multipart/form-data"):
+        form = await request.form()
+        arquivo = form.get("arquivo")
+        if arquivo is None or isinstance(arquivo, str):
+            raise HTTPException(status_code=400, detail='Envie o arquivo no campo "arquivo"')
+        corpo, tipo = await arquivo.read(), arquivo.content_type or arquivo.filename or ""
+    else:
+        corpo = await request.body()
+    try:
+        prospects = detetive_lote.ler_prospects(corpo, tipo)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def linhas():
+        async for item in detetive_lote.analisar_lote(prospects, _executar_db):
+            yield json.dumps(item, default=str, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(linhas(), media_type="application/x-ndjson")
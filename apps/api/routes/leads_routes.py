@@ -4,16 +4,47 @@ from typing import Optional, List
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from apps.api.schemas.lead_schema import (
-    LeadDetalhadoOut
+    LeadBuscaOut,
+    LeadDetalhadoOut,
+    LeadList,
+    LeadQualidade,
 )
 from apps.api.services.lead.lead_service import (
+    buscar_leads,
+    buscar_texto,
     get_lead,
     get_leads_detalhados,
+    get_qualidade,
 )
 from packages.database.session import get_session
 
 router = APIRouter(prefix="/leads", tags=["leads"])
 
+@router.get("", response_model=LeadList)
+async def listar_leads(
+    estado: Optional[str] = None,
+    tipo: Optional[str] = None,
+    distribuidora: Optional[str] = None,
+    segmento: Optional[str] = None,
+    ordem: str = "padrao",
+    busca: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="proximo_cursor da página anterior"),
+    db: AsyncSession = Depends(get_session),
+):
+    try:
+        return await buscar_leads(db, estado, tipo, distribuidora, segmento, ordem, busca, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/busca", response_model=List[LeadBuscaOut])
+async def busca_textual(
+    q: str = Query(..., min_length=2, description="Prefixo ou termo aproximado (bairro, descrição, razão social)"),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_session),
+):
+    return await buscar_texto(db, q, limit)
+
 @router.get("/detalhados", response_model=List[LeadDetalhadoOut])
 async def listar_leads_detalhados(
     limit: int = Query(300, ge=1, le=1000),
@@ -22,6 +53,13 @@ async def listar_leads_detalhados(
     rows = await get_leads_detalhados(db, limit=limit)
     return [LeadDetalhadoOut.model_validate(r, from_attributes=True) for r in rows]
 
+@router.get("/{uc_id}/qualidade", response_model=LeadQualidade)
+async def qualidade_lead(uc_id: str, db: AsyncSession = Depends(get_session)):
+    qualidade = await get_qualidade(db, uc_id)
+    if not qualidade:
+        raise HTTPException(status_code=404, detail="Lead sem série de qualidade")
+    return qualidade
+
 @router.get("/{uc_id}", response_model=LeadDetalhadoOut)
 async def detalhar_lead(uc_id: str, db: AsyncSession = Depends(get_session)):
     lead = await get_lead(db, uc_id)
@@ -31,8 +31,19 @@ class LeadOut(BaseModel):
     media_dic: Optional[float] = None
     media_fic: Optional[float] = None
 
+class LeadBuscaOut(BaseModel):
+    uc_id: str
+    razao_social: Optional[str] = None
+    bairro: Optional[str] = None
+    municipio: Optional[str] = None
+    estado: Optional[str] = None
+    distribuidora_nome: Optional[str] = None
+    score: float  # 1 = casou por prefixo + word_similarity (0..1)
+
 class LeadList(BaseModel):
     total: int
+    total_aproximado: bool = False  # True = estimativa (reltuples), sem filtros
+    proximo_cursor: Optional[str] = None  # None = última página
     items: List[LeadOut]
 
 
@@ -44,8 +55,8 @@ class LeadList(BaseModel):
 class LeadQualidade(BaseModel):
     dicMed: Optional[float] = None
     ficMed: Optional[float] = None
-    dicMes: Optional[List[float]] = None
-    ficMes: Optional[List[float]] = None
+    dicMes: Optional[List[Optional[float]]] = None  # 12 meses; None = mês sem valor
+    ficMes: Optional[List[Optional[float]]] = None
 
 
 # -------------------------------
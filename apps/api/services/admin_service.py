@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import json
 from typing import Any
 
 from pydantic import BaseModel
@@ -49,23 +50,12 @@ async def executar_importacao(payload: ImportacaoPayload) -> dict[str, Any]:
         if not script:
             continue
 
-        env = {}
-        if cam == "UCBT":
-            env.update({
-                "UCBT_CHUNK_SIZE": "3000",
-                "UCBT_ROWS_PER_COPY": "15000",
-                "UCBT_SLEEP_MS_BETWEEN": "120",
-            })
-        if cam == "PONNOT":
-            env.update({
-                "PONNOT_CHUNK_SIZE": "4000",
-                "PONNOT_SLEEP_MS_BETWEEN": "80",
-            })
-
+        # chunk e pausa entre chunks não são fixados aqui: os importers ajustam pela carga
+        # do banco (packages/jobs/importers/controle_carga.py, knobs IMPORT_* do worker)
         job_id = enqueue({
             "script": script,
             "args": ["--gdb", gdb_path, "--distribuidora", dist, "--ano", str(ano)],
-            "env": env,
+            "env": {},
         }, priority=5)
         job_ids.append(job_id)
 
@@ -89,6 +79,24 @@ async def listar_status_importacoes(db: AsyncSession):
     rs = await db.execute(q)
     return [dict(r._mapping) for r in rs.fetchall()]
 
+async def listar_progresso_importacoes(db: AsyncSession):
+    """import_status + checkpoint (import_checkpoint): progresso em % e ponto de retomada."""
+    q = text("""
+        SELECT s.import_id, s.distribuidora_nome, s.ano, s.camada, s.status,
+               s.linhas_processadas, s.data_inicio, s.data_fim,
+               c.layer, c.offset_features, c.total_features, c.linhas_commitadas,
+               c.atualizado_em AS checkpoint_em,
+               CASE WHEN s.status = 'completed' OR c.concluido THEN 100.0
+                    WHEN c.total_features > 0 THEN round(100.0 * c.offset_features / c.total_features, 1)
+               END AS progresso_pct
+        FROM intel_lead.import_status s
+        LEFT JOIN intel_lead.import_checkpoint c ON c.import_id = s.import_id
+        ORDER BY COALESCE(c.atualizado_em, s.data_inicio) DESC NULLS LAST
+        LIMIT 100
+    """)
+    rs = await db.execute(q)
+    return [dict(r._mapping) for r in rs.fetchall()]
+
 async def contagem_por_status(db: AsyncSession):
     q = text("""
         SELECT COALESCE(situacao,'(null)') AS situacao, COUNT(*) AS qtde
@@ -135,10 +143,96 @@ async def enriquecer_cnpj(payload):
 
 # ============== Ops de banco ==============
 
-async def refresh_materializadas(db: AsyncSession):
-    await db.execute(text("REFRESH MATERIALIZED VIEW intel_lead.mv_lead_completo_detalhado"))
-    await db.execute(text("REFRESH MATERIALIZED VIEW intel_lead.resumo_leads_distribuidora"))
-    await db.execute(text("REFRESH MATERIALIZED VIEW intel_lead.resumo_energia_municipio"))
-    await db.execute(text("REFRESH MATERIALIZED VIEW intel_lead.resumo_leads_ano_camada"))
-    await db.commit()
-    return {"status": "ok", "msg": "Materializadas atualizadas com sucesso"}
+REFRESH_SCRIPT = "packages/jobs/utils/materializadas.py"
+RESUMOS_SCRIPT = "packages/jobs/utils/resumos.py"
+
+async def _enfileirar_unico(db: AsyncSession, script: str, args: list[str], msg: str):
+    """Enfileira script+args, ou devolve o job igual que ainda está na fila."""
+    q = text("""
+        SELECT id FROM import_queue
+        WHERE status = 'queued' AND payload->>'script' = :script
+          AND COALESCE(payload->'args', '[]'::jsonb) = CAST(:args AS jsonb)
+        ORDER BY id
+        LIMIT 1
+    """)
+    existente = (await db.execute(q, {"script": script, "args": json.dumps(args)})).scalar()
+    if existente is not None:
+        return {"status": "queued", "job_id": existente, "msg": "Job igual já estava na fila"}
+
+    job_id = enqueue({"script": script, "args": args, "env": {}}, priority=3)
+    return {"status": "queued", "job_id": job_id, "msg": msg}
+
+async def refresh_materializadas(db: AsyncSession, mvs: list[str] | None = None):
+    """
+    Enfileira o refresh das MVs (grafo de dependências, paralelo, CONCURRENTLY quando dá;
+    packages/jobs/utils/materializadas.py). Se já houver um refresh igual na fila, devolve o
+    mesmo job em vez de enfileirar outro.
+    """
+    args: list[str] = []
+    for mv in mvs or []:
+        args += ["--mv", mv]
+    return await _enfileirar_unico(db, REFRESH_SCRIPT, args, "Refresh das materializadas enfileirado")
+
+async def historico_refresh_materializadas(db: AsyncSession, limite: int = 100):
+    """Últimas MVs atualizadas (mv_refresh_log): modo, status e duração de cada uma."""
+    existe = (await db.execute(text("SELECT to_regclass('intel_lead.mv_refresh_log') IS NOT NULL"))).scalar_one()
+    if not existe:
+        return []
+    q = text("""
+        SELECT execucao_id, mv, modo, status, iniciado_em, duracao_ms, erro
+        FROM intel_lead.mv_refresh_log
+        ORDER BY iniciado_em DESC NULLS LAST, id DESC
+        LIMIT :limite
+    """)
+    rs = await db.execute(q, {"limite": limite})
+    return [dict(r._mapping) for r in rs.fetchall()]
+
+# --------------------------------------------------------------------------------------
+# Resumos incrementais do dashboard (packages/jobs/utils/resumos.py, migration 017)
+# --------------------------------------------------------------------------------------
+async def resumo_dashboard(db: AsyncSession, limite_municipios: int = 100):
+    """
+    Resumos mantidos pelos deltas de cada importação: leads por distribuidora/camada/status,
+    por ano/camada e energia por município (top N por energia total).
+    """
+    existe = (await db.execute(text("SELECT to_regclass('intel_lead.resumo_inc_energia_municipio') IS NOT NULL"))).scalar_one()
+    if not existe:
+        return {"atualizado_em": None, "por_distribuidora": [], "por_ano_camada": [], "energia_municipio": []}
+
+    por_distribuidora = await db.execute(text("""
+        SELECT r.distribuidora_id, d.nome AS distribuidora_nome, r.camada, r.status, r.total_leads
+        FROM intel_lead.resumo_inc_leads_distribuidora r
+        LEFT JOIN intel_lead.distribuidora d ON d.id = r.distribuidora_id
+        ORDER BY r.total_leads DESC
+    """))
+    por_ano_camada = await db.execute(text("""
+        SELECT ano, camada, total_leads
+        FROM intel_lead.resumo_inc_leads_ano_camada
+        ORDER BY ano, camada
+    """))
+    energia = await db.execute(text("""
+        SELECT r.municipio_id, m.nome AS municipio_nome, m.uf, r.total_leads,
+               r.energia_total, r.soma_media_energia / NULLIF(r.leads_com_energia, 0) AS media_energia
+        FROM intel_lead.resumo_inc_energia_municipio r
+        LEFT JOIN intel_lead.municipio m ON m.id = r.municipio_id
+        ORDER BY r.energia_total DESC
+        LIMIT :limite
+    """), {"limite": limite_municipios})
+    atualizado_em = (await db.execute(text("""
+        SELECT max(atualizado_em) FROM (
+            SELECT max(atualizado_em) AS atualizado_em FROM intel_lead.resumo_inc_leads_distribuidora
+            UNION ALL SELECT max(atualizado_em) FROM intel_lead.resumo_inc_leads_ano_camada
+            UNION ALL SELECT max(atualizado_em) FROM intel_lead.resumo_inc_energia_municipio
+        ) t
+    """))).scalar()
+    return {
+        "atualizado_em": atualizado_em,
+        "por_distribuidora": [dict(r._mapping) for r in por_distribuidora.fetchall()],
+        "por_ano_camada": [dict(r._mapping) for r in por_ano_camada.fetchall()],
+        "energia_municipio": [dict(r._mapping) for r in energia.fetchall()],
+    }
+
+async def verificar_resumos(db: AsyncSession):
+    """Enfileira a comparação dos resumos com o recálculo completo (reconstrói se divergir)."""
+    return await _enfileirar_unico(db, RESUMOS_SCRIPT, ["--verificar", "--corrigir"],
+                                   "Verificação dos resumos enfileirada")
@@ -34,6 +34,17 @@ class Settings(BaseSettings):
     db_sslmode: str
     postgres_dsn: str | None = None
 
+    # pool async (por processo/worker): conexões = pool_size + max_overflow
+    db_pool_size: int = 10
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 10.0      # segundos esperando conexão livre antes de erro
+    db_pool_recycle: int = 1800
+    # cache de prepared statements do asyncpg por conexão; 0 atrás de pgbouncer (transaction)
+    db_statement_cache_size: int = 500
+    # statement_timeout por classe de rota (ms); "api" é o padrão da conexão
+    db_statement_timeout_ms: int = 15000
+    db_statement_timeout_admin_ms: int = 300000
+
     api_name: str = "Youon Intelligence API"
     api_version: str = "0.1.0"
 
@@ -45,6 +56,10 @@ class Settings(BaseSettings):
         pwd  = quote(self.db_pass)
         return f"postgresql+asyncpg://{user}:{pwd}@{self.db_host}:{self.db_port}/{self.db_name}"
 
+    @property
+    def statement_timeouts(self) -> dict[str, int]:
+        return {"api": self.db_statement_timeout_ms, "admin": self.db_statement_timeout_admin_ms}
+
 
 
 @lru_cache
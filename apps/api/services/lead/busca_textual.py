@@ -0,0 +1,84 @@
+# apps/api/services/lead/busca_textual.py
+"""
+Busca textual sobre mv_lead_busca/mv_lead_busca_termo (migration 019: pg_trgm + unaccent +
+tsvector).
+
+- Termo = valor de bairro, descricao ou razao_social em minúsculas e sem acento
+  (normaliza_busca(); a consulta passa pela mesma função). Cada campo é um termo: palavras de
+  campos diferentes não se combinam num casamento por prefixo
+- Ranking sobre os termos distintos (bem menos que os leads): casamento por prefixo de todas
+  as palavras (tsvector, 'joa' acha 'joao') vale 1, somado à word_similarity (0..1, aproximada:
+  'jardin paulsta' acha 'jardim paulista'). Entra quem casa por prefixo ou tem
+  word_similarity >= pg_trgm.word_similarity_threshold (0.6)
+- Filtro `busca` de buscar_leads: LIKE '%termo%' nos termos, pelo índice trigram, e daí aos
+  leads (em vez de ILIKE sequencial na MV de leads)
+"""
+
+from __future__ import annotations
+import re
+import unicodedata
+
+MAX_TERMOS = 8
+
+# termos mais relevantes -> até :limit leads de cada (pelo índice texto, uc_id) -> um por lead
+_SQL_BUSCA = """
+    WITH termos AS (
+        SELECT t.texto, {score} AS score
+        FROM intel_lead.mv_lead_busca_termo t
+        WHERE {condicao}
+        ORDER BY score DESC, t.leads DESC
+        LIMIT :limit
+    ), achados AS (
+        SELECT DISTINCT ON (b.id) b.id, termos.score
+        FROM termos
+        CROSS JOIN LATERAL (
+            SELECT id FROM intel_lead.mv_lead_busca
+            WHERE texto = termos.texto
+            ORDER BY uc_id
+            LIMIT :limit
+        ) b
+        ORDER BY b.id, termos.score DESC
+    )
+    SELECT d.uc_id, d.razao_social, d.bairro, d.municipio, d.estado, d.distribuidora_nome, achados.score
+    FROM achados
+    JOIN intel_lead.mv_lead_completo_detalhado d ON d.id = achados.id
+    ORDER BY achados.score DESC, d.uc_id
+    LIMIT :limit
+"""
+SQL_BUSCA = _SQL_BUSCA.format(
+    score="(t.doc @@ to_tsquery('simple', :tsquery))::int + word_similarity(intel_lead.normaliza_busca(:q), t.texto)",
+    condicao="t.doc @@ to_tsquery('simple', :tsquery) OR intel_lead.normaliza_busca(:q) <% t.texto",
+)
+# sem palavra de 3+ letras não há trigrama útil: só prefixo, termos com mais leads primeiro
+SQL_BUSCA_PREFIXO = _SQL_BUSCA.format(
+    score="1::float8",
+    condicao="t.doc @@ to_tsquery('simple', :tsquery)",
+)
+
+FILTRO_BUSCA = (
+    "id IN (SELECT b.id FROM intel_lead.mv_lead_busca_termo t "
+    "JOIN intel_lead.mv_lead_busca b ON b.texto = t.texto "
+    "WHERE t.texto LIKE '%' || intel_lead.normaliza_busca(:busca) || '%')"
+)
+
+
+def normalizar(texto: str) -> str:
+    """Minúsculas sem acento (equivalente a normaliza_busca() para português)."""
+    sem_acento = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode()
+    return " ".join(sem_acento.lower().split())
+
+
+def tsquery_prefixo(texto: str) -> str | None:
+    """'Jardim São Jo' -> 'jardim:* & sao:* & jo:*'; None se não sobrar palavra."""
+    termos = re.findall(r"[a-z0-9]+", normalizar(texto))[:MAX_TERMOS]
+    return " & ".join(f"{t}:*" for t in termos) or None
+
+
+def consulta_busca(texto: str) -> str:
+    """SQL_BUSCA, ou SQL_BUSCA_PREFIXO se nenhuma palavra tiver 3 letras."""
+    return SQL_BUSCA if any(len(t) >= 3 for t in normalizar(texto).split()) else SQL_BUSCA_PREFIXO
+
+
+def padrao_like(texto: str) -> str:
+    """Termo do filtro `busca` com %, _ e \\ escapados (o LIKE os trataria como curinga)."""
+    return re.sub(r"([%_\\])", r"\\\1", texto)
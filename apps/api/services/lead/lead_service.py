@@ -7,25 +7,146 @@ from apps.api.schemas.lead_schema import (
     LeadMapOut,
     LeadList,
     LeadOut,
+    LeadBuscaOut,
 
 )
 
 from sqlalchemy import select
 from apps.api.models.lead_model import LeadCompletoDetalhado
+from apps.api.services.lead import busca_textual, paginacao
 
 import json
+import time
 
-# 🔢 Parser auxiliar para arrays de texto
-def parse_array_text(texto: str | None) -> list[float] | None:
+# 🧱 Tabelas opcionais (migrations 015/019): "existe" vale para o processo; "não existe" é
+# reconsultado depois de RECHECAGEM_TABELA_S (a migration pode rodar com a API no ar)
+RECHECAGEM_TABELA_S = 60.0
+_tabelas: dict[str, tuple[bool, float]] = {}
+
+
+async def _tabela_existe(db: AsyncSession, tabela: str) -> bool:
+    existe, verificada_em = _tabelas.get(tabela, (False, None))
+    if existe or (verificada_em is not None and time.monotonic() - verificada_em < RECHECAGEM_TABELA_S):
+        return existe
+    query = text("SELECT to_regclass(:tabela) IS NOT NULL")
+    existe = bool((await db.execute(query, {"tabela": tabela})).scalar_one())
+    _tabelas[tabela] = (existe, time.monotonic())
+    return existe
+
+
+# 🔢 Parser auxiliar para arrays (texto '{1,2,NULL}' ou lista, como o asyncpg devolve real[])
+def parse_array_text(texto: str | list | None) -> list[float | None] | None:
     if not texto:
         return None
     try:
-        return [float(x) for x in texto.strip("{} ").split(",") if x]
+        if isinstance(texto, str):
+            texto = [x.strip() for x in texto.strip("{} ").split(",") if x.strip()]
+        return [None if x is None or x == "NULL" else float(x) for x in texto]
     except Exception:
         return None
 
 
-# 🔍 Listagem com filtros e paginação
+# 📆 Séries mensais: lead_serie_mensal (real[12] por medida) ou, para UCs importadas no
+# formato longo, as mensais de 12 linhas por UC
+MEDIDAS_LONGAS = {
+    "energia_ponta": "lead_energia_mensal",
+    "energia_fora_ponta": "lead_energia_mensal",
+    "energia_total": "lead_energia_mensal",
+    "demanda_ponta": "lead_demanda_mensal",
+    "demanda_fora_ponta": "lead_demanda_mensal",
+    "demanda_total": "lead_demanda_mensal",
+    "demanda_contratada": "lead_demanda_mensal",
+    "dic": "lead_qualidade_mensal",
+    "fic": "lead_qualidade_mensal",
+    "sem_rede": "lead_qualidade_mensal",
+}
+
+
+async def _tem_serie_compacta(db: AsyncSession) -> bool:
+    return await _tabela_existe(db, "intel_lead.lead_serie_mensal")
+
+
+async def get_series_mensais(db: AsyncSession, uc_id: str, medidas: list[str]) -> dict[str, list[float | None]]:
+    """{medida: 12 valores (índice 0 = mês 1, None = sem valor)} das medidas que a UC tiver."""
+    medidas = [m for m in medidas if m in MEDIDAS_LONGAS]
+    series: dict[str, list[float | None]] = {}
+    if medidas and await _tem_serie_compacta(db):
+        query = text("""
+            SELECT s.medida, s.valores
+            FROM intel_lead.lead_serie_mensal s
+            JOIN intel_lead.lead_bruto lb ON lb.id = s.lead_bruto_id
+            WHERE lb.uc_id = :uc_id AND s.medida = ANY(:medidas)
+        """)
+        for row in (await db.execute(query, {"uc_id": uc_id, "medidas": medidas})).mappings():
+            series[row["medida"]] = parse_array_text(row["valores"])
+
+    faltando = [m for m in medidas if m not in series]
+    for tabela in dict.fromkeys(MEDIDAS_LONGAS[m] for m in faltando):
+        colunas = [m for m in faltando if MEDIDAS_LONGAS[m] == tabela]
+        query = text(f"""
+            SELECT m.mes, {", ".join(f"m.{c}" for c in colunas)}
+            FROM intel_lead.{tabela} m
+            JOIN intel_lead.lead_bruto lb ON lb.id = m.lead_bruto_id
+            WHERE lb.uc_id = :uc_id
+        """)
+        rows = (await db.execute(query, {"uc_id": uc_id})).mappings().all()
+        if not rows:
+            continue
+        for c in colunas:
+            serie: list[float | None] = [None] * 12
+            for row in rows:
+                if 1 <= row["mes"] <= 12 and row[c] is not None:
+                    serie[row["mes"] - 1] = float(row[c])
+            if any(v is not None for v in serie):
+                series[c] = serie
+    return series
+
+
+def _media(serie: list[float | None] | None) -> float | None:
+    valores = [v for v in serie or [] if v is not None]
+    return round(sum(valores) / len(valores), 2) if valores else None
+
+
+# 🔎 Busca textual (mv_lead_busca, migration 019; ver busca_textual.py)
+async def _tem_busca_textual(db: AsyncSession) -> bool:
+    return await _tabela_existe(db, "intel_lead.mv_lead_busca_termo")
+
+
+async def buscar_texto(db: AsyncSession, q: str, limit: int) -> list[LeadBuscaOut]:
+    """Leads por prefixo/aproximação em bairro, descrição e razão social, mais relevantes primeiro."""
+    tsquery = busca_textual.tsquery_prefixo(q)
+    if not tsquery:
+        return []
+    sql = busca_textual.consulta_busca(q)
+    result = await db.execute(text(sql), {"q": q, "tsquery": tsquery, "limit": limit})
+    return [LeadBuscaOut(**row) for row in result.mappings().all()]
+
+
+# 🔍 Listagem com filtros e paginação por cursor (keyset; ver paginacao.py)
+_contagens = paginacao.CacheContagem()
+
+
+async def _contar_leads(db: AsyncSession, where_clause: str, params: dict) -> tuple[int, bool]:
+    """(total, aproximado): reltuples da MV sem filtro; COUNT(*) em cache com filtro."""
+    if not where_clause:
+        estimativa = (await db.execute(text(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = 'intel_lead.mv_lead_completo_detalhado'::regclass"
+        ))).scalar()
+        if estimativa and estimativa > 0:
+            return int(estimativa), True
+
+    chave = paginacao.assinatura(params)
+    total = _contagens.get(chave)
+    if total is None:
+        count_query = text(f"""
+            SELECT COUNT(*) FROM intel_lead.mv_lead_completo_detalhado
+            {where_clause}
+        """)
+        total = (await db.execute(count_query, params)).scalar_one()
+        _contagens.put(chave, total)
+    return total, False
+
+
 async def buscar_leads(
     db: AsyncSession,
     estado: str | None,
@@ -34,11 +155,15 @@ async def buscar_leads(
     segmento: str | None,
     ordem: str,
     busca: str | None,
-    skip: int,
     limit: int,
+    cursor: str | None = None,
 ) -> LeadList:
+    """
+    Uma página de leads. `cursor` = proximo_cursor da página anterior (None = primeira);
+    ValueError se o cursor for de outra ordenação/filtros.
+    """
     filtros = []
-    params = {"skip": skip, "limit": limit}
+    params = {}
 
     if estado:
         filtros.append("estado = :estado")
@@ -52,40 +177,39 @@ async def buscar_leads(
     if segmento:
         filtros.append("segmento_desc = :segmento")
         params["segmento"] = segmento
-    if busca:
+    if busca and await _tem_busca_textual(db):
+        filtros.append(busca_textual.FILTRO_BUSCA)
+        params["busca"] = busca_textual.padrao_like(busca)
+    elif busca:
         filtros.append("(bairro ILIKE :busca OR descricao ILIKE :busca)")
         params["busca"] = f"%{busca}%"
 
     where_clause = "WHERE " + " AND ".join(filtros) if filtros else ""
+    ordem = ordem if ordem in paginacao.ORDENACOES else "padrao"
+    assinatura = paginacao.assinatura(params)
+    posicao = paginacao.decodificar_cursor(cursor, ordem, assinatura) if cursor else None
 
-    ordenacoes = {
-        "padrao": "distribuidora_nome",
-        "dic_asc": "media_dic ASC",
-        "dic_desc": "media_dic DESC",
-        "fic_asc": "media_fic ASC",
-        "fic_desc": "media_fic DESC",
-        "potencia_desc": "pac DESC",
-        "potencia_asc": "pac ASC"
-    }
-    order_clause = f"ORDER BY {ordenacoes.get(ordem, 'distribuidora_nome')}"
-
-    count_query = text(f"""
-        SELECT COUNT(*) FROM intel_lead.mv_lead_completo_detalhado
-        {where_clause}
-    """)
-    total = (await db.execute(count_query, params)).scalar_one()
+    total, aproximado = await _contar_leads(db, where_clause, params)
 
-    query = text(f"""
-        SELECT * FROM intel_lead.mv_lead_completo_detalhado
-        {where_clause}
-        {order_clause}
-        OFFSET :skip LIMIT :limit
-    """)
-    result = await db.execute(query, params)
-    rows = result.mappings().all()
+    # uma linha a mais para saber se há próxima página
+    rows: list = []
+    consultas = paginacao.consultas_pagina("intel_lead.mv_lead_completo_detalhado", filtros, ordem, posicao)
+    for sql, extras in consultas:
+        faltam = limit + 1 - len(rows)
+        if faltam <= 0:
+            break
+        result = await db.execute(text(sql), {**params, **extras, "limit": faltam})
+        rows += result.mappings().all()
+
+    proximo = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        proximo = paginacao.cursor_da_linha(ordem, assinatura, rows[-1])
 
     return LeadList(
         total=total,
+        total_aproximado=aproximado,
+        proximo_cursor=proximo,
         items=[LeadOut(**row) for row in rows]
     )
 
@@ -105,24 +229,16 @@ async def get_lead(db: AsyncSession, uc_id: str) -> LeadDetalhadoOut | None:
 
 # 📉 Qualidade DIC/FIC
 async def get_qualidade(db: AsyncSession, uc_id: str) -> LeadQualidade | None:
-    query = text("""
-        SELECT qm.dic, qm.fic
-        FROM intel_lead.lead_qualidade_mensal qm
-        JOIN intel_lead.lead_bruto lb ON lb.id = qm.lead_bruto_id
-        WHERE lb.uc_id = :uc_id
-        LIMIT 1
-    """)
-    result = await db.execute(query, {"uc_id": uc_id})  # 👈 agora sim
-    row = result.mappings().first()
-    if not row:
+    series = await get_series_mensais(db, uc_id, ["dic", "fic"])
+    if not series:
         return None
-    dic_array = parse_array_text(row["dic"])
-    fic_array = parse_array_text(row["fic"])
+    dic_array = series.get("dic")
+    fic_array = series.get("fic")
     return LeadQualidade(
         dicMes=dic_array,
         ficMes=fic_array,
-        dicMed=round(sum(dic_array) / len(dic_array), 2) if dic_array else None,
-        ficMed=round(sum(fic_array) / len(fic_array), 2) if fic_array else None,
+        dicMed=_media(dic_array),
+        ficMed=_media(fic_array),
     )
 
 # 🗺️ Pontos para mapa
@@ -0,0 +1,144 @@
+# apps/api/services/lead/paginacao.py
+"""
+Paginação por cursor (keyset) e contagem em cache para a listagem de leads.
+
+- Ordem = coluna de `ordenacao` + (uc_id, id) como desempate; o cursor é a última linha da
+  página (valor, uc_id, id) codificada em base64, junto com a ordenação e uma assinatura dos
+  filtros (cursor de outra busca -> ValueError)
+- A próxima página começa com `(coluna, uc_id, id) > (cursor)` em vez de OFFSET: custo de uma
+  página não depende da profundidade, desde que exista índice (coluna, uc_id, id) na MV
+  (migration 018)
+- NULLs seguem o padrão do Postgres (ASC: no fim; DESC: no começo), que é a varredura direta
+  ou reversa do mesmo índice. Os nulos são um trecho à parte, lido depois (ou antes) dos valores
+- Contagem: sem filtro usa reltuples da MV (aproximada, atualizada no refresh/ANALYZE);
+  com filtro, COUNT(*) exato guardado por conjunto de filtros durante LEADS_COUNT_TTL segundos
+"""
+
+from __future__ import annotations
+import base64
+import hashlib
+import json
+import os
+import time
+from typing import Any
+
+# ordem -> (coluna, decrescente)
+ORDENACOES: dict[str, tuple[str, bool]] = {
+    "padrao": ("distribuidora_nome", False),
+    "dic_asc": ("media_dic", False),
+    "dic_desc": ("media_dic", True),
+    "fic_asc": ("media_fic", False),
+    "fic_desc": ("media_fic", True),
+    "potencia_desc": ("pac", True),
+    "potencia_asc": ("pac", False),
+}
+
+COUNT_TTL = float(os.getenv("LEADS_COUNT_TTL", "60"))
+COUNT_MAX_ENTRADAS = 1024
+
+
+def ordenacao(ordem: str | None) -> tuple[str, bool]:
+    return ORDENACOES.get(ordem or "padrao", ORDENACOES["padrao"])
+
+
+def assinatura(params: dict[str, Any]) -> str:
+    """Hash curto dos filtros (sem os parâmetros de paginação)."""
+    filtros = {k: v for k, v in params.items() if not k.startswith("c_") and k != "limit"}
+    return hashlib.md5(json.dumps(filtros, sort_keys=True, default=str).encode()).hexdigest()[:12]
+
+
+# --------------------------------------------------------------------------------------
+# Cursor
+# --------------------------------------------------------------------------------------
+def codificar_cursor(ordem: str, filtros: str, valor: Any, uc_id: str, id_: str) -> str:
+    bruto = json.dumps([ordem, filtros, valor, uc_id, id_], separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(bruto.encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str, ordem: str, filtros: str) -> tuple[Any, str, str]:
+    """(valor, uc_id, id) da última linha vista; ValueError se inválido ou de outra busca."""
+    try:
+        bruto = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        c_ordem, c_filtros, valor, uc_id, id_ = json.loads(bruto)
+    except Exception:
+        raise ValueError("cursor inválido")
+    if c_ordem != ordem or c_filtros != filtros:
+        raise ValueError("cursor de outra ordenação ou de outros filtros")
+    return valor, uc_id, id_
+
+
+def cursor_da_linha(ordem: str, filtros: str, row: dict) -> str:
+    coluna, _ = ordenacao(ordem)
+    return codificar_cursor(ordem, filtros, row.get(coluna), row["uc_id"], row["id"])
+
+
+# --------------------------------------------------------------------------------------
+# Keyset
+# --------------------------------------------------------------------------------------
+def trechos_keyset(ordem: str, cursor: tuple[Any, str, str] | None) -> list[tuple[str, str, dict]]:
+    """
+    Trechos (condição, ORDER BY, parâmetros) lidos em sequência até completar a página:
+    valores não nulos e nulos, na ordem em que o Postgres os devolve, a partir do cursor.
+    """
+    coluna, desc = ordenacao(ordem)
+    direcao = "DESC" if desc else "ASC"
+    op = "<" if desc else ">"
+    # a coluna fica no ORDER BY dos nulos também: sem ela o planner não usa a ordem do índice
+    order_by = f"{coluna} {direcao}, uc_id {direcao}, id {direcao}"
+    valores = (f"{coluna} IS NOT NULL", order_by, {})
+    nulos = (f"{coluna} IS NULL", order_by, {})
+    trechos = [nulos, valores] if desc else [valores, nulos]
+    if cursor is None:
+        return trechos
+
+    valor, uc_id, id_ = cursor
+    params = {"c_valor": valor, "c_uc_id": uc_id, "c_id": id_}
+    if valor is None:
+        inicio = trechos.index(nulos)
+        trechos[inicio] = (f"{coluna} IS NULL AND (uc_id, id) {op} (:c_uc_id, :c_id)", nulos[1], params)
+    else:
+        inicio = trechos.index(valores)
+        trechos[inicio] = (f"({coluna}, uc_id, id) {op} (:c_valor, :c_uc_id, :c_id)", valores[1], params)
+    return trechos[inicio:]
+
+
+def consultas_pagina(tabela: str, filtros: list[str], ordem: str,
+                     cursor: tuple[Any, str, str] | None) -> list[tuple[str, dict]]:
+    """SELECTs (com :limit) de cada trecho da página."""
+    consultas = []
+    for condicao, order_by, params in trechos_keyset(ordem, cursor):
+        where = " AND ".join(filtros + [condicao])
+        consultas.append((f"SELECT * FROM {tabela} WHERE {where} ORDER BY {order_by} LIMIT :limit", params))
+    return consultas
+
+
+# --------------------------------------------------------------------------------------
+# Contagem
+# --------------------------------------------------------------------------------------
+class CacheContagem:
+    """COUNT(*) por conjunto de filtros, válido por `ttl` segundos (memória do processo)."""
+
+    def __init__(self, ttl: float = COUNT_TTL, max_entradas: int = COUNT_MAX_ENTRADAS):
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self._itens: dict[str, tuple[float, int]] = {}
+
+    def get(self, chave: str) -> int | None:
+        item = self._itens.get(chave)
+        if item is None:
+            return None
+        expira, total = item
+        if expira < time.monotonic():
+            del self._itens[chave]
+            return None
+        return total
+
+    def put(self, chave: str, total: int) -> None:
+        if len(self._itens) >= self.max_entradas:
+            agora = time.monotonic()
+            for k in [k for k, (expira, _) in self._itens.items() if expira < agora]:
+                del self._itens[k]
+            if len(self._itens) >= self.max_entradas:
+                # descarta a entrada mais antiga (dict mantém ordem de inserção)
+                del self._itens[next(iter(self._itens))]
+        self._itens[chave] = (time.monotonic() + self.ttl, total)
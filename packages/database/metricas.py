@@ -0,0 +1,211 @@
+# packages/database/metricas.py
+"""
+Métricas de banco por rota da API (instaladas em packages/database/session.py e
+apps/api/main.py; lidas em GET /v1/admin/db/metricas).
+
+- MetricasDBMiddleware (ASGI): uma Medicao por requisição num ContextVar; no fim soma na rota
+  (template do path, ex. /v1/leads/{uc_id}; sem rota casada -> "<sem rota>") e devolve o
+  header Server-Timing (db, pool)
+- instrumentar(engine): before/after_cursor_execute contam queries e tempo de banco da
+  requisição corrente (o SQLAlchemy async propaga o contexto para o greenlet dos eventos)
+- PoolMedido: tempo para obter conexão do pool (fila + conexão nova + pre-ping) e quantas
+  requisições esperam agora. Saturação = espera_pool crescendo com aguardando > 0
+"""
+
+from __future__ import annotations
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+AMOSTRAS_POR_ROTA = 512
+SEM_ROTA = "<sem rota>"
+
+
+@dataclass
+class Medicao:
+    queries: int = 0
+    db_s: float = 0.0
+    espera_pool_s: float = 0.0
+
+_medicao: ContextVar[Optional[Medicao]] = ContextVar("medicao_db", default=None)
+
+
+def medicao_atual() -> Optional[Medicao]:
+    return _medicao.get()
+
+# --------------------------------------------------------------------------------------
+# Agregação por rota
+# --------------------------------------------------------------------------------------
+@dataclass
+class EstatisticaRota:
+    requisicoes: int = 0
+    erros: int = 0
+    queries: int = 0
+    db_s: float = 0.0
+    espera_pool_s: float = 0.0
+    total_s: float = 0.0
+    # (total, db, espera) em segundos das últimas requisições, para os percentis
+    amostras: deque = field(default_factory=lambda: deque(maxlen=AMOSTRAS_POR_ROTA))
+
+    def resumo(self) -> dict:
+        total, db, espera = (np.array(c) * 1000 for c in zip(*self.amostras)) if self.amostras else ([0], [0], [0])
+        n = max(self.requisicoes, 1)
+        return {
+            "requisicoes": self.requisicoes,
+            "erros": self.erros,
+            "queries_por_req": round(self.queries / n, 2),
+            "db_ms_medio": round(self.db_s * 1000 / n, 2),
+            "db_ms_p95": round(float(np.percentile(db, 95)), 2),
+            "espera_pool_ms_media": round(self.espera_pool_s * 1000 / n, 2),
+            "espera_pool_ms_p95": round(float(np.percentile(espera, 95)), 2),
+            "total_ms_p50": round(float(np.percentile(total, 50)), 2),
+            "total_ms_p95": round(float(np.percentile(total, 95)), 2),
+            "fracao_db": round(self.db_s / self.total_s, 3) if self.total_s else 0.0,
+        }
+
+
+class RegistroMetricas:
+    def __init__(self):
+        self._rotas: dict[str, EstatisticaRota] = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, rota: str, medicao: Medicao, total_s: float, status: int) -> None:
+        with self._lock:
+            est = self._rotas.setdefault(rota, EstatisticaRota())
+            est.requisicoes += 1
+            est.erros += status >= 500
+            est.queries += medicao.queries
+            est.db_s += medicao.db_s
+            est.espera_pool_s += medicao.espera_pool_s
+            est.total_s += total_s
+            est.amostras.append((total_s, medicao.db_s, medicao.espera_pool_s))
+
+    def resumo(self) -> dict[str, dict]:
+        with self._lock:
+            rotas = sorted(self._rotas.items(), key=lambda kv: kv[1].db_s, reverse=True)
+            return {rota: est.resumo() for rota, est in rotas}
+
+    def zerar(self) -> None:
+        with self._lock:
+            self._rotas.clear()
+
+REGISTRO = RegistroMetricas()
+
+# --------------------------------------------------------------------------------------
+# Engine e pool
+# --------------------------------------------------------------------------------------
+def instrumentar(engine) -> None:
+    """Conta queries e tempo de banco na Medicao corrente (engine sync ou .sync_engine)."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _antes(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metricas_inicio", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _depois(conn, cursor, statement, parameters, context, executemany):
+        _fim_query(conn)
+
+    @event.listens_for(engine, "handle_error")
+    def _erro(contexto):
+        if contexto.connection is not None:
+            _fim_query(contexto.connection)
+
+def _fim_query(conn) -> None:
+    inicios = conn.info.get("metricas_inicio")
+    if not inicios:
+        return
+    duracao = time.perf_counter() - inicios.pop()
+    medicao = _medicao.get()
+    if medicao is not None:
+        medicao.queries += 1
+        medicao.db_s += duracao
+
+
+class MedeCheckout:
+    """Mixin de pool: mede connect() (obter conexão) e conta quem está esperando."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._trava_metricas = threading.Lock()
+        self.aguardando = 0
+        self.max_aguardando = 0
+        self.checkouts = 0
+        self.espera_total_s = 0.0
+        self.espera_max_s = 0.0
+
+    def connect(self):
+        with self._trava_metricas:
+            self.aguardando += 1
+            self.max_aguardando = max(self.max_aguardando, self.aguardando)
+        inicio = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            espera = time.perf_counter() - inicio
+            with self._trava_metricas:
+                self.aguardando -= 1
+                self.checkouts += 1
+                self.espera_total_s += espera
+                self.espera_max_s = max(self.espera_max_s, espera)
+            medicao = _medicao.get()
+            if medicao is not None:
+                medicao.espera_pool_s += espera
+
+    def estado(self) -> dict:
+        return {
+            "tamanho": self.size(),
+            "em_uso": self.checkedout(),
+            "overflow": self.overflow(),
+            "ociosas": self.checkedin(),
+            "aguardando": self.aguardando,
+            "max_aguardando": self.max_aguardando,
+            "checkouts": self.checkouts,
+            "espera_ms_media": round(self.espera_total_s * 1000 / max(self.checkouts, 1), 2),
+            "espera_ms_max": round(self.espera_max_s * 1000, 2),
+        }
+
+
+class PoolMedido(MedeCheckout, AsyncAdaptedQueuePool):
+    pass
+
+# --------------------------------------------------------------------------------------
+# Middleware
+# --------------------------------------------------------------------------------------
+class MetricasDBMiddleware:
+    """ASGI puro (sem BaseHTTPMiddleware: a rota roda na mesma task e enxerga a Medicao)."""
+
+    def __init__(self, app, registro: RegistroMetricas = REGISTRO):
+        self.app = app
+        self.registro = registro
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        medicao = Medicao()
+        token = _medicao.set(medicao)
+        inicio = time.perf_counter()
+        status = 500
+
+        async def enviar(mensagem):
+            nonlocal status
+            if mensagem["type"] == "http.response.start":
+                status = mensagem["status"]
+                timing = f"db;dur={medicao.db_s * 1000:.1f}, pool;dur={medicao.espera_pool_s * 1000:.1f}"
+                mensagem["headers"] = list(mensagem.get("headers", [])) + [(b"server-timing", timing.encode())]
+            await send(mensagem)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            _medicao.reset(token)
+            rota = getattr(scope.get("route"), "path", None) or SEM_ROTA
+            self.registro.registrar(rota, medicao, time.perf_counter() - inicio, status)
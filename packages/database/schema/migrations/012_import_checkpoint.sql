@@ -0,0 +1,15 @@
+-- Checkpoint das importações (um por import_id), gravado pelo importer no mesmo commit
+-- dos dados de cada chunk. Um job reenfileirado retoma de offset_features.
+-- Os importers também criam a tabela se ela não existir (packages/jobs/utils/rastreio.py).
+SET search_path TO intel_lead;
+
+CREATE TABLE IF NOT EXISTS import_checkpoint (
+    import_id          TEXT PRIMARY KEY,
+    camada             TEXT NOT NULL,
+    layer              TEXT,
+    offset_features    BIGINT NOT NULL DEFAULT 0,
+    linhas_commitadas  BIGINT NOT NULL DEFAULT 0,
+    total_features     BIGINT,
+    concluido          BOOLEAN NOT NULL DEFAULT false,
+    atualizado_em      TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
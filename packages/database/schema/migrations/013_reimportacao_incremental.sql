@@ -0,0 +1,13 @@
+-- Reimportação incremental: índice compacto (chave do COD_ID, hash do conteúdo) por importação
+-- e resumo do diff (novas/alteradas/iguais/removidas) em import_status.
+-- Os importers também criam/acrescentam se faltar (packages/jobs/utils/incremental.py, rastreio.py).
+SET search_path TO intel_lead;
+
+CREATE TABLE IF NOT EXISTS uc_hash_index (
+    import_id  TEXT   NOT NULL,
+    chave      BIGINT NOT NULL,
+    hash       BIGINT NOT NULL,
+    PRIMARY KEY (import_id, chave)
+);
+
+ALTER TABLE import_status ADD COLUMN IF NOT EXISTS resumo_diff JSONB;
@@ -0,0 +1,185 @@
+-- Particionamento das mensais (lead_energia_mensal, lead_demanda_mensal, lead_qualidade_mensal)
+-- por LIST (import_id): uma partição por distribuidora/ano/camada (o import_id é o hash dos três).
+--
+-- - A tabela atual vira a partição DEFAULT (<tabela>_legado), sem copiar linhas
+-- - Índice particionado em lead_bruto_id (reaproveita o do legado, se já existir um igual)
+-- - Chaves no pai (CREATE TABLE LIKE não copia PK nem FKs): a PK/UNIQUEs do legado com import_id
+--   acrescentado (a chave de partição tem de fazer parte; import_id passa a NOT NULL; a PK do
+--   legado dá lugar à do pai) e as FKs do
+--   legado (lead_bruto ON DELETE CASCADE, import_status), declaradas no pai: valem para a DEFAULT
+--   e para toda partição criada pelos importers
+-- - Antes das chaves, o que as violaria:
+--   . import_id NULL no legado (UCAT/UCMT não o gravavam nas mensais): recebe o import_id do
+--     lead_bruto da linha; se essa importação já tem partição própria (reimportada depois do
+--     particionamento), as linhas antigas são apagadas (a partição já tem a versão nova)
+--   . órfãs (lead_bruto apagado enquanto o pai estava sem a FK): apagadas, como o CASCADE faria
+--   . o que continuar sem import_id vai para <tabela>_sem_import, fora do particionamento
+--   Contagens em RAISE NOTICE. Varre as mensais inteiras (e valida as FKs): rodar fora de pico
+-- - Views/MVs que leem as mensais apontam para a tabela antiga por OID: são recriadas aqui com
+--   a mesma definição e índices (MVs populadas são atualizadas). GRANTs/owner dessas views não
+--   são copiados: reaplique se o banco usar papéis diferentes do dono do schema
+-- - As partições por import_id são criadas pelos importers (packages/jobs/utils/particoes.py);
+--   depois desta migration, rode `python -m packages.jobs.utils.particoes --migrar-legado` para
+--   esvaziar a DEFAULT (enquanto ela tiver linhas, cada nova partição a varre)
+-- Idempotente: mensais já particionadas pulam o particionamento; pai que já tem PK pula limpeza e
+-- chaves. Banco migrado por uma versão anterior desta migration (sem as chaves): rodar de novo.
+SET search_path TO intel_lead;
+
+DO $$
+DECLARE
+    t    text;
+    v    record;
+    idx  text;
+    mensais text[] := ARRAY['lead_energia_mensal', 'lead_demanda_mensal', 'lead_qualidade_mensal'];
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'lead_energia_mensal'::regclass) THEN
+        RAISE NOTICE 'mensais já particionadas';
+        RETURN;
+    END IF;
+
+    CREATE TEMP TABLE _views_mensais ON COMMIT DROP AS
+    WITH RECURSIVE dep AS (
+        SELECT r.ev_class AS oid, 1 AS nivel
+        FROM pg_depend d
+        JOIN pg_rewrite r ON r.oid = d.objid
+        WHERE d.classid = 'pg_rewrite'::regclass
+          AND d.refobjid = ANY (SELECT to_regclass(m) FROM unnest(mensais) m)
+        UNION
+        SELECT r.ev_class, dep.nivel + 1
+        FROM dep
+        JOIN pg_depend d ON d.refobjid = dep.oid AND d.classid = 'pg_rewrite'::regclass
+        JOIN pg_rewrite r ON r.oid = d.objid
+        WHERE r.ev_class <> dep.oid
+    )
+    SELECT c.oid, n.nspname, c.relname, c.relkind, c.relispopulated AS populada,
+           max(dep.nivel) AS nivel,
+           rtrim(pg_get_viewdef(c.oid), ';') AS definicao,
+           ARRAY(SELECT i.indexdef FROM pg_indexes i
+                 WHERE i.schemaname = n.nspname AND i.tablename = c.relname) AS indices
+    FROM dep
+    JOIN pg_class c ON c.oid = dep.oid
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE c.relkind IN ('v', 'm')
+    GROUP BY c.oid, n.nspname, c.relname, c.relkind, c.relispopulated;
+
+    FOR v IN SELECT * FROM _views_mensais ORDER BY nivel DESC LOOP
+        EXECUTE format('DROP %s IF EXISTS %I.%I',
+                       CASE v.relkind WHEN 'm' THEN 'MATERIALIZED VIEW' ELSE 'VIEW' END, v.nspname, v.relname);
+    END LOOP;
+
+    FOREACH t IN ARRAY mensais LOOP
+        EXECUTE format('ALTER TABLE %I RENAME TO %I', t, t || '_legado');
+        EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS INCLUDING CONSTRAINTS) PARTITION BY LIST (import_id)',
+                       t, t || '_legado');
+        EXECUTE format('CREATE INDEX %I ON %I (lead_bruto_id)', t || '_lead_bruto_id_idx', t);
+        EXECUTE format('ALTER TABLE %I ATTACH PARTITION %I DEFAULT', t, t || '_legado');
+    END LOOP;
+
+    FOR v IN SELECT * FROM _views_mensais ORDER BY nivel LOOP
+        IF v.relkind = 'm' THEN
+            EXECUTE format('CREATE MATERIALIZED VIEW %I.%I AS %s WITH NO DATA', v.nspname, v.relname, v.definicao);
+        ELSE
+            EXECUTE format('CREATE VIEW %I.%I AS %s', v.nspname, v.relname, v.definicao);
+        END IF;
+        FOREACH idx IN ARRAY v.indices LOOP
+            EXECUTE idx;
+        END LOOP;
+    END LOOP;
+
+    FOR v IN SELECT * FROM _views_mensais WHERE relkind = 'm' AND populada ORDER BY nivel LOOP
+        EXECUTE format('REFRESH MATERIALIZED VIEW %I.%I', v.nspname, v.relname);
+    END LOOP;
+END $$;
+
+-- chaves do pai (também em bancos particionados por uma versão anterior desta migration)
+DO $$
+DECLARE
+    t       text;
+    legado  regclass;
+    c       record;
+    imp     text;
+    sim     boolean;
+    n       bigint;
+    colunas text[];
+    mensais text[] := ARRAY['lead_energia_mensal', 'lead_demanda_mensal', 'lead_qualidade_mensal'];
+BEGIN
+    FOREACH t IN ARRAY mensais LOOP
+        CONTINUE WHEN EXISTS (SELECT 1 FROM pg_constraint WHERE conrelid = t::regclass AND contype = 'p');
+        legado := to_regclass(t || '_legado');
+
+        EXECUTE format('DELETE FROM %I m WHERE NOT EXISTS (SELECT 1 FROM lead_bruto lb WHERE lb.id = m.lead_bruto_id)', t);
+        GET DIAGNOSTICS n = ROW_COUNT;
+        RAISE NOTICE '%: % linha(s) órfã(s) apagada(s)', t, n;
+
+        IF legado IS NOT NULL THEN
+            FOR imp IN EXECUTE format('
+                SELECT DISTINCT lb.import_id
+                FROM ONLY %s m
+                JOIN lead_bruto lb ON lb.id = m.lead_bruto_id
+                JOIN import_status s ON s.import_id = lb.import_id
+                WHERE m.import_id IS NULL', legado)
+            LOOP
+                EXECUTE format('SELECT EXISTS (SELECT 1 FROM %I WHERE import_id = $1 AND tableoid <> $2)', t)
+                    INTO sim USING imp, legado;
+                IF sim THEN
+                    EXECUTE format('
+                        DELETE FROM ONLY %s m USING lead_bruto lb
+                        WHERE m.import_id IS NULL AND lb.id = m.lead_bruto_id AND lb.import_id = $1', legado)
+                        USING imp;
+                ELSE
+                    EXECUTE format('
+                        UPDATE ONLY %s m SET import_id = lb.import_id FROM lead_bruto lb
+                        WHERE m.import_id IS NULL AND lb.id = m.lead_bruto_id AND lb.import_id = $1', legado)
+                        USING imp;
+                END IF;
+                GET DIAGNOSTICS n = ROW_COUNT;
+                RAISE NOTICE '%: % linha(s) sem import_id %', t, n,
+                    CASE WHEN sim THEN 'apagada(s) (' || imp || ' já tem partição)' ELSE 'atribuída(s) a ' || imp END;
+            END LOOP;
+        END IF;
+
+        EXECUTE format('SELECT count(*) FROM %I WHERE import_id IS NULL', t) INTO n;
+        IF n > 0 THEN
+            EXECUTE format('CREATE TABLE IF NOT EXISTS %I (LIKE %I)', t || '_sem_import', t);
+            EXECUTE format('
+                WITH movidas AS (DELETE FROM %I WHERE import_id IS NULL RETURNING *)
+                INSERT INTO %I SELECT * FROM movidas', t, t || '_sem_import');
+            RAISE NOTICE '%: % linha(s) sem import_id movida(s) para %', t, n, t || '_sem_import';
+        END IF;
+
+        -- PK/UNIQUEs do legado com import_id (sem PK no legado: id + import_id)
+        FOR c IN
+            SELECT con.conname, con.contype,
+                   ARRAY(SELECT a.attname::text
+                         FROM unnest(con.conkey) WITH ORDINALITY k(attnum, ordem)
+                         JOIN pg_attribute a ON a.attrelid = con.conrelid AND a.attnum = k.attnum
+                         ORDER BY k.ordem) AS colunas
+            FROM pg_constraint con
+            WHERE con.conrelid = legado AND con.contype IN ('p', 'u')
+            UNION ALL
+            SELECT NULL, 'p', ARRAY['id']
+            WHERE NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conrelid = legado AND contype = 'p')
+            ORDER BY contype
+        LOOP
+            colunas := c.colunas || CASE WHEN 'import_id' = ANY (c.colunas) THEN '{}'::text[] ELSE ARRAY['import_id'] END;
+            IF c.contype = 'p' THEN
+                -- partição não pode ter PK própria: a do pai (com import_id) a substitui
+                IF c.conname IS NOT NULL THEN
+                    EXECUTE format('ALTER TABLE %s DROP CONSTRAINT %I', legado, c.conname);
+                END IF;
+                EXECUTE format('ALTER TABLE %I ADD PRIMARY KEY (%s)', t,
+                               (SELECT string_agg(quote_ident(x), ', ') FROM unnest(colunas) x));
+            ELSE
+                EXECUTE format('ALTER TABLE %I ADD UNIQUE (%s)', t,
+                               (SELECT string_agg(quote_ident(x), ', ') FROM unnest(colunas) x));
+            END IF;
+        END LOOP;
+
+        -- FKs do legado no pai (a do legado é reaproveitada como a da partição)
+        FOR c IN SELECT conname, pg_get_constraintdef(oid) AS definicao FROM pg_constraint
+                 WHERE conrelid = legado AND contype = 'f' ORDER BY conname LOOP
+            EXECUTE format('ALTER TABLE %I ADD CONSTRAINT %I %s', t, c.conname, c.definicao);
+        END LOOP;
+        RAISE NOTICE '%: chaves criadas no pai', t;
+    END LOOP;
+END $$;
@@ -0,0 +1,25 @@
+-- Armazenamento compacto das séries mensais: uma linha por UC por medida com os 12 meses
+-- num real[] (posição 1 = mês 1; mês sem valor = NULL), alternativa às mensais longas
+-- (lead_energia_mensal/lead_demanda_mensal/lead_qualidade_mensal, 12 linhas por UC).
+--
+-- - Gravada pelos importers com MENSAL_FORMATO=compacto|ambos (ou --formato-mensal);
+--   o default continua "linhas" (packages/jobs/utils/serie_mensal.py)
+-- - medida = nome da coluna na mensal longa (energia_total, demanda_contratada, dic, fic...)
+-- - Particionada por LIST (import_id) como as mensais (migration 014); as partições são
+--   criadas pelos importers. Sem partição DEFAULT: a tabela é nova, não há legado
+-- - As importações antigas continuam só nas mensais longas; a API (lead_service) lê daqui
+--   primeiro e cai para as longas quando a UC não tem série compacta
+-- - Comparação de tamanho, tempo de COPY e latência de leitura por lead:
+--   tests/jobs/bench/bench_serie_mensal.py
+SET search_path TO intel_lead;
+
+CREATE TABLE IF NOT EXISTS lead_serie_mensal (
+    lead_bruto_id uuid NOT NULL,
+    medida        text NOT NULL,
+    valores       real[] NOT NULL CHECK (array_length(valores, 1) = 12),
+    origem        origem_enum,
+    import_id     text NOT NULL
+) PARTITION BY LIST (import_id);
+
+CREATE INDEX IF NOT EXISTS lead_serie_mensal_lead_medida_idx
+    ON lead_serie_mensal (lead_bruto_id, medida);
@@ -0,0 +1,42 @@
+-- Refresh das MVs fora da requisição (packages/jobs/utils/materializadas.py)
+--
+-- - mv_refresh_log: uma linha por MV por execução (modo, status, duração)
+-- - Índices únicos nas MVs conhecidas, para REFRESH ... CONCURRENTLY (leitores não ficam
+--   bloqueados durante o refresh). Chaves = colunas do GROUP BY (resumos) e o id do lead.
+--   MV inexistente ou com chave repetida: só um NOTICE; ela continua com o REFRESH comum
+-- Idempotente.
+SET search_path TO intel_lead;
+
+CREATE TABLE IF NOT EXISTS mv_refresh_log (
+    id           BIGSERIAL PRIMARY KEY,
+    execucao_id  TEXT NOT NULL,
+    mv           TEXT NOT NULL,
+    modo         TEXT NOT NULL,
+    status       TEXT NOT NULL,
+    iniciado_em  TIMESTAMPTZ,
+    duracao_ms   INTEGER,
+    erro         TEXT
+);
+CREATE INDEX IF NOT EXISTS mv_refresh_log_iniciado_em_idx ON mv_refresh_log (iniciado_em DESC);
+
+DO $$
+DECLARE
+    i record;
+BEGIN
+    FOR i IN SELECT * FROM (VALUES
+        ('mv_lead_completo_detalhado', 'id'),
+        ('resumo_leads_distribuidora', 'distribuidora_id, distribuidora_nome, camada, status'),
+        ('resumo_energia_municipio',   'municipio_id, municipio_nome, uf'),
+        ('resumo_leads_ano_camada',    'ano, camada')
+    ) AS t(mv, colunas) LOOP
+        IF to_regclass(i.mv) IS NULL THEN
+            RAISE NOTICE '%: não existe', i.mv;
+            CONTINUE;
+        END IF;
+        BEGIN
+            EXECUTE format('CREATE UNIQUE INDEX IF NOT EXISTS %I ON %I (%s)', i.mv || '_uniq', i.mv, i.colunas);
+        EXCEPTION WHEN unique_violation OR undefined_column THEN
+            RAISE NOTICE '%: sem índice único (%)', i.mv, SQLERRM;
+        END;
+    END LOOP;
+END $$;
@@ -0,0 +1,65 @@
+-- Resumos do dashboard mantidos por deltas de importação (packages/jobs/utils/resumos.py)
+--
+-- - resumo_inc_*: totais lidos por GET /v1/admin/dashboard/resumo (mesmos números das MVs
+--   resumo_*, sem depender do refresh global)
+-- - resumo_inc_*_import: contribuição de cada import_id; reimportar troca a contribuição
+-- - lead_bruto (import_id): o delta de uma importação lê só as linhas dela
+-- Idempotente. Carga inicial (e correção de deriva) depois de aplicar:
+--   python packages/jobs/utils/resumos.py --reconstruir
+SET search_path TO intel_lead;
+
+CREATE INDEX IF NOT EXISTS lead_bruto_import_id_idx ON lead_bruto (import_id);
+
+-- resumo_leads_distribuidora
+CREATE TABLE IF NOT EXISTS resumo_inc_leads_distribuidora (
+    distribuidora_id  INTEGER,
+    camada            TEXT,
+    status            TEXT,
+    total_leads       BIGINT NOT NULL DEFAULT 0,
+    atualizado_em     TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+CREATE TABLE IF NOT EXISTS resumo_inc_leads_distribuidora_import (
+    import_id         TEXT,
+    distribuidora_id  INTEGER,
+    camada            TEXT,
+    status            TEXT,
+    total_leads       BIGINT NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS resumo_inc_leads_distribuidora_import_import_id_idx
+    ON resumo_inc_leads_distribuidora_import (import_id);
+
+-- resumo_leads_ano_camada
+CREATE TABLE IF NOT EXISTS resumo_inc_leads_ano_camada (
+    ano            INTEGER,
+    camada         TEXT,
+    total_leads    BIGINT NOT NULL DEFAULT 0,
+    atualizado_em  TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+CREATE TABLE IF NOT EXISTS resumo_inc_leads_ano_camada_import (
+    import_id    TEXT,
+    ano          INTEGER,
+    camada       TEXT,
+    total_leads  BIGINT NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS resumo_inc_leads_ano_camada_import_import_id_idx
+    ON resumo_inc_leads_ano_camada_import (import_id);
+
+-- resumo_energia_municipio (média = soma_media_energia / leads_com_energia)
+CREATE TABLE IF NOT EXISTS resumo_inc_energia_municipio (
+    municipio_id        INTEGER,
+    total_leads         BIGINT NOT NULL DEFAULT 0,
+    energia_total       NUMERIC NOT NULL DEFAULT 0,
+    soma_media_energia  NUMERIC NOT NULL DEFAULT 0,
+    leads_com_energia   BIGINT NOT NULL DEFAULT 0,
+    atualizado_em       TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+CREATE TABLE IF NOT EXISTS resumo_inc_energia_municipio_import (
+    import_id           TEXT,
+    municipio_id        INTEGER,
+    total_leads         BIGINT NOT NULL DEFAULT 0,
+    energia_total       NUMERIC NOT NULL DEFAULT 0,
+    soma_media_energia  NUMERIC NOT NULL DEFAULT 0,
+    leads_com_energia   BIGINT NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS resumo_inc_energia_municipio_import_import_id_idx
+    ON resumo_inc_energia_municipio_import (import_id);
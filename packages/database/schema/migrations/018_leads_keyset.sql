@@ -0,0 +1,21 @@
+-- Índices da listagem de leads por cursor (apps/api/services/lead/paginacao.py)
+--
+-- Um índice (coluna da ordenação, uc_id, id) por coluna ordenável da MV: a página seguinte
+-- começa em (coluna, uc_id, id) > cursor, lida pelo índice (ASC) ou pela varredura reversa
+-- dele (DESC), sem OFFSET. MV inexistente: só um NOTICE.
+-- Idempotente.
+SET search_path TO intel_lead;
+
+DO $$
+DECLARE
+    c text;
+BEGIN
+    IF to_regclass('mv_lead_completo_detalhado') IS NULL THEN
+        RAISE NOTICE 'mv_lead_completo_detalhado: não existe';
+        RETURN;
+    END IF;
+    FOREACH c IN ARRAY ARRAY['distribuidora_nome', 'media_dic', 'media_fic', 'pac'] LOOP
+        EXECUTE format('CREATE INDEX IF NOT EXISTS %I ON mv_lead_completo_detalhado (%I, uc_id, id)',
+                       'mv_lead_completo_detalhado_' || c || '_keyset_idx', c);
+    END LOOP;
+END $$;
@@ -0,0 +1,43 @@
+-- Busca textual de leads (apps/api/services/lead/busca_textual.py)
+--
+-- - normaliza_busca(): minúsculas sem acento. unaccent() é só STABLE; com o dicionário
+--   explícito o wrapper pode ser IMMUTABLE e entrar em índice/MV
+-- - mv_lead_busca: uma linha por lead por campo preenchido (bairro, descricao, razao_social),
+--   com o valor normalizado; (texto, uc_id) leva de um termo aos seus leads
+-- - mv_lead_busca_termo: valores normalizados distintos (muitos leads por bairro), com GIN
+--   trigram (busca aproximada <% e o filtro LIKE '%x%' de buscar_leads) e GIN no tsvector
+--   'simple' (prefixo por palavra, to_tsquery 'x:*'). O ranking roda sobre os termos, não
+--   sobre os leads
+-- - As duas dependem de mv_lead_completo_detalhado: o refresh
+--   (packages/jobs/utils/materializadas.py) as atualiza em seguida, CONCURRENTLY pelos índices únicos
+-- Idempotente.
+SET search_path TO intel_lead;
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm WITH SCHEMA public;
+CREATE EXTENSION IF NOT EXISTS unaccent WITH SCHEMA public;
+
+CREATE OR REPLACE FUNCTION normaliza_busca(texto text) RETURNS text
+    LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE
+    AS $$ SELECT lower(public.unaccent('public.unaccent'::regdictionary, texto)) $$;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_lead_busca AS
+SELECT l.id, l.uc_id, c.campo, normaliza_busca(btrim(c.valor)) AS texto
+FROM mv_lead_completo_detalhado l
+CROSS JOIN LATERAL (VALUES
+    ('bairro', l.bairro),
+    ('descricao', l.descricao),
+    ('razao_social', l.razao_social)
+) AS c(campo, valor)
+WHERE btrim(c.valor) <> '';
+
+CREATE UNIQUE INDEX IF NOT EXISTS mv_lead_busca_uniq ON mv_lead_busca (id, campo);
+CREATE INDEX IF NOT EXISTS mv_lead_busca_texto_idx ON mv_lead_busca (texto, uc_id);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_lead_busca_termo AS
+SELECT texto, to_tsvector('simple', texto) AS doc, count(*) AS leads
+FROM mv_lead_busca
+GROUP BY texto;
+
+CREATE UNIQUE INDEX IF NOT EXISTS mv_lead_busca_termo_uniq ON mv_lead_busca_termo (texto);
+CREATE INDEX IF NOT EXISTS mv_lead_busca_termo_trgm_idx ON mv_lead_busca_termo USING gin (texto public.gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS mv_lead_busca_termo_doc_idx ON mv_lead_busca_termo USING gin (doc);
@@ -0,0 +1,26 @@
+-- Match de UC por ponto do modo Detetive (packages/detectors/match_engine.py)
+--
+-- - lead_bruto.geog: geography(Point, 4326) gerada de (longitude, latitude). É coluna
+--   gerada STORED: COPY dos importadores e UPDATEs preenchem sozinhos
+-- - Coordenadas fora de [-90, 90] x [-180, 180] ou (0, 0) ficam NULL (fora do índice)
+-- - GiST em geog: ORDER BY geog <-> ponto percorre o índice (KNN) e
+--   ST_DWithin(geog, ponto, metros) filtra o raio pelo índice; em geography as duas
+--   medem em metros
+-- O ADD COLUMN reescreve lead_bruto uma vez: rodar fora da janela de importação.
+-- Idempotente.
+SET search_path TO intel_lead;
+
+CREATE EXTENSION IF NOT EXISTS postgis WITH SCHEMA public;
+
+ALTER TABLE lead_bruto ADD COLUMN IF NOT EXISTS geog public.geography(Point, 4326)
+    GENERATED ALWAYS AS (
+        CASE WHEN latitude BETWEEN -90 AND 90
+                  AND longitude BETWEEN -180 AND 180
+                  AND NOT (latitude = 0 AND longitude = 0)
+             THEN public.ST_SetSRID(public.ST_MakePoint(longitude, latitude), 4326)::public.geography
+        END
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS lead_bruto_geog_gist ON lead_bruto USING gist (geog);
+
+ANALYZE lead_bruto;
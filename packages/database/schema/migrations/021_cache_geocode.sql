@@ -0,0 +1,20 @@
+-- Cache de geocodificação do Modo Detetive (packages/detectors/cache_geocode.py)
+--
+-- - chave: endereço normalizado (sem acento, abreviações por extenso) + "|CEP" quando o
+--   endereço traz CEP
+-- - resultado: o dict de geo_utils.inferir_coordenadas_endereco; {} = Google sem resultado
+--   (cache negativo, validade curta)
+-- - expira_em: consulta só enxerga linhas válidas; a gravação sobrescreve a vencida
+-- A API também cria a tabela se ela não existir. Idempotente.
+SET search_path TO intel_lead;
+
+CREATE TABLE IF NOT EXISTS cache_geocode (
+    chave      TEXT PRIMARY KEY,
+    endereco   TEXT NOT NULL,
+    resultado  JSONB NOT NULL,
+    criado_em  TIMESTAMPTZ NOT NULL DEFAULT now(),
+    expira_em  TIMESTAMPTZ NOT NULL
+);
+
+-- limpeza periódica de vencidas: DELETE FROM cache_geocode WHERE expira_em < now()
+CREATE INDEX IF NOT EXISTS cache_geocode_expira_em ON cache_geocode (expira_em);
@@ -1,7 +1,9 @@
 # packages/database/session.py
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from apps.api.services.config import get_settings
+from packages.database.metricas import PoolMedido, instrumentar
 
 settings = get_settings()
 
@@ -9,7 +11,23 @@ engine = create_async_engine(
     settings.dsn,
     echo=False,
     pool_pre_ping=True,
+    poolclass=PoolMedido,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_timeout=settings.db_pool_timeout,
+    pool_recycle=settings.db_pool_recycle,
+    connect_args={
+        # cache do dialeto (statements preparados pelo SQLAlchemy) e cache interno do asyncpg
+        "prepared_statement_cache_size": settings.db_statement_cache_size,
+        "statement_cache_size": settings.db_statement_cache_size,
+        # timeout da classe "api" vale para a conexão inteira; as outras classes usam SET LOCAL
+        "server_settings": {
+            "statement_timeout": str(settings.db_statement_timeout_ms),
+            "application_name": "youon-api",
+        },
+    },
 )
+instrumentar(engine.sync_engine)
 
 AsyncSessionLocal = sessionmaker(
     bind=engine,
@@ -19,6 +37,18 @@ AsyncSessionLocal = sessionmaker(
 
 from typing import AsyncGenerator
 
-async def get_session() -> AsyncGenerator[AsyncSession, None]:
-    async with AsyncSessionLocal() as session:
-        yield session
+def sessao(classe: str = "api"):
+    """Dependência de sessão com o statement_timeout da classe de rota (config.statement_timeouts)."""
+    timeout_ms = settings.statement_timeouts[classe]
+
+    async def _get_session() -> AsyncGenerator[AsyncSession, None]:
+        async with AsyncSessionLocal() as session:
+            if timeout_ms != settings.db_statement_timeout_ms:
+                # vale até o fim da transação (commit/rollback volta ao padrão da conexão)
+                await session.execute(text(f"SET LOCAL statement_timeout = {int(timeout_ms)}"))
+            yield session
+
+    return _get_session
+
+get_session = sessao("api")
+get_session_admin = sessao("admin")
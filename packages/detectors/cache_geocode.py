@@ -0,0 +1,328 @@
+# packages/detectors/cache_geocode.py
+"""
+Cache de geocodificação (Google Geocoding) do Modo Detetive: detetive_core/detetive_lote
+chamam geocodificar()/geocodificar_async() no lugar de geo_utils.inferir_coordenadas_endereco.
+
+- Chave: endereço normalizado (sem acento, minúsculo, abreviações expandidas: R. -> rua,
+  Av. -> avenida..., "nº" e "Brasil" fora) + CEP extraído ("01310-100", "01.310-100",
+  "CEP 01310100" -> 01310100). "Av. Paulista, nº 1000" e "AVENIDA PAULISTA 1000" caem na
+  mesma chave
+- Duas camadas: LRU em memória com TTL (GEOCODE_CACHE_LRU_MAX entradas, até
+  GEOCODE_CACHE_LRU_TTL_S) na frente de intel_lead.cache_geocode (migration 021; criada aqui
+  se faltar). Consulta: memória -> banco -> Google; o resultado do Google vai para as duas
+- Cache negativo: endereço sem resultado ({}, só ZERO_RESULTS do Google) fica
+  GEOCODE_CACHE_TTL_NEGATIVO_DIAS; com resultado, GEOCODE_CACHE_TTL_DIAS. Erro do Google
+  (HTTP != 200, rede, OVER_QUERY_LIMIT/REQUEST_DENIED/INVALID_REQUEST...) levanta em
+  geo_utils e não é guardado
+- Falha no banco não derruba a geocodificação: conta em erros_banco e segue para o Google
+- Métricas do processo em METRICAS (GET /v1/admin/geocode/cache/metricas)
+"""
+
+from __future__ import annotations
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from .geo_utils import inferir_coordenadas_endereco, inferir_coordenadas_endereco_async
+
+GEOCODE_CACHE_LRU_MAX = int(os.getenv("GEOCODE_CACHE_LRU_MAX", "50000"))
+GEOCODE_CACHE_LRU_TTL_S = float(os.getenv("GEOCODE_CACHE_LRU_TTL_S", "3600"))
+GEOCODE_CACHE_TTL_DIAS = float(os.getenv("GEOCODE_CACHE_TTL_DIAS", "90"))
+GEOCODE_CACHE_TTL_NEGATIVO_DIAS = float(os.getenv("GEOCODE_CACHE_TTL_NEGATIVO_DIAS", "7"))
+USAR_BANCO = os.getenv("GEOCODE_CACHE_BANCO", "1") != "0"
+
+# token (já sem acento e minúsculo) -> forma por extenso; só expande com algo depois
+# ("Al. Santos" -> alameda, mas "Maceió - AL" no fim continua al)
+ABREVIACOES = {
+    "r": "rua", "av": "avenida", "avda": "avenida", "al": "alameda", "tv": "travessa",
+    "trav": "travessa", "pc": "praca", "pca": "praca", "rod": "rodovia",
+    "estr": "estrada", "lgo": "largo", "lg": "largo", "jd": "jardim", "jard": "jardim",
+    "vl": "vila", "pq": "parque", "cj": "conjunto", "conj": "conjunto", "qd": "quadra",
+    "lt": "lote", "bl": "bloco", "ap": "apartamento", "apto": "apartamento", "sl": "sala",
+    "dr": "doutor", "prof": "professor", "eng": "engenheiro", "sta": "santa", "sto": "santo",
+    "cel": "coronel", "gov": "governador", "pres": "presidente", "mal": "marechal",
+}
+MARCAS_NUMERO = {"n", "no", "num", "numero", "nro"}
+RE_CEP = re.compile(r"(?:\bcep\b\W*)?\b(\d{2})\.?(\d{3})-?(\d{3})\b", re.IGNORECASE)
+RE_SEM_NUMERO = re.compile(r"\bs\s*/\s*n(?:o|º)?\b", re.IGNORECASE)
+
+
+# --------------------------------------------------------------------------------------
+# Normalização
+# --------------------------------------------------------------------------------------
+def extrair_cep(endereco: str) -> tuple[str, Optional[str]]:
+    """(endereço sem o CEP, CEP só com dígitos); o último CEP do texto vale."""
+    achados = list(RE_CEP.finditer(endereco))
+    if not achados:
+        return endereco, None
+    ultimo = achados[-1]
+    return endereco[:ultimo.start()] + " " + endereco[ultimo.end():], "".join(ultimo.groups())
+
+
+def normalizar_endereco(endereco: str) -> str:
+    """Endereço sem acento, minúsculo, só letras/dígitos, abreviações por extenso (sem CEP)."""
+    texto = RE_SEM_NUMERO.sub(" sn ", endereco)
+    texto = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode().lower()
+    tokens = re.findall(r"[a-z0-9]+", texto)
+    if tokens and tokens[-1] == "brasil":
+        tokens.pop()
+    saida = []
+    for i, token in enumerate(tokens):
+        seguinte = tokens[i + 1] if i + 1 < len(tokens) else ""
+        if token in MARCAS_NUMERO and seguinte[:1].isdigit():
+            continue  # "nº 10", "n. 10", "numero 10" -> "10"
+        saida.append(ABREVIACOES.get(token, token) if seguinte else token)
+    return " ".join(saida)
+
+
+def chave_endereco(endereco: str) -> str:
+    sem_cep, cep = extrair_cep(endereco)
+    texto = normalizar_endereco(sem_cep)
+    return f"{texto}|{cep}" if cep else texto
+
+
+# --------------------------------------------------------------------------------------
+# Memória e métricas
+# --------------------------------------------------------------------------------------
+_AUSENTE = object()
+
+
+class LRUComTTL:
+    """OrderedDict com teto de entradas e validade por entrada; seguro entre threads."""
+
+    def __init__(self, maximo: int):
+        self.maximo = maximo
+        self._itens: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obter(self, chave: str) -> Any:
+        """Valor guardado ou _AUSENTE (ausente ou vencido)."""
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                return _AUSENTE
+            if item[0] <= time.monotonic():
+                del self._itens[chave]
+                return _AUSENTE
+            self._itens.move_to_end(chave)
+            return item[1]
+
+    def guardar(self, chave: str, valor: Any, ttl_s: float) -> None:
+        if ttl_s <= 0 or self.maximo <= 0:
+            return
+        with self._lock:
+            self._itens[chave] = (time.monotonic() + ttl_s, valor)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.maximo:
+                self._itens.popitem(last=False)
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._itens.clear()
+
+    def __len__(self) -> int:
+        return len(self._itens)
+
+
+class MetricasCache:
+    CAMPOS = ("consultas", "acertos_memoria", "acertos_banco", "acertos_negativos",
+              "faltas", "chamadas_google", "erros_google", "gravacoes", "erros_banco")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.zerar()
+
+    def contar(self, *campos: str) -> None:
+        with self._lock:
+            for campo in campos:
+                self._contagens[campo] += 1
+
+    def zerar(self) -> None:
+        with self._lock:
+            self._contagens = dict.fromkeys(self.CAMPOS, 0)
+
+    def resumo(self) -> dict:
+        with self._lock:
+            c = dict(self._contagens)
+        acertos = c["acertos_memoria"] + c["acertos_banco"]
+        return {
+            **c,
+            "taxa_acerto": round(acertos / c["consultas"], 4) if c["consultas"] else 0.0,
+            "taxa_acerto_memoria": round(c["acertos_memoria"] / c["consultas"], 4) if c["consultas"] else 0.0,
+            "entradas_memoria": len(MEMORIA),
+        }
+
+MEMORIA = LRUComTTL(GEOCODE_CACHE_LRU_MAX)
+METRICAS = MetricasCache()
+
+# --------------------------------------------------------------------------------------
+# Banco (Session síncrona do SQLAlchemy; na API, via AsyncSession.run_sync)
+#
+# A transação do chamador nunca é commitada nem desfeita aqui: a leitura roda num
+# savepoint da Session dele (falha desfaz só o savepoint) e DDL/gravação vão numa Session
+# curta no mesmo engine, com commit próprio.
+# --------------------------------------------------------------------------------------
+SQL_TABELA = """
+    CREATE TABLE IF NOT EXISTS intel_lead.cache_geocode (
+        chave      TEXT PRIMARY KEY,
+        endereco   TEXT NOT NULL,
+        resultado  JSONB NOT NULL,
+        criado_em  TIMESTAMPTZ NOT NULL DEFAULT now(),
+        expira_em  TIMESTAMPTZ NOT NULL
+    )
+"""
+SQL_BUSCAR = text("""
+    SELECT resultado, EXTRACT(EPOCH FROM expira_em - now()) AS restante_s
+    FROM intel_lead.cache_geocode
+    WHERE chave = :chave AND expira_em > now()
+""")
+SQL_GRAVAR = text("""
+    INSERT INTO intel_lead.cache_geocode (chave, endereco, resultado, expira_em)
+    VALUES (:chave, :endereco, CAST(:resultado AS jsonb), now() + make_interval(secs => :ttl_s))
+    ON CONFLICT (chave) DO UPDATE
+       SET endereco = EXCLUDED.endereco, resultado = EXCLUDED.resultado,
+           criado_em = now(), expira_em = EXCLUDED.expira_em
+""")
+
+_tabela_ok = False
+
+
+def _sessao_propria(db) -> Session:
+    """Session nova no engine da Session do chamador (mesmo pool, outra transação)."""
+    return Session(db.get_bind().engine)
+
+
+def _garantir_tabela(db) -> None:
+    """Cria cache_geocode se ainda não existir (uma vez por processo)."""
+    global _tabela_ok
+    if not _tabela_ok:
+        with _sessao_propria(db) as s:
+            # to_regclass antes: com a migration aplicada, o papel da API não precisa de CREATE
+            if not s.execute(text("SELECT to_regclass('intel_lead.cache_geocode') IS NOT NULL")).scalar():
+                s.execute(text(SQL_TABELA))
+                s.commit()
+        _tabela_ok = True
+
+
+def ttl_s(resultado: dict) -> float:
+    return (GEOCODE_CACHE_TTL_DIAS if resultado else GEOCODE_CACHE_TTL_NEGATIVO_DIAS) * 86400
+
+
+def buscar_no_banco(db, chave: str) -> Any:
+    """(resultado, segundos até expirar) ou _AUSENTE."""
+    _garantir_tabela(db)
+    with db.begin_nested():
+        row = db.execute(SQL_BUSCAR, {"chave": chave}).first()
+    if row is None:
+        return _AUSENTE
+    resultado = row[0] if isinstance(row[0], dict) else json.loads(row[0])
+    return resultado, float(row[1])
+
+
+def gravar_no_banco(db, chave: str, endereco: str, resultado: dict) -> None:
+    _garantir_tabela(db)
+    with _sessao_propria(db) as s:
+        s.execute(SQL_GRAVAR, {"chave": chave, "endereco": endereco,
+                               "resultado": json.dumps(resultado), "ttl_s": ttl_s(resultado)})
+        s.commit()
+
+
+def _de_memoria(chave: str) -> Any:
+    METRICAS.contar("consultas")
+    valor = MEMORIA.obter(chave)
+    if valor is _AUSENTE:
+        return valor
+    METRICAS.contar("acertos_memoria", *(() if valor else ("acertos_negativos",)))
+    return dict(valor)  # cópia: o chamador pode alterar o dict
+
+
+def _do_banco(chave: str, achado: Any) -> Any:
+    """Sobe para a memória o que veio do banco; devolve o resultado ou _AUSENTE."""
+    if achado is _AUSENTE:
+        return _AUSENTE
+    resultado, restante_s = achado
+    METRICAS.contar("acertos_banco", *(() if resultado else ("acertos_negativos",)))
+    MEMORIA.guardar(chave, dict(resultado), min(GEOCODE_CACHE_LRU_TTL_S, restante_s))
+    return resultado
+
+
+def _guardar(chave: str, resultado: dict) -> None:
+    MEMORIA.guardar(chave, dict(resultado), min(GEOCODE_CACHE_LRU_TTL_S, ttl_s(resultado)))
+
+
+# --------------------------------------------------------------------------------------
+# Consulta
+# --------------------------------------------------------------------------------------
+def geocodificar(endereco: str, db=None) -> dict:
+    """inferir_coordenadas_endereco com cache; db = Session síncrona (None: só memória)."""
+    chave = chave_endereco(endereco)
+    resultado = _de_memoria(chave)
+    if resultado is not _AUSENTE:
+        return resultado
+
+    usar_banco = USAR_BANCO and db is not None
+    if usar_banco:
+        try:
+            resultado = _do_banco(chave, buscar_no_banco(db, chave))
+        except Exception:
+            METRICAS.contar("erros_banco")
+            usar_banco = False
+        if resultado is not _AUSENTE:
+            return resultado
+
+    METRICAS.contar("faltas", "chamadas_google")
+    try:
+        resultado = inferir_coordenadas_endereco(endereco)
+    except Exception:
+        METRICAS.contar("erros_google")
+        raise
+    _guardar(chave, resultado)
+    if usar_banco:
+        try:
+            gravar_no_banco(db, chave, endereco, resultado)
+            METRICAS.contar("gravacoes")
+        except Exception:
+            METRICAS.contar("erros_banco")
+    return resultado
+
+
+async def geocodificar_async(endereco: str,
+                             executar_db: Optional[Callable[[Callable[[Any], Any]], Awaitable[Any]]] = None) -> dict:
+    """geocodificar para corrotinas; executar_db roda uma função síncrona numa Session."""
+    chave = chave_endereco(endereco)
+    resultado = _de_memoria(chave)
+    if resultado is not _AUSENTE:
+        return resultado
+
+    usar_banco = USAR_BANCO and executar_db is not None
+    if usar_banco:
+        try:
+            resultado = _do_banco(chave, await executar_db(lambda s: buscar_no_banco(s, chave)))
+        except Exception:
+            METRICAS.contar("erros_banco")
+            usar_banco = False
+        if resultado is not _AUSENTE:
+            return resultado
+
+    METRICAS.contar("faltas", "chamadas_google")
+    try:
+        resultado = await inferir_coordenadas_endereco_async(endereco)
+    except Exception:
+        METRICAS.contar("erros_google")
+        raise
+    _guardar(chave, resultado)
+    if usar_banco:
+        try:
+            await executar_db(lambda s: gravar_no_banco(s, chave, endereco, resultado))
+            METRICAS.contar("gravacoes")
+        except Exception:
+            METRICAS.contar("erros_banco")
+    return resultado
@@ -1,33 +1,26 @@
 # packages/detectors/cnpj_utils.py
 
-import requests
 import re
-import os
+from typing import Optional
 
-CNPJA_TOKEN = os.getenv("CNPJA_API_TOKEN")  # sua chave comercial vai no .env
+from .provedores_http import Resposta, cliente
+
+# token da API comercial (CNPJA_API_TOKEN no .env): header do cliente "cnpja" em provedores_http
 
 
 def limpar_cnpj(cnpj: str) -> str:
     return re.sub(r"\D", "", cnpj)
 
 
-def buscar_dados_empresa(dados: dict) -> dict:
-    """
-    Usa a API comercial da CNPJá com token, consultando por CNPJ ou nome.
-    """
-    headers = {"Authorization": f"Bearer {CNPJA_TOKEN}"}
-    base_url = "https://api.cnpja.com.br/companies"
-
+def _consulta_empresa(dados: dict) -> Optional[tuple[str, dict]]:
     if dados.get("cnpj"):
-        cnpj = limpar_cnpj(dados["cnpj"])
-        url = f"{base_url}/{cnpj}"
-    elif dados.get("nome"):
-        nome = dados["nome"]
-        url = f"{base_url}?search={nome}"
-    else:
-        return {}
+        return f"/companies/{limpar_cnpj(dados['cnpj'])}", {}
+    if dados.get("nome"):
+        return "/companies", {"search": dados["nome"]}
+    return None
 
-    res = requests.get(url, headers=headers)
+
+def _empresa(res: Resposta) -> dict:
     if res.status_code != 200:
         return {}
 
@@ -47,3 +40,23 @@ def buscar_dados_empresa(dados: dict) -> dict:
         "telefone": data.get("phones", [{}])[0].get("number"),
         "endereco": f"{endereco.get('street', '')}, {endereco.get('number', '')}, {endereco.get('district', '')}, {endereco.get('city', '')} - {endereco.get('state', '')}"
     }
+
+
+def buscar_dados_empresa(dados: dict) -> dict:
+    """
+    Usa a API comercial da CNPJá com token, consultando por CNPJ ou nome.
+    """
+    consulta = _consulta_empresa(dados)
+    if consulta is None:
+        return {}
+    caminho, params = consulta
+    return _empresa(cliente("cnpja").get(caminho, params=params, operacao="empresa"))
+
+
+async def buscar_dados_empresa_async(dados: dict) -> dict:
+    """buscar_dados_empresa para corrotinas (Modo Detetive)."""
+    consulta = _consulta_empresa(dados)
+    if consulta is None:
+        return {}
+    caminho, params = consulta
+    return _empresa(await cliente("cnpja").get_async(caminho, params=params, operacao="empresa"))
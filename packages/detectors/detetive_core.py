@@ -1,14 +1,11 @@
-from .geo_utils import inferir_coordenadas_endereco
+from .cache_geocode import geocodificar
 from .cnpj_utils import buscar_dados_empresa
 from .match_engine import buscar_uc_por_ponto_geografico
 from .diagnoser import diagnosticar_uc
 
 
-def montar_dossie_detetive(dados_input: dict, db):
-    """
-    Pipeline principal do modo Detetive. Recebe dados parciais e tenta montar um dossiê completo.
-    """
-    resultado = {
+def novo_resultado(dados_input: dict) -> dict:
+    return {
         "entrada": dados_input,
         "logs": [],
         "etapas": {},
@@ -18,64 +15,89 @@ def montar_dossie_detetive(dados_input: dict, db):
         "score_confianca": 0.0
     }
 
+
+def registrar_empresa(dados_input: dict, resultado: dict, empresa: dict) -> None:
+    resultado["etapas"]["empresa"] = empresa
+    resultado["logs"].append("Empresa localizada via CNPJá.")
+    if not dados_input.get("endereco") and empresa.get("endereco"):
+        dados_input["endereco"] = empresa["endereco"]
+
+
+def registrar_geo(dados_input: dict, resultado: dict, geo: dict) -> None:
+    resultado["etapas"]["geo"] = geo
+    dados_input.update(geo)
+    resultado["logs"].append("Endereço geocodificado com sucesso.")
+
+
+def registrar_matches(resultado: dict, matches: list) -> bool:
+    """Guarda os matches; False se não houve nenhum (o pipeline para aqui)."""
+    resultado["possiveis_matches"] = matches
+    if matches:
+        match = matches[0]
+        resultado["match_principal"] = match
+        resultado["logs"].append(f"UC encontrada com distância aproximada de {round(match.get('distancia_metros', 0), 2)} metros.")
+        return True
+    resultado["logs"].append("Nenhuma UC correspondente encontrada na base.")
+    return False
+
+
+def calcular_score(dados_input: dict, resultado: dict, diagnostico: dict) -> float:
+    score = 0
+    if dados_input.get("cnpj") and resultado["etapas"].get("empresa"):
+        score += 30
+    if dados_input.get("endereco"):
+        score += 25
+    if dados_input.get("cep"):
+        score += 10
+    if dados_input.get("latitude") and dados_input.get("longitude"):
+        score += 30
+    if diagnostico:
+        score += 25
+    return min(score, 100.0)
+
+
+def finalizar_resultado(resultado: dict) -> dict:
+    # ✅ Garantia de tipos corretos para evitar erro no response_model
+    resultado["possiveis_matches"] = resultado.get("possiveis_matches", []) or []
+    resultado["match_principal"] = resultado.get("match_principal") or None
+    resultado["diagnostico"] = resultado.get("diagnostico") or None
+    resultado["logs"] = resultado.get("logs", []) or []
+    return resultado
+
+
+def montar_dossie_detetive(dados_input: dict, db):
+    """
+    Pipeline principal do modo Detetive. Recebe dados parciais e tenta montar um dossiê completo.
+    Versão síncrona (db = Session síncrona); em lote/async: packages/detectors/detetive_lote.py.
+    """
+    resultado = novo_resultado(dados_input)
+
     try:
         # Etapa 1 - Buscar dados da empresa (se houver CNPJ ou nome)
         if dados_input.get("cnpj") or dados_input.get("nome"):
-            empresa = buscar_dados_empresa(dados_input)
-            resultado["etapas"]["empresa"] = empresa
-            resultado["logs"].append("Empresa localizada via CNPJá.")
-            if not dados_input.get("endereco") and empresa.get("endereco"):
-                dados_input["endereco"] = empresa["endereco"]
+            registrar_empresa(dados_input, resultado, buscar_dados_empresa(dados_input))
         else:
             resultado["logs"].append("Nenhum CNPJ ou nome informado para buscar dados empresariais.")
 
-        # Etapa 2 - Inferir coordenadas e CEP se tiver endereço
+        # Etapa 2 - Inferir coordenadas e CEP se tiver endereço (cache antes do Google)
         if dados_input.get("endereco"):
-            geo = inferir_coordenadas_endereco(dados_input["endereco"])
-            resultado["etapas"]["geo"] = geo
-            dados_input.update(geo)
-            resultado["logs"].append("Endereço geocodificado com sucesso.")
+            registrar_geo(dados_input, resultado, geocodificar(dados_input["endereco"], db))
         else:
             resultado["logs"].append("Endereço não informado. Pulo geocodificação.")
 
         # Etapa 3 - Buscar possível UC na base ANEEL via ponto geográfico
         matches = buscar_uc_por_ponto_geografico(dados_input, db)
-        resultado["possiveis_matches"] = matches
-
-        if matches:
-            match = matches[0]
-            resultado["match_principal"] = match
-            resultado["logs"].append(f"UC encontrada com distância aproximada de {round(match.get('distancia_metros', 0), 2)} metros.")
-        else:
-            resultado["logs"].append("Nenhuma UC correspondente encontrada na base.")
+        if not registrar_matches(resultado, matches):
             return resultado
 
         # Etapa 4 - Diagnóstico da UC encontrada
-        diagnostico = diagnosticar_uc(match["uc_id"], db)
+        diagnostico = diagnosticar_uc(matches[0]["uc_id"], db)
         resultado["diagnostico"] = diagnostico
 
         # Etapa 5 - Score de confiança
-        score = 0
-        if dados_input.get("cnpj") and resultado["etapas"].get("empresa"):
-            score += 30
-        if dados_input.get("endereco"):
-            score += 25
-        if dados_input.get("cep"):
-            score += 10
-        if dados_input.get("latitude") and dados_input.get("longitude"):
-            score += 30
-        if diagnostico:
-            score += 25
-
-        resultado["score_confianca"] = min(score, 100.0)
+        resultado["score_confianca"] = calcular_score(dados_input, resultado, diagnostico)
 
     except Exception as e:
         resultado["logs"].append(f"Erro durante análise: {str(e)}")
 
-    # ✅ Garantia de tipos corretos para evitar erro no response_model
-    resultado["possiveis_matches"] = resultado.get("possiveis_matches", []) or []
-    resultado["match_principal"] = resultado.get("match_principal") or None
-    resultado["diagnostico"] = resultado.get("diagnostico") or None
-    resultado["logs"] = resultado.get("logs", []) or []
-
-    return resultado
+    return finalizar_resultado(resultado)
@@ -0,0 +1,205 @@
+# packages/detectors/detetive_lote.py
+"""
+Modo Detetive em lote (POST /v1/detetive/lote) e a versão async do unitário.
+
+- Cada prospect passa pelas etapas de detetive_core (empresa -> geocodificação -> match ->
+  diagnóstico -> score) numa corrotina; o lote roda até DETETIVE_LOTE_CONCORRENCIA
+  prospects ao mesmo tempo e devolve cada resultado assim que termina, com o índice da
+  linha de entrada (a rota transforma em NDJSON)
+- Provedores externos (CNPJá, Google): versões async de cnpj_utils/geo_utils, pelo cliente
+  de provedores_http (keep-alive, retry e limite de concorrência/QPS por provedor,
+  compartilhado com o resto do processo)
+- Banco: as funções síncronas de match_engine/diagnoser rodam via executar_db (na API,
+  AsyncSession.run_sync em sessões próprias), até DETETIVE_DB_CONCORRENCIA ao mesmo tempo
+- Dentro do lote, CNPJs (só dígitos) e endereços (chave de cache_geocode) repetidos são
+  consultados uma vez: as outras ocorrências aguardam a mesma task. Entre lotes e
+  requisições, a geocodificação passa pelo cache de cache_geocode (memória -> banco)
+- Erro numa etapa vai para o log do prospect, como no unitário; o lote segue
+- Entrada: JSON (lista ou {"prospects": [...]}) ou CSV com cabeçalho (cnpj, nome,
+  endereco, latitude, longitude, id...), até DETETIVE_LOTE_MAX linhas
+"""
+
+from __future__ import annotations
+import asyncio
+import csv
+import io
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+
+from .cache_geocode import chave_endereco, geocodificar_async, normalizar_endereco
+from .cnpj_utils import buscar_dados_empresa_async, limpar_cnpj
+from .detetive_core import (
+    calcular_score, finalizar_resultado, novo_resultado, registrar_empresa, registrar_geo, registrar_matches,
+)
+from .diagnoser import diagnosticar_uc
+from .match_engine import buscar_uc_por_ponto_geografico
+from .provedores_http import Limite
+
+DETETIVE_LOTE_MAX = int(os.getenv("DETETIVE_LOTE_MAX", "10000"))
+DETETIVE_LOTE_CONCORRENCIA = int(os.getenv("DETETIVE_LOTE_CONCORRENCIA", "64"))
+DETETIVE_DB_CONCORRENCIA = int(os.getenv("DETETIVE_DB_CONCORRENCIA", "4"))
+CAMPOS_NUMERICOS = ("latitude", "longitude")
+
+ExecutarDb = Callable[[Callable[[Any], Any]], Awaitable[Any]]
+
+
+# --------------------------------------------------------------------------------------
+# Limites e deduplicação
+# --------------------------------------------------------------------------------------
+LIMITE_DB = Limite(DETETIVE_DB_CONCORRENCIA)  # por processo, entre requisições
+
+
+class Memo:
+    """Uma task por chave: ocorrências repetidas no lote aguardam o mesmo resultado."""
+
+    def __init__(self):
+        self._tasks: dict[Any, asyncio.Future] = {}
+        self.reaproveitados = 0
+
+    async def obter(self, chave, fabrica: Callable[[], Awaitable[Any]]):
+        task = self._tasks.get(chave)
+        if task is None:
+            task = self._tasks[chave] = asyncio.ensure_future(fabrica())
+        else:
+            self.reaproveitados += 1
+        # shield: um prospect cancelado não cancela a consulta dos outros
+        return await asyncio.shield(task)
+
+    def cancelar(self) -> None:
+        for task in self._tasks.values():
+            task.cancel()
+
+
+# --------------------------------------------------------------------------------------
+# Pipeline
+# --------------------------------------------------------------------------------------
+@dataclass
+class Contexto:
+    executar_db: ExecutarDb
+    limite_db: Limite = LIMITE_DB
+    empresas: Memo = field(default_factory=Memo)
+    geos: Memo = field(default_factory=Memo)
+
+    async def db(self, fn: Callable[[Any], Any]):
+        async with self.limite_db:
+            return await self.executar_db(fn)
+
+
+async def analisar_prospect(dados: dict, ctx: Contexto) -> dict:
+    """Mesmo dossiê de detetive_core.montar_dossie_detetive, com as etapas async."""
+    dados_input = dict(dados)
+    resultado = novo_resultado(dados_input)
+
+    try:
+        if dados_input.get("cnpj") or dados_input.get("nome"):
+            consulta = {k: dados_input[k] for k in ("cnpj", "nome") if dados_input.get(k)}
+            chave = ("cnpj", limpar_cnpj(str(consulta["cnpj"]))) if "cnpj" in consulta else ("nome", normalizar_endereco(consulta["nome"]))
+            empresa = await ctx.empresas.obter(chave, lambda: buscar_dados_empresa_async(consulta))
+            registrar_empresa(dados_input, resultado, empresa)
+        else:
+            resultado["logs"].append("Nenhum CNPJ ou nome informado para buscar dados empresariais.")
+
+        if dados_input.get("endereco"):
+            endereco = dados_input["endereco"]
+            geo = await ctx.geos.obter(chave_endereco(endereco), lambda: geocodificar_async(endereco, ctx.db))
+            registrar_geo(dados_input, resultado, geo)
+        else:
+            resultado["logs"].append("Endereço não informado. Pulo geocodificação.")
+
+        matches = await ctx.db(lambda s: buscar_uc_por_ponto_geografico(dados_input, s))
+        if not registrar_matches(resultado, matches):
+            return resultado
+
+        diagnostico = await ctx.db(lambda s: diagnosticar_uc(matches[0]["uc_id"], s))
+        resultado["diagnostico"] = diagnostico
+        resultado["score_confianca"] = calcular_score(dados_input, resultado, diagnostico)
+
+    except Exception as e:
+        resultado["logs"].append(f"Erro durante análise: {str(e)}")
+
+    return finalizar_resultado(resultado)
+
+
+async def analisar_lote(prospects: list[dict], executar_db: ExecutarDb,
+                        concorrencia: int = DETETIVE_LOTE_CONCORRENCIA,
+                        limite_db: Optional[Limite] = None) -> AsyncIterator[dict]:
+    """
+    {"indice": i, **dossiê} de cada prospect na ordem em que terminam; por último
+    {"resumo": {...}}. Fechar o gerador (cliente desconectou) cancela o que falta.
+    """
+    ctx = Contexto(executar_db, limite_db) if limite_db is not None else Contexto(executar_db)
+    vagas = asyncio.Semaphore(max(concorrencia, 1))
+    inicio = time.perf_counter()
+
+    async def um(indice: int, dados: dict):
+        async with vagas:
+            return indice, await analisar_prospect(dados, ctx)
+
+    tasks = [asyncio.ensure_future(um(i, p)) for i, p in enumerate(prospects)]
+    com_match = com_erro = 0
+    try:
+        for proximo in asyncio.as_completed(tasks):
+            indice, resultado = await proximo
+            com_match += resultado["match_principal"] is not None
+            com_erro += any(log.startswith("Erro durante análise") for log in resultado["logs"])
+            yield {"indice": indice, "id": prospects[indice].get("id"), **resultado}
+        yield {"resumo": {
+            "total": len(prospects),
+            "com_match": com_match,
+            "com_erro": com_erro,
+            "cnpjs_reaproveitados": ctx.empresas.reaproveitados,
+            "enderecos_reaproveitados": ctx.geos.reaproveitados,
+            "duracao_ms": round((time.perf_counter() - inicio) * 1000),
+        }}
+    finally:
+        for task in tasks:
+            task.cancel()
+        ctx.empresas.cancelar()
+        ctx.geos.cancelar()
+
+
+# --------------------------------------------------------------------------------------
+# Entrada
+# --------------------------------------------------------------------------------------
+def _limpar(item: dict) -> dict:
+    dados = {str(k).strip().lower(): (v.strip() if isinstance(v, str) else v)
+             for k, v in item.items() if k is not None}
+    dados = {k: v for k, v in dados.items() if v not in ("", None)}
+    for campo in CAMPOS_NUMERICOS:
+        if campo in dados:
+            try:
+                dados[campo] = float(str(dados[campo]).replace(",", "."))
+            except ValueError:
+                del dados[campo]
+    return dados
+
+
+def ler_prospects(corpo: bytes, tipo: str = "") -> list[dict]:
+    """Prospects de um corpo JSON ou CSV; ValueError se inválido, vazio ou acima do limite."""
+    texto = corpo.decode("utf-8-sig", errors="replace").strip()
+    if not texto:
+        raise ValueError("lote vazio")
+    if "json" in tipo or texto[0] in "[{":
+        try:
+            dados = json.loads(texto)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"JSON inválido: {e}")
+        if isinstance(dados, dict):
+            dados = dados.get("prospects")
+        if not isinstance(dados, list) or not all(isinstance(d, dict) for d in dados):
+            raise ValueError("JSON deve ser uma lista de objetos ou {\"prospects\": [...]}")
+    else:
+        try:
+            dialeto = csv.Sniffer().sniff(texto.split("\n", 1)[0], delimiters=",;\t")
+        except csv.Error:
+            dialeto = csv.excel
+        dados = list(csv.DictReader(io.StringIO(texto), dialect=dialeto))
+    if len(dados) > DETETIVE_LOTE_MAX:
+        raise ValueError(f"lote com {len(dados)} prospects; máximo {DETETIVE_LOTE_MAX}")
+    prospects = [_limpar(d) for d in dados]
+    if not prospects:
+        raise ValueError("lote vazio")
+    return prospects
@@ -25,7 +25,7 @@ def diagnosticar_uc(uc_id: str, db) -> dict:
     if not row:
         return {}
 
-    data = dict(row)
+    data = dict(row._mapping)
 
     # Diagnóstico simples baseado em regras
     insights = []
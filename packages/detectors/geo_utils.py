@@ -1,28 +1,27 @@
 # packages/detectors/geo_utils.py
 
-import requests
 import os
 
+from .provedores_http import Resposta, cliente
+
 GOOGLE_API_KEY = os.getenv("GOOGLE_MAPS_API_KEY")
 
 
-def inferir_coordenadas_endereco(endereco: str) -> dict:
+def _geocode(res: Resposta) -> dict:
     """
-    Usa a API do Google Maps para obter lat/lng, CEP, bairro, cidade e UF a partir do endereço textual.
+    {} só para ZERO_RESULTS (endereço sem resultado; o cache guarda como negativo).
+    OVER_QUERY_LIMIT, REQUEST_DENIED, INVALID_REQUEST etc. vêm com HTTP 200 e results
+    vazio, mas são erro: levantam, como o status != 200.
     """
-    url = "https://maps.googleapis.com/maps/api/geocode/json"
-    params = {
-        "address": endereco,
-        "key": GOOGLE_API_KEY
-    }
-
-    res = requests.get(url, params=params)
     if res.status_code != 200:
         raise Exception("Erro na requisição à API do Google Maps")
 
     data = res.json()
-    if not data["results"]:
+    status = data.get("status")
+    if status == "ZERO_RESULTS":
         return {}
+    if status != "OK" or not data.get("results"):
+        raise Exception(f"Erro na API do Google Maps: {status} {data.get('error_message', '')}".rstrip())
 
     result = data["results"][0]
     location = result["geometry"]["location"]
@@ -37,4 +36,18 @@ def inferir_coordenadas_endereco(endereco: str) -> dict:
         "bairro": componentes_dict.get("sublocality") or componentes_dict.get("neighborhood"),
         "municipio": componentes_dict.get("administrative_area_level_2"),
         "uf": componentes_dict.get("administrative_area_level_1")
-    }
\ No newline at end of file
+    }
+
+
+def inferir_coordenadas_endereco(endereco: str) -> dict:
+    """
+    Usa a API do Google Maps para obter lat/lng, CEP, bairro, cidade e UF a partir do endereço textual.
+    """
+    params = {"address": endereco, "key": GOOGLE_API_KEY}
+    return _geocode(cliente("google").get("/geocode/json", params=params, operacao="geocode"))
+
+
+async def inferir_coordenadas_endereco_async(endereco: str) -> dict:
+    """inferir_coordenadas_endereco para corrotinas (Modo Detetive)."""
+    params = {"address": endereco, "key": GOOGLE_API_KEY}
+    return _geocode(await cliente("google").get_async("/geocode/json", params=params, operacao="geocode"))
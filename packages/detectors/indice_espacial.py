@@ -0,0 +1,372 @@
+# packages/detectors/indice_espacial.py
+"""
+Índice espacial em memória para "as k UCs / pontos notáveis mais próximos de (lat, lon)".
+
+- Grade em graus (INDICE_ESPACIAL_CELULA, default 0.002° ~ 220 m) com chave Z-order
+  (Morton, como um geohash) por ponto; pontos ordenados pela chave. Todo bloco alinhado de
+  2^L x 2^L células é uma faixa contígua de chaves: os 3x3 blocos em volta de uma consulta
+  são 9 searchsorted, em qualquer nível (quadtree implícita, densa ou esparsa)
+- Consultas em lote (arrays de lat/lon), vetorizadas em NumPy:
+  knn(): sobe de nível (blocos 1, 2, 4, ... células) só para as consultas ainda não
+  resolvidas; resolvida quando a k-ésima distância cabe no raio coberto com certeza pelos
+  blocos. Limitado a raio_max_metros (vizinhos além disso não voltam)
+  raio(): o nível que cobre o raio, filtro por distância
+  Distâncias em metros (haversine, esfera de raio médio). Sem volta no antimeridiano
+- Um ponto por id (uc_id / pn_id): repetido, vale o último
+- Snapshot: um arquivo por fonte (<INDICE_ESPACIAL_DIR>/<fonte>.grid), cabeçalho JSON +
+  arrays alinhados, aberto com np.memmap (carregar é instantâneo; o SO pagina sob demanda
+  e processos da API compartilham as páginas). Gravado em arquivo temporário + os.replace:
+  quem está com o antigo aberto continua lendo o antigo. Diretório: INDICE_ESPACIAL_DIR
+  (default <raiz do repo>/data/indice_espacial, independente do cwd: a API roda em
+  /code/apps/api e o orquestrador em /app, ambos com ./data montado). Com API e worker em
+  hosts/volumes diferentes, apontar INDICE_ESPACIAL_DIR dos dois para o mesmo volume
+- Atualização incremental: depois de cada importação de UCs, rastreio.py enfileira este
+  script com --import-id; só as UCs daquela importação são relidas (lead_com_coordenadas),
+  substituídas/removidas no índice e o snapshot é regravado. "pontos" é reconstruído
+  inteiro (--construir --fonte pontos) depois das cargas de PONNOT
+  A API (match_engine, KNN do Detetive) relê o snapshot quando o arquivo muda (checado a
+  cada INDICE_ESPACIAL_RECARGA_S)
+
+Uso:
+    python packages/detectors/indice_espacial.py --construir [--fonte ucs|pontos]
+    python packages/detectors/indice_espacial.py --import-id <id>
+"""
+
+from __future__ import annotations
+import argparse
+import io
+import json
+import math
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[2]
+INDICE_ESPACIAL_DIR = Path(os.getenv("INDICE_ESPACIAL_DIR") or ROOT / "data" / "indice_espacial")
+INDICE_ESPACIAL_CELULA = float(os.getenv("INDICE_ESPACIAL_CELULA", "0.002"))
+INDICE_ESPACIAL_RECARGA_S = float(os.getenv("INDICE_ESPACIAL_RECARGA_S", "30"))
+RAIO_MAX_METROS = 50_000.0
+
+RAIO_TERRA = 6_371_008.8
+METROS_POR_GRAU = math.pi / 180 * RAIO_TERRA
+MAGICO = b"UCGRID1\n"
+BITS = 21  # bits por eixo na chave Z-order
+ALINHAMENTO = 64
+
+# fonte -> (consulta completa, consulta por importação)
+FONTES = {
+    "ucs": (
+        "SELECT uc_id::text, latitude, longitude FROM lead_com_coordenadas",
+        """
+            SELECT c.uc_id::text, c.latitude, c.longitude
+            FROM lead_com_coordenadas c
+            WHERE c.uc_id IN (SELECT uc_id FROM lead_bruto WHERE import_id = %s)
+        """,
+    ),
+    "pontos": (
+        "SELECT pn_id::text, latitude, longitude FROM ponto_notavel",
+        None,
+    ),
+}
+
+
+def haversine(lat1, lon1, lat2, lon2) -> np.ndarray:
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(a, dtype=np.float64)) for a in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * RAIO_TERRA * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def _ordenar_por_consulta(q, p, d, d_max: float):
+    """Ordena os candidatos por (consulta, distância): uma chave float só, mais rápido que lexsort."""
+    ordem = np.argsort(q + d / (d_max * 1.0001 + 1.0), kind="stable")
+    return q[ordem], p[ordem], d[ordem]
+
+
+# --------------------------------------------------------------------------------------
+# Índice
+# --------------------------------------------------------------------------------------
+def _espalhar(x: np.ndarray) -> np.ndarray:
+    """Bits de x (até 32) intercalados com zeros: 0b1011 -> 0b1000101."""
+    x = x.astype(np.uint64)
+    for desloca, mascara in ((16, 0x0000FFFF0000FFFF), (8, 0x00FF00FF00FF00FF), (4, 0x0F0F0F0F0F0F0F0F),
+                             (2, 0x3333333333333333), (1, 0x5555555555555555)):
+        x = (x | (x << np.uint64(desloca))) & np.uint64(mascara)
+    return x
+
+
+def morton(i: np.ndarray, j: np.ndarray) -> np.ndarray:
+    """Chave Z-order da célula (linha i, coluna j): blocos 2^L x 2^L alinhados são faixas contíguas."""
+    return ((_espalhar(i) << np.uint64(1)) | _espalhar(j)).astype(np.int64)
+
+
+class IndiceEspacial:
+    def __init__(self, celula: float, chaves, lat, lon, ids):
+        if 360 / celula > 2 ** BITS:
+            raise ValueError(f"célula {celula}° menor que o mínimo ({360 / 2 ** BITS:.6f}°)")
+        self.celula = celula
+        self.linhas = int(math.ceil(180 / celula))
+        self.colunas = int(math.ceil(360 / celula))
+        self.chaves = chaves
+        self.lat = lat
+        self.lon = lon
+        self.ids = ids
+
+    def __len__(self) -> int:
+        return len(self.lat)
+
+    @classmethod
+    def construir(cls, ids: Sequence, lat: Sequence, lon: Sequence,
+                  celula: float = INDICE_ESPACIAL_CELULA) -> "IndiceEspacial":
+        ids = np.asarray(ids).astype(bytes) if len(ids) else np.zeros(0, dtype="S1")
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        validos = (np.isfinite(lat) & np.isfinite(lon) & (np.abs(lat) <= 90) & (np.abs(lon) <= 180)
+                   & ~((lat == 0) & (lon == 0)))
+        ids, lat, lon = ids[validos], lat[validos], lon[validos]
+        # um ponto por id: o último
+        _, ultimo = np.unique(ids[::-1], return_index=True)
+        manter = np.sort(len(ids) - 1 - ultimo)
+        ids, lat, lon = ids[manter], lat[manter], lon[manter]
+
+        vazio = cls(celula, np.zeros(0, np.int64), lat, lon, ids)
+        chaves = morton(*vazio._celula(lat, lon))
+        ordem = np.argsort(chaves, kind="stable")
+        return cls(celula, chaves[ordem], lat[ordem], lon[ordem], ids[ordem])
+
+    def atualizar(self, ids: Sequence, lat: Sequence, lon: Sequence,
+                  removidos: Iterable = ()) -> "IndiceEspacial":
+        """Novo índice com os pontos de `ids` substituídos (ou incluídos) e `removidos` fora."""
+        novos = np.asarray(ids).astype(bytes) if len(ids) else np.zeros(0, dtype="S1")
+        removidos = list(removidos)
+        fora = np.concatenate([novos, np.asarray(removidos).astype(bytes)]) if removidos else novos
+        manter = ~np.isin(self.ids, fora)
+        largura = max(self.ids.dtype.itemsize, novos.dtype.itemsize)
+        return IndiceEspacial.construir(
+            np.concatenate([np.asarray(self.ids[manter], dtype=f"S{largura}"), novos.astype(f"S{largura}")]),
+            np.concatenate([self.lat[manter], np.asarray(lat, dtype=np.float64)]),
+            np.concatenate([self.lon[manter], np.asarray(lon, dtype=np.float64)]),
+            self.celula,
+        )
+
+    # ---- células ----
+    def _celula(self, lat, lon) -> tuple[np.ndarray, np.ndarray]:
+        i = np.clip(np.floor((np.asarray(lat) + 90) / self.celula).astype(np.int64), 0, self.linhas - 1)
+        j = np.clip(np.floor((np.asarray(lon) + 180) / self.celula).astype(np.int64), 0, self.colunas - 1)
+        return i, j
+
+    def _candidatos(self, lat, lon, nivel) -> tuple[np.ndarray, np.ndarray]:
+        """(consulta, ponto) de todos os pontos nos 3x3 blocos de 2^nivel células em volta de cada consulta."""
+        nivel = np.broadcast_to(np.asarray(nivel, dtype=np.int64), np.shape(lat))[:, None]
+        i, j = self._celula(lat, lon)
+        d = np.array([-1, 0, 1])
+        bi = ((i[:, None] >> nivel) + d.repeat(3)[None, :])
+        bj = ((j[:, None] >> nivel) + np.tile(d, 3)[None, :])
+        valido = (bi >= 0) & (bj >= 0) & ((bi << nivel) < self.linhas) & ((bj << nivel) < self.colunas)
+        inicio_bloco = morton(np.maximum(bi, 0) << nivel, np.maximum(bj, 0) << nivel)
+        ini = np.searchsorted(self.chaves, inicio_bloco)
+        fim = np.searchsorted(self.chaves, inicio_bloco + (np.int64(1) << (2 * nivel)))
+        tamanhos = np.where(valido, fim - ini, 0).ravel()
+        total = int(tamanhos.sum())
+        if total == 0:
+            return np.zeros(0, np.int64), np.zeros(0, np.int64)
+        # pontos de cada bloco: ini, ini+1, ..., fim-1, concatenados
+        consulta = np.repeat(np.arange(len(lat)), 9)
+        deslocamento = np.arange(total) - np.repeat(np.cumsum(tamanhos) - tamanhos, tamanhos)
+        return np.repeat(consulta, tamanhos), np.repeat(ini.ravel(), tamanhos) + deslocamento
+
+    def _cobertura(self, lat, nivel) -> np.ndarray:
+        """Raio (m) que os 3x3 blocos do nível cobrem com certeza em volta da consulta."""
+        lado = np.exp2(nivel) * self.celula
+        lat_borda = np.minimum(np.abs(lat) + 2 * lado, 90.0)
+        return lado * METROS_POR_GRAU * np.cos(np.radians(lat_borda))
+
+    def _nivel_para(self, lat, metros: float) -> np.ndarray:
+        """Menor nível cuja cobertura alcança `metros`, por consulta."""
+        nivel = np.zeros(len(lat), dtype=np.int64)
+        falta = self._cobertura(lat, nivel) < metros
+        while falta.any() and nivel.max() < BITS:
+            nivel[falta] += 1
+            falta &= self._cobertura(lat, nivel) < metros
+        return nivel
+
+    # ---- consultas ----
+    def knn(self, lat, lon, k: int = 10, raio_max_metros: float = RAIO_MAX_METROS
+            ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        (distâncias [Q, k] em metros, posições [Q, k]) dos k vizinhos mais próximos de cada
+        consulta, em ordem de distância. Faltando vizinho dentro de raio_max_metros: inf / -1.
+        Ids: self.ids[posicoes] (onde posicoes >= 0).
+        """
+        lat = np.atleast_1d(np.asarray(lat, dtype=np.float64))
+        lon = np.atleast_1d(np.asarray(lon, dtype=np.float64))
+        dist = np.full((len(lat), k), np.inf)
+        pos = np.full((len(lat), k), -1, dtype=np.int64)
+        if not len(self) or not len(lat):
+            return dist, pos
+        nivel_max = self._nivel_para(lat, raio_max_metros)
+        pendentes = np.arange(len(lat))
+        nivel = 0
+        while len(pendentes):
+            q, p = self._candidatos(lat[pendentes], lon[pendentes], np.minimum(nivel, nivel_max[pendentes]))
+            d = haversine(lat[pendentes][q], lon[pendentes][q], self.lat[p], self.lon[p])
+            dentro = d <= raio_max_metros
+            q, p, d = _ordenar_por_consulta(q[dentro], p[dentro], d[dentro], raio_max_metros)
+            primeiro = np.searchsorted(q, np.arange(len(pendentes)))
+            rank = np.arange(len(q)) - primeiro[q]
+            top = rank < k
+            dist[pendentes[q[top]], rank[top]] = d[top]
+            pos[pendentes[q[top]], rank[top]] = p[top]
+            # resolvida: k-ésimo vizinho dentro da área coberta, ou já no nível do raio máximo
+            resolvidas = ((dist[pendentes, k - 1] <= self._cobertura(lat[pendentes], nivel))
+                          | (nivel >= nivel_max[pendentes]))
+            pendentes = pendentes[~resolvidas]
+            nivel += 1
+        return dist, pos
+
+    def raio(self, lat, lon, metros: float) -> list[tuple[np.ndarray, np.ndarray]]:
+        """Por consulta: (posições, distâncias) dos pontos a até `metros`, mais próximos primeiro."""
+        lat = np.atleast_1d(np.asarray(lat, dtype=np.float64))
+        lon = np.atleast_1d(np.asarray(lon, dtype=np.float64))
+        if not len(self) or not len(lat):
+            return [(np.zeros(0, np.int64), np.zeros(0)) for _ in range(len(lat))]
+        q, p = self._candidatos(lat, lon, self._nivel_para(lat, metros))
+        d = haversine(lat[q], lon[q], self.lat[p], self.lon[p])
+        dentro = d <= metros
+        q, p, d = _ordenar_por_consulta(q[dentro], p[dentro], d[dentro], metros)
+        cortes = np.searchsorted(q, np.arange(1, len(lat)))
+        return list(zip(np.split(p, cortes), np.split(d, cortes)))
+
+    # ---- snapshot ----
+    def salvar(self, caminho: Path) -> None:
+        caminho = Path(caminho)
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        arrays = {"chaves": self.chaves, "lat": self.lat, "lon": self.lon, "ids": self.ids}
+        cabecalho = {"celula": self.celula, "arrays": {}}
+        offset = 0
+        for nome, arr in arrays.items():
+            cabecalho["arrays"][nome] = [arr.dtype.str, len(arr), offset]
+            offset += -(-arr.nbytes // ALINHAMENTO) * ALINHAMENTO
+        bruto = json.dumps(cabecalho).encode()
+        base = -(-(len(MAGICO) + 8 + len(bruto)) // ALINHAMENTO) * ALINHAMENTO
+
+        tmp = caminho.with_name(f".{caminho.name}.{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            f.write(MAGICO + len(bruto).to_bytes(8, "little") + bruto)
+            for nome, arr in arrays.items():
+                f.seek(base + cabecalho["arrays"][nome][2])
+                f.write(np.ascontiguousarray(arr).tobytes())
+            f.truncate(base + offset)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, caminho)
+
+    @classmethod
+    def carregar(cls, caminho: Path) -> "IndiceEspacial":
+        caminho = Path(caminho)
+        with open(caminho, "rb") as f:
+            if f.read(len(MAGICO)) != MAGICO:
+                raise ValueError(f"{caminho} não é um snapshot de índice espacial")
+            tamanho = int.from_bytes(f.read(8), "little")
+            cabecalho = json.loads(f.read(tamanho))
+        base = -(-(len(MAGICO) + 8 + tamanho) // ALINHAMENTO) * ALINHAMENTO
+        arrays = {}
+        for nome, (dtype, n, offset) in cabecalho["arrays"].items():
+            arrays[nome] = (np.memmap(caminho, dtype=dtype, mode="r", offset=base + offset, shape=(n,))
+                            if n else np.zeros(0, dtype=dtype))
+        return cls(cabecalho["celula"], **arrays)
+
+
+# --------------------------------------------------------------------------------------
+# Snapshot por fonte, recarregado quando muda (API)
+# --------------------------------------------------------------------------------------
+def caminho_snapshot(fonte: str, diretorio: Path = INDICE_ESPACIAL_DIR) -> Path:
+    return Path(diretorio) / f"{fonte}.grid"
+
+_carregados: dict[str, tuple[float, float, IndiceEspacial]] = {}
+_lock = threading.Lock()
+
+
+def indice(fonte: str = "ucs", diretorio: Path = INDICE_ESPACIAL_DIR) -> Optional[IndiceEspacial]:
+    """Índice da fonte (None sem snapshot); relê o arquivo se ele mudou."""
+    agora = time.monotonic()
+    with _lock:
+        item = _carregados.get(fonte)
+        if item and agora - item[1] < INDICE_ESPACIAL_RECARGA_S:
+            return item[2]
+        caminho = caminho_snapshot(fonte, diretorio)
+        try:
+            mtime = caminho.stat().st_mtime
+        except FileNotFoundError:
+            _carregados.pop(fonte, None)
+            return None
+        if item and item[0] == mtime:
+            _carregados[fonte] = (mtime, agora, item[2])
+            return item[2]
+        carregado = IndiceEspacial.carregar(caminho)
+        _carregados[fonte] = (mtime, agora, carregado)
+        return carregado
+
+
+# --------------------------------------------------------------------------------------
+# Banco (job)
+# --------------------------------------------------------------------------------------
+def _ler_pontos(cur, sql: str, params: tuple = ()) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(ids, lat, lon) da consulta via COPY (milhões de linhas sem passar por tuplas Python)."""
+    import pandas as pd
+
+    consulta = cur.mogrify(sql, params).decode() if params else sql
+    buf = io.BytesIO()
+    cur.copy_expert(f"COPY ({consulta}) TO STDOUT WITH (FORMAT csv)", buf)
+    buf.seek(0)
+    df = pd.read_csv(buf, header=None, names=["id", "lat", "lon"], dtype={"id": str, "lat": float, "lon": float})
+    return df["id"].to_numpy(dtype=str), df["lat"].to_numpy(), df["lon"].to_numpy()
+
+
+def construir_do_banco(cur, fonte: str) -> IndiceEspacial:
+    ids, lat, lon = _ler_pontos(cur, FONTES[fonte][0])
+    return IndiceEspacial.construir(ids, lat, lon)
+
+
+def atualizar_import(cur, import_id: str, diretorio: Path = INDICE_ESPACIAL_DIR) -> IndiceEspacial:
+    """Relê só as UCs da importação e regrava o snapshot de "ucs" (sem snapshot: constrói)."""
+    caminho = caminho_snapshot("ucs", diretorio)
+    if not caminho.exists():
+        return construir_do_banco(cur, "ucs")
+    ids, lat, lon = _ler_pontos(cur, FONTES["ucs"][1], (import_id,))
+    # UCs da importação que saíram de lead_com_coordenadas (sem coordenada válida, etc.)
+    cur.execute("SELECT DISTINCT uc_id::text AS uc_id FROM lead_bruto WHERE import_id = %s", (import_id,))
+    # get_db_cursor entrega RealDictCursor por padrão; aceita as duas formas de linha
+    removidos = {r["uc_id"] if isinstance(r, dict) else r[0] for r in cur.fetchall()} - set(ids)
+    return IndiceEspacial.carregar(caminho).atualizar(ids, lat, lon, removidos)
+
+
+def main():
+    from packages.database.connection import get_db_cursor
+
+    ap = argparse.ArgumentParser(description="Snapshot do índice espacial de UCs / pontos notáveis")
+    ap.add_argument("--construir", action="store_true", help="Reconstrói a fonte inteira")
+    ap.add_argument("--fonte", choices=sorted(FONTES), default="ucs")
+    ap.add_argument("--import-id", help="Atualiza só as UCs desta importação")
+    ap.add_argument("--dir", type=Path, default=INDICE_ESPACIAL_DIR)
+    args = ap.parse_args()
+
+    if not args.construir and not args.import_id:
+        ap.error("use --construir ou --import-id")
+    fonte = "ucs" if args.import_id else args.fonte
+
+    t0 = time.perf_counter()
+    with get_db_cursor(dict_cursor=False) as cur:
+        if args.import_id:
+            idx = atualizar_import(cur, args.import_id, args.dir)
+        else:
+            idx = construir_do_banco(cur, fonte)
+    idx.salvar(caminho_snapshot(fonte, args.dir))
+    print(f"[indice] {fonte}: {len(idx):,} pontos em {time.perf_counter() - t0:.1f} s -> {caminho_snapshot(fonte, args.dir)}")
+
+
+if __name__ == "__main__":
+    main()
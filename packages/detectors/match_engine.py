@@ -1,40 +1,112 @@
+"""
+Match de UC por ponto geográfico (modo Detetive).
+
+- Com lead_bruto.geog (migration 020): KNN pelo índice GiST (ORDER BY geog <-> ponto) e raio
+  com ST_DWithin, ambos em metros; só os vizinhos mais próximos dentro do raio são lidos
+- Sem a coluna: a mesma consulta montando a geography na hora (metros corretos, mas varre)
+- Uma UC pode ter várias linhas em lead_bruto (anos/importações): fica a mais próxima
+- Com snapshot do índice espacial em memória (indice_espacial.py, fonte "ucs"): os vizinhos
+  saem do índice e o banco só lê os detalhes por uc_id (SQL_DETALHES). Distância e ordem vêm
+  do índice (coordenadas da última atualização do snapshot). Sem snapshot: PostGIS, como acima
+"""
+
 from sqlalchemy import text
 
+from .indice_espacial import indice
+
+PONTO = "ST_SetSRID(ST_MakePoint(:lng, :lat), 4326)::geography"
+GEOG_CALCULADA = "ST_SetSRID(ST_MakePoint(lb.longitude, lb.latitude), 4326)::geography"
+FILTRO_COORDENADAS = "lb.latitude BETWEEN -90 AND 90 AND lb.longitude BETWEEN -180 AND 180 AND"
+# vizinhos lidos por UC pedida, para sobrar `limit` UCs distintas
+CANDIDATOS_POR_UC = 4
+
+_SQL_MATCH = """
+    WITH vizinhos AS MATERIALIZED (
+        SELECT lb.uc_id, ST_Distance({geog}, {ponto}) AS distancia_metros
+        FROM intel_lead.lead_bruto lb
+        WHERE {filtro} ST_DWithin({geog}, {ponto}, :raio)
+        ORDER BY {geog} <-> {ponto}
+        LIMIT :candidatos
+    ), proximos AS (
+        SELECT DISTINCT ON (uc_id) uc_id, distancia_metros
+        FROM vizinhos
+        ORDER BY uc_id, distancia_metros
+    )
+    SELECT v.*, p.distancia_metros
+    FROM proximos p
+    JOIN LATERAL (
+        SELECT * FROM intel_lead.vw_lead_completo_detalhado d WHERE d.uc_id = p.uc_id LIMIT 1
+    ) v ON true
+    ORDER BY p.distancia_metros
+    LIMIT :limit
+"""
+SQL_MATCH = _SQL_MATCH.format(geog="lb.geog", ponto=PONTO, filtro="")
+SQL_MATCH_SEM_INDICE = _SQL_MATCH.format(geog=GEOG_CALCULADA, ponto=PONTO, filtro=FILTRO_COORDENADAS)
+SQL_DETALHES = """
+    SELECT DISTINCT ON (d.uc_id) d.*
+    FROM intel_lead.vw_lead_completo_detalhado d
+    WHERE d.uc_id = ANY(:ids)
+    ORDER BY d.uc_id
+"""
+
+_geog: bool | None = None
+
+
+def _tem_geog(db) -> bool:
+    global _geog
+    if _geog is None:
+        query = text("""
+            SELECT EXISTS (
+                SELECT 1 FROM pg_attribute
+                WHERE attrelid = to_regclass('intel_lead.lead_bruto') AND attname = 'geog' AND NOT attisdropped
+            )
+        """)
+        _geog = bool(db.execute(query).scalar())
+    return _geog
+
+
+def parametros_match(lat: float, lng: float, limit: int, raio_max_metros: float) -> dict:
+    return {"lat": float(lat), "lng": float(lng), "raio": float(raio_max_metros),
+            "limit": limit, "candidatos": limit * CANDIDATOS_POR_UC}
+
+
+def _vizinhos_no_indice(lat: float, lng: float, limit: int, raio_max_metros: float) -> dict | None:
+    """uc_id -> distância (m) dos vizinhos no índice em memória; None sem snapshot."""
+    idx = indice("ucs")
+    if idx is None:
+        return None
+    dist, pos = idx.knn(lat, lng, k=limit, raio_max_metros=raio_max_metros)
+    achados = pos[0] >= 0
+    return {idx.ids[p].decode(): float(d) for p, d in zip(pos[0][achados], dist[0][achados])}
+
+
 def buscar_uc_por_ponto_geografico(dados: dict, db, limit: int = 10, raio_max_metros: float = 100.0) -> list:
     """
     Busca unidades consumidoras mais próximas com base em coordenadas geográficas.
-    Retorna apenas as que estão dentro do raio máximo permitido.
+    Retorna apenas as que estão dentro do raio máximo permitido (em metros).
     """
     lat = dados.get("latitude")
     lng = dados.get("longitude")
 
-    if not lat or not lng:
+    if lat is None or lng is None:
         return []
 
-    query = text(f"""
-        SELECT *,
-            ST_Distance(
-                ST_SetSRID(ST_MakePoint(:lng, :lat), 4326),
-                ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)
-            ) AS distancia_metros
-        FROM intel_lead.vw_lead_completo_detalhado
-        WHERE latitude IS NOT NULL AND longitude IS NOT NULL
-        ORDER BY distancia_metros ASC
-        LIMIT {limit}
-    """)
-
-    res = db.execute(query, {"lat": lat, "lng": lng})
-    rows = res.fetchall()
-
-    # Filtra e classifica os matches dentro do raio
+    vizinhos = _vizinhos_no_indice(lat, lng, limit, raio_max_metros)
+    if vizinhos is None:
+        query = text(SQL_MATCH if _tem_geog(db) else SQL_MATCH_SEM_INDICE)
+        linhas = db.execute(query, parametros_match(lat, lng, limit, raio_max_metros)).mappings().all()
+    elif vizinhos:
+        res = db.execute(text(SQL_DETALHES), {"ids": list(vizinhos)}).mappings().all()
+        linhas = sorted((dict(row, distancia_metros=vizinhos[row["uc_id"]]) for row in res),
+                        key=lambda row: row["distancia_metros"])
+    else:
+        linhas = []
+
     matches = []
-    for row in rows:
+    for row in linhas:
         row_dict = dict(row)
-        distancia = row_dict.get("distancia_metros", 9999)
-
-        if distancia <= raio_max_metros:
-            row_dict["nivel_match"] = _classificar_match_por_distancia(distancia)
-            matches.append(row_dict)
+        row_dict["nivel_match"] = _classificar_match_por_distancia(row_dict["distancia_metros"])
+        matches.append(row_dict)
 
     return matches
 
@@ -0,0 +1,445 @@
+# packages/detectors/provedores_http.py
+"""
+Cliente HTTP compartilhado dos provedores externos (CNPJá, Google Maps), usado por
+cnpj_utils, geo_utils e pelos jobs de enriquecimento (enrich_geo_job, enrich_cnpj_job).
+
+- Um ClienteProvedor por provedor e por processo (cliente(nome)), com sessões keep-alive:
+  requests.Session (pool urllib3 do tamanho da concorrência) para o código síncrono e
+  aiohttp.ClientSession (uma por event loop) para o async
+- Timeout de conexão e de leitura em toda chamada (<PROVEDOR>_TIMEOUT_S; conexão
+  PROVEDORES_TIMEOUT_CONEXAO_S)
+- Retry só de GET, em erro de rede/timeout e em 429/5xx: até <PROVEDOR>_TENTATIVAS
+  tentativas, backoff exponencial com jitter ("full jitter") e Retry-After respeitado até o
+  teto. Esgotadas as tentativas: a última resposta volta para o chamador (que trata o
+  status como antes); erro de rede vira ErroProvedor
+- Limite por provedor: até <PROVEDOR>_CONCORRENCIA chamadas em voo e início a no máximo
+  <PROVEDOR>_QPS por segundo. O mesmo Limite vale para threads e event loops do processo
+  (a API async e as threads dos jobs dividem a cota)
+- Métricas por (provedor, operação) em METRICAS: tentativas, retries, status, espera no
+  limite e histograma de latência por tentativa (GET /v1/admin/provedores/metricas)
+"""
+
+from __future__ import annotations
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+import weakref
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Mapping, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+TIMEOUT_CONEXAO_S = float(os.getenv("PROVEDORES_TIMEOUT_CONEXAO_S", "5"))
+KEEPALIVE_S = float(os.getenv("PROVEDORES_KEEPALIVE_S", "30"))
+BACKOFF_BASE_S = float(os.getenv("PROVEDORES_BACKOFF_BASE_S", "0.25"))
+BACKOFF_TETO_S = float(os.getenv("PROVEDORES_BACKOFF_TETO_S", "8"))
+STATUS_RETRY = frozenset({429, 500, 502, 503, 504})
+# limites superiores (ms) das faixas do histograma; a última faixa é "acima de 30 s"
+FAIXAS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+class ErroProvedor(Exception):
+    """Falha de rede/timeout que persistiu depois de todas as tentativas."""
+
+
+# --------------------------------------------------------------------------------------
+# Limite de concorrência + QPS (threads e event loops)
+# --------------------------------------------------------------------------------------
+def _acordar(fut: asyncio.Future) -> None:
+    if not fut.done():
+        fut.set_result(None)
+
+
+class Limite:
+    """
+    Até `concorrencia` chamadas simultâneas, iniciadas a no máximo `qps` por segundo.
+    `with limite:` em código síncrono, `async with limite:` em corrotinas; as duas formas
+    disputam a mesma cota.
+    """
+
+    def __init__(self, concorrencia: int, qps: float = 0.0):
+        self.concorrencia = max(int(concorrencia), 1)
+        self.intervalo = 1.0 / qps if qps > 0 else 0.0
+        self._trava = threading.Condition()
+        self._ativas = 0
+        self._proximo = 0.0
+        self._esperando_async: list[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+    @property
+    def ativas(self) -> int:
+        return self._ativas
+
+    def _ocupar(self) -> bool:
+        # chamar com a trava
+        if self._ativas < self.concorrencia:
+            self._ativas += 1
+            return True
+        return False
+
+    def _reservar(self) -> float:
+        """Reserva o próximo horário livre; devolve quanto falta para ele."""
+        if not self.intervalo:
+            return 0.0
+        with self._trava:
+            agora = time.monotonic()
+            inicio = max(agora, self._proximo)
+            self._proximo = inicio + self.intervalo
+        return inicio - agora
+
+    def liberar(self) -> None:
+        with self._trava:
+            self._ativas -= 1
+            self._trava.notify()
+            esperando, self._esperando_async = self._esperando_async, []
+        # acorda todas as corrotinas em espera; quem não conseguir vaga volta para a fila
+        for loop, fut in esperando:
+            try:
+                loop.call_soon_threadsafe(_acordar, fut)
+            except RuntimeError:
+                pass  # loop já fechado
+
+    def __enter__(self):
+        with self._trava:
+            while not self._ocupar():
+                self._trava.wait()
+        try:
+            espera = self._reservar()
+            if espera > 0:
+                time.sleep(espera)
+        except BaseException:
+            self.liberar()
+            raise
+        return self
+
+    def __exit__(self, *exc):
+        self.liberar()
+
+    async def __aenter__(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._trava:
+                if self._ocupar():
+                    break
+                fut = loop.create_future()
+                self._esperando_async.append((loop, fut))
+            await fut
+        try:
+            espera = self._reservar()
+            if espera > 0:
+                await asyncio.sleep(espera)
+        except BaseException:
+            self.liberar()
+            raise
+        return self
+
+    async def __aexit__(self, *exc):
+        self.liberar()
+
+
+# --------------------------------------------------------------------------------------
+# Métricas
+# --------------------------------------------------------------------------------------
+@dataclass
+class Histograma:
+    contagens: list = field(default_factory=lambda: [0] * (len(FAIXAS_MS) + 1))
+    soma_ms: float = 0.0
+    max_ms: float = 0.0
+
+    def registrar(self, ms: float) -> None:
+        faixa = next((i for i, limite in enumerate(FAIXAS_MS) if ms <= limite), len(FAIXAS_MS))
+        self.contagens[faixa] += 1
+        self.soma_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentil(self, p: float) -> float:
+        """Limite superior da faixa que contém o percentil p (0-100); acima de 30 s, o máximo."""
+        total = sum(self.contagens)
+        if not total:
+            return 0.0
+        alvo, acumulado = total * p / 100, 0
+        for i, n in enumerate(self.contagens):
+            acumulado += n
+            if acumulado >= alvo and n:
+                return float(FAIXAS_MS[i]) if i < len(FAIXAS_MS) else self.max_ms
+        return self.max_ms
+
+    def resumo(self) -> dict:
+        n = sum(self.contagens)
+        rotulos = [f"<={f}" for f in FAIXAS_MS] + [f">{FAIXAS_MS[-1]}"]
+        return {
+            "media_ms": round(self.soma_ms / n, 2) if n else 0.0,
+            "p50_ms": self.percentil(50),
+            "p95_ms": self.percentil(95),
+            "p99_ms": self.percentil(99),
+            "max_ms": round(self.max_ms, 2),
+            "faixas_ms": dict(zip(rotulos, self.contagens)),
+        }
+
+
+@dataclass
+class EstatisticaProvedor:
+    chamadas: int = 0
+    tentativas: int = 0
+    erros_rede: int = 0
+    falhas: int = 0  # chamadas que terminaram em ErroProvedor
+    espera_limite_s: float = 0.0
+    status: Counter = field(default_factory=Counter)
+    latencia: Histograma = field(default_factory=Histograma)
+
+    def resumo(self) -> dict:
+        n = max(self.chamadas, 1)
+        return {
+            "chamadas": self.chamadas,
+            "tentativas": self.tentativas,
+            "retries": self.tentativas - self.chamadas,
+            "erros_rede": self.erros_rede,
+            "falhas": self.falhas,
+            "status": {str(k): v for k, v in sorted(self.status.items())},
+            "espera_limite_ms_media": round(self.espera_limite_s * 1000 / n, 2),
+            "latencia": self.latencia.resumo(),
+        }
+
+
+class RegistroProvedores:
+    def __init__(self):
+        self._estatisticas: dict[tuple[str, str], EstatisticaProvedor] = {}
+        self._lock = threading.Lock()
+
+    def tentativa(self, provedor: str, operacao: str, ms: float, status: Optional[int], espera_s: float) -> None:
+        with self._lock:
+            est = self._estatisticas.setdefault((provedor, operacao), EstatisticaProvedor())
+            est.tentativas += 1
+            est.espera_limite_s += espera_s
+            est.latencia.registrar(ms)
+            if status is None:
+                est.erros_rede += 1
+            else:
+                est.status[status] += 1
+
+    def chamada(self, provedor: str, operacao: str, falhou: bool) -> None:
+        with self._lock:
+            est = self._estatisticas.setdefault((provedor, operacao), EstatisticaProvedor())
+            est.chamadas += 1
+            est.falhas += falhou
+
+    def resumo(self) -> dict[str, dict[str, dict]]:
+        with self._lock:
+            saida: dict[str, dict[str, dict]] = {}
+            for (provedor, operacao), est in sorted(self._estatisticas.items()):
+                saida.setdefault(provedor, {})[operacao] = est.resumo()
+            return saida
+
+    def zerar(self) -> None:
+        with self._lock:
+            self._estatisticas.clear()
+
+METRICAS = RegistroProvedores()
+
+# --------------------------------------------------------------------------------------
+# Cliente
+# --------------------------------------------------------------------------------------
+@dataclass
+class Resposta:
+    status_code: int
+    conteudo: bytes
+    headers: Mapping[str, str]
+    duracao_ms: int  # da chamada inteira (espera, tentativas e backoff)
+    tentativas: int
+
+    def json(self) -> Any:
+        return json.loads(self.conteudo)
+
+
+@dataclass
+class ConfigProvedor:
+    nome: str
+    base_url: str
+    concorrencia: int = 4
+    qps: float = 0.0
+    timeout_s: float = 20.0
+    tentativas: int = 3
+    headers: dict = field(default_factory=dict)
+
+
+def _espera_retry(tentativa: int, resposta: Optional[Resposta]) -> float:
+    espera = random.uniform(0, min(BACKOFF_TETO_S, BACKOFF_BASE_S * 2 ** tentativa))
+    retry_after = resposta.headers.get("Retry-After") if resposta is not None else None
+    if retry_after:
+        try:
+            espera = max(espera, min(float(retry_after), BACKOFF_TETO_S))
+        except ValueError:
+            pass  # formato data HTTP: fica o backoff
+    return espera
+
+
+def _params(params: Optional[dict]) -> Optional[dict]:
+    # requests descarta None; aiohttp exige str
+    return {k: str(v) for k, v in params.items() if v is not None} if params else None
+
+
+class ClienteProvedor:
+    def __init__(self, config: ConfigProvedor):
+        self.config = config
+        self.limite = Limite(config.concorrencia, config.qps)
+        self._sessao: Optional[requests.Session] = None
+        self._sessoes_async: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+        self._trava = threading.Lock()
+
+    def _url(self, caminho: str) -> str:
+        return caminho if "://" in caminho else self.config.base_url.rstrip("/") + "/" + caminho.lstrip("/")
+
+    def _timeout(self) -> tuple[float, float]:
+        return TIMEOUT_CONEXAO_S, self.config.timeout_s
+
+    def sessao(self) -> requests.Session:
+        with self._trava:
+            if self._sessao is None:
+                sessao = requests.Session()
+                # retry fica por nossa conta (backoff com jitter + métricas)
+                adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=self.config.concorrencia, max_retries=0)
+                sessao.mount("https://", adaptador)
+                sessao.mount("http://", adaptador)
+                sessao.headers.update(self.config.headers)
+                self._sessao = sessao
+            return self._sessao
+
+    def sessao_async(self):
+        import aiohttp
+
+        loop = asyncio.get_running_loop()
+        sessao = self._sessoes_async.get(loop)
+        if sessao is None or sessao.closed:
+            conexao, leitura = self._timeout()
+            sessao = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.config.concorrencia, keepalive_timeout=KEEPALIVE_S,
+                                               ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(sock_connect=conexao, sock_read=leitura),
+                headers=self.config.headers,
+            )
+            self._sessoes_async[loop] = sessao
+        return sessao
+
+    def _concluir(self, operacao: str, resposta: Optional[Resposta], erro: Optional[BaseException]) -> Resposta:
+        METRICAS.chamada(self.config.nome, operacao, falhou=resposta is None)
+        if resposta is None:
+            raise ErroProvedor(f"{self.config.nome} ({operacao}): {erro}") from erro
+        return resposta
+
+    def _repetir(self, tentativa: int, resposta: Optional[Resposta]) -> bool:
+        return tentativa + 1 < self.config.tentativas and (resposta is None or resposta.status_code in STATUS_RETRY)
+
+    def get(self, caminho: str, *, operacao: str, params: Optional[dict] = None,
+            headers: Optional[dict] = None) -> Resposta:
+        """GET síncrono com limite, timeout e retry."""
+        url, inicio_chamada = self._url(caminho), time.perf_counter()
+        resposta, erro = None, None
+        for tentativa in range(self.config.tentativas):
+            inicio = time.perf_counter()
+            with self.limite:
+                espera = time.perf_counter() - inicio
+                inicio = time.perf_counter()
+                try:
+                    r = self.sessao().get(url, params=_params(params), headers=headers, timeout=self._timeout())
+                    resposta, erro = Resposta(r.status_code, r.content, r.headers, 0, tentativa + 1), None
+                except requests.RequestException as e:
+                    resposta, erro = None, e
+            METRICAS.tentativa(self.config.nome, operacao, (time.perf_counter() - inicio) * 1000,
+                               resposta.status_code if resposta else None, espera)
+            if not self._repetir(tentativa, resposta):
+                break
+            time.sleep(_espera_retry(tentativa, resposta))
+        if resposta is not None:
+            resposta.duracao_ms = int((time.perf_counter() - inicio_chamada) * 1000)
+        return self._concluir(operacao, resposta, erro)
+
+    async def get_async(self, caminho: str, *, operacao: str, params: Optional[dict] = None,
+                        headers: Optional[dict] = None) -> Resposta:
+        """GET async (aiohttp), com o mesmo limite, timeout e retry do síncrono."""
+        import aiohttp
+
+        url, inicio_chamada = self._url(caminho), time.perf_counter()
+        resposta, erro = None, None
+        for tentativa in range(self.config.tentativas):
+            inicio = time.perf_counter()
+            async with self.limite:
+                espera = time.perf_counter() - inicio
+                inicio = time.perf_counter()
+                try:
+                    async with self.sessao_async().get(url, params=_params(params), headers=headers) as r:
+                        corpo = await r.read()
+                    resposta, erro = Resposta(r.status, corpo, r.headers, 0, tentativa + 1), None
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    resposta, erro = None, e
+            METRICAS.tentativa(self.config.nome, operacao, (time.perf_counter() - inicio) * 1000,
+                               resposta.status_code if resposta else None, espera)
+            if not self._repetir(tentativa, resposta):
+                break
+            await asyncio.sleep(_espera_retry(tentativa, resposta))
+        if resposta is not None:
+            resposta.duracao_ms = int((time.perf_counter() - inicio_chamada) * 1000)
+        return self._concluir(operacao, resposta, erro)
+
+    async def fechar_async(self) -> None:
+        """Fecha a sessão aiohttp do loop atual (shutdown da API)."""
+        sessao = self._sessoes_async.pop(asyncio.get_running_loop(), None)
+        if sessao is not None and not sessao.closed:
+            await sessao.close()
+
+    def fechar(self) -> None:
+        with self._trava:
+            if self._sessao is not None:
+                self._sessao.close()
+                self._sessao = None
+
+
+# --------------------------------------------------------------------------------------
+# Provedores
+# --------------------------------------------------------------------------------------
+def _config_do_ambiente(nome: str, base_url: str, concorrencia: int, qps: float, headers: Optional[dict] = None) -> ConfigProvedor:
+    prefixo = nome.upper()
+    return ConfigProvedor(
+        nome=nome,
+        base_url=os.getenv(f"{prefixo}_BASE_URL", base_url),
+        concorrencia=int(os.getenv(f"{prefixo}_CONCORRENCIA", str(concorrencia))),
+        qps=float(os.getenv(f"{prefixo}_QPS", str(qps))),
+        timeout_s=float(os.getenv(f"{prefixo}_TIMEOUT_S", "20")),
+        tentativas=int(os.getenv(f"{prefixo}_TENTATIVAS", "3")),
+        headers=headers or {},
+    )
+
+# lidos na primeira chamada (os jobs carregam o .env depois dos imports)
+CONFIGS = {
+    "cnpja": lambda: _config_do_ambiente("cnpja", "https://api.cnpja.com.br", 4, 5,
+                                         {"Authorization": f"Bearer {os.getenv('CNPJA_API_TOKEN')}"}),
+    "google": lambda: _config_do_ambiente("google", "https://maps.googleapis.com/maps/api", 10, 40),
+}
+
+_clientes: dict[str, ClienteProvedor] = {}
+_trava_clientes = threading.Lock()
+
+
+def cliente(nome: str) -> ClienteProvedor:
+    with _trava_clientes:
+        if nome not in _clientes:
+            _clientes[nome] = ClienteProvedor(CONFIGS[nome]())
+        return _clientes[nome]
+
+
+def registrar(config: ConfigProvedor) -> ClienteProvedor:
+    """Troca o cliente de um provedor (outra URL/limites; usado nos testes)."""
+    with _trava_clientes:
+        antigo = _clientes.get(config.nome)
+        _clientes[config.nome] = novo = ClienteProvedor(config)
+    if antigo is not None:
+        antigo.fechar()
+    return novo
+
+
+async def fechar_async() -> None:
+    for c in list(_clientes.values()):
+        await c.fechar_async()
@@ -1,15 +1,12 @@
 import os
-import time
-import requests
 from typing import List
 from dotenv import load_dotenv
 from datetime import datetime
 import psycopg2
 
-load_dotenv()
+from packages.detectors.provedores_http import cliente
 
-CNPJA_BASE_URL = "https://api.cnpja.com.br/companies"
-CNPJA_TOKEN = os.getenv("CNPJA_API_TOKEN")
+load_dotenv()
 
 DB_CONFIG = {
     "host": os.getenv("DB_HOST"),
@@ -20,10 +17,6 @@ DB_CONFIG = {
     "sslmode": "require"
 }
 
-HEADERS = {
-    "Authorization": f"Bearer {CNPJA_TOKEN}"
-}
-
 def get_db():
     return psycopg2.connect(**DB_CONFIG)
 
@@ -51,11 +44,9 @@ def buscar_endereco_google(conn, lead_id):
         return result[0] if result else None
 
 def buscar_cnpj_por_endereco(endereco: str):
-    url = f"{CNPJA_BASE_URL}?q={endereco}"
-    start = time.time()
-    response = requests.get(url, headers=HEADERS)
-    tempo = int((time.time() - start) * 1000)
-    return response, tempo
+    # token (CNPJA_API_TOKEN), keep-alive, timeout, retry e limite: cliente "cnpja"
+    response = cliente("cnpja").get("/companies", params={"q": endereco}, operacao="busca_endereco")
+    return response, response.duracao_ms
 
 def atualizar_enriquecido(conn, lead_id, empresa):
     now = datetime.utcnow()
@@ -1,12 +1,12 @@
 import os
-import time
-import requests
 from typing import List
 from dotenv import load_dotenv
 from datetime import datetime
 import psycopg2
 from psycopg2.extras import execute_values
 
+from packages.detectors.provedores_http import cliente
+
 load_dotenv()
 
 API_KEY = os.getenv("GOOGLE_MAPS_API_KEY")
@@ -51,22 +51,23 @@ def salvar_cache(conn, lat, lon, raio, place_ids):
         """, (lat, lon, raio, place_ids, "google"))
 
 def buscar_places(lat, lon, raio):
-    url = (
-        f"https://maps.googleapis.com/maps/api/place/nearbysearch/json?"
-        f"location={lat},{lon}&radius={raio}&key={API_KEY}"
+    res = cliente("google").get(
+        "/place/nearbysearch/json",
+        params={"location": f"{lat},{lon}", "radius": raio, "key": API_KEY},
+        operacao="places_nearby",
     )
-    start = time.time()
-    res = requests.get(url)
-    elapsed = int((time.time() - start) * 1000)
-    return res, elapsed
+    return res, res.duracao_ms
 
 def buscar_place_details(place_id):
-    url = (
-        f"https://maps.googleapis.com/maps/api/place/details/json?"
-        f"place_id={place_id}&fields=name,formatted_address,formatted_phone_number,website,rating,types"
-        f"&key={API_KEY}"
-    )
-    return requests.get(url).json()
+    return cliente("google").get(
+        "/place/details/json",
+        params={
+            "place_id": place_id,
+            "fields": "name,formatted_address,formatted_phone_number,website,rating,types",
+            "key": API_KEY,
+        },
+        operacao="place_details",
+    ).json()
 
 def salvar_resultado(conn, lead_id, dados, raio):
     now = datetime.utcnow()
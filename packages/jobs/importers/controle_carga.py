@@ -0,0 +1,220 @@
+# packages/jobs/importers/controle_carga.py
+# -*- coding: utf-8 -*-
+"""
+Controle adaptativo de chunk e pausa para os importers em streaming (UCBT, PONNOT).
+
+No lugar do chunk fixo + sleep fixo entre chunks:
+- A cada chunk gravado o importer informa linhas, tempo de COPY/INSERT e tempo de commit
+- Sinais de pressão no banco (1.0 = no limite configurado):
+  - latência de escrita por mil linhas (média móvel) contra a melhor já vista na sessão
+    (IMPORT_TOLERANCIA_LATENCIA = quantas vezes mais lenta ainda é aceitável)
+  - tempo de commit contra IMPORT_COMMIT_ALVO_MS (chunk grande demais -> flush de WAL longo)
+  - opcional (IMPORT_PG_STAT=1): sessões ativas de outros clientes em pg_stat_activity contra
+    IMPORT_MAX_SESSOES_ATIVAS e atraso de réplica (pg_stat_replication) contra IMPORT_MAX_LAG_S
+- Decisão (AIMD): pressão > 1 -> chunk pela metade; pressão < 0.5 -> chunk +25%; senão mantém;
+  sempre dentro de [IMPORT_CHUNK_MIN, IMPORT_CHUNK_MAX]
+- Pausa: com pressão 1 o importer ocupa o banco na utilização-alvo (IMPORT_UTILIZACAO_ALVO =
+  fração do tempo em que está escrevendo); a pausa escala com a pressão, então fora de pico
+  quase não há pausa e sob carga ela cresce; sempre em [IMPORT_PAUSA_MS_MIN, IMPORT_PAUSA_MS_MAX]
+- Toda decisão vai para o log ([carga <camada>] ...) e fica em .decisoes para auditoria
+- IMPORT_ADAPTATIVO=0 (ou --fixo nos importers): chunk e pausa fixos, como antes
+
+O leitor (leitor_gdb.ler_chunks_gdb(controle=...)) consulta .chunk_size entre um chunk e outro.
+"""
+
+from __future__ import annotations
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Optional
+
+from tqdm import tqdm
+
+IMPORT_ADAPTATIVO = os.getenv("IMPORT_ADAPTATIVO", "1") == "1"
+IMPORT_CHUNK_MIN = int(os.getenv("IMPORT_CHUNK_MIN", "5000"))
+IMPORT_CHUNK_MAX = int(os.getenv("IMPORT_CHUNK_MAX", "200000"))
+IMPORT_PAUSA_MS_MIN = int(os.getenv("IMPORT_PAUSA_MS_MIN", "0"))
+IMPORT_PAUSA_MS_MAX = int(os.getenv("IMPORT_PAUSA_MS_MAX", "5000"))
+IMPORT_UTILIZACAO_ALVO = float(os.getenv("IMPORT_UTILIZACAO_ALVO", "0.8"))
+IMPORT_COMMIT_ALVO_MS = float(os.getenv("IMPORT_COMMIT_ALVO_MS", "1000"))
+IMPORT_TOLERANCIA_LATENCIA = float(os.getenv("IMPORT_TOLERANCIA_LATENCIA", "2.0"))
+IMPORT_PG_STAT = os.getenv("IMPORT_PG_STAT", "0") == "1"
+IMPORT_PG_STAT_CADA = int(os.getenv("IMPORT_PG_STAT_CADA", "5"))
+IMPORT_MAX_SESSOES_ATIVAS = int(os.getenv("IMPORT_MAX_SESSOES_ATIVAS", "8"))
+IMPORT_MAX_LAG_S = float(os.getenv("IMPORT_MAX_LAG_S", "30"))
+
+ALFA_EWMA = 0.3
+DERIVA_BASE = 1.01          # a melhor latência "esquece" devagar (tabela crescendo, cache frio)
+PRESSAO_RECUO = 1.0
+PRESSAO_AVANCO = 0.5
+FATOR_AVANCO = 1.25
+
+SQL_PG_STAT = """
+    SELECT
+        (SELECT count(*) FROM pg_stat_activity
+          WHERE state = 'active' AND backend_type = 'client backend' AND pid <> pg_backend_pid()),
+        (SELECT COALESCE(max(EXTRACT(EPOCH FROM replay_lag)), 0) FROM pg_stat_replication)
+"""
+
+
+@dataclass
+class Decisao:
+    chunk: int
+    linhas: int
+    escrita_ms: float
+    commit_ms: float
+    ms_por_mil: float
+    pressao: float
+    sinal: str
+    acao: str
+    chunk_novo: int
+    pausa_ms: int
+
+    def linha(self) -> str:
+        return (f"chunk {self.chunk}: {self.linhas} linhas | escrita {self.escrita_ms:.0f} ms "
+                f"commit {self.commit_ms:.0f} ms ({self.ms_por_mil:.1f} ms/mil) | "
+                f"pressão {self.pressao:.2f} ({self.sinal}) -> {self.acao}: "
+                f"chunk {self.chunk_novo}, pausa {self.pausa_ms} ms")
+
+
+class ControleCarga:
+    """Chunk e pausa entre chunks ajustados pela latência observada no banco."""
+
+    def __init__(
+        self,
+        chunk_size: int,
+        pausa_ms: int,
+        camada: str = "",
+        adaptativo: bool = IMPORT_ADAPTATIVO,
+        chunk_min: int = IMPORT_CHUNK_MIN,
+        chunk_max: int = IMPORT_CHUNK_MAX,
+        pausa_ms_min: int = IMPORT_PAUSA_MS_MIN,
+        pausa_ms_max: int = IMPORT_PAUSA_MS_MAX,
+        utilizacao_alvo: float = IMPORT_UTILIZACAO_ALVO,
+        commit_alvo_ms: float = IMPORT_COMMIT_ALVO_MS,
+        tolerancia_latencia: float = IMPORT_TOLERANCIA_LATENCIA,
+        pg_stat: bool = IMPORT_PG_STAT,
+        pg_stat_cada: int = IMPORT_PG_STAT_CADA,
+        max_sessoes_ativas: int = IMPORT_MAX_SESSOES_ATIVAS,
+        max_lag_s: float = IMPORT_MAX_LAG_S,
+        log: Optional[Callable[[str], None]] = tqdm.write,
+        dormir: Callable[[float], None] = time.sleep,
+    ):
+        self.chunk_size = int(chunk_size)
+        self.pausa_ms = int(pausa_ms)
+        self.camada = camada
+        self.adaptativo = adaptativo
+        # o valor pedido na CLI sempre cabe nos limites
+        self.chunk_min = min(chunk_min, self.chunk_size)
+        self.chunk_max = max(chunk_max, self.chunk_size)
+        self.pausa_ms_min = pausa_ms_min
+        self.pausa_ms_max = pausa_ms_max
+        self.utilizacao_alvo = min(max(utilizacao_alvo, 0.05), 1.0)
+        self.commit_alvo_ms = commit_alvo_ms
+        self.tolerancia_latencia = tolerancia_latencia
+        self.pg_stat = pg_stat
+        self.pg_stat_cada = max(1, pg_stat_cada)
+        self.max_sessoes_ativas = max_sessoes_ativas
+        self.max_lag_s = max_lag_s
+        self._log = log
+        self._dormir = dormir
+
+        self.chunks = 0
+        self.pausa_total_s = 0.0
+        self.recuos = self.avancos = 0
+        self.decisoes: Deque[Decisao] = deque(maxlen=1000)
+        self._ewma: Optional[float] = None
+        self._base: Optional[float] = None
+        self._sessoes_ativas = 0
+        self._lag_s = 0.0
+        self._chunk_inicial = self.chunk_size
+
+    # ------------------------------------------------------------------ sinais
+    def _amostrar_banco(self, cur) -> None:
+        """Lê pg_stat_activity/pg_stat_replication logo depois do commit; sem permissão, desliga."""
+        try:
+            cur.execute(SQL_PG_STAT)
+            ativas, lag = cur.fetchone()
+            self._sessoes_ativas, self._lag_s = int(ativas or 0), float(lag or 0)
+        except Exception as e:
+            cur.connection.rollback()
+            self.pg_stat = False
+            self._emitir(f"pg_stat desligado: {e}")
+
+    def _pressao(self, ms_por_mil: float, commit_ms: float) -> tuple:
+        self._ewma = ms_por_mil if self._ewma is None else ALFA_EWMA * ms_por_mil + (1 - ALFA_EWMA) * self._ewma
+        self._base = self._ewma if self._base is None else min(self._ewma, self._base * DERIVA_BASE)
+        sinais = {
+            # 0 na melhor latência da sessão, 1 quando chega a `tolerancia_latencia` vezes ela
+            "latência": (self._ewma / self._base - 1.0) / max(self.tolerancia_latencia - 1.0, 0.01)
+                        if self._base > 0 else 0.0,
+            "commit": commit_ms / self.commit_alvo_ms if self.commit_alvo_ms > 0 else 0.0,
+        }
+        if self.pg_stat:
+            sinais["sessões"] = self._sessoes_ativas / max(1, self.max_sessoes_ativas)
+            sinais["réplica"] = self._lag_s / self.max_lag_s if self.max_lag_s > 0 else 0.0
+        sinal = max(sinais, key=sinais.get)
+        return sinais[sinal], sinal
+
+    # ------------------------------------------------------------------ API
+    def registrar(self, linhas: int, escrita_s: float, commit_s: float, cur=None) -> Optional[Decisao]:
+        """
+        Chamado depois do commit de cada chunk. Ajusta chunk_size e pausa_ms e devolve a decisão
+        (None no modo fixo). Com pg_stat ligado, `cur` é usado para amostrar o banco.
+        """
+        self.chunks += 1
+        if not self.adaptativo or linhas <= 0:
+            return None
+        if self.pg_stat and cur is not None and (self.chunks - 1) % self.pg_stat_cada == 0:
+            self._amostrar_banco(cur)
+
+        escrita_ms, commit_ms = escrita_s * 1000.0, commit_s * 1000.0
+        ms_por_mil = (escrita_ms + commit_ms) / linhas * 1000.0
+        pressao, sinal = self._pressao(ms_por_mil, commit_ms)
+
+        anterior = self.chunk_size
+        if pressao > PRESSAO_RECUO:
+            self.chunk_size = max(self.chunk_min, anterior // 2)
+            acao = "recua"
+            self.recuos += 1
+        elif pressao < PRESSAO_AVANCO:
+            self.chunk_size = min(self.chunk_max, int(anterior * FATOR_AVANCO))
+            acao = "avança"
+            self.avancos += 1
+        else:
+            acao = "mantém"
+
+        # pausa p/ utilização u: ocupado / (ocupado + pausa) = u, escalada pela pressão
+        ocupado_ms = escrita_ms + commit_ms
+        pausa = ocupado_ms * (1.0 / self.utilizacao_alvo - 1.0) * pressao
+        self.pausa_ms = int(min(self.pausa_ms_max, max(self.pausa_ms_min, pausa)))
+
+        decisao = Decisao(self.chunks, linhas, escrita_ms, commit_ms, ms_por_mil, pressao, sinal,
+                          acao, self.chunk_size, self.pausa_ms)
+        self.decisoes.append(decisao)
+        self._emitir(decisao.linha())
+        return decisao
+
+    def pausar(self) -> None:
+        if self.pausa_ms > 0:
+            self._dormir(self.pausa_ms / 1000.0)
+            self.pausa_total_s += self.pausa_ms / 1000.0
+
+    def limitar_chunk(self, teto: int) -> None:
+        """O leitor reduziu o chunk por memória (IMPORT_MAX_RSS_MB): vira o novo teto."""
+        self.chunk_max = max(self.chunk_min, min(self.chunk_max, teto))
+        self.chunk_size = min(self.chunk_size, self.chunk_max)
+
+    def resumo(self) -> str:
+        if not self.adaptativo:
+            return (f"controle de carga {self.camada}: fixo (chunk {self.chunk_size}, "
+                    f"pausa {self.pausa_ms} ms, {self.pausa_total_s:.1f}s em pausa)")
+        tamanhos = [d.chunk_novo for d in self.decisoes] or [self.chunk_size]
+        return (f"controle de carga {self.camada}: {self.chunks} chunks | chunk {self._chunk_inicial} -> "
+                f"{self.chunk_size} (min {min(tamanhos)}, max {max(tamanhos)}) | "
+                f"{self.avancos} avanços, {self.recuos} recuos | {self.pausa_total_s:.1f}s em pausa")
+
+    def _emitir(self, msg: str) -> None:
+        if self._log is not None:
+            self._log(f"[carga {self.camada}] {msg}")
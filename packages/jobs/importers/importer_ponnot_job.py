@@ -13,16 +13,24 @@ Colunas que suportamos no banco (usamos só as que existirem):
   distribuidora_id (text) | ano (int)
 
 Execução leve:
-- Fiona em streaming (não carrega tudo em RAM)
-- Chunk pequeno (default 5k)
-- COPY por micro-batches
+- Streaming em lotes colunares (pyogrio/Arrow via leitor_gdb; Fiona como fallback),
+  só com os atributos usados + x/y do Point
+- Chunks de 50k por padrão (50k–200k): a staging é da sessão (utils/staging.py), sem
+  custo de CREATE TABLE por chunk
+- COPY por micro-batches (FORMAT binary quando possível, ver utils/pg_copy.py)
+- Chunk e pausa entre chunks adaptativos pela latência de COPY/commit
+  (importers/controle_carga.py); --fixo (ou IMPORT_ADAPTATIVO=0) mantém os valores da CLI
+- --pipeline (ou PONNOT_PIPELINE=1): leitura, transformação e COPY sobrepostos
+  (PONNOT_PIPELINE_WORKERS, PONNOT_MAX_CHUNKS_EM_VOO; ver importers/pipeline.py)
 """
 
 from __future__ import annotations
-import os, io, gc, sys, time, argparse, hashlib, math
+import os, gc, sys, time, argparse, hashlib, math
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
+from contextlib import ExitStack
+from typing import Iterator, List, Dict, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 import fiona
 import psycopg2
@@ -31,9 +39,12 @@ from tqdm import tqdm
 SCHEMA = "intel_lead"
 TABLE  = f"{SCHEMA}.ponto_notavel"
 
-CHUNK_SIZE = int(os.getenv("PONNOT_CHUNK_SIZE", "5000"))
+CHUNK_SIZE = int(os.getenv("PONNOT_CHUNK_SIZE", "50000"))
 ROWS_PER_COPY = int(os.getenv("PONNOT_ROWS_PER_COPY", "20000"))
 SLEEP_MS = int(os.getenv("PONNOT_SLEEP_MS_BETWEEN", "80"))
+PIPELINE = os.getenv("PONNOT_PIPELINE", "0") == "1"
+PIPELINE_WORKERS = int(os.getenv("PONNOT_PIPELINE_WORKERS", "2"))
+MAX_CHUNKS_EM_VOO = int(os.getenv("PONNOT_MAX_CHUNKS_EM_VOO", "4"))
 
 # ---------------------- Conexão ----------------------
 def _fallback_conn():
@@ -89,29 +100,36 @@ def introspect_table(cur) -> dict:
     return {"cols": cols, "has_pn_id": "pn_id" in cols, "pn_id_has_default": pn_has_default}
 
 # ---------------------- Utils ----------------------
-def props_get_any(props: Dict, keys: List[str]) -> Optional[str]:
-    for k in keys:
-        v = props.get(k)
-        if v is not None and str(v).strip() not in ("", "nan", "NaN"):
-            return str(v)
-    return None
-
-def feature_lat_lon(feat: dict) -> Tuple[Optional[float], Optional[float]]:
-    lat = lon = None
-    geom = feat.get("geometry")
-    if geom and geom.get("type") == "Point":
-        coords = geom.get("coordinates") or []
-        if len(coords) >= 2:
-            lon, lat = coords[0], coords[1]
-    props = feat.get("properties") or {}
-    if lat is None:
-        v = props_get_any(props, ["LAT","Latitude","lat","Y","y"])
-        try: lat = float(v) if v is not None else None
-        except: lat = None
-    if lon is None:
-        v = props_get_any(props, ["LONG","Longitude","long","X","x"])
-        try: lon = float(v) if v is not None else None
-        except: lon = None
+CHAVES_PN  = ["PN_ID","PNID","ID_PN","ID","COD","CODIGO"]
+CHAVES_LAT = ["LAT","Latitude","lat","Y","y"]
+CHAVES_LON = ["LONG","Longitude","long","X","x"]
+COLUNAS_LEITURA = CHAVES_PN + CHAVES_LAT + CHAVES_LON
+
+def _como_texto(serie: pd.Series) -> pd.Series:
+    # inteiro com nulos chega como float; volta a Int64 para "123" (e não "123.0")
+    if pd.api.types.is_float_dtype(serie):
+        validos = serie.dropna()
+        if len(validos) and (validos == validos.round()).all() and validos.abs().max() < 2**53:
+            serie = serie.astype("Int64")
+    return serie.astype(object).where(serie.notna(), None).map(lambda v: v if v is None else str(v))
+
+def props_get_any(df: pd.DataFrame, keys: List[str]) -> pd.Series:
+    """Por linha, o primeiro valor não vazio (como texto) entre as colunas `keys`."""
+    out = pd.Series([None] * len(df), index=df.index, dtype=object)
+    for k in reversed(keys):  # a primeira chave da lista tem prioridade
+        if k not in df.columns:
+            continue
+        txt = _como_texto(df[k])
+        ok = txt.notna() & ~txt.fillna("").str.strip().isin(["", "nan", "NaN"])
+        out = out.mask(ok, txt)
+    return out
+
+def lat_lon(df: pd.DataFrame) -> Tuple[pd.Series, pd.Series]:
+    """Coordenadas do Point (_LAT/_LON do leitor); sem geometria, cai nos atributos."""
+    lat = pd.to_numeric(df.get("_LAT"), errors="coerce") if "_LAT" in df else pd.Series(np.nan, index=df.index)
+    lon = pd.to_numeric(df.get("_LON"), errors="coerce") if "_LON" in df else pd.Series(np.nan, index=df.index)
+    lat = lat.fillna(pd.to_numeric(props_get_any(df, CHAVES_LAT), errors="coerce"))
+    lon = lon.fillna(pd.to_numeric(props_get_any(df, CHAVES_LON), errors="coerce"))
     return lat, lon
 
 def stable_bigint_id(dist: str, ano: int, lat: Optional[float], lon: Optional[float]) -> int:
@@ -121,90 +139,178 @@ def stable_bigint_id(dist: str, ano: int, lat: Optional[float], lon: Optional[fl
     # 12 hex (~48 bits) cabe em BIGINT
     return int(hashlib.md5(base.encode()).hexdigest()[:12], 16)
 
-def copy_dataframe(cur, df: pd.DataFrame, table_full: str, columns: List[str]) -> int:
-    if df.empty: return 0
-    buf = io.StringIO()
-    df.to_csv(buf, index=False, header=False, columns=columns, na_rep='\\N')
-    buf.seek(0)
-    cur.copy_expert(
-        f"COPY {table_full} ({','.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
-        buf
-    )
-    return len(df)
+from packages.jobs.utils.pg_copy import copy_dataframe
+
+from packages.jobs.utils.staging import preparar_staging
+
+from packages.jobs.importers.pipeline import executar_pipeline
+
+try:
+    from packages.jobs.importers.leitor_gdb import contar_registros, ler_chunks_gdb
+except Exception:
+    contar_registros = ler_chunks_gdb = None
+
+from packages.jobs.importers.controle_carga import ControleCarga, IMPORT_ADAPTATIVO
+
+def total_registros(gdb: Path, layer: str) -> int:
+    if contar_registros is not None:
+        return contar_registros(gdb, layer)
+    with fiona.open(str(gdb), layer=layer) as src:
+        return len(src)
 
 # ---------------------- Núcleo ----------------------
-def processar_chunk(
-    feats: List[dict],
-    cur,
+def colunas_destino(cols_db: List[str]) -> List[str]:
+    # mapeamento mínimo para o seu banco
+    return [c for c in ["pn_id","latitude","longitude","distribuidora_id","ano"] if c in cols_db]
+
+def transformar_chunk(
+    df: pd.DataFrame,
     cols_db: List[str],
     include_pn_id: bool,
     dist_text: str,
     ano: int
-) -> int:
-    if not feats: return 0
-
-    # mapeamento mínimo para o seu banco
-    want_cols = [c for c in ["pn_id","latitude","longitude","distribuidora_id","ano"] if c in cols_db]
-
-    rows = []
-    for feat in feats:
-        props = feat.get("properties") or {}
-        lat, lon = feature_lat_lon(feat)
-
-        # pega PN_ID do GDB se existir
-        raw_pn = props_get_any(props, ["PN_ID","PNID","ID_PN","ID","COD","CODIGO"])
-        pn_val = None
-        if include_pn_id:
-            if raw_pn is not None and raw_pn.isdigit():
-                try: pn_val = int(raw_pn)
-                except: pn_val = None
-            if pn_val is None:
-                pn_val = stable_bigint_id(dist_text, ano, lat, lon)
-
-        row = {
-            "pn_id": pn_val,
-            "latitude": float(lat) if lat is not None else None,
-            "longitude": float(lon) if lon is not None else None,
-            "distribuidora_id": dist_text,
-            "ano": int(ano)
-        }
-        rows.append({k: row[k] for k in want_cols})
-
-    df = pd.DataFrame.from_records(rows, columns=want_cols)
-
-    # tipos finais
-    if "latitude" in df:  df["latitude"]  = pd.to_numeric(df["latitude"], errors="coerce")
-    if "longitude" in df: df["longitude"] = pd.to_numeric(df["longitude"], errors="coerce")
-    if "ano" in df:       df["ano"]       = pd.to_numeric(df["ano"], errors="coerce").astype("Int64")
+) -> pd.DataFrame:
+    """Parte só-CPU: atributos (+ _LON/_LAT) -> DataFrame nas colunas do destino."""
+    want_cols = colunas_destino(cols_db)
+    lat, lon = lat_lon(df)
+
+    out = pd.DataFrame(index=df.index)
+    if include_pn_id:
+        # PN_ID do GDB se for numérico; senão id determinístico por (dist, ano, lat, lon)
+        raw_pn = props_get_any(df, CHAVES_PN)
+        digito = raw_pn.fillna("").str.isdigit()
+        out["pn_id"] = [
+            int(r) if d else stable_bigint_id(dist_text, ano, None if pd.isna(la) else la, None if pd.isna(lo) else lo)
+            for r, d, la, lo in zip(raw_pn, digito, lat, lon)
+        ]
+    else:
+        out["pn_id"] = None
+    out["latitude"] = lat.astype(float)
+    out["longitude"] = lon.astype(float)
+    out["distribuidora_id"] = dist_text
+    out["ano"] = pd.Series(int(ano), index=df.index, dtype="Int64")
+    return out[want_cols].reset_index(drop=True)
+
+def gravar_chunk(cur, df: pd.DataFrame, include_pn_id: bool) -> int:
+    """Parte de banco: staging + upsert (com pn_id) ou COPY direto."""
+    if df.empty: return 0
+    want_cols = list(df.columns)
 
     # staging + upsert se pn_id faz parte do conjunto
     if include_pn_id and "pn_id" in want_cols:
-        cur.execute(f"CREATE TEMP TABLE _stg_pn (LIKE {TABLE} INCLUDING ALL) ON COMMIT DROP;")
-        copy_dataframe(cur, df, "_stg_pn", want_cols)
+        # staging da sessão (sem índices), esvaziada no commit de cada chunk
+        stg = preparar_staging(cur, TABLE, want_cols)
+        copy_dataframe(cur, df, stg, want_cols)
         cur.execute(f"""
             INSERT INTO {TABLE} ({','.join(want_cols)})
-            SELECT {','.join(want_cols)} FROM _stg_pn
+            SELECT {','.join(want_cols)} FROM {stg}
             ON CONFLICT (pn_id) DO NOTHING
         """)
-        inserted = cur.rowcount
-    else:
-        # sem pn_id -> assume que a coluna no banco tem DEFAULT/IDENTITY
-        copy_dataframe(cur, df, TABLE, want_cols)
-        # não há rowcount para COPY direto; melhor retornar tamanho do df
-        inserted = len(df)
+        return cur.rowcount
 
-    del df, rows
+    # sem pn_id -> assume que a coluna no banco tem DEFAULT/IDENTITY
+    copy_dataframe(cur, df, TABLE, want_cols)
+    # não há rowcount para COPY direto; melhor retornar tamanho do df
+    return len(df)
+
+def processar_chunk(
+    chunk: pd.DataFrame,
+    cur,
+    cols_db: List[str],
+    include_pn_id: bool,
+    dist_text: str,
+    ano: int
+) -> int:
+    if chunk.empty: return 0
+    df = transformar_chunk(chunk, cols_db, include_pn_id, dist_text, ano)
+    inserted = gravar_chunk(cur, df, include_pn_id)
+    del df
     gc.collect()
     return inserted
 
+# ---------------------- Execução ----------------------
+def ler_chunks(gdb: Path, layer: str, chunk_size: int, pbar, controle=None) -> Iterator[pd.DataFrame]:
+    """
+    Lotes colunares (leitor_gdb/pyogrio) com _LON/_LAT; sem o módulo, monta o mesmo a partir do Fiona.
+    Com `controle`, o tamanho de cada chunk vem de controle.chunk_size.
+    """
+    if ler_chunks_gdb is not None:
+        for df in ler_chunks_gdb(gdb, layer, chunk_size, max_rss_mb=0, colunas=COLUNAS_LEITURA,
+                                 ler_geometria=True, controle=controle):
+            pbar.update(len(df))
+            yield df
+        return
+
+    with fiona.open(str(gdb), layer=layer) as src:
+        linhas: List[dict] = []
+        for feat in src:
+            linha = dict(feat.get("properties") or {})
+            geom = feat.get("geometry")
+            coords = (geom.get("coordinates") or []) if geom and geom.get("type") == "Point" else []
+            linha["_LON"], linha["_LAT"] = (coords[0], coords[1]) if len(coords) >= 2 else (None, None)
+            linhas.append(linha)
+            pbar.update(1)
+            if len(linhas) >= (controle.chunk_size if controle is not None else chunk_size):
+                yield pd.DataFrame(linhas)
+                linhas = []
+        if linhas:
+            yield pd.DataFrame(linhas)
+
+def gravar_e_commitar(conn, cur, df: pd.DataFrame, include_pn_id: bool, controle) -> int:
+    """gravar_chunk + commit, medindo os dois tempos para o controle de carga, e a pausa que ele pedir."""
+    t0 = time.perf_counter()
+    inserted = gravar_chunk(cur, df, include_pn_id)
+    t1 = time.perf_counter()
+    conn.commit()
+    t2 = time.perf_counter()
+    controle.registrar(len(df), t1 - t0, t2 - t1, cur=cur)
+    controle.pausar()
+    return inserted
+
+def importar_pipeline(chunks, args, cols_db: List[str], include_pn_id: bool, dist_text: str, controle) -> int:
+    """Leitor Fiona -> N transformadores -> 1 gravador com conexão própria."""
+    total_ins = 0
+    gravador: Dict[str, object] = {}
+
+    def abrir_gravador():
+        stack = ExitStack()
+        gravador["conn"] = stack.enter_context(get_db_connection())
+        gravador["cur"] = stack.enter_context(gravador["conn"].cursor())
+        return stack
+
+    def gravar(df: pd.DataFrame) -> int:
+        nonlocal total_ins
+        total_ins += gravar_e_commitar(gravador["conn"], gravador["cur"], df, include_pn_id, controle)
+        return len(df)
+
+    stats = executar_pipeline(
+        chunks,
+        lambda chunk: transformar_chunk(chunk, cols_db, include_pn_id, dist_text, args.ano),
+        gravar,
+        n_transformadores=args.workers,
+        max_em_voo=args.max_chunks_em_voo,
+        linhas_transformadas=len,
+        ao_abrir_gravador=abrir_gravador,
+        ao_fechar_gravador=lambda stack: stack.close(),
+    )
+    for linha in stats.linhas_resumo():
+        tqdm.write(f"[pipeline] {linha}")
+    return total_ins
+
 # ---------------------- Main ----------------------
 def main():
     ap = argparse.ArgumentParser(description="Importer PONNOT (básico e alinhado ao banco minimalista)")
     ap.add_argument("--gdb", required=True)
     ap.add_argument("--distribuidora", required=True)  # vira distribuidora_id (TEXT)
     ap.add_argument("--ano", type=int, required=True)
-    ap.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
-    ap.add_argument("--sleep-ms-between", type=int, default=SLEEP_MS)
+    ap.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Linhas por chunk (50k–200k)")
+    ap.add_argument("--sleep-ms-between", type=int, default=SLEEP_MS, help="Pausa entre chunks (inicial; fixa com --fixo)")
+    ap.add_argument("--fixo", action="store_true", default=not IMPORT_ADAPTATIVO,
+                    help="Desliga o controle adaptativo: chunk e pausa fixos")
+    ap.add_argument("--pipeline", action="store_true", default=PIPELINE,
+                    help="Sobrepõe leitura, transformação e COPY em threads")
+    ap.add_argument("--workers", type=int, default=PIPELINE_WORKERS)
+    ap.add_argument("--max-chunks-em-voo", type=int, default=MAX_CHUNKS_EM_VOO)
     ap.add_argument("--modo-debug", action="store_true")
     args = ap.parse_args()
 
@@ -218,35 +324,30 @@ def main():
 
     dist_text = str(args.distribuidora)
 
-    with get_db_connection() as conn, conn.cursor() as cur, fiona.open(str(gdb), layer=layer) as src:
+    with get_db_connection() as conn, conn.cursor() as cur:
         # introspecção da tabela do SEU banco
         meta = introspect_table(cur)
         cols_db = meta["cols"]
         include_pn_id = meta["has_pn_id"] and not meta["pn_id_has_default"]
 
-        total = len(src)
-        pbar = tqdm(total=total, desc=f"PONNOT {dist_text} {args.ano}", unit="pt")
-
-        chunk: List[dict] = []
-        total_ins = 0
-
-        def flush():
-            nonlocal chunk, total_ins
-            if not chunk: return
-            total_ins += processar_chunk(chunk, cur, cols_db, include_pn_id, dist_text, args.ano)
-            conn.commit()
-            chunk = []
-            if args.sleep_ms_between > 0:
-                time.sleep(args.sleep_ms_between / 1000.0)
-
-        for feat in src:
-            chunk.append(feat)
-            if len(chunk) >= args.chunk_size:
-                flush()
-            pbar.update(1)
+        pbar = tqdm(total=total_registros(gdb, layer), desc=f"PONNOT {dist_text} {args.ano}", unit="pt")
+        controle = ControleCarga(args.chunk_size, args.sleep_ms_between, camada="PONNOT", adaptativo=not args.fixo)
+        chunks = ler_chunks(gdb, layer, args.chunk_size, pbar, controle)
+
+        if args.pipeline:
+            total_ins = importar_pipeline(chunks, args, cols_db, include_pn_id, dist_text, controle)
+        else:
+            total_ins = 0
+            for chunk in chunks:
+                if chunk.empty:
+                    continue
+                df = transformar_chunk(chunk, cols_db, include_pn_id, dist_text, args.ano)
+                total_ins += gravar_e_commitar(conn, cur, df, include_pn_id, controle)
+                del df
+                gc.collect()
 
-        flush()
         pbar.close()
+        tqdm.write(controle.resumo())
 
         if args.modo_debug:
             print(f"Inseridos ponto_notavel: {total_ins}")
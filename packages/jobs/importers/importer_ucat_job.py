@@ -1,15 +1,25 @@
 import os
-import io
 import hashlib
 import argparse
 import pandas as pd
-import geopandas as gpd
 from pathlib import Path
 from tqdm import tqdm
 from fiona import listlayers
 
-from packages.database.connection import get_db_connection
-from packages.jobs.utils.rastreio import registrar_status, gerar_import_id
+from packages.database.connection import DB_SCHEMA, get_db_connection
+from packages.jobs.utils.rastreio import registrar_status, gerar_import_id, ler_checkpoint, salvar_checkpoint
+from packages.jobs.utils.pg_copy import copy_dataframe
+from packages.jobs.utils.lead_bruto import inserir_lead_bruto
+from packages.jobs.utils.particoes import TABELAS_MENSAIS, preparar_particoes, concluir_particoes, reimportacao
+from packages.jobs.utils.serie_mensal import (
+    FORMATOS, TABELA_SERIES, formato_mensal, tabelas_destino, garantir_tabela_series, copy_series,
+)
+from packages.jobs.utils.incremental import (
+    IndiceHash, hash_chave, hash_conteudo, gravar_hashes, import_anterior, resumo_diff, descartar_indice, texto_resumo,
+)
+from packages.jobs.importers.leitor_gdb import (
+    IMPORT_CHUNK_SIZE, IMPORT_MAX_RSS_MB, colunas_mensais, contar_registros, ler_chunks_gdb, pico_rss_mb,
+)
 from packages.jobs.utils.sanitize import (
     sanitize_numeric,
     sanitize_cnae,
@@ -21,6 +31,9 @@ from packages.jobs.utils.sanitize import (
     sanitize_situacao,
     sanitize_classe,
     sanitize_pac,
+    preparar_cache_normalizacao,
+    salvar_cache_normalizacao,
+    resumo_cache_normalizacao,
 )
 
 RELEVANT_COLUMNS = [
@@ -28,6 +41,13 @@ RELEVANT_COLUMNS = [
     "SIT_ATIV", "CLAS_SUB", "CONJ", "MUN", "BRR", "CEP", "PN_CON", "DESCR",
     "CTAT", "SUB", "TIP_CC", "FAS_CON", "TEN_FORN", "CAR_INST", "DEM_CONT", "SEMRED"
 ]
+# lidas do GDB: atributos + mensais (o resto da camada nem sai do GDAL)
+COLUNAS_LEITURA = RELEVANT_COLUMNS + colunas_mensais("ENE_P_", "ENE_F_", "DEM_P_", "DEM_F_", "DIC_", "FIC_")
+# conteúdo mensal que entra no hash da UC (reimportação incremental)
+COLUNAS_HASH_MENSAIS = ["DEM_CONT", "SEMRED"] + colunas_mensais("ENE_P_", "ENE_F_", "DEM_P_", "DEM_F_", "DIC_", "FIC_")
+# coluna com algum valor assim é descartada na camada inteira (decidido antes do primeiro chunk,
+# ver colunas_descartadas)
+PADRAO_DESCARTE = "106022|YEL"
 
 def detectar_layer(gdb_path: Path) -> str:
     layers = listlayers(str(gdb_path))
@@ -38,13 +58,246 @@ def gerar_uc_id(cod_id: str, ano: int, camada: str, distribuidora_id: int) -> st
     return hashlib.sha256(base.encode()).hexdigest()
 
 def insert_copy(cur, df: pd.DataFrame, table: str, columns: list[str]):
-    buf = io.StringIO()
-    df.to_csv(buf, index=False, header=False, columns=columns, na_rep='\\N')
-    buf.seek(0)
-    cur.copy_expert(f"COPY {table} ({','.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buf)
+    copy_dataframe(cur, df, table, columns)
     tqdm.write(f"Inserido em {table}: {len(df)} registros")
 
-def importar_ucat(gdb_path: Path, distribuidora: str, ano: int, prefixo: str, modo_debug: bool = False):
+def _transformar_bruto(gdf: pd.DataFrame, ano: int, camada: str, dist_id: int, import_id: str) -> pd.DataFrame:
+    return pd.DataFrame({
+        "uc_id": [
+            gerar_uc_id(cod_id, ano, camada, dist_id)
+            for cod_id in gdf["COD_ID"]
+        ],
+        "import_id": import_id,
+        "cod_id": gdf["COD_ID"],
+        "distribuidora_id": dist_id,
+        "origem": camada,
+        "ano": ano,
+        "status": "raw",
+        "data_conexao": pd.to_datetime(gdf["DAT_CON"], errors="coerce"),
+        "cnae": sanitize_cnae(gdf["CNAE"]),
+        "grupo_tensao": sanitize_grupo_tensao(gdf["GRU_TEN"]),
+        "modalidade": sanitize_modalidade(gdf["GRU_TAR"]),
+        "tipo_sistema": sanitize_tipo_sistema(gdf["TIP_SIST"]),
+        "situacao": sanitize_situacao(gdf["SIT_ATIV"]),
+        "classe": sanitize_classe(gdf["CLAS_SUB"]),
+        "segmento": None,
+        "subestacao": sanitize_str(gdf["SUB"]),
+        "municipio_id": sanitize_int(gdf["MUN"]),
+        "bairro": sanitize_str(gdf["BRR"]),
+        "cep": sanitize_int(gdf["CEP"]),
+        "pac": sanitize_pac(gdf["PAC"]),
+        "pn_con": sanitize_str(gdf["PN_CON"]),
+        "descricao": sanitize_str(gdf["DESCR"]),
+    })
+
+def _transformar_mensais(gdf: pd.DataFrame, df_bruto: pd.DataFrame, camada: str):
+    energia_df = pd.concat([
+        pd.DataFrame({
+            "uc_id": df_bruto["uc_id"],
+            "mes": mes,
+            "energia_ponta": sanitize_numeric(gdf.get(f"ENE_P_{mes:02d}")),
+            "energia_fora_ponta": sanitize_numeric(gdf.get(f"ENE_F_{mes:02d}")),
+            "energia_total": sanitize_numeric(gdf.get(f"ENE_P_{mes:02d}")) + sanitize_numeric(gdf.get(f"ENE_F_{mes:02d}")),
+            "origem": camada,
+            "import_id": df_bruto["import_id"],
+        }) for mes in range(1, 13)
+    ]).reset_index(drop=True)
+
+    demanda_df = pd.concat([
+        pd.DataFrame({
+            "uc_id": df_bruto["uc_id"],
+            "mes": mes,
+            "demanda_ponta": sanitize_numeric(gdf.get(f"DEM_P_{mes:02d}")),
+            "demanda_fora_ponta": sanitize_numeric(gdf.get(f"DEM_F_{mes:02d}")),
+            "demanda_total": sanitize_numeric(gdf.get(f"DEM_P_{mes:02d}")) + sanitize_numeric(gdf.get(f"DEM_F_{mes:02d}")),
+            "demanda_contratada": sanitize_numeric(gdf.get("DEM_CONT")),
+            "origem": camada,
+            "import_id": df_bruto["import_id"],
+        }) for mes in range(1, 13)
+    ]).reset_index(drop=True)
+
+    qualidade_df = pd.concat([
+        pd.DataFrame({
+            "uc_id": df_bruto["uc_id"],
+            "mes": mes,
+            "dic": sanitize_numeric(gdf.get(f"DIC_{mes:02d}")),
+            "fic": sanitize_numeric(gdf.get(f"FIC_{mes:02d}")),
+            "sem_rede": sanitize_numeric(gdf.get("SEMRED")),
+            "origem": camada,
+            "import_id": df_bruto["import_id"],
+        }) for mes in range(1, 13)
+    ]).reset_index(drop=True)
+
+    return energia_df, demanda_df, qualidade_df
+
+def _hashes(gdf: pd.DataFrame, df_bruto: pd.DataFrame) -> tuple:
+    """(chave, hash) por UC: atributos já normalizados (sem os que mudam a cada importação) + mensais."""
+    conteudo = df_bruto.drop(columns=["uc_id", "import_id", "cod_id", "ano", "status"])
+    for col in COLUNAS_HASH_MENSAIS:
+        conteudo[col] = sanitize_numeric(gdf[col]).to_numpy() if col in gdf.columns else None
+    return hash_chave(df_bruto["cod_id"].astype(str)), hash_conteudo(conteudo, conteudo.columns.tolist())
+
+def colunas_descartadas(gdb_path: Path, layer: str, chunk_size: int, max_rss_mb: int) -> set[str]:
+    """
+    Colunas lidas com algum valor casando PADRAO_DESCARTE em qualquer feature da camada.
+    Uma passada só de leitura antes da importação: decidido por chunk, a mesma coluna sumiria
+    só nos chunks com a linha culpada e o conteúdo gravado (e o hash incremental) passaria a
+    depender do tamanho do chunk.
+    """
+    descartar: set[str] = set()
+    for gdf in ler_chunks_gdb(gdb_path, layer, chunk_size, max_rss_mb, colunas=COLUNAS_LEITURA):
+        descartar.update(c for c in gdf.columns if c not in descartar
+                         and gdf[c].astype(str).str.contains(PADRAO_DESCARTE, na=False).any())
+    return descartar
+
+def _com_lead_bruto_id(df: pd.DataFrame, id_map: dict) -> pd.DataFrame:
+    ids = df["uc_id"].map(id_map)
+    ok = ids.notna()
+    return df.loc[ok].assign(lead_bruto_id=ids[ok]).drop(columns=["uc_id"])
+
+def processar_chunk(conn, gdf: pd.DataFrame, ano: int, camada: str, import_id: str, estado: dict) -> tuple[int, int, int, int]:
+    """
+    Transforma e grava um chunk (lead_bruto + mensais) e faz commit.
+    `estado` carrega o que precisa valer para a camada inteira: dist_id, uc_ids já vistos,
+    as colunas descartadas (colunas_descartadas),
+    o checkpoint (gravado na mesma transação do chunk), a partição de destino de cada tabela
+    gravada (mensais longas e/ou lead_serie_mensal, conforme o formato) e,
+    no modo incremental, o índice de hashes da importação anterior (só UCs novas/alteradas
+    seguem para lead_bruto).
+    """
+    lidas = len(gdf)
+    gdf = gdf.replace(["None", "nan", "", "***", "-"], None)
+    gdf = gdf.drop(columns=[col for col in gdf.columns if col in estado["descartadas"]])
+
+    for col in RELEVANT_COLUMNS:
+        if col not in gdf.columns:
+            gdf[col] = None
+
+    dist_ids = set(sanitize_int(gdf["DIST"]).dropna().unique())
+    if estado["dist_id"] is not None:
+        dist_ids.add(estado["dist_id"])
+    if len(dist_ids) != 1:
+        raise ValueError(f"Esperado um único código de distribuidora, mas encontrei: {sorted(dist_ids)}")
+    dist_id = estado["dist_id"] = int(dist_ids.pop())
+
+    df_bruto = _transformar_bruto(gdf, ano, camada, dist_id, import_id)
+
+    # duplicados dentro do chunk e contra chunks anteriores
+    dup = df_bruto.duplicated(subset=["uc_id"]) | df_bruto["uc_id"].isin(estado["vistos"])
+    if dup.any():
+        tqdm.write(f"{int(dup.sum())} registros duplicados de uc_id detectados e ignorados.")
+        df_bruto = df_bruto.loc[~dup].reset_index(drop=True)
+        gdf = gdf.loc[~dup.to_numpy()].reset_index(drop=True)
+    estado["vistos"].update(df_bruto["uc_id"])
+
+    # índice de hashes desta importação sempre completo; o filtro só vale no modo incremental
+    chaves, hashes = _hashes(gdf, df_bruto)
+    with conn.cursor() as cur:
+        gravadas = gravar_hashes(cur, import_id, chaves, hashes)
+    if estado.get("indice") is not None:
+        emitir = estado["indice"].mascara_emitir(chaves, hashes, gravadas)
+        df_bruto = df_bruto.loc[emitir].reset_index(drop=True)
+        gdf = gdf.loc[emitir].reset_index(drop=True)
+
+    if df_bruto.empty:
+        _gravar_checkpoint(conn, estado, lidas, 0)
+        conn.commit()
+        return 0, 0, 0, 0
+
+    energia_df, demanda_df, qualidade_df = _transformar_mensais(gdf, df_bruto, camada)
+
+    # COPY + INSERT ... RETURNING: o mapeamento uc_id -> id vem junto, sem reler lead_bruto.
+    # Reimportação (partições trocadas no fim): as UCs já existem, o mapa precisa cobri-las
+    idempotente = reimportacao(estado.get("destinos") or {})
+    with conn.cursor() as cur:
+        _, id_map = inserir_lead_bruto(cur, df_bruto, df_bruto.columns.tolist(), DB_SCHEMA, idempotente=idempotente)
+    tqdm.write(f"Inserido em lead_bruto: {len(id_map)} registros")
+
+    energia_df = _com_lead_bruto_id(energia_df, id_map)
+    demanda_df = _com_lead_bruto_id(demanda_df, id_map)
+    qualidade_df = _com_lead_bruto_id(qualidade_df, id_map)
+
+    destinos = estado.get("destinos") or {t: t for t in TABELAS_MENSAIS}
+    mensais = {"lead_energia_mensal": energia_df, "lead_demanda_mensal": demanda_df,
+               "lead_qualidade_mensal": qualidade_df}
+    with conn.cursor() as cur:
+        for tabela, df in mensais.items():
+            if tabela in destinos:
+                insert_copy(cur, df, destinos[tabela], df.columns.tolist())
+        if TABELA_SERIES in destinos:
+            n = copy_series(cur, mensais, destinos[TABELA_SERIES])
+            tqdm.write(f"Inserido em {TABELA_SERIES}: {n} séries")
+    _gravar_checkpoint(conn, estado, lidas, len(df_bruto))
+    conn.commit()
+
+    # contagem só das mensais longas gravadas (no formato compacto, 0)
+    n = {t: len(df) if t in destinos else 0 for t, df in mensais.items()}
+    return len(df_bruto), n["lead_energia_mensal"], n["lead_demanda_mensal"], n["lead_qualidade_mensal"]
+
+def _gravar_checkpoint(conn, estado: dict, lidas: int, inseridas: int) -> None:
+    ck = estado.get("checkpoint")
+    if ck is None:
+        return
+    ck["offset"] += lidas
+    ck["linhas"] += inseridas
+    with conn.cursor() as cur:
+        salvar_checkpoint(cur, ck["import_id"], ck["camada"], ck["layer"], ck["offset"], ck["linhas"], ck["total"])
+
+def _retomada(conn, import_id: str, layer: str, total: int, estado: dict) -> int:
+    """
+    Ponto de retomada (feature) do checkpoint deste import_id, 0 se não houver.
+    Recarrega os uc_ids já gravados para a deduplicação entre chunks continuar valendo.
+    """
+    with conn.cursor() as cur:
+        ck = ler_checkpoint(cur, import_id)
+        if not ck or ck["layer"] != layer or ck["offset"] >= total:
+            conn.commit()
+            return 0
+        cur.execute("SELECT uc_id FROM lead_bruto WHERE import_id = %s", (import_id,))
+        estado["vistos"].update(uc_id for (uc_id,) in cur.fetchall())
+    conn.commit()
+    estado["checkpoint"]["offset"], estado["checkpoint"]["linhas"] = ck["offset"], ck["linhas"]
+    tqdm.write(f"Retomando do checkpoint: feature {ck['offset']}/{total} ({ck['linhas']} lead_bruto já gravados)")
+    return ck["offset"]
+
+def _base_incremental(conn, import_id: str, distribuidora: str, camada: str, inicio: int, incremental: bool, estado: dict):
+    """
+    Importação anterior (base do diff). Sem retomada, o índice de hashes deste import_id
+    recomeça; no modo incremental, o índice da anterior vai para estado["indice"].
+    """
+    with conn.cursor() as cur:
+        if not inicio:
+            descartar_indice(cur, import_id)
+        anterior = import_anterior(cur, import_id, distribuidora, camada)
+        if incremental and anterior:
+            estado["indice"] = IndiceHash.carregar(cur, anterior)
+    conn.commit()
+    if incremental:
+        tqdm.write(f"Incremental: base {anterior} ({len(estado['indice'])} UCs)" if anterior
+                   else "Incremental: sem importação anterior com índice; importando tudo")
+    return anterior
+
+def _descartar_base(anterior) -> None:
+    """Esta importação passa a ser a base da próxima; o índice da anterior não é mais necessário."""
+    if anterior:
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                descartar_indice(cur, anterior)
+            conn.commit()
+
+def importar_ucat(
+    gdb_path: Path,
+    distribuidora: str,
+    ano: int,
+    prefixo: str,
+    modo_debug: bool = False,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+    max_rss_mb: int = IMPORT_MAX_RSS_MB,
+    do_zero: bool = False,
+    incremental: bool = False,
+    formato: str | None = None,
+):
+    formato = formato_mensal(formato)
     camada = "UCAT"
     import_id = gerar_import_id(prefixo, ano, camada)
     registrar_status(prefixo, ano, camada, "running", distribuidora_nome=distribuidora)
@@ -54,127 +307,76 @@ def importar_ucat(gdb_path: Path, distribuidora: str, ano: int, prefixo: str, mo
         if not layer:
             raise Exception("Camada UCAT não encontrada no GDB.")
 
-        tqdm.write(f"Lendo camada '{layer}'")
-        gdf = gpd.read_file(str(gdb_path), layer=layer)
-        if gdf.empty:
+        tqdm.write(f"Lendo camada '{layer}' em chunks de {chunk_size}")
+        total = contar_registros(gdb_path, layer)
+        if total == 0:
             registrar_status(prefixo, ano, camada, "no_new_rows", import_id=import_id)
             tqdm.write("Camada UCAT vazia. Nada a importar.")
             return
 
-        gdf.replace(["None", "nan", "", "***", "-"], None, inplace=True)
-        gdf.drop(columns=[col for col in gdf.columns if gdf[col].astype(str).str.contains("106022|YEL", na=False).any()], inplace=True)
-
-        for col in RELEVANT_COLUMNS:
-            if col not in gdf.columns:
-                gdf[col] = None
-
-        dist_id = sanitize_int(gdf["DIST"]).dropna().unique()
-        if len(dist_id) != 1:
-            raise ValueError(f"Esperado um único código de distribuidora, mas encontrei: {dist_id}")
-        dist_id = int(dist_id[0])
-
-        tqdm.write("Transformando UCAT para lead_bruto")
-        df_bruto = pd.DataFrame({
-            "uc_id": [
-                gerar_uc_id(row["COD_ID"], ano, camada, dist_id)
-                for _, row in gdf.iterrows()
-            ],
-            "import_id": import_id,
-            "cod_id": gdf["COD_ID"],
-            "distribuidora_id": dist_id,
-            "origem": camada,
-            "ano": ano,
-            "status": "raw",
-            "data_conexao": pd.to_datetime(gdf["DAT_CON"], errors="coerce"),
-            "cnae": sanitize_cnae(gdf["CNAE"]),
-            "grupo_tensao": gdf["GRU_TEN"].apply(sanitize_grupo_tensao),
-            "modalidade": gdf["GRU_TAR"].apply(sanitize_modalidade),
-            "tipo_sistema": gdf["TIP_SIST"].apply(sanitize_tipo_sistema),
-            "situacao": gdf["SIT_ATIV"].apply(sanitize_situacao),
-            "classe": gdf["CLAS_SUB"].apply(sanitize_classe),
-            "segmento": None,
-            "subestacao": sanitize_str(gdf["SUB"]),
-            "municipio_id": sanitize_int(gdf["MUN"]),
-            "bairro": sanitize_str(gdf["BRR"]),
-            "cep": sanitize_int(gdf["CEP"]),
-            "pac": gdf["PAC"].apply(sanitize_pac),
-            "pn_con": sanitize_str(gdf["PN_CON"]),
-            "descricao": sanitize_str(gdf["DESCR"]),
-        })
-
-        if df_bruto.empty:
-            registrar_status(prefixo, ano, camada, "no_new_rows", import_id=import_id)
-            tqdm.write("Nenhum registro válido após transformação.")
-            return
-
-        if df_bruto.duplicated(subset=["uc_id"]).any():
-            qtd = df_bruto.duplicated(subset=["uc_id"], keep=False).sum()
-            tqdm.write(f"{qtd} registros duplicados de uc_id detectados e ignorados.")
-            df_bruto = df_bruto.drop_duplicates(subset=["uc_id"], keep="first").reset_index(drop=True)
-            gdf = gdf.loc[df_bruto.index].reset_index(drop=True)
-
-        energia_df = pd.concat([
-            pd.DataFrame({
-                "uc_id": df_bruto["uc_id"],
-                "mes": mes,
-                "energia_ponta": sanitize_numeric(gdf.get(f"ENE_P_{mes:02d}")),
-                "energia_fora_ponta": sanitize_numeric(gdf.get(f"ENE_F_{mes:02d}")),
-                "energia_total": sanitize_numeric(gdf.get(f"ENE_P_{mes:02d}")) + sanitize_numeric(gdf.get(f"ENE_F_{mes:02d}")),
-                "origem": camada
-            }) for mes in range(1, 13)
-        ]).reset_index(drop=True)
-
-        demanda_df = pd.concat([
-            pd.DataFrame({
-                "uc_id": df_bruto["uc_id"],
-                "mes": mes,
-                "demanda_ponta": sanitize_numeric(gdf.get(f"DEM_P_{mes:02d}")),
-                "demanda_fora_ponta": sanitize_numeric(gdf.get(f"DEM_F_{mes:02d}")),
-                "demanda_total": sanitize_numeric(gdf.get(f"DEM_P_{mes:02d}")) + sanitize_numeric(gdf.get(f"DEM_F_{mes:02d}")),
-                "demanda_contratada": sanitize_numeric(gdf.get("DEM_CONT")),
-                "origem": camada
-            }) for mes in range(1, 13)
-        ]).reset_index(drop=True)
-
-        qualidade_df = pd.concat([
-            pd.DataFrame({
-                "uc_id": df_bruto["uc_id"],
-                "mes": mes,
-                "dic": sanitize_numeric(gdf.get(f"DIC_{mes:02d}")),
-                "fic": sanitize_numeric(gdf.get(f"FIC_{mes:02d}")),
-                "sem_rede": sanitize_numeric(gdf.get("SEMRED")),
-                "origem": camada
-            }) for mes in range(1, 13)
-        ]).reset_index(drop=True)
-
+        descartadas = colunas_descartadas(gdb_path, layer, chunk_size, max_rss_mb)
+        if descartadas:
+            tqdm.write(f"Colunas descartadas na camada ({PADRAO_DESCARTE}): {', '.join(sorted(descartadas))}")
+        estado = {
+            "dist_id": None, "vistos": set(), "indice": None, "destinos": None, "descartadas": descartadas,
+            "checkpoint": {"import_id": import_id, "camada": camada, "layer": layer,
+                           "total": total, "offset": 0, "linhas": 0},
+        }
+        n_bruto = n_energia = n_demanda = n_qualidade = 0
         with get_db_connection() as conn:
+            try:
+                with conn.cursor() as cur:
+                    preparar_cache_normalizacao(cur)
+            except Exception as e:
+                tqdm.write(f"Cache de normalização sem tabelas de domínio: {e}")
+            conn.rollback()
+            inicio = 0 if do_zero else _retomada(conn, import_id, layer, total, estado)
+            anterior = _base_incremental(conn, import_id, distribuidora, camada, inicio, incremental, estado)
+            # partição de cada tabela gravada (reimportação: tabela de troca, trocada no fim)
+            tabelas = tabelas_destino(formato, TABELAS_MENSAIS)
+            if TABELA_SERIES in tabelas:
+                with conn.cursor() as cur:
+                    garantir_tabela_series(cur)
+                conn.commit()
+            estado["destinos"] = preparar_particoes(conn, import_id, tabelas, retomando=inicio > 0,
+                                                    descricao=f"{distribuidora} {ano} {camada}")
+            n_bruto = estado["checkpoint"]["linhas"]
+            pbar = tqdm(total=total, initial=inicio, desc=f"UCAT {distribuidora} {ano}", unit="reg")
+            for gdf in ler_chunks_gdb(gdb_path, layer, chunk_size, max_rss_mb, colunas=COLUNAS_LEITURA, inicio=inicio):
+                b, e, d, q = processar_chunk(conn, gdf, ano, camada, import_id, estado)
+                n_bruto += b; n_energia += e; n_demanda += d; n_qualidade += q
+                pbar.update(len(gdf))
+                del gdf
+            pbar.close()
+            concluir_particoes(conn, import_id, estado["destinos"])
             with conn.cursor() as cur:
-                insert_copy(cur, df_bruto, "lead_bruto", df_bruto.columns.tolist())
+                resumo = resumo_diff(cur, import_id, anterior)
             conn.commit()
+        tqdm.write(texto_resumo(resumo))
+        salvar_cache_normalizacao()
+        tqdm.write(resumo_cache_normalizacao())
 
-            df_ids = pd.read_sql("""
-                SELECT id AS lead_bruto_id, uc_id FROM lead_bruto WHERE import_id = %s
-            """, conn, params=(import_id,))
-
-        energia_df = energia_df.merge(df_ids, on="uc_id").drop(columns=["uc_id"])
-        demanda_df = demanda_df.merge(df_ids, on="uc_id").drop(columns=["uc_id"])
-        qualidade_df = qualidade_df.merge(df_ids, on="uc_id").drop(columns=["uc_id"])
+        pico = pico_rss_mb()
+        pico_txt = f"{pico:.0f} MB" if pico is not None else "n/d"
+        tqdm.write(f"Pico de memória (RSS): {pico_txt}")
 
-        with get_db_connection() as conn:
-            with conn.cursor() as cur:
-                insert_copy(cur, energia_df, "lead_energia_mensal", energia_df.columns.tolist())
-                insert_copy(cur, demanda_df, "lead_demanda_mensal", demanda_df.columns.tolist())
-                insert_copy(cur, qualidade_df, "lead_qualidade_mensal", qualidade_df.columns.tolist())
-            conn.commit()
+        if n_bruto == 0:
+            registrar_status(prefixo, ano, camada, "no_new_rows", import_id=import_id,
+                             observacoes=texto_resumo(resumo), resumo_diff=resumo)
+            _descartar_base(anterior)
+            tqdm.write("Nenhum registro novo ou válido após transformação.")
+            return
 
         registrar_status(
             prefixo, ano, camada, "completed",
-            linhas_processadas=len(df_bruto),
-            observacoes=f"{len(energia_df)} energia | {len(demanda_df)} demanda | {len(qualidade_df)} qualidade",
-            import_id=import_id
+            linhas_processadas=n_bruto,
+            observacoes=f"{n_energia} energia | {n_demanda} demanda | {n_qualidade} qualidade | pico RSS {pico_txt} | {texto_resumo(resumo)}",
+            import_id=import_id,
+            resumo_diff=resumo,
         )
+        _descartar_base(anterior)
 
-        tqdm.write(f"Importação UCAT finalizada com {len(df_bruto)} registros")
+        tqdm.write(f"Importação UCAT finalizada com {n_bruto} registros")
 
     except Exception as e:
         tqdm.write(f"Erro ao importar UCAT: {e}")
@@ -192,7 +394,14 @@ if __name__ == "__main__":
     parser.add_argument("--ano", required=True, type=int)
     parser.add_argument("--distribuidora", required=True)
     parser.add_argument("--prefixo", required=True)
-    parser.add_argument("--modo_debug", action="store_true")
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+    parser.add_argument("--max-rss-mb", type=int, default=IMPORT_MAX_RSS_MB)
+    parser.add_argument("--do-zero", action="store_true", help="Ignora o checkpoint e reimporta a camada inteira")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Grava só UCs novas/alteradas em relação à última importação da distribuidora")
+    parser.add_argument("--formato-mensal", choices=FORMATOS, default=None,
+                        help="linhas (12 por UC), compacto (real[12] em lead_serie_mensal) ou ambos; default MENSAL_FORMATO")
+    parser.add_argument("--modo_debug", "--modo-debug", dest="modo_debug", action="store_true")
     args = parser.parse_args()
 
     importar_ucat(
@@ -200,5 +409,10 @@ if __name__ == "__main__":
         distribuidora=args.distribuidora,
         ano=args.ano,
         prefixo=args.prefixo,
-        modo_debug=args.modo_debug
+        modo_debug=args.modo_debug,
+        chunk_size=args.chunk_size,
+        max_rss_mb=args.max_rss_mb,
+        do_zero=args.do_zero,
+        incremental=args.incremental,
+        formato=args.formato_mensal,
     )
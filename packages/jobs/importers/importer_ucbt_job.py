@@ -3,39 +3,68 @@
 """
 Importer UCBT – alta escala, baixa RAM.
 
-- Streaming FileGDB (Fiona)
-- Chunks pequenos (default 5k) com pausa curta entre chunks
-- COPY em micro-batches (default 20k linhas)
-- lead_bruto idempotente por uc_id
+- Streaming FileGDB em lotes colunares (pyogrio/Arrow via leitor_gdb; Fiona como fallback)
+- Chunks de 50k por padrão (50k–200k); a staging de lead_bruto é da sessão
+  (utils/staging.py), sem CREATE TABLE por chunk
+- Chunk e pausa entre chunks adaptativos: crescem fora de pico e recuam quando COPY/commit
+  ficam lentos (importers/controle_carga.py; knobs IMPORT_CHUNK_MIN/MAX, IMPORT_PAUSA_MS_MAX,
+  IMPORT_UTILIZACAO_ALVO, IMPORT_PG_STAT...); --fixo volta ao chunk/pausa fixos
+- COPY em micro-batches (default 20k linhas), FORMAT binary quando possível (COPY_FORMAT)
+- lead_bruto idempotente por uc_id; mapeamento uc_id -> id no próprio INSERT (RETURNING)
 - Mensais: energia_total, demanda_total(+contratada), qualidade(dic/fic/sem_rede)
+  montados de forma colunar (um sanitize por coluna mensal, ids em lote)
 - Fallback automático: se não houver UNIQUE(uc_id), troca ON CONFLICT por anti-join
+- Retomável: a cada commit grava o checkpoint (features lidas, linhas gravadas) em
+  import_checkpoint na mesma transação; um retry do mesmo import_id pula direto para ele
+  (--do-zero ignora o checkpoint). O progresso (%) aparece em /v1/admin/import-progress
+- Reimportação incremental (--incremental): hash de conteúdo por UC (chave = COD_ID) comparado
+  com o índice da última importação da distribuidora (utils/incremental.py); só UCs novas ou
+  alteradas vão para lead_bruto/mensais. O diff (novas/alteradas/iguais/removidas) fica em
+  import_status.resumo_diff em toda importação
+- Mensais particionadas por import_id (distribuidora/ano/camada; utils/particoes.py): o COPY vai
+  direto para a partição; reimportar a mesma camada carrega numa tabela à parte e troca as
+  partições no fim (DETACH/ATTACH), sem DELETE das linhas antigas
+- Formato das mensais (--formato-mensal / MENSAL_FORMATO): "linhas" (12 linhas por UC em cada
+  mensal), "compacto" (uma linha por UC por medida com real[12] em lead_serie_mensal;
+  utils/serie_mensal.py) ou "ambos"
 
 Knobs (env ou CLI):
-- UCBT_CHUNK_SIZE (default 5000)
-- UCBT_ROWS_PER_COPY (default 20000)
-- UCBT_SLEEP_MS_BETWEEN (default 120)
+- UCBT_CHUNK_SIZE (default 50000)
+- UCBT_ROWS_PER_COPY (default 100000)
+- UCBT_SLEEP_MS_BETWEEN (default 120)  -> pausa inicial (fixa com --fixo / IMPORT_ADAPTATIVO=0)
+- UCBT_PIPELINE=1 / --pipeline        -> leitura, transformação e COPY sobrepostos (threads)
+- UCBT_PIPELINE_WORKERS (default 2)   -> transformadores no modo pipeline
+- UCBT_MAX_CHUNKS_EM_VOO (default 4)  -> backpressure: chunks em memória no modo pipeline
+- UCBT_PIPELINE_PROCESSOS=1 / --processos -> transformadores em processos (CPU em Python puro)
 - --distribuidora-id-as-text  -> usa TEXT para distribuidora_id (caso seu schema tenha TEXT)
 """
 
 from __future__ import annotations
-import os, io, gc, sys, uuid, time, argparse, hashlib
+import os, gc, sys, time, argparse, hashlib
 from pathlib import Path
-from typing import List, Tuple, Dict, Optional
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from functools import partial
+from typing import Iterator, List, Tuple, Dict, Optional
 
+import numpy as np
 import pandas as pd
 import fiona
 import psycopg2
 from psycopg2 import sql
-from psycopg2.errors import InvalidColumnReference
 from tqdm import tqdm
 
 # --------------------------------------------------------------------------------------
 # Config
 # --------------------------------------------------------------------------------------
 SCHEMA = "intel_lead"
-UCBT_CHUNK_SIZE = int(os.getenv("UCBT_CHUNK_SIZE", "5000"))
-UCBT_ROWS_PER_COPY = int(os.getenv("UCBT_ROWS_PER_COPY", "20000"))
+UCBT_CHUNK_SIZE = int(os.getenv("UCBT_CHUNK_SIZE", "50000"))
+UCBT_ROWS_PER_COPY = int(os.getenv("UCBT_ROWS_PER_COPY", "100000"))
 UCBT_SLEEP_MS_BETWEEN = int(os.getenv("UCBT_SLEEP_MS_BETWEEN", "120"))
+UCBT_PIPELINE = os.getenv("UCBT_PIPELINE", "0") == "1"
+UCBT_PIPELINE_WORKERS = int(os.getenv("UCBT_PIPELINE_WORKERS", "2"))
+UCBT_MAX_CHUNKS_EM_VOO = int(os.getenv("UCBT_MAX_CHUNKS_EM_VOO", "4"))
+UCBT_PIPELINE_PROCESSOS = os.getenv("UCBT_PIPELINE_PROCESSOS", "0") == "1"
 
 # --------------------------------------------------------------------------------------
 # Conexão
@@ -65,7 +94,8 @@ except Exception:
 try:
     from packages.jobs.utils.sanitize import (
         sanitize_cnae, sanitize_grupo_tensao, sanitize_modalidade, sanitize_tipo_sistema,
-        sanitize_situacao, sanitize_classe, sanitize_pac, sanitize_str, sanitize_int, sanitize_numeric
+        sanitize_situacao, sanitize_classe, sanitize_pac, sanitize_str, sanitize_int, sanitize_numeric,
+        preparar_cache_normalizacao, salvar_cache_normalizacao, resumo_cache_normalizacao,
     )
 except Exception:
     def sanitize_cnae(x): return pd.Series(x, dtype="string")
@@ -78,17 +108,59 @@ except Exception:
     def sanitize_str(x): return pd.Series(x, dtype="string")
     def sanitize_int(x): return pd.to_numeric(x, errors="coerce").astype("Int64")
     def sanitize_numeric(x): return pd.to_numeric(x, errors="coerce")
+    def preparar_cache_normalizacao(cur=None): return 0
+    def salvar_cache_normalizacao(): return 0
+    def resumo_cache_normalizacao(): return "cache de normalização: indisponível"
 
 # --------------------------------------------------------------------------------------
-# Rastreio
+# COPY (binary com fallback CSV; ver packages/jobs/utils/pg_copy.py) e lead_bruto com RETURNING
+# --------------------------------------------------------------------------------------
+from packages.jobs.utils.pg_copy import copy_dataframe
+
+from packages.jobs.utils.lead_bruto import inserir_lead_bruto
+
+# --------------------------------------------------------------------------------------
+# Leitura colunar do GDB (pyogrio/Arrow; ver packages/jobs/importers/leitor_gdb.py)
 # --------------------------------------------------------------------------------------
 try:
-    from packages.jobs.utils.rastreio import registrar_status, gerar_import_id
+    from packages.jobs.importers.leitor_gdb import contar_registros, ler_chunks_gdb
 except Exception:
-    def registrar_status(*args, **kwargs): pass
-    def gerar_import_id(distribuidora_nome: str, ano: int, camada: str) -> str:
-        base = f"{distribuidora_nome}-{ano}-{camada}"
-        return hashlib.md5(base.encode()).hexdigest()[:16]
+    contar_registros = ler_chunks_gdb = None
+
+# --------------------------------------------------------------------------------------
+# Pipeline (leitor -> transformadores -> gravador)
+# --------------------------------------------------------------------------------------
+from packages.jobs.importers.pipeline import executar_pipeline
+
+# --------------------------------------------------------------------------------------
+# Controle de carga (chunk/pausa adaptativos; ver packages/jobs/importers/controle_carga.py)
+# --------------------------------------------------------------------------------------
+from packages.jobs.importers.controle_carga import ControleCarga, IMPORT_ADAPTATIVO
+
+# --------------------------------------------------------------------------------------
+# Rastreio
+# --------------------------------------------------------------------------------------
+from packages.jobs.utils.rastreio import registrar_status, gerar_import_id, ler_checkpoint, salvar_checkpoint
+
+# --------------------------------------------------------------------------------------
+# Reimportação incremental (hash de conteúdo por UC; ver packages/jobs/utils/incremental.py)
+# --------------------------------------------------------------------------------------
+from packages.jobs.utils.incremental import (
+    IndiceHash, hash_chave, hash_conteudo, gravar_hashes,
+    import_anterior, resumo_diff, descartar_indice, texto_resumo,
+)
+
+# --------------------------------------------------------------------------------------
+# Partições das mensais (ver packages/jobs/utils/particoes.py)
+# --------------------------------------------------------------------------------------
+from packages.jobs.utils.particoes import preparar_particoes, concluir_particoes
+
+# --------------------------------------------------------------------------------------
+# Séries mensais compactas (ver packages/jobs/utils/serie_mensal.py)
+# --------------------------------------------------------------------------------------
+from packages.jobs.utils.serie_mensal import (
+    FORMATOS, TABELA_SERIES, formato_mensal, tabelas_destino, garantir_tabela_series, copy_series,
+)
 
 # --------------------------------------------------------------------------------------
 # Helpers
@@ -112,103 +184,195 @@ def gerar_uc_id(cod_id: str, ano: int, camada: str, dist_id: int | str) -> str:
     h = hashlib.md5(base.encode()).hexdigest()
     return f"UC:{h}"
 
-def copy_dataframe(cur, df: pd.DataFrame, table_full: str, columns: List[str]) -> int:
+def copy_frame_buffered(cur, df: pd.DataFrame, table_full: str, columns: List[str], rows_per_copy: int) -> int:
     if df.empty:
         return 0
-    buf = io.StringIO()
-    df.to_csv(buf, index=False, header=False, columns=columns, na_rep='\\N')
-    buf.seek(0)
-    cur.copy_expert(
-        f"COPY {table_full} ({','.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
-        buf
-    )
-    return len(df)
-
-def copy_rows_buffered(cur, table_full: str, columns: List[str], rows: List[Tuple], rows_per_copy: int) -> int:
-    if not rows:
-        return 0
     total = 0
-    for i in range(0, len(rows), rows_per_copy):
-        chunk = rows[i:i + rows_per_copy]
-        df = pd.DataFrame.from_records(chunk, columns=columns)
-        total += copy_dataframe(cur, df, table_full, columns)
-        del df
-        gc.collect()
+    for i in range(0, len(df), rows_per_copy):
+        total += copy_dataframe(cur, df.iloc[i:i + rows_per_copy], table_full, columns)
     return total
 
 # --------------------------------------------------------------------------------------
-# Núcleo
+# Mensais (colunar)
 # --------------------------------------------------------------------------------------
-def insert_lead_bruto_with_idempotency(cur, df_bruto: pd.DataFrame, colunas_bruto: List[str]) -> int:
-    """Insere lead_bruto idempotente. Tenta ON CONFLICT(uc_id). Se não houver UNIQUE, usa anti-join."""
-    # staging
-    cur.execute(f"CREATE TEMP TABLE _stg_lb (LIKE {SCHEMA}.lead_bruto INCLUDING ALL) ON COMMIT DROP;")
-    copy_dataframe(cur, df_bruto, f"_stg_lb", colunas_bruto)
-
-    try:
-        cur.execute(f"""
-            INSERT INTO {SCHEMA}.lead_bruto ({','.join(colunas_bruto)})
-            SELECT {','.join(colunas_bruto)} FROM _stg_lb
-            ON CONFLICT (uc_id) DO NOTHING
-        """)
-        return cur.rowcount
-    except InvalidColumnReference:
-        # fallback: não há UNIQUE(uc_id)
-        cur.execute(f"""
-            INSERT INTO {SCHEMA}.lead_bruto ({','.join(colunas_bruto)})
-            SELECT {','.join('s.' + c for c in colunas_bruto)}
-            FROM _stg_lb s
-            WHERE NOT EXISTS (
-                SELECT 1 FROM {SCHEMA}.lead_bruto t WHERE t.uc_id = s.uc_id
-            )
-        """)
-        return cur.rowcount
+MESES = np.arange(1, 13)
+_HEX = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+# posições dos dígitos hex no formato canônico 8-4-4-4-12
+_UUID_POS = np.array([i for i in range(36) if i not in (8, 13, 18, 23)])
+
+def gerar_uuids(n: int) -> np.ndarray:
+    """
+    Gera n UUID4 (texto canônico) de uma vez, a partir de os.urandom.
+    Equivale a str(uuid.uuid4()) por linha, sem o custo de um objeto por id.
+    """
+    if n <= 0:
+        return np.array([], dtype="U36")
+    raw = np.frombuffer(os.urandom(16 * n), dtype=np.uint8).reshape(n, 16).copy()
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40   # versão 4
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80   # variante RFC 4122
+    nib = np.empty((n, 32), dtype=np.uint8)
+    nib[:, 0::2] = raw >> 4
+    nib[:, 1::2] = raw & 0x0F
+    out = np.full((n, 36), ord("-"), dtype=np.uint8)
+    out[:, _UUID_POS] = _HEX[nib]
+    return out.view("S36").ravel().astype("U36")
+
+def _coluna_mensal(serie: pd.Series) -> np.ndarray:
+    # campos double do FileGDB já chegam float: mesmo resultado do sanitize (que descarta inf), sem passar por texto
+    if pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+        arr = serie.to_numpy(dtype="float64", na_value=np.nan)
+        arr[np.isinf(arr)] = np.nan
+        return arr
+    return sanitize_numeric(serie).to_numpy(dtype="float64")
+
+def _bloco_mensal(df: pd.DataFrame, prefixo: str) -> np.ndarray:
+    """Sanitiza PREFIXO_01..12 (uma vez por coluna) e devolve a matriz (n_ucs, 12) achatada por UC."""
+    cols = [_coluna_mensal(df[f"{prefixo}_{m:02d}"]) for m in MESES]
+    return np.column_stack(cols).ravel()
+
+def montar_mensais(
+    df: pd.DataFrame,
+    lead_ids: pd.Series,
+    camada: str,
+    import_id: str,
+) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    Explode os blocos ENE/DEM/DIC/FIC_01..12 em frames longos (12 linhas por UC, mês 1..12),
+    na mesma ordem e com os mesmos valores do antigo laço por linha.
+    UCs sem lead_bruto_id são descartadas.
+    """
+    ok = lead_ids.notna().to_numpy()
+    # sanitiza no chunk inteiro (antes do filtro) para manter o dtype inferido do caminho antigo
+    dem_contratada = np.repeat(sanitize_numeric(df["DEM_CONT"]).to_numpy()[ok], 12)
+    sem_rede = np.repeat(sanitize_numeric(df["SEMRED"]).to_numpy()[ok], 12)
+
+    df = df.loc[ok]
+    ids = lead_ids.to_numpy()[ok]
+    n = len(df)
+
+    lead_bruto_id = np.repeat(ids, 12)
+    mes = np.tile(MESES, n)
+    vazio = np.full(n * 12, None, dtype=object)
+
+    energia = pd.DataFrame({
+        "id": gerar_uuids(n * 12),
+        "lead_bruto_id": lead_bruto_id,
+        "mes": mes,
+        "energia_ponta": vazio,
+        "energia_fora_ponta": vazio,
+        "energia_total": _bloco_mensal(df, "ENE"),
+        "origem": camada,
+        "import_id": import_id,
+    })
+    demanda = pd.DataFrame({
+        "id": gerar_uuids(n * 12),
+        "lead_bruto_id": lead_bruto_id,
+        "mes": mes,
+        "demanda_ponta": vazio,
+        "demanda_fora_ponta": vazio,
+        "demanda_total": _bloco_mensal(df, "DEM"),
+        "demanda_contratada": dem_contratada,
+        "origem": camada,
+        "import_id": import_id,
+    })
+    qualidade = pd.DataFrame({
+        "id": gerar_uuids(n * 12),
+        "lead_bruto_id": lead_bruto_id,
+        "mes": mes,
+        "dic": _bloco_mensal(df, "DIC"),
+        "fic": _bloco_mensal(df, "FIC"),
+        "sem_rede": sem_rede,
+        "origem": camada,
+        "import_id": import_id,
+    })
+    return energia, demanda, qualidade
 
-def processar_chunk(
-    chunk_data: List[dict],
-    cur,
+# --------------------------------------------------------------------------------------
+# Núcleo
+# --------------------------------------------------------------------------------------
+def insert_lead_bruto_with_idempotency(cur, df_bruto: pd.DataFrame, colunas_bruto: List[str]) -> Tuple[int, Dict[str, str]]:
+    """
+    Insere lead_bruto idempotente e devolve (inseridas, {uc_id: id}), cobrindo UCs que já existiam.
+    Tenta ON CONFLICT(uc_id); se não houver UNIQUE, usa anti-join (ver packages/jobs/utils/lead_bruto.py).
+    """
+    return inserir_lead_bruto(cur, df_bruto, colunas_bruto, SCHEMA)
+
+COLUNAS_GDB = [
+    "COD_ID","DIST","CNAE","DAT_CON","PAC","GRU_TEN","GRU_TAR","TIP_SIST",
+    "SIT_ATIV","CLAS_SUB","CONJ","MUN","BRR","CEP","PN_CON","DESCR","SEMRED","DEM_CONT"
+]
+COLUNAS_LEITURA = COLUNAS_GDB + [f"{p}_{i:02d}" for p in ("ENE", "DEM", "DIC", "FIC") for i in range(1, 13)]
+COLUNAS_BRUTO = [
+    "uc_id","import_id","cod_id","distribuidora_id","origem","ano","data_conexao",
+    "cnae","grupo_tensao","modalidade","tipo_sistema","situacao","classe","segmento",
+    "municipio_id","bairro","cep","pac","pn_con","descricao"
+]
+# conteúdo da UC para a reimportação incremental: atributos normalizados (sem os que mudam
+# a cada importação) + séries mensais brutas
+COLUNAS_HASH = [c for c in COLUNAS_BRUTO if c not in ("uc_id", "import_id", "cod_id", "ano")]
+COLUNAS_HASH_MENSAIS = ["SEMRED", "DEM_CONT"] + [f"{p}_{i:02d}" for p in ("ENE", "DEM", "DIC", "FIC") for i in range(1, 13)]
+MENSAIS = [
+    ("energia",   f"{SCHEMA}.lead_energia_mensal",
+     ["id","lead_bruto_id","mes","energia_ponta","energia_fora_ponta","energia_total","origem","import_id"]),
+    ("demanda",   f"{SCHEMA}.lead_demanda_mensal",
+     ["id","lead_bruto_id","mes","demanda_ponta","demanda_fora_ponta","demanda_total","demanda_contratada","origem","import_id"]),
+    ("qualidade", f"{SCHEMA}.lead_qualidade_mensal",
+     ["id","lead_bruto_id","mes","dic","fic","sem_rede","origem","import_id"]),
+]
+TABELA_SERIES_FULL = f"{SCHEMA}.{TABELA_SERIES}"
+
+def preparar_chunk(chunk_data: List[dict] | pd.DataFrame, dist_as_text: bool) -> pd.DataFrame:
+    """Monta o DataFrame do chunk e a coluna '_DIST_SAN' (INT ou TEXT conforme o schema)."""
+    df = chunk_data if isinstance(chunk_data, pd.DataFrame) else pd.DataFrame(chunk_data)
+    if dist_as_text:
+        df["_DIST_SAN"] = sanitize_str(df.get("DIST"))
+    else:
+        df["_DIST_SAN"] = sanitize_int(df.get("DIST"))
+    return df
+
+def transformar_chunk(
+    chunk_data: List[dict] | pd.DataFrame,
     import_id: str,
     ano: int,
     camada: str,
     dist_id: int | str,
-    rows_per_copy: int
-) -> Tuple[int, Dict[str, int]]:
-    df = pd.DataFrame(chunk_data)
+) -> Optional[Dict[str, pd.DataFrame]]:
+    """
+    Parte só-CPU do chunk: lead_bruto sanitizado + mensais longos.
+    Nos mensais, 'lead_bruto_id' ainda carrega o uc_id; gravar_chunk() troca pelo id real.
+    """
+    df = chunk_data if isinstance(chunk_data, pd.DataFrame) else pd.DataFrame(chunk_data)
     if df.empty:
-        return 0, {"energia": 0, "demanda": 0, "qualidade": 0}
-
-    base_cols = [
-        "COD_ID","DIST","CNAE","DAT_CON","PAC","GRU_TEN","GRU_TAR","TIP_SIST",
-        "SIT_ATIV","CLAS_SUB","CONJ","MUN","BRR","CEP","PN_CON","DESCR","SEMRED","DEM_CONT"
-    ]
-    energia_cols = [f"ENE_{i:02d}" for i in range(1, 13)]
-    demanda_cols = [f"DEM_{i:02d}" for i in range(1, 13)]
-    qualidade_cols = [f"DIC_{i:02d}" for i in range(1, 13)] + [f"FIC_{i:02d}" for i in range(1, 13)]
+        return None
 
-    for col in base_cols + energia_cols + demanda_cols + qualidade_cols:
+    for col in COLUNAS_LEITURA:
         if col not in df.columns:
             df[col] = None
 
-    df = df[df["COD_ID"].notna()].copy()
+    df = df[df["COD_ID"].notna()].reset_index(drop=True)
     if df.empty:
-        return 0, {"energia": 0, "demanda": 0, "qualidade": 0}
+        return None
 
     df["uc_id"]     = [gerar_uc_id(str(c), int(ano), camada, dist_id) for c in df["COD_ID"]]
+    # UC repetida no chunk: fica a primeira (a mesma que o INSERT mantém), sem mensais em dobro
+    dup = df["uc_id"].duplicated()
+    if dup.any():
+        df = df.loc[~dup].reset_index(drop=True)
     df["import_id"] = import_id
     df["cod_id"]    = df["COD_ID"].astype(str)
     # distribuidora_id: ajuste conforme o schema da sua tabela (INT vs TEXT)
     # se precisar TEXT, passe --distribuidora-id-as-text na CLI
-    df["distribuidora_id"] = df["_DIST_SAN"]  # preenchido na main()
+    df["distribuidora_id"] = df["_DIST_SAN"]  # preenchido em preparar_chunk()
     df["origem"]    = camada
     df["ano"]       = int(ano)
 
-    # --- FIX: apply por elemento para funções escalares ---
+    # --- categóricos: normalizados por valor distinto, saem como pd.Categorical ---
     df["cnae"]         = sanitize_cnae(df["CNAE"])
-    df["grupo_tensao"] = df["GRU_TEN"].apply(sanitize_grupo_tensao)      # FIX
-    df["modalidade"]   = df["GRU_TAR"].apply(sanitize_modalidade)         # FIX
-    df["tipo_sistema"] = df["TIP_SIST"].apply(sanitize_tipo_sistema)      # FIX
-    df["situacao"]     = df["SIT_ATIV"].apply(sanitize_situacao)          # FIX
-    df["classe"]       = df["CLAS_SUB"].apply(sanitize_classe)            # FIX
+    df["grupo_tensao"] = sanitize_grupo_tensao(df["GRU_TEN"])
+    df["modalidade"]   = sanitize_modalidade(df["GRU_TAR"])
+    df["tipo_sistema"] = sanitize_tipo_sistema(df["TIP_SIST"])
+    df["situacao"]     = sanitize_situacao(df["SIT_ATIV"])
+    df["classe"]       = sanitize_classe(df["CLAS_SUB"])
     # ------------------------------------------------------
 
     df["segmento"]     = sanitize_str(df["CONJ"])
@@ -220,73 +384,241 @@ def processar_chunk(
     df["pac"]          = sanitize_pac(df["PAC"])
     df["data_conexao"] = pd.to_datetime(df["DAT_CON"], errors="coerce").dt.date
 
-    colunas_bruto = [
-        "uc_id","import_id","cod_id","distribuidora_id","origem","ano","data_conexao",
-        "cnae","grupo_tensao","modalidade","tipo_sistema","situacao","classe","segmento",
-        "municipio_id","bairro","cep","pac","pn_con","descricao"
+    energia_df, demanda_df, qualidade_df = montar_mensais(df, df["uc_id"], camada, import_id)
+    return {
+        "bruto": df[COLUNAS_BRUTO].copy(),
+        "energia": energia_df,
+        "demanda": demanda_df,
+        "qualidade": qualidade_df,
+        "hash": montar_hashes(df),
+    }
+
+def montar_hashes(df: pd.DataFrame) -> pd.DataFrame:
+    """uc_id, chave (COD_ID) e hash do conteúdo de cada UC do chunk."""
+    mensais = pd.DataFrame({c: _coluna_mensal(df[c]) for c in COLUNAS_HASH_MENSAIS}, index=df.index)
+    conteudo = pd.concat([df[COLUNAS_HASH], mensais], axis=1)
+    return pd.DataFrame({
+        "uc_id": df["uc_id"],
+        "chave": hash_chave(df["cod_id"]),
+        "hash": hash_conteudo(conteudo, COLUNAS_HASH + COLUNAS_HASH_MENSAIS),
+    })
+
+def preparar_e_transformar(
+    chunk_data: List[dict],
+    dist_as_text: bool,
+    import_id: str,
+    ano: int,
+    camada: str,
+    dist_id: int | str,
+) -> Tuple[int, Optional[Dict[str, pd.DataFrame]]]:
+    """
+    preparar_chunk + transformar_chunk numa função de módulo (picklable para o pool de processos).
+    Devolve (features lidas, chunk transformado): o gravador precisa das lidas para o checkpoint.
+    """
+    df = preparar_chunk(chunk_data, dist_as_text)
+    return len(chunk_data), transformar_chunk(df, import_id, ano, camada, dist_id)
+
+def filtrar_alteradas(chunk: Dict[str, pd.DataFrame], indice, gravadas: np.ndarray) -> Dict[str, pd.DataFrame]:
+    """
+    Modo incremental: só UCs novas ou alteradas em relação ao índice da importação anterior.
+    `gravadas`: chaves que entraram no índice agora; COD_ID repetido de chunk anterior fica de fora.
+    """
+    hashes = chunk["hash"]
+    emitir = hashes["uc_id"].to_numpy()[
+        indice.mascara_emitir(hashes["chave"].to_numpy(), hashes["hash"].to_numpy(), gravadas)
     ]
-    df_bruto = df[colunas_bruto].copy()
+    filtrado = {"hash": hashes, "bruto": chunk["bruto"].loc[chunk["bruto"]["uc_id"].isin(emitir)]}
+    for nome, _, _ in MENSAIS:
+        frame = chunk[nome]
+        filtrado[nome] = frame.loc[frame["lead_bruto_id"].isin(emitir)]
+    return filtrado
 
-    inserted_bruto = insert_lead_bruto_with_idempotency(cur, df_bruto, colunas_bruto)
+def gravar_chunk(
+    cur,
+    chunk: Optional[Dict[str, pd.DataFrame]],
+    rows_per_copy: int,
+    indice=None,
+    destinos: Optional[Dict[str, str]] = None,
+) -> Tuple[int, Dict[str, int]]:
+    """
+    Parte de banco do chunk: índice de hashes, lead_bruto idempotente, mapeamento uc_id -> id e
+    COPY dos mensais. Com `indice` (IndiceHash da importação anterior), UCs iguais não são gravadas.
+    `destinos`: tabela -> partição (ou tabela de troca) desta importação; só as tabelas nele são
+    gravadas (mensais longas e/ou lead_serie_mensal, conforme o formato). Sem `destinos`, só as longas.
+    """
+    agg = {"energia": 0, "demanda": 0, "qualidade": 0, "series": 0}
+    if not chunk:
+        return 0, agg
+
+    if "hash" in chunk:
+        # o índice é sempre completo (base da próxima reimportação), inclusive no modo incremental
+        gravadas = gravar_hashes(cur, chunk["bruto"]["import_id"].iat[0],
+                                 chunk["hash"]["chave"].to_numpy(), chunk["hash"]["hash"].to_numpy())
+        if indice is not None:
+            chunk = filtrar_alteradas(chunk, indice, gravadas)
+
+    # inserção + mapeamento uc_id -> id (novas e já existentes) na mesma ida ao banco
+    inserted_bruto, id_map = insert_lead_bruto_with_idempotency(cur, chunk["bruto"], COLUNAS_BRUTO)
+
+    destinos = destinos or {t: t for _, t, _ in MENSAIS}
+    compactas = {}
+    for nome, tabela, colunas in MENSAIS:
+        frame = chunk[nome]
+        ids = frame["lead_bruto_id"].map(id_map)
+        ok = ids.notna()
+        frame = frame.loc[ok].assign(lead_bruto_id=ids[ok])
+        if tabela in destinos:
+            agg[nome] = copy_frame_buffered(cur, frame, destinos[tabela], colunas, rows_per_copy)
+        compactas[tabela] = frame
+    if TABELA_SERIES_FULL in destinos:
+        agg["series"] = copy_series(cur, compactas, destinos[TABELA_SERIES_FULL])
+
+    return inserted_bruto, agg
 
-    # Mapear lead_bruto_id para este chunk
-    cur.execute(
-        f"SELECT id, uc_id FROM {SCHEMA}.lead_bruto WHERE uc_id = ANY(%s)",
-        (list(df["uc_id"]),)
-    )
-    id_map = dict(cur.fetchall())
-
-    energia_rows: List[Tuple] = []
-    demanda_rows: List[Tuple] = []
-    qualidade_rows: List[Tuple] = []
-
-    dem_contratada_series = sanitize_numeric(df.get("DEM_CONT"))
-    sem_rede_series = sanitize_numeric(df.get("SEMRED"))
-
-    for idx, row in df.iterrows():
-        lead_bruto_id = id_map.get(row["uc_id"])
-        if not lead_bruto_id:
-            continue
-
-        dem_contratada = dem_contratada_series.iloc[idx] if dem_contratada_series is not None else None
-        sem_rede = sem_rede_series.iloc[idx] if sem_rede_series is not None else None
-
-        for mes in range(1, 13):
-            energia_rows.append((
-                uuid.uuid4(), lead_bruto_id, mes,
-                None, None,
-                sanitize_numeric(row.get(f"ENE_{mes:02d}")),
-                camada, import_id
-            ))
-        for mes in range(1, 13):
-            demanda_rows.append((
-                uuid.uuid4(), lead_bruto_id, mes,
-                None, None,
-                sanitize_numeric(row.get(f"DEM_{mes:02d}")),
-                dem_contratada,
-                camada, import_id
-            ))
-        for mes in range(1, 13):
-            qualidade_rows.append((
-                uuid.uuid4(), lead_bruto_id, mes,
-                sanitize_numeric(row.get(f"DIC_{mes:02d}")),
-                sanitize_numeric(row.get(f"FIC_{mes:02d}")),
-                sem_rede,
-                camada, import_id
-            ))
-
-    energia_cols   = ["id","lead_bruto_id","mes","energia_ponta","energia_fora_ponta","energia_total","origem","import_id"]
-    demanda_cols   = ["id","lead_bruto_id","mes","demanda_ponta","demanda_fora_ponta","demanda_total","demanda_contratada","origem","import_id"]
-    qualidade_cols = ["id","lead_bruto_id","mes","dic","fic","sem_rede","origem","import_id"]
-
-    e = copy_rows_buffered(cur, f"{SCHEMA}.lead_energia_mensal",   energia_cols,   energia_rows, UCBT_ROWS_PER_COPY)
-    d = copy_rows_buffered(cur, f"{SCHEMA}.lead_demanda_mensal",   demanda_cols,   demanda_rows, UCBT_ROWS_PER_COPY)
-    q = copy_rows_buffered(cur, f"{SCHEMA}.lead_qualidade_mensal", qualidade_cols, qualidade_rows, UCBT_ROWS_PER_COPY)
-
-    del df, df_bruto, energia_rows, demanda_rows, qualidade_rows
+def processar_chunk(
+    chunk_data: List[dict] | pd.DataFrame,
+    cur,
+    import_id: str,
+    ano: int,
+    camada: str,
+    dist_id: int | str,
+    rows_per_copy: int,
+    indice=None,
+    destinos: Optional[Dict[str, str]] = None,
+) -> Tuple[int, Dict[str, int]]:
+    chunk = transformar_chunk(chunk_data, import_id, ano, camada, dist_id)
+    result = gravar_chunk(cur, chunk, rows_per_copy, indice, destinos)
+    del chunk
     gc.collect()
+    return result
 
-    return inserted_bruto, {"energia": e, "demanda": d, "qualidade": q}
+# --------------------------------------------------------------------------------------
+# Execução: sequencial (padrão) ou pipeline (leitura/transformação/COPY em paralelo)
+# --------------------------------------------------------------------------------------
+def ler_chunks(gdb_path: Path, layer: str, chunk_size: int, pbar, controle=None, inicio: int = 0) -> Iterator[List[dict] | pd.DataFrame]:
+    """
+    Lotes colunares (leitor_gdb/pyogrio) só com COLUNAS_LEITURA; sem o módulo, dicts do Fiona.
+    Com `controle`, o tamanho de cada chunk vem de controle.chunk_size.
+    inicio: pula as primeiras features (retomada de checkpoint).
+    """
+    if ler_chunks_gdb is not None:
+        for df in ler_chunks_gdb(gdb_path, layer, chunk_size, max_rss_mb=0, colunas=COLUNAS_LEITURA,
+                                 controle=controle, inicio=inicio):
+            pbar.update(len(df))
+            yield df
+        return
+
+    with fiona.open(str(gdb_path), layer=layer) as src:
+        chunk_data: List[dict] = []
+        for feat in (src.filter(inicio, None) if inicio else src):
+            chunk_data.append(feat.get("properties") or {})
+            pbar.update(1)
+            if len(chunk_data) >= (controle.chunk_size if controle is not None else chunk_size):
+                yield chunk_data
+                chunk_data = []
+        if chunk_data:
+            yield chunk_data
+
+def total_registros(gdb_path: Path, layer: str) -> int:
+    if contar_registros is not None:
+        return contar_registros(gdb_path, layer)
+    with fiona.open(str(gdb_path), layer=layer) as src:
+        return len(src)
+
+def gravar_e_commitar(
+    conn,
+    cur,
+    chunk: Optional[Dict[str, pd.DataFrame]],
+    rows_per_copy: int,
+    controle,
+    lidas: int = 0,
+    checkpoint: Optional[dict] = None,
+    indice=None,
+    destinos: Optional[Dict[str, str]] = None,
+) -> Tuple[int, Dict[str, int]]:
+    """
+    gravar_chunk + checkpoint + commit, medindo os tempos para o controle de carga, e a pausa
+    que ele pedir. O checkpoint entra na mesma transação dos dados do chunk.
+    """
+    t0 = time.perf_counter()
+    result = gravar_chunk(cur, chunk, rows_per_copy, indice, destinos)
+    if checkpoint is not None:
+        checkpoint["offset"] += lidas
+        checkpoint["linhas"] += result[0]
+        salvar_checkpoint(cur, checkpoint["import_id"], "UCBT", checkpoint["layer"],
+                          checkpoint["offset"], checkpoint["linhas"], checkpoint["total"])
+    t1 = time.perf_counter()
+    conn.commit()
+    t2 = time.perf_counter()
+    controle.registrar(len(chunk["bruto"]) if chunk else 0, t1 - t0, t2 - t1, cur=cur)
+    controle.pausar()
+    return result
+
+def importar_sequencial(chunks, args, import_id: str, dist_id: int | str, controle, checkpoint=None, indice=None,
+                        destinos=None) -> Dict[str, int]:
+    totais = {"bruto": 0, "energia": 0, "demanda": 0, "qualidade": 0, "series": 0}
+    with get_db_connection() as conn, conn.cursor() as cur:
+        for chunk_data in chunks:
+            lidas, chunk = preparar_e_transformar(
+                chunk_data, args.distribuidora_id_as_text, import_id, args.ano, "UCBT", dist_id
+            )
+            inserted, agg = gravar_e_commitar(conn, cur, chunk, args.rows_per_copy, controle, lidas, checkpoint,
+                                              indice, destinos)
+            del chunk
+            gc.collect()
+            totais["bruto"] += inserted
+            for k, v in agg.items():
+                totais[k] += v
+    return totais
+
+def importar_pipeline(chunks, args, import_id: str, dist_id: int | str, controle, checkpoint=None, indice=None,
+                      destinos=None) -> Dict[str, int]:
+    """
+    Leitor Fiona -> N transformadores -> 1 gravador (conexão própria).
+    No máximo --max-chunks-em-voo chunks em memória; a pausa entre chunks fica só no gravador.
+    O filtro incremental (indice) também fica no gravador: o índice não vai para os processos.
+    """
+    totais = {"bruto": 0, "energia": 0, "demanda": 0, "qualidade": 0, "series": 0}
+    transformar = partial(
+        preparar_e_transformar,
+        dist_as_text=args.distribuidora_id_as_text,
+        import_id=import_id, ano=args.ano, camada="UCBT", dist_id=dist_id,
+    )
+
+    def abrir_gravador():
+        stack = ExitStack()
+        conn = stack.enter_context(get_db_connection())
+        cur = stack.enter_context(conn.cursor())
+        gravador["conn"], gravador["cur"] = conn, cur
+        return stack
+
+    def gravar(item) -> int:
+        lidas, chunk = item
+        inserted, agg = gravar_e_commitar(
+            gravador["conn"], gravador["cur"], chunk, args.rows_per_copy, controle, lidas, checkpoint, indice, destinos
+        )
+        totais["bruto"] += inserted
+        for k, v in agg.items():
+            totais[k] += v
+        return len(chunk["bruto"]) if chunk else 0
+
+    gravador: Dict[str, object] = {}
+    with ExitStack() as pool:
+        executor = pool.enter_context(ProcessPoolExecutor(args.workers)) if args.processos else None
+        stats = executar_pipeline(
+            chunks,
+            transformar,
+            gravar,
+            n_transformadores=args.workers,
+            max_em_voo=args.max_chunks_em_voo,
+            linhas_transformadas=lambda item: len(item[1]["bruto"]) if item[1] else 0,
+            ao_abrir_gravador=abrir_gravador,
+            ao_fechar_gravador=lambda stack: stack.close(),
+            executor=executor,
+        )
+    for linha in stats.linhas_resumo():
+        tqdm.write(f"[pipeline] {linha}")
+    return totais
 
 # --------------------------------------------------------------------------------------
 # Main
@@ -299,11 +631,27 @@ def main():
     ap.add_argument("--distribuidora-id-as-text", action="store_true", help="Força TEXT para distribuidora_id")
     ap.add_argument("--ano", type=int, required=True)
     ap.add_argument("--import-id", type=str, default=None)
-    ap.add_argument("--chunk-size", type=int, default=UCBT_CHUNK_SIZE)
+    ap.add_argument("--chunk-size", type=int, default=UCBT_CHUNK_SIZE, help="UCs por chunk (50k–200k)")
     ap.add_argument("--rows-per-copy", type=int, default=UCBT_ROWS_PER_COPY)
-    ap.add_argument("--sleep-ms-between", type=int, default=UCBT_SLEEP_MS_BETWEEN)
+    ap.add_argument("--sleep-ms-between", type=int, default=UCBT_SLEEP_MS_BETWEEN,
+                    help="Pausa entre chunks (inicial; fixa com --fixo)")
+    ap.add_argument("--fixo", action="store_true", default=not IMPORT_ADAPTATIVO,
+                    help="Desliga o controle adaptativo: chunk e pausa fixos")
+    ap.add_argument("--pipeline", action="store_true", default=UCBT_PIPELINE,
+                    help="Sobrepõe leitura, transformação e COPY em threads")
+    ap.add_argument("--workers", type=int, default=UCBT_PIPELINE_WORKERS, help="Transformadores no modo pipeline")
+    ap.add_argument("--max-chunks-em-voo", type=int, default=UCBT_MAX_CHUNKS_EM_VOO,
+                    help="Limite de chunks em memória no modo pipeline")
+    ap.add_argument("--processos", action="store_true", default=UCBT_PIPELINE_PROCESSOS,
+                    help="Transformadores em processos (contorna o GIL) em vez de threads")
+    ap.add_argument("--do-zero", action="store_true", help="Ignora o checkpoint e reimporta a camada inteira")
+    ap.add_argument("--incremental", action="store_true",
+                    help="Grava só UCs novas/alteradas em relação à última importação da distribuidora")
+    ap.add_argument("--formato-mensal", choices=FORMATOS, default=None,
+                    help="linhas (12 por UC), compacto (real[12] em lead_serie_mensal) ou ambos; default MENSAL_FORMATO")
     ap.add_argument("--modo-debug", action="store_true")
     args = ap.parse_args()
+    formato = formato_mensal(args.formato_mensal)
 
     gdb_path = Path(args.gdb)
     if not gdb_path.exists():
@@ -317,68 +665,114 @@ def main():
     import_id = args.import_id or gerar_import_id(args.distribuidora, args.ano, "UCBT")
     prefixo = f"{args.distribuidora}_{args.ano}"
 
+    total = total_registros(gdb_path, layer)
+
+    # checkpoint de uma execução interrompida deste import_id (mesma camada)
+    retomada = None
+    if not args.do_zero:
+        try:
+            with get_db_connection() as conn, conn.cursor() as cur:
+                retomada = ler_checkpoint(cur, import_id)
+                conn.commit()
+        except Exception as e:
+            tqdm.write(f"Sem checkpoint de importação: {e}")
+    if retomada and (retomada["layer"] != layer or retomada["offset"] >= total):
+        retomada = None
+    checkpoint = {
+        "import_id": import_id, "layer": layer, "total": total,
+        "offset": retomada["offset"] if retomada else 0,
+        "linhas": retomada["linhas"] if retomada else 0,
+    }
+    if retomada:
+        tqdm.write(f"Retomando do checkpoint: feature {checkpoint['offset']}/{total} "
+                   f"({checkpoint['linhas']} lead_bruto já gravados)")
+
+    # índice de hashes: o desta importação recomeça junto com ela; o da anterior é a base do diff
+    indice = None
+    with get_db_connection() as conn, conn.cursor() as cur:
+        if not retomada:
+            descartar_indice(cur, import_id)
+        anterior = import_anterior(cur, import_id, args.distribuidora, "UCBT")
+        if args.incremental and anterior:
+            indice = IndiceHash.carregar(cur, anterior)
+        conn.commit()
+    if args.incremental:
+        tqdm.write(f"Incremental: base {anterior} ({len(indice)} UCs)" if indice is not None
+                   else "Incremental: sem importação anterior com índice; importando tudo")
+
+    # partição de cada mensal para esta importação (reimportação: tabela de troca, trocada no fim)
+    with get_db_connection() as conn:
+        tabelas = tabelas_destino(formato, [t for _, t, _ in MENSAIS], SCHEMA)
+        if TABELA_SERIES_FULL in tabelas:
+            with conn.cursor() as cur:
+                garantir_tabela_series(cur)
+            conn.commit()
+        destinos = preparar_particoes(conn, import_id, tabelas, retomando=bool(retomada),
+                                      descricao=f"{args.distribuidora} {args.ano} UCBT")
+
     # status running
     registrar_status(
         prefixo, args.ano, "UCBT", "running",
         observacoes=f"Layer={layer}",
         import_id=import_id,
-        distribuidora_nome=args.distribuidora
+        distribuidora_nome=args.distribuidora,
+        total_registros=total,
     )
 
-    # Abrir DB/Fiona
-    with get_db_connection() as conn, conn.cursor() as cur, fiona.open(str(gdb_path), layer=layer) as src:
-        total = len(src)
-        pbar = tqdm(total=total, desc=f"UCBT {args.distribuidora} {args.ano}", unit="reg")
-
-        # Pré-sanitização da coluna DIST conforme tipo desejado
-        # Carregaremos em cada chunk como '_DIST_SAN'
-        chunk_data: List[dict] = []
-        total_bruto = total_e = total_d = total_q = 0
-
-        def flush():
-            nonlocal chunk_data, total_bruto, total_e, total_d, total_q
-            if not chunk_data:
-                return
-
-            df = pd.DataFrame(chunk_data)
-            if args.distribuidora_id_as_text:
-                df["_DIST_SAN"] = sanitize_str(df.get("DIST"))
-            else:
-                df["_DIST_SAN"] = sanitize_int(df.get("DIST"))
-
-            inserted, agg = processar_chunk(
-                df.to_dict(orient="records"),
-                cur, import_id, args.ano, "UCBT", dist_id, args.rows_per_copy
-            )
+    # cache de normalização quente antes do 1º chunk (no modo --processos os workers herdam no fork)
+    try:
+        with get_db_connection() as conn, conn.cursor() as cur:
+            preparar_cache_normalizacao(cur)
+    except Exception as e:
+        tqdm.write(f"Cache de normalização sem tabelas de domínio: {e}")
+
+    inicio = checkpoint["offset"]
+    pbar = tqdm(total=total, initial=inicio, desc=f"UCBT {args.distribuidora} {args.ano}", unit="reg")
+    # sem o módulo do pipeline no path, segue no modo sequencial
+    importar = importar_pipeline if args.pipeline else importar_sequencial
+    controle = ControleCarga(args.chunk_size, args.sleep_ms_between, camada="UCBT", adaptativo=not args.fixo)
+    chunks = ler_chunks(gdb_path, layer, args.chunk_size, pbar, controle, inicio=inicio)
+    totais = importar(chunks, args, import_id, dist_id, controle, checkpoint, indice, destinos)
+    pbar.close()
+    tqdm.write(controle.resumo())
+    salvar_cache_normalizacao()
+    tqdm.write(resumo_cache_normalizacao())
+
+    total_bruto, total_e, total_d, total_q = totais["bruto"], totais["energia"], totais["demanda"], totais["qualidade"]
+    status_final = "completed"
+    observ = f"energia={total_e}, demanda={total_d}, qualidade={total_q}"
+    if formato != "linhas":
+        observ += f", series={totais['series']} ({formato})"
+    if retomada:
+        # lead_bruto das execuções anteriores entra no total; mensais são só desta execução
+        total_bruto += retomada["linhas"]
+        observ += f" (retomado da feature {inicio}; mensais desta execução)"
+
+    with get_db_connection() as conn:
+        concluir_particoes(conn, import_id, destinos)
+
+    # diff contra a importação anterior, no banco (cobre também os chunks de execuções retomadas)
+    with get_db_connection() as conn, conn.cursor() as cur:
+        resumo = resumo_diff(cur, import_id, anterior)
+        conn.commit()
+    observ += f" | {texto_resumo(resumo)}"
+    tqdm.write(texto_resumo(resumo))
+    registrar_status(
+        prefixo, args.ano, "UCBT", status_final,
+        linhas_processadas=total_bruto,
+        observacoes=observ,
+        import_id=import_id,
+        distribuidora_nome=args.distribuidora,
+        resumo_diff=resumo,
+    )
+    if anterior:
+        # esta importação passa a ser a base; o índice anterior não é mais necessário
+        with get_db_connection() as conn, conn.cursor() as cur:
+            descartar_indice(cur, anterior)
             conn.commit()
-            total_bruto += inserted
-            total_e += agg["energia"]; total_d += agg["demanda"]; total_q += agg["qualidade"]
-            chunk_data = []
-            if args.sleep_ms_between > 0:
-                time.sleep(args.sleep_ms_between / 1000.0)
-
-        for feat in src:
-            props = feat.get("properties") or {}
-            chunk_data.append(props)
-            if len(chunk_data) >= args.chunk_size:
-                flush()
-            pbar.update(1)
-
-        flush()
-        pbar.close()
-
-        status_final = "completed"
-        observ = f"energia={total_e}, demanda={total_d}, qualidade={total_q}"
-        registrar_status(
-            prefixo, args.ano, "UCBT", status_final,
-            linhas_processadas=total_bruto,
-            observacoes=observ,
-            import_id=import_id,
-            distribuidora_nome=args.distribuidora
-        )
 
-        if args.modo_debug:
-            print(f"Inseridos lead_bruto={total_bruto} | energia={total_e} | demanda={total_d} | qualidade={total_q}")
+    if args.modo_debug:
+        print(f"Inseridos lead_bruto={total_bruto} | energia={total_e} | demanda={total_d} | qualidade={total_q}")
 
 if __name__ == "__main__":
     main()
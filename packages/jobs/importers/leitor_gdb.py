@@ -0,0 +1,222 @@
+# packages/jobs/importers/leitor_gdb.py
+# -*- coding: utf-8 -*-
+"""
+Leitura de camadas do FileGDB em chunks, com memória limitada.
+
+- Leitor "arrow" (padrão, pyogrio): lotes Arrow direto para colunas NumPy/pandas,
+  só com as colunas pedidas e sem geometria quando ela não é usada
+- Leitor "fiona" (fallback sem pyogrio): streaming de features, um dict por linha
+- Só um chunk de atributos fica em RAM por vez (sem GeoDataFrame inteiro)
+- ler_geometria=True acrescenta _LON/_LAT (x/y de geometrias Point; NaN nas demais)
+- Teto de RSS configurável: se o processo passar do limite depois de um chunk,
+  roda gc e, persistindo, reduz o tamanho dos próximos chunks pela metade
+- controle= (importers/controle_carga.py): o tamanho de cada chunk é lido de
+  controle.chunk_size entre um chunk e outro (cresce/encolhe conforme a carga no banco;
+  o teto de RSS continua valendo e vira limite do controle)
+- inicio=N pula as N primeiras features (retomada de checkpoint): skip_features no
+  pyogrio, filter(start) no Fiona, sem ler/converter o que já foi gravado
+- pico_rss_mb() para registrar o pico de memória do processo ao final da importação
+
+Knobs (env):
+- IMPORT_LEITOR (default "arrow"; "fiona" força o caminho antigo)
+- IMPORT_CHUNK_SIZE (default 50000; 50k–200k com a staging por sessão)
+- IMPORT_MAX_RSS_MB (default 3072; 0 desliga o teto)
+"""
+
+from __future__ import annotations
+import gc
+import os
+import sys
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+import fiona
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import pyogrio
+    from pyogrio.raw import open_arrow
+except ImportError:
+    pyogrio = None
+    open_arrow = None
+
+IMPORT_LEITOR = os.getenv("IMPORT_LEITOR", "arrow").lower()
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "50000"))
+IMPORT_MAX_RSS_MB = int(os.getenv("IMPORT_MAX_RSS_MB", "3072"))
+CHUNK_MINIMO = 500
+MESES = range(1, 13)
+
+# --------------------------------------------------------------------------------------
+# Memória
+# --------------------------------------------------------------------------------------
+def rss_atual_mb() -> Optional[float]:
+    """RSS atual do processo (Linux via /proc); None se indisponível."""
+    try:
+        with open("/proc/self/statm") as f:
+            paginas = int(f.read().split()[1])
+        return paginas * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except Exception:
+        return None
+
+def pico_rss_mb() -> Optional[float]:
+    """Pico de RSS do processo desde o início (ru_maxrss: KB no Linux, bytes no macOS)."""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024
+
+# --------------------------------------------------------------------------------------
+# Colunas
+# --------------------------------------------------------------------------------------
+def colunas_mensais(*prefixos: str) -> List[str]:
+    """colunas_mensais("ENE_", "DIC_") -> ENE_01..ENE_12, DIC_01..DIC_12"""
+    return [f"{p}{mes:02d}" for p in prefixos for mes in MESES]
+
+def campos_da_camada(gdb_path: Path, layer: str) -> List[str]:
+    if pyogrio is not None:
+        return list(pyogrio.read_info(str(gdb_path), layer=layer)["fields"])
+    with fiona.open(str(gdb_path), layer=layer) as src:
+        return list(src.schema["properties"])
+
+# --------------------------------------------------------------------------------------
+# Leitura
+# --------------------------------------------------------------------------------------
+def contar_registros(gdb_path: Path, layer: str) -> int:
+    if pyogrio is not None:
+        return int(pyogrio.read_info(str(gdb_path), layer=layer, force_feature_count=True)["features"])
+    with fiona.open(str(gdb_path), layer=layer) as src:
+        return len(src)
+
+def ler_chunks_gdb(
+    gdb_path: Path,
+    layer: str,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+    max_rss_mb: Optional[int] = IMPORT_MAX_RSS_MB,
+    colunas: Optional[List[str]] = None,
+    ler_geometria: bool = False,
+    leitor: Optional[str] = None,
+    controle=None,
+    inicio: int = 0,
+) -> Iterator[pd.DataFrame]:
+    """
+    Gera DataFrames com os atributos da camada, chunk a chunk.
+    - colunas: só essas (as que não existirem na camada são ignoradas); None = todas
+    - ler_geometria: acrescenta _LON/_LAT
+    - controle: objeto com .chunk_size (ControleCarga), consultado antes de cada chunk
+    - inicio: índice da primeira feature a ler (0 = desde o começo)
+    O consumidor processa/grava cada chunk antes de pedir o próximo; é nesse
+    momento que o RSS é conferido contra max_rss_mb.
+    """
+    leitor = (leitor or IMPORT_LEITOR).lower()
+    if leitor == "arrow" and open_arrow is not None:
+        yield from _ler_arrow(gdb_path, layer, chunk_size, max_rss_mb, colunas, ler_geometria, controle, inicio)
+    else:
+        yield from _ler_fiona(gdb_path, layer, chunk_size, max_rss_mb, colunas, ler_geometria, controle, inicio)
+
+def _ler_arrow(gdb_path, layer, chunk_size, max_rss_mb, colunas, ler_geometria, controle=None, inicio=0) -> Iterator[pd.DataFrame]:
+    chunk_size = _chunk_inicial(chunk_size, controle)
+    with open_arrow(
+        str(gdb_path), layer=layer, columns=colunas, read_geometry=ler_geometria,
+        batch_size=chunk_size, use_pyarrow=True, skip_features=max(0, int(inicio)),
+    ) as (meta, reader):
+        geom_col = meta.get("geometry_name") or "wkb_geometry"
+        # o lote tem o tamanho inicial; chunks menores fatiam o lote, maiores juntam lotes
+        partes, acumuladas = [], 0
+        for batch in reader:
+            inicio = 0
+            while inicio < batch.num_rows:
+                parte = batch.slice(inicio, chunk_size - acumuladas)
+                inicio += parte.num_rows
+                partes.append(parte)
+                acumuladas += parte.num_rows
+                if acumuladas >= chunk_size:
+                    yield _arrow_para_pandas(partes, geom_col, ler_geometria)
+                    partes, acumuladas = [], 0
+                    chunk_size = _proximo_chunk(chunk_size, max_rss_mb, controle)
+        if partes:
+            yield _arrow_para_pandas(partes, geom_col, ler_geometria)
+
+def _arrow_para_pandas(partes, geom_col: str, ler_geometria: bool) -> pd.DataFrame:
+    if len(partes) == 1:
+        df = partes[0].to_pandas()
+    else:
+        import pyarrow as pa
+        df = pa.Table.from_batches(partes).to_pandas()
+    if ler_geometria:
+        wkb = df.pop(geom_col) if geom_col in df.columns else None
+        df["_LON"], df["_LAT"] = _xy_de_wkb(wkb, len(df))
+    return df
+
+def _xy_de_wkb(wkb: Optional[pd.Series], n: int):
+    if wkb is None:
+        return np.full(n, np.nan), np.full(n, np.nan)
+    import shapely
+    geoms = shapely.from_wkb(wkb.to_numpy())
+    ponto = shapely.get_type_id(geoms) == 0
+    x = np.full(n, np.nan)
+    y = np.full(n, np.nan)
+    x[ponto] = shapely.get_x(geoms[ponto])
+    y[ponto] = shapely.get_y(geoms[ponto])
+    return x, y
+
+def _ler_fiona(gdb_path, layer, chunk_size, max_rss_mb, colunas, ler_geometria, controle=None, inicio=0) -> Iterator[pd.DataFrame]:
+    chunk_size = _chunk_inicial(chunk_size, controle)
+    with fiona.open(str(gdb_path), layer=layer) as src:
+        if colunas is not None:
+            colunas = [c for c in colunas if c in src.schema["properties"]]
+        linhas: List[dict] = []
+        for feat in (src.filter(int(inicio), None) if inicio else src):
+            props = feat.get("properties") or {}
+            linha = {c: props.get(c) for c in colunas} if colunas is not None else dict(props)
+            if ler_geometria:
+                linha["_LON"], linha["_LAT"] = _xy_de_feature(feat)
+            linhas.append(linha)
+            if len(linhas) >= chunk_size:
+                yield pd.DataFrame(linhas)
+                linhas = []
+                chunk_size = _proximo_chunk(chunk_size, max_rss_mb, controle)
+        if linhas:
+            yield pd.DataFrame(linhas)
+
+def _xy_de_feature(feat) -> tuple:
+    geom = feat.get("geometry")
+    if geom and geom.get("type") == "Point":
+        coords = geom.get("coordinates") or []
+        if len(coords) >= 2:
+            return coords[0], coords[1]
+    return np.nan, np.nan
+
+def _chunk_inicial(chunk_size: int, controle) -> int:
+    if controle is not None:
+        chunk_size = controle.chunk_size
+    return max(CHUNK_MINIMO, int(chunk_size))
+
+def _proximo_chunk(chunk_size: int, max_rss_mb: Optional[int], controle) -> int:
+    """Tamanho do próximo chunk: o do controle (se houver), limitado pelo teto de RSS."""
+    if controle is not None:
+        chunk_size = max(CHUNK_MINIMO, int(controle.chunk_size))
+    novo = _ajustar_chunk(chunk_size, max_rss_mb)
+    if controle is not None and novo < chunk_size:
+        controle.limitar_chunk(novo)
+    return novo
+
+def _ajustar_chunk(chunk_size: int, max_rss_mb: Optional[int]) -> int:
+    if not max_rss_mb:
+        return chunk_size
+    rss = rss_atual_mb()
+    if rss is None or rss <= max_rss_mb:
+        return chunk_size
+    gc.collect()
+    rss = rss_atual_mb() or 0.0
+    if rss <= max_rss_mb or chunk_size <= CHUNK_MINIMO:
+        return chunk_size
+    novo = max(CHUNK_MINIMO, chunk_size // 2)
+    tqdm.write(f"RSS {rss:.0f} MB acima do teto de {max_rss_mb} MB: chunk {chunk_size} -> {novo}")
+    return novo
@@ -0,0 +1,230 @@
+# packages/jobs/importers/pipeline.py
+# -*- coding: utf-8 -*-
+"""
+Pipeline com filas limitadas para os importers em streaming (UCBT, PONNOT).
+
+    leitor (1 thread) -> transformadores (N threads) -> gravador (1 thread, conexão própria)
+
+- Backpressure: no máximo `max_em_voo` chunks existem ao mesmo tempo (lidos e ainda não
+  gravados); o leitor bloqueia até o gravador liberar espaço, então a RAM fica limitada
+- O gravador aplica os chunks na ordem de leitura (buffer de reordenação), o que mantém
+  o comportamento do modo sequencial (commit por chunk, em sequência)
+- Transformação em threads por padrão; com `executor` (ex.: ProcessPoolExecutor) cada
+  transformador delega o chunk ao executor, útil quando a transformação é Python puro
+  e fica presa no GIL (nesse caso `transformar` e o chunk precisam ser picklable)
+- Qualquer erro em uma etapa interrompe as demais e é relançado em executar_pipeline()
+- Ao final devolve estatísticas por etapa (itens, linhas, tempo ocupado, linhas/s)
+  e profundidade das filas (média/máxima)
+"""
+
+from __future__ import annotations
+import queue
+import threading
+import time
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+_FIM = object()
+
+
+@dataclass
+class EtapaStats:
+    nome: str
+    itens: int = 0
+    linhas: int = 0
+    ocupado_s: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def registrar(self, linhas: int, dt: float) -> None:
+        with self._lock:
+            self.itens += 1
+            self.linhas += linhas
+            self.ocupado_s += dt
+
+    def resumo(self, parede_s: float) -> str:
+        taxa = self.linhas / parede_s if parede_s > 0 else 0.0
+        uso = 100.0 * self.ocupado_s / parede_s if parede_s > 0 else 0.0
+        return (f"{self.nome:<13} itens={self.itens:>6} linhas={self.linhas:>10} "
+                f"ocupado={self.ocupado_s:8.1f}s ({uso:5.1f}%) {taxa:12,.0f} linhas/s")
+
+
+@dataclass
+class FilaStats:
+    nome: str
+    capacidade: int
+    amostras: int = 0
+    soma: int = 0
+    maximo: int = 0
+
+    def amostrar(self, q: queue.Queue) -> None:
+        d = q.qsize()
+        self.amostras += 1
+        self.soma += d
+        self.maximo = max(self.maximo, d)
+
+    def resumo(self) -> str:
+        media = self.soma / self.amostras if self.amostras else 0.0
+        return f"fila {self.nome:<8} cap={self.capacidade:>3} media={media:5.2f} max={self.maximo}"
+
+
+@dataclass
+class PipelineStats:
+    etapas: Dict[str, EtapaStats]
+    filas: Dict[str, FilaStats]
+    parede_s: float = 0.0
+
+    def linhas_resumo(self) -> List[str]:
+        return ([e.resumo(self.parede_s) for e in self.etapas.values()]
+                + [f.resumo() for f in self.filas.values()]
+                + [f"total {self.parede_s:.1f}s"])
+
+
+def executar_pipeline(
+    ler: Iterable[Any],
+    transformar: Callable[[Any], Any],
+    gravar: Callable[[Any], int],
+    n_transformadores: int = 2,
+    max_em_voo: int = 4,
+    linhas_lidas: Callable[[Any], int] = len,
+    linhas_transformadas: Callable[[Any], int] = lambda _: 0,
+    ao_abrir_gravador: Optional[Callable[[], Any]] = None,
+    ao_fechar_gravador: Optional[Callable[[Any], None]] = None,
+    executor: Optional[Executor] = None,
+) -> PipelineStats:
+    """
+    Executa ler -> transformar -> gravar em threads.
+
+    - ler: iterável de chunks brutos (roda na thread do leitor)
+    - transformar(chunk) -> item pronto para gravar (N threads; deve ser puro/CPU)
+    - gravar(item) -> linhas gravadas (uma thread só; faz COPY + commit)
+    - ao_abrir_gravador/ao_fechar_gravador: abrem/fecham recursos da thread do gravador
+      (ex.: a conexão própria), chamados dentro dela
+    - executor: se informado, transformar(chunk) roda nele (processos) em vez da thread
+    """
+    n_transformadores = max(1, int(n_transformadores))
+    max_em_voo = max(1, int(max_em_voo))
+
+    q_lidos: queue.Queue = queue.Queue(maxsize=max_em_voo)
+    q_prontos: queue.Queue = queue.Queue(maxsize=max_em_voo)
+    vagas = threading.Semaphore(max_em_voo)
+    parar = threading.Event()
+    erros: List[BaseException] = []
+
+    stats = PipelineStats(
+        etapas={n: EtapaStats(n) for n in ("leitura", "transformacao", "gravacao")},
+        filas={"lidos": FilaStats("lidos", max_em_voo), "prontos": FilaStats("prontos", max_em_voo)},
+    )
+
+    def _falhar(e: BaseException) -> None:
+        erros.append(e)
+        parar.set()
+
+    def _put(q: queue.Queue, item: Any) -> bool:
+        while not parar.is_set():
+            try:
+                q.put(item, timeout=0.2)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(q: queue.Queue) -> Any:
+        while not parar.is_set():
+            try:
+                return q.get(timeout=0.2)
+            except queue.Empty:
+                continue
+        return _FIM
+
+    def _leitor() -> None:
+        seq = 0
+        try:
+            it = iter(ler)
+            while not parar.is_set():
+                while not vagas.acquire(timeout=0.2):
+                    if parar.is_set():
+                        return
+                t0 = time.perf_counter()
+                try:
+                    chunk = next(it)
+                except StopIteration:
+                    vagas.release()
+                    break
+                stats.etapas["leitura"].registrar(linhas_lidas(chunk), time.perf_counter() - t0)
+                stats.filas["lidos"].amostrar(q_lidos)
+                if not _put(q_lidos, (seq, chunk)):
+                    return
+                seq += 1
+        except BaseException as e:
+            _falhar(e)
+        finally:
+            for _ in range(n_transformadores):
+                _put(q_lidos, _FIM)
+
+    def _transformador() -> None:
+        try:
+            while True:
+                msg = _get(q_lidos)
+                if msg is _FIM:
+                    break
+                seq, chunk = msg
+                t0 = time.perf_counter()
+                item = executor.submit(transformar, chunk).result() if executor else transformar(chunk)
+                stats.etapas["transformacao"].registrar(linhas_transformadas(item), time.perf_counter() - t0)
+                stats.filas["prontos"].amostrar(q_prontos)
+                if not _put(q_prontos, (seq, item)):
+                    return
+        except BaseException as e:
+            _falhar(e)
+        finally:
+            _put(q_prontos, _FIM)
+
+    def _gravador() -> None:
+        recurso = None
+        try:
+            if ao_abrir_gravador:
+                recurso = ao_abrir_gravador()
+            pendentes: Dict[int, Any] = {}
+            proximo = 0
+            finalizados = 0
+            while finalizados < n_transformadores:
+                msg = _get(q_prontos)
+                if msg is _FIM:
+                    if parar.is_set():
+                        return
+                    finalizados += 1
+                    continue
+                seq, item = msg
+                pendentes[seq] = item
+                while proximo in pendentes:
+                    item = pendentes.pop(proximo)
+                    t0 = time.perf_counter()
+                    n = gravar(item)
+                    stats.etapas["gravacao"].registrar(n, time.perf_counter() - t0)
+                    vagas.release()
+                    proximo += 1
+        except BaseException as e:
+            _falhar(e)
+        finally:
+            if ao_fechar_gravador and recurso is not None:
+                try:
+                    ao_fechar_gravador(recurso)
+                except BaseException as e:
+                    if not erros:
+                        _falhar(e)
+
+    t_inicio = time.perf_counter()
+    threads = [threading.Thread(target=_leitor, name="pipeline-leitor", daemon=True)]
+    threads += [threading.Thread(target=_transformador, name=f"pipeline-transf-{i}", daemon=True)
+                for i in range(n_transformadores)]
+    threads.append(threading.Thread(target=_gravador, name="pipeline-gravador", daemon=True))
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    stats.parede_s = time.perf_counter() - t_inicio
+
+    if erros:
+        raise erros[0]
+    return stats
@@ -0,0 +1,189 @@
+# packages/jobs/utils/incremental.py
+# -*- coding: utf-8 -*-
+"""
+Reimportação incremental: hash de conteúdo por UC e índice compacto por importação.
+
+- chave = hash 64 bits do COD_ID (estável entre versões da BDGD; o uc_id não é, pois inclui o ano)
+- hash  = hash 64 bits dos atributos já normalizados + séries mensais da UC
+  (pd.util.hash_pandas_object: SipHash com chave fixa, determinístico entre processos; números
+  viram float64 antes, então 1 / 1.0 / Int64 dão o mesmo hash)
+- uc_hash_index(import_id, chave, hash): toda importação grava o conjunto inteiro (16 bytes de
+  dados por UC), no mesmo commit do chunk; a primeira importação completa já serve de base
+- Modo incremental: o índice da importação anterior da mesma distribuidora/camada é carregado
+  em dois arrays int64 ordenados (busca binária) e só UCs novas ou alteradas seguem para
+  lead_bruto e mensais
+- Resumo (novas/alteradas/iguais/removidas) calculado no banco ao final, comparando os dois
+  índices: vale também para importações retomadas de checkpoint
+"""
+
+from __future__ import annotations
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from packages.jobs.utils.pg_copy import copy_dataframe
+from packages.jobs.utils.staging import preparar_staging
+
+SQL_TABELA_HASH = """
+    CREATE TABLE IF NOT EXISTS uc_hash_index (
+        import_id  TEXT   NOT NULL,
+        chave      BIGINT NOT NULL,
+        hash       BIGINT NOT NULL,
+        PRIMARY KEY (import_id, chave)
+    )
+"""
+_tabela_hash_ok = False
+
+IGUAL, ALTERADA, NOVA = 0, 1, 2
+
+# --------------------------------------------------------------------------------------
+# Hashes
+# --------------------------------------------------------------------------------------
+def _normalizar_para_hash(serie: pd.Series) -> pd.Series:
+    if pd.api.types.is_bool_dtype(serie.dtype) or pd.api.types.is_numeric_dtype(serie.dtype):
+        return pd.Series(serie.to_numpy(dtype="float64", na_value=np.nan), index=serie.index)
+    if isinstance(serie.dtype, pd.CategoricalDtype) or pd.api.types.is_string_dtype(serie.dtype):
+        return serie.astype(object)
+    return serie
+
+def hash_chave(cod_id: pd.Series) -> np.ndarray:
+    """Hash int64 do COD_ID (chave da UC entre versões)."""
+    return pd.util.hash_pandas_object(cod_id.astype(object), index=False).to_numpy().view(np.int64)
+
+def hash_conteudo(df: pd.DataFrame, colunas: List[str]) -> np.ndarray:
+    """Hash int64 por linha sobre `colunas` (as ausentes contam como nulas)."""
+    quadro = pd.DataFrame(
+        {c: _normalizar_para_hash(df[c]) if c in df.columns else np.nan for c in colunas},
+        index=df.index,
+    )
+    return pd.util.hash_pandas_object(quadro, index=False).to_numpy().view(np.int64)
+
+# --------------------------------------------------------------------------------------
+# Índice em memória
+# --------------------------------------------------------------------------------------
+class IndiceHash:
+    """chave -> hash da importação anterior, em dois arrays ordenados por chave."""
+
+    def __init__(self, chaves: np.ndarray, hashes: np.ndarray):
+        ordem = np.argsort(chaves, kind="stable")
+        self.chaves = np.asarray(chaves, dtype=np.int64)[ordem]
+        self.hashes = np.asarray(hashes, dtype=np.int64)[ordem]
+
+    def __len__(self) -> int:
+        return len(self.chaves)
+
+    def classificar(self, chaves: np.ndarray, hashes: np.ndarray) -> np.ndarray:
+        """IGUAL / ALTERADA / NOVA para cada (chave, hash) do chunk."""
+        if len(self.chaves) == 0:
+            return np.full(len(chaves), NOVA, dtype=np.int8)
+        pos = np.searchsorted(self.chaves, chaves)
+        pos_ok = np.minimum(pos, len(self.chaves) - 1)
+        existe = self.chaves[pos_ok] == chaves
+        igual = existe & (self.hashes[pos_ok] == hashes)
+        return np.where(igual, IGUAL, np.where(existe, ALTERADA, NOVA)).astype(np.int8)
+
+    def mascara_emitir(self, chaves: np.ndarray, hashes: np.ndarray, gravadas: np.ndarray) -> np.ndarray:
+        """
+        True para as UCs que seguem para lead_bruto/mensais: novas ou alteradas e gravadas agora
+        no índice (`gravadas`, retorno de gravar_hashes; COD_ID repetido de outro chunk fica de fora).
+        """
+        return (self.classificar(chaves, hashes) != IGUAL) & np.isin(chaves, gravadas)
+
+    @classmethod
+    def carregar(cls, cur, import_id: str) -> "IndiceHash":
+        garantir_tabela_hash(cur)
+        cur.execute("SELECT chave, hash FROM uc_hash_index WHERE import_id = %s", (import_id,))
+        linhas = cur.fetchall()
+        if linhas and isinstance(linhas[0], dict):
+            linhas = [(l["chave"], l["hash"]) for l in linhas]
+        arr = np.array(linhas, dtype=np.int64).reshape(-1, 2)
+        return cls(arr[:, 0], arr[:, 1])
+
+# --------------------------------------------------------------------------------------
+# Banco
+# --------------------------------------------------------------------------------------
+def garantir_tabela_hash(cur) -> None:
+    """Cria uc_hash_index se ainda não existir (uma vez por processo)."""
+    global _tabela_hash_ok
+    if not _tabela_hash_ok:
+        cur.execute("SELECT to_regclass('uc_hash_index') IS NOT NULL AS existe")
+        row = cur.fetchone()
+        existe = row["existe"] if isinstance(row, dict) else row[0]
+        if not existe:
+            cur.execute(SQL_TABELA_HASH)
+        _tabela_hash_ok = True
+
+def import_anterior(cur, import_id: str, distribuidora_nome: str, camada: str) -> Optional[str]:
+    """
+    Última importação concluída da mesma distribuidora/camada que tenha índice de hashes
+    (no_new_rows conta: é o fim de uma reimportação incremental sem nada novo).
+    """
+    garantir_tabela_hash(cur)
+    cur.execute("""
+        SELECT s.import_id
+        FROM import_status s
+        WHERE s.distribuidora_nome = %s AND s.camada = %s
+          AND s.status IN ('completed', 'no_new_rows')
+          AND s.import_id <> %s
+          AND EXISTS (SELECT 1 FROM uc_hash_index h WHERE h.import_id = s.import_id)
+        ORDER BY s.data_fim DESC NULLS LAST
+        LIMIT 1
+    """, (distribuidora_nome, camada, import_id))
+    row = cur.fetchone()
+    if not row:
+        return None
+    return row["import_id"] if isinstance(row, dict) else row[0]
+
+def gravar_hashes(cur, import_id: str, chaves: np.ndarray, hashes: np.ndarray) -> np.ndarray:
+    """
+    Grava (chave, hash) das UCs do chunk com o cursor do importer (antes do commit do chunk) e
+    devolve as chaves efetivamente gravadas. COD_ID repetido (no chunk ou em chunk anterior):
+    fica a primeira ocorrência, como em lead_bruto; as demais não entram no retorno.
+    """
+    if len(chaves) == 0:
+        return np.array([], dtype=np.int64)
+    garantir_tabela_hash(cur)
+    df = pd.DataFrame({"import_id": import_id, "chave": chaves, "hash": hashes})
+    df = df.loc[~df["chave"].duplicated()]
+    colunas = ["import_id", "chave", "hash"]
+    staging = preparar_staging(cur, "uc_hash_index", colunas)
+    copy_dataframe(cur, df, staging, colunas)
+    cur.execute(f"""
+        INSERT INTO uc_hash_index (import_id, chave, hash)
+        SELECT import_id, chave, hash FROM {staging}
+        ON CONFLICT (import_id, chave) DO NOTHING
+        RETURNING chave
+    """)
+    linhas = cur.fetchall()
+    if linhas and isinstance(linhas[0], dict):
+        return np.array([l["chave"] for l in linhas], dtype=np.int64)
+    return np.array([l[0] for l in linhas], dtype=np.int64)
+
+def resumo_diff(cur, import_id: str, anterior: Optional[str]) -> Dict[str, int]:
+    """novas / alteradas / iguais / removidas entre o índice de import_id e o de `anterior`."""
+    cur.execute("""
+        WITH atual AS (SELECT chave, hash FROM uc_hash_index WHERE import_id = %s),
+             ant   AS (SELECT chave, hash FROM uc_hash_index WHERE import_id = %s)
+        SELECT count(*) FILTER (WHERE a.chave IS NULL),
+               count(*) FILTER (WHERE c.chave IS NOT NULL AND a.chave IS NOT NULL AND a.hash <> c.hash),
+               count(*) FILTER (WHERE a.hash = c.hash),
+               count(*) FILTER (WHERE c.chave IS NULL)
+        FROM atual c FULL JOIN ant a ON a.chave = c.chave
+    """, (import_id, anterior))
+    row = cur.fetchone()
+    valores = list(row.values()) if isinstance(row, dict) else list(row)
+    return dict(zip(("novas", "alteradas", "iguais", "removidas"), (int(v or 0) for v in valores)))
+
+def descartar_indice(cur, import_id: Optional[str]) -> None:
+    """
+    Remove o índice de import_id: o da importação anterior, quando a atual termina e passa a
+    ser a base, ou o da própria importação quando ela recomeça do zero.
+    """
+    if import_id:
+        garantir_tabela_hash(cur)
+        cur.execute("DELETE FROM uc_hash_index WHERE import_id = %s", (import_id,))
+
+def texto_resumo(resumo: Dict[str, int]) -> str:
+    return (f"diff: {resumo['novas']} novas, {resumo['alteradas']} alteradas, "
+            f"{resumo['iguais']} iguais, {resumo['removidas']} removidas")
@@ -0,0 +1,95 @@
+# packages/jobs/utils/lead_bruto.py
+# -*- coding: utf-8 -*-
+"""
+Inserção de lead_bruto via staging, devolvendo o mapeamento uc_id -> id na mesma ida ao banco.
+
+- COPY do chunk para a staging da sessão (utils/staging.py: temporária sem índices,
+  criada uma vez por conexão e esvaziada a cada commit) e um único INSERT ... SELECT
+  com RETURNING: as linhas novas vêm do RETURNING e as que já existiam (modo idempotente) de um join com lead_bruto no
+  mesmo comando (o join enxerga o snapshot de antes do INSERT, então não há repetição).
+  Sem o SELECT ... WHERE uc_id = ANY(%s) depois de cada chunk
+- Idempotente: ON CONFLICT (uc_id) DO NOTHING; se o destino não tiver UNIQUE(uc_id),
+  desfaz até o SAVEPOINT (a transação não fica abortada), passa ao anti-join (NOT EXISTS)
+  e lembra a escolha no processo
+- uc_id repetido dentro do chunk: fica a primeira ocorrência (a staging não tem índice
+  único, e o anti-join inseriria as duas)
+- idempotente=False: INSERT simples (conflito continua sendo erro), só com RETURNING
+"""
+
+from __future__ import annotations
+from typing import Dict, List, Set, Tuple
+
+import pandas as pd
+from psycopg2.errors import InvalidColumnReference
+
+from packages.jobs.utils.pg_copy import copy_dataframe
+from packages.jobs.utils.staging import preparar_staging
+
+# schemas cujo lead_bruto não tem UNIQUE(uc_id) (descoberto no primeiro ON CONFLICT)
+_sem_unique_uc_id: Set[str] = set()
+
+# --------------------------------------------------------------------------------------
+# SQL
+# --------------------------------------------------------------------------------------
+def _sql_insert(schema: str, colunas: List[str], modo: str, staging: str) -> str:
+    cols = ",".join(colunas)
+    sel = ",".join(f"s.{c}" for c in colunas)
+    insert = f"INSERT INTO {schema}.lead_bruto ({cols}) SELECT {sel} FROM {staging} s"
+    if modo == "simples":
+        return f"{insert} RETURNING uc_id, id"
+    if modo == "on_conflict":
+        insert += " ON CONFLICT (uc_id) DO NOTHING"
+    else:
+        insert += f" WHERE NOT EXISTS (SELECT 1 FROM {schema}.lead_bruto t WHERE t.uc_id = s.uc_id)"
+    return f"""
+        WITH novos AS ({insert} RETURNING uc_id, id)
+        SELECT uc_id, id, true FROM novos
+        UNION ALL
+        SELECT t.uc_id, t.id, false
+        FROM {schema}.lead_bruto t JOIN {staging} s ON s.uc_id = t.uc_id
+    """
+
+# --------------------------------------------------------------------------------------
+# API
+# --------------------------------------------------------------------------------------
+def inserir_lead_bruto(
+    cur,
+    df_bruto: pd.DataFrame,
+    colunas: List[str],
+    schema: str = "intel_lead",
+    idempotente: bool = True,
+) -> Tuple[int, Dict[str, str]]:
+    """
+    Insere df_bruto[colunas] em {schema}.lead_bruto e devolve (linhas inseridas, {uc_id: id}).
+    No modo idempotente o mapa cobre também as UCs que já existiam.
+    Roda dentro da transação do chamador (a staging esvazia no commit).
+    """
+    if df_bruto.empty:
+        return 0, {}
+    dup = df_bruto["uc_id"].duplicated()
+    if dup.any():
+        df_bruto = df_bruto.loc[~dup]
+
+    staging = preparar_staging(cur, f"{schema}.lead_bruto", colunas)
+    copy_dataframe(cur, df_bruto, staging, colunas)
+
+    if not idempotente:
+        cur.execute(_sql_insert(schema, colunas, "simples", staging))
+        linhas = cur.fetchall()
+        return len(linhas), dict(linhas)
+
+    linhas = None
+    if schema not in _sem_unique_uc_id:
+        try:
+            # SAVEPOINT no mesmo comando: sem round-trip extra quando o ON CONFLICT funciona
+            cur.execute("SAVEPOINT lb_insert; " + _sql_insert(schema, colunas, "on_conflict", staging))
+            linhas = cur.fetchall()
+        except InvalidColumnReference:
+            cur.execute("ROLLBACK TO SAVEPOINT lb_insert")
+            _sem_unique_uc_id.add(schema)
+    if linhas is None:
+        cur.execute(_sql_insert(schema, colunas, "anti_join", staging))
+        linhas = cur.fetchall()
+
+    inseridas = sum(1 for _, _, novo in linhas if novo)
+    return inseridas, {uc_id: id_ for uc_id, id_, _ in linhas}
@@ -0,0 +1,270 @@
+# packages/jobs/utils/materializadas.py
+# -*- coding: utf-8 -*-
+"""
+Refresh das materialized views do schema, fora da requisição HTTP.
+
+- O grafo de dependências vem do catálogo (pg_depend/pg_rewrite): uma MV depende de outra se
+  a lê direto ou através de views comuns. Cada MV só começa depois das que ela lê
+- MVs independentes atualizam em paralelo, cada uma na sua conexão (MV_REFRESH_PARALELO)
+- REFRESH ... CONCURRENTLY quando a MV já está populada e tem índice único utilizável (só
+  colunas, sem WHERE): leitores continuam vendo a versão anterior durante o refresh.
+  Sem ele, o REFRESH comum bloqueia leituras da MV até terminar (migration 016 cria os
+  índices únicos das MVs conhecidas)
+- Falha numa MV: as que dependem dela são puladas (ficariam com dado inconsistente); as
+  demais seguem
+- Cada MV gera uma linha em mv_refresh_log (modo, status, duração, erro), agrupadas por
+  execucao_id; /v1/admin/db/refresh/historico lista as últimas
+- Roda como job da fila (admin_service.refresh_materializadas enfileira este script) ou direto:
+    python packages/jobs/utils/materializadas.py [--mv NOME ...] [--paralelo N] [--bloqueante]
+  Com --mv, atualiza as MVs pedidas e tudo que depende delas
+
+Knobs (env):
+- MV_REFRESH_PARALELO (default 2)
+"""
+
+from __future__ import annotations
+import argparse
+import os
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from psycopg2 import sql
+from tqdm import tqdm
+
+from packages.database.connection import DB_SCHEMA, get_db_connection
+
+MV_REFRESH_PARALELO = int(os.getenv("MV_REFRESH_PARALELO", "2"))
+
+SQL_TABELA_LOG = """
+    CREATE TABLE IF NOT EXISTS mv_refresh_log (
+        id           BIGSERIAL PRIMARY KEY,
+        execucao_id  TEXT NOT NULL,
+        mv           TEXT NOT NULL,
+        modo         TEXT NOT NULL,
+        status       TEXT NOT NULL,
+        iniciado_em  TIMESTAMPTZ,
+        duracao_ms   INTEGER,
+        erro         TEXT
+    )
+"""
+_tabela_log_ok = False
+
+@dataclass
+class Materializada:
+    nome: str
+    populada: bool
+    indice_unico: bool
+    depende_de: Set[str] = field(default_factory=set)
+
+    def modo(self, bloqueante: bool = False) -> str:
+        return "concurrently" if self.populada and self.indice_unico and not bloqueante else "bloqueante"
+
+@dataclass
+class Resultado:
+    mv: str
+    modo: str
+    status: str                      # ok | erro | pulada
+    iniciado_em: Optional[float] = None
+    duracao_ms: Optional[int] = None
+    erro: Optional[str] = None
+
+# --------------------------------------------------------------------------------------
+# Catálogo
+# --------------------------------------------------------------------------------------
+def _valor(row, chave: str, pos: int):
+    return row[chave] if isinstance(row, dict) else row[pos]
+
+def listar_materializadas(cur, schema: str = DB_SCHEMA) -> Dict[str, Materializada]:
+    """MVs do schema com as dependências entre elas (atravessando views comuns)."""
+    cur.execute("""
+        WITH RECURSIVE mvs AS (
+            SELECT c.oid, c.relname, c.relispopulated
+            FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE c.relkind = 'm' AND n.nspname = %s
+        ),
+        dep AS (
+            SELECT r.ev_class AS mv, d.refobjid AS ref
+            FROM pg_rewrite r
+            JOIN pg_depend d ON d.classid = 'pg_rewrite'::regclass AND d.objid = r.oid
+                            AND d.refclassid = 'pg_class'::regclass
+            WHERE r.ev_class IN (SELECT oid FROM mvs) AND d.refobjid <> r.ev_class
+            UNION
+            SELECT dep.mv, d.refobjid
+            FROM dep
+            JOIN pg_class v ON v.oid = dep.ref AND v.relkind = 'v'
+            JOIN pg_rewrite r ON r.ev_class = v.oid
+            JOIN pg_depend d ON d.classid = 'pg_rewrite'::regclass AND d.objid = r.oid
+                            AND d.refclassid = 'pg_class'::regclass AND d.refobjid <> v.oid
+        )
+        SELECT m.relname AS mv, m.relispopulated AS populada,
+               EXISTS (SELECT 1 FROM pg_index i
+                       WHERE i.indrelid = m.oid AND i.indisunique AND i.indisvalid
+                         AND i.indpred IS NULL AND i.indexprs IS NULL) AS indice_unico,
+               ARRAY(SELECT DISTINCT o.relname FROM dep JOIN mvs o ON o.oid = dep.ref
+                     WHERE dep.mv = m.oid AND o.oid <> m.oid) AS depende_de
+        FROM mvs m
+        ORDER BY m.relname
+    """, (schema,))
+    mvs = {}
+    for row in cur.fetchall():
+        nome = _valor(row, "mv", 0)
+        mvs[nome] = Materializada(nome, bool(_valor(row, "populada", 1)), bool(_valor(row, "indice_unico", 2)),
+                                  set(_valor(row, "depende_de", 3) or []))
+    return mvs
+
+# --------------------------------------------------------------------------------------
+# Grafo
+# --------------------------------------------------------------------------------------
+def com_dependentes(mvs: Dict[str, Materializada], pedidas: Iterable[str]) -> Set[str]:
+    """As MVs pedidas e todas as que dependem delas (direta ou indiretamente)."""
+    desconhecidas = set(pedidas) - set(mvs)
+    if desconhecidas:
+        raise ValueError(f"MV(s) inexistente(s): {', '.join(sorted(desconhecidas))}")
+    alvo = set(pedidas)
+    mudou = True
+    while mudou:
+        novas = {n for n, mv in mvs.items() if n not in alvo and mv.depende_de & alvo}
+        alvo |= novas
+        mudou = bool(novas)
+    return alvo
+
+def ordem_topologica(mvs: Dict[str, Materializada]) -> List[str]:
+    """Ordem válida de refresh (dependências primeiro); ValueError se houver ciclo."""
+    pendentes = {n: set(mv.depende_de) & set(mvs) for n, mv in mvs.items()}
+    ordem: List[str] = []
+    while pendentes:
+        prontas = sorted(n for n, deps in pendentes.items() if not deps)
+        if not prontas:
+            raise ValueError(f"Ciclo de dependência entre MVs: {', '.join(sorted(pendentes))}")
+        for n in prontas:
+            ordem.append(n)
+            del pendentes[n]
+        for deps in pendentes.values():
+            deps.difference_update(prontas)
+    return ordem
+
+def executar_grafo(
+    mvs: Dict[str, Materializada],
+    atualizar: Callable[[Materializada], Resultado],
+    paralelo: int = MV_REFRESH_PARALELO,
+    bloqueante: bool = False,
+    ao_concluir: Optional[Callable[[Resultado], None]] = None,
+) -> List[Resultado]:
+    """
+    Dispara cada MV assim que todas as suas dependências (dentro de `mvs`) terminaram com
+    sucesso, até `paralelo` ao mesmo tempo. Dependência com erro/pulada -> a MV é pulada.
+    """
+    ordem_topologica(mvs)  # valida (ciclo) antes de começar
+    pendentes = {n: set(mv.depende_de) & set(mvs) for n, mv in mvs.items()}
+    resultados: Dict[str, Resultado] = {}
+
+    def concluir(res: Resultado) -> None:
+        resultados[res.mv] = res
+        if ao_concluir:
+            ao_concluir(res)
+
+    with ThreadPoolExecutor(max_workers=max(1, paralelo)) as pool:
+        em_voo = {}
+        while pendentes or em_voo:
+            for nome in sorted(pendentes):
+                deps = pendentes[nome]
+                if any(d in resultados and resultados[d].status != "ok" for d in deps):
+                    del pendentes[nome]
+                    concluir(Resultado(nome, mvs[nome].modo(bloqueante), "pulada",
+                                       erro="dependência não atualizada: " + ", ".join(
+                                           sorted(d for d in deps if d in resultados and resultados[d].status != "ok"))))
+                elif all(d in resultados for d in deps):
+                    del pendentes[nome]
+                    em_voo[pool.submit(atualizar, mvs[nome])] = nome
+            if not em_voo:
+                continue  # só sobraram puladas: o próximo laço as resolve
+            feitos, _ = wait(em_voo, return_when=FIRST_COMPLETED)
+            for futuro in feitos:
+                nome = em_voo.pop(futuro)
+                try:
+                    concluir(futuro.result())
+                except Exception as e:
+                    concluir(Resultado(nome, mvs[nome].modo(bloqueante), "erro", erro=str(e)))
+    return [resultados[n] for n in ordem_topologica(mvs)]
+
+# --------------------------------------------------------------------------------------
+# Banco
+# --------------------------------------------------------------------------------------
+def garantir_tabela_log(cur) -> None:
+    global _tabela_log_ok
+    if not _tabela_log_ok:
+        cur.execute(SQL_TABELA_LOG)
+        _tabela_log_ok = True
+
+def refresh_mv(mv: Materializada, schema: str = DB_SCHEMA, bloqueante: bool = False) -> Resultado:
+    """REFRESH de uma MV na sua própria conexão (autocommit)."""
+    modo = mv.modo(bloqueante)
+    inicio = time.time()
+    t0 = time.perf_counter()
+    with get_db_connection() as conn:
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            try:
+                cur.execute(sql.SQL("REFRESH MATERIALIZED VIEW {}{}").format(
+                    sql.SQL("CONCURRENTLY ") if modo == "concurrently" else sql.SQL(""),
+                    sql.Identifier(schema, mv.nome)))
+            except Exception as e:
+                return Resultado(mv.nome, modo, "erro", inicio, int((time.perf_counter() - t0) * 1000), str(e).strip())
+    return Resultado(mv.nome, modo, "ok", inicio, int((time.perf_counter() - t0) * 1000))
+
+def registrar_resultado(cur, execucao_id: str, res: Resultado) -> None:
+    garantir_tabela_log(cur)
+    cur.execute("""
+        INSERT INTO mv_refresh_log (execucao_id, mv, modo, status, iniciado_em, duracao_ms, erro)
+        VALUES (%s, %s, %s, %s, to_timestamp(%s), %s, %s)
+    """, (execucao_id, res.mv, res.modo, res.status, res.iniciado_em, res.duracao_ms, res.erro))
+
+def refresh_materializadas(
+    pedidas: Optional[Iterable[str]] = None,
+    paralelo: int = MV_REFRESH_PARALELO,
+    bloqueante: bool = False,
+    schema: str = DB_SCHEMA,
+) -> List[Resultado]:
+    """Atualiza as MVs do schema (ou as pedidas + dependentes) respeitando o grafo."""
+    execucao_id = uuid.uuid4().hex[:16]
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            mvs = listar_materializadas(cur, schema)
+            garantir_tabela_log(cur)
+        conn.commit()
+        if pedidas:
+            alvo = com_dependentes(mvs, pedidas)
+            mvs = {n: mv for n, mv in mvs.items() if n in alvo}
+        for mv in mvs.values():
+            if mv.modo(bloqueante) == "bloqueante":
+                motivo = "não populada" if not mv.populada else ("sem índice único" if not mv.indice_unico else "--bloqueante")
+                tqdm.write(f"[mv] {mv.nome}: REFRESH bloqueante ({motivo})")
+
+        def ao_concluir(res: Resultado) -> None:
+            # callback roda na thread principal (executar_grafo): a conexão de log não é compartilhada
+            with conn.cursor() as cur:
+                registrar_resultado(cur, execucao_id, res)
+            conn.commit()
+            duracao = f"{res.duracao_ms} ms" if res.duracao_ms is not None else "-"
+            tqdm.write(f"[mv] {res.mv}: {res.status} ({res.modo}, {duracao})" + (f" {res.erro}" if res.erro else ""))
+
+        return executar_grafo(mvs, lambda mv: refresh_mv(mv, schema, bloqueante), paralelo, bloqueante, ao_concluir)
+
+def main():
+    ap = argparse.ArgumentParser(description="Refresh das materialized views (grafo de dependências, em paralelo)")
+    ap.add_argument("--mv", action="append", default=None, help="MV a atualizar (com as dependentes); repetível")
+    ap.add_argument("--paralelo", type=int, default=MV_REFRESH_PARALELO, help="MVs atualizadas ao mesmo tempo")
+    ap.add_argument("--bloqueante", action="store_true", help="Não usa CONCURRENTLY")
+    args = ap.parse_args()
+
+    resultados = refresh_materializadas(args.mv, args.paralelo, args.bloqueante)
+    falhas = [r for r in resultados if r.status != "ok"]
+    tqdm.write(f"[mv] {len(resultados) - len(falhas)}/{len(resultados)} MV(s) atualizada(s)")
+    if falhas:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
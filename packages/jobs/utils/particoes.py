@@ -0,0 +1,329 @@
+# packages/jobs/utils/particoes.py
+# -*- coding: utf-8 -*-
+"""
+Partições das tabelas mensais (lead_energia_mensal, lead_demanda_mensal, lead_qualidade_mensal).
+
+- As mensais são particionadas por LIST (import_id) (migration 014). O import_id é o hash de
+  distribuidora + ano + camada (rastreio.gerar_import_id), então cada partição guarda uma
+  distribuidora/ano/camada; o COMMENT da partição diz qual
+- preparar_particoes(), antes do 1º chunk, garante a partição da importação e devolve o destino
+  do COPY de cada mensal (o importer grava direto na partição, sem roteamento pelo pai)
+- Reimportação (a partição já existe e não é retomada): os dados vão para uma tabela de troca
+  <partição>_novo, fora do particionamento; concluir_particoes() troca as duas no fim
+  (DETACH da antiga + DROP, ATTACH da nova) numa transação curta, sem DELETE linha a linha e
+  sem leitores vendo a camada pela metade. Se o importer cair, a tabela de troca continua lá e
+  a retomada segue gravando nela
+- Partições novas entram por CREATE TABLE LIKE + ATTACH (SHARE UPDATE EXCLUSIVE no pai, não
+  bloqueia leitura); a troca usa lock_timeout com novas tentativas para não enfileirar leitores
+  atrás de uma query longa
+- Chaves (migration 014): a PK (id, import_id) vem com o LIKE (INCLUDING INDEXES); as FKs do pai
+  (lead_bruto ON DELETE CASCADE, import_status) não, e o ATTACH as cria validando a tabela. Numa
+  partição nova ela está vazia; na de troca, concluir_particoes() as cria e valida antes da
+  transação da troca, e o ATTACH só as reaproveita
+- Linhas de antes do particionamento ficam na partição DEFAULT (<tabela>_legado);
+  migrar_legado() (ou `python -m packages.jobs.utils.particoes --migrar-legado`) as move para
+  partições próprias e, no fim, informa o que ainda ficou nela. Enquanto a DEFAULT tiver linhas,
+  todo ATTACH a varre. Linhas sem import_id (UCAT/UCMT antigas) são atribuídas pelo lead_bruto na
+  migration 014, que precisa delas resolvidas para a PK
+- Tabela não particionada (schema antigo): destino = a própria tabela, sem troca
+
+Knobs (env):
+- PARTICAO_LOCK_TIMEOUT_MS (default 5000)
+- PARTICAO_TENTATIVAS (default 5)
+"""
+
+from __future__ import annotations
+import argparse
+import hashlib
+import os
+import re
+import time
+from typing import Dict, Iterable, List, Optional
+
+from psycopg2 import sql
+from psycopg2.errors import LockNotAvailable
+from tqdm import tqdm
+
+TABELAS_MENSAIS = ("lead_energia_mensal", "lead_demanda_mensal", "lead_qualidade_mensal")
+SUFIXO_TROCA = "_novo"
+PARTICAO_LOCK_TIMEOUT_MS = int(os.getenv("PARTICAO_LOCK_TIMEOUT_MS", "5000"))
+PARTICAO_TENTATIVAS = int(os.getenv("PARTICAO_TENTATIVAS", "5"))
+_LIMITE_NOME = 63 - len(SUFIXO_TROCA)
+
+# --------------------------------------------------------------------------------------
+# Nomes
+# --------------------------------------------------------------------------------------
+def _partes(tabela: str) -> tuple:
+    """'intel_lead.x' -> ('intel_lead', 'x'); sem schema -> (None, 'x') (vale o search_path)."""
+    return tuple(tabela.split(".", 1)) if "." in tabela else (None, tabela)
+
+def _ident(schema: Optional[str], nome: str) -> sql.Composable:
+    return sql.Identifier(schema, nome) if schema else sql.Identifier(nome)
+
+def _qualificar(schema: Optional[str], nome: str) -> str:
+    return f"{schema}.{nome}" if schema else nome
+
+def nome_particao(tabela: str, import_id: str) -> str:
+    """Nome da partição de import_id (mesmo schema da tabela), curto o bastante para o sufixo de troca."""
+    schema, nome = _partes(tabela)
+    chave = re.sub(r"[^a-z0-9_]", "_", import_id.lower())
+    base = f"{nome}_{chave}"
+    if len(base) > _LIMITE_NOME or chave != import_id:
+        # import_id fora do padrão (--import-id livre): nome estável derivado do hash
+        base = f"{nome}_{chave[:16]}_{hashlib.md5(import_id.encode()).hexdigest()[:8]}"[:_LIMITE_NOME]
+    return _qualificar(schema, base)
+
+# --------------------------------------------------------------------------------------
+# Catálogo
+# --------------------------------------------------------------------------------------
+def _valor(row, chave: str):
+    return row[chave] if isinstance(row, dict) else row[0]
+
+def particionada(cur, tabela: str) -> bool:
+    cur.execute("""
+        SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)) AS sim
+    """, (tabela,))
+    return bool(_valor(cur.fetchone(), "sim"))
+
+def _situacao(cur, tabela: str) -> Optional[str]:
+    """None (não existe), 'particao' (anexada a algum pai) ou 'solta'."""
+    cur.execute("""
+        SELECT CASE WHEN c.relispartition THEN 'particao' ELSE 'solta' END AS situacao
+        FROM pg_class c WHERE c.oid = to_regclass(%s)
+    """, (tabela,))
+    row = cur.fetchone()
+    return _valor(row, "situacao") if row else None
+
+def particao_padrao(cur, tabela: str) -> Optional[str]:
+    cur.execute("""
+        SELECT p.partdefid::regclass::text AS padrao
+        FROM pg_partitioned_table p
+        WHERE p.partrelid = to_regclass(%s) AND p.partdefid <> 0
+    """, (tabela,))
+    row = cur.fetchone()
+    return _valor(row, "padrao") if row else None
+
+def _fks(cur, tabela: str) -> List[tuple]:
+    """(nome, definição) das FKs da tabela."""
+    cur.execute("""
+        SELECT conname, pg_get_constraintdef(oid) AS definicao
+        FROM pg_constraint WHERE conrelid = to_regclass(%s) AND contype = 'f'
+        ORDER BY conname
+    """, (tabela,))
+    return [(r["conname"], r["definicao"]) if isinstance(r, dict) else tuple(r) for r in cur.fetchall()]
+
+def _legado_tem(cur, padrao: Optional[str], import_id: str) -> bool:
+    if not padrao:
+        return False
+    cur.execute(sql.SQL("SELECT EXISTS (SELECT 1 FROM ONLY {} WHERE import_id = %s) AS sim")
+                .format(sql.SQL(padrao)), (import_id,))
+    return bool(_valor(cur.fetchone(), "sim"))
+
+# --------------------------------------------------------------------------------------
+# DDL
+# --------------------------------------------------------------------------------------
+def _criar_solta(cur, tabela: str, destino: str, descricao: str) -> None:
+    """Tabela com as colunas, defaults e índices do pai, ainda fora do particionamento."""
+    cur.execute(sql.SQL("CREATE TABLE {} (LIKE {} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING INDEXES)")
+                .format(_ident(*_partes(destino)), _ident(*_partes(tabela))))
+    if descricao:
+        cur.execute(sql.SQL("COMMENT ON TABLE {} IS {}")
+                    .format(_ident(*_partes(destino)), sql.Literal(descricao)))
+
+def _validar_fks(cur, tabela: str, troca: str) -> None:
+    """
+    FKs do pai na tabela de troca: NOT VALID + VALIDATE (sem travar escrita em lead_bruto). No
+    ATTACH o Postgres reaproveita a FK já validada em vez de varrer a tabela com o lock da troca.
+    """
+    existentes = {nome for nome, _ in _fks(cur, troca)}
+    ident = _ident(*_partes(troca))
+    for nome, definicao in _fks(cur, tabela):
+        if nome in existentes:
+            continue
+        cur.execute(sql.SQL("ALTER TABLE {} ADD CONSTRAINT {} {} NOT VALID")
+                    .format(ident, sql.Identifier(nome), sql.SQL(definicao)))
+        cur.execute(sql.SQL("ALTER TABLE {} VALIDATE CONSTRAINT {}").format(ident, sql.Identifier(nome)))
+
+def _anexar(cur, tabela: str, particao: str, import_id: str) -> None:
+    """
+    ATTACH com CHECK equivalente ao limite da partição: o Postgres aceita a tabela sem varrê-la.
+    (A DEFAULT ainda é varrida se tiver linhas; ver migrar_legado.)
+    """
+    ident = _ident(*_partes(particao))
+    cur.execute(sql.SQL("ALTER TABLE {} ADD CONSTRAINT particao_import_id CHECK (import_id IS NOT NULL AND import_id = {})")
+                .format(ident, sql.Literal(import_id)))
+    cur.execute(sql.SQL("ALTER TABLE {} ATTACH PARTITION {} FOR VALUES IN ({})")
+                .format(_ident(*_partes(tabela)), ident, sql.Literal(import_id)))
+    cur.execute(sql.SQL("ALTER TABLE {} DROP CONSTRAINT particao_import_id").format(ident))
+
+def _com_lock_timeout(conn, passo, descricao: str):
+    """Roda passo(cur) numa transação com lock_timeout; sem o lock, desfaz e tenta de novo."""
+    for tentativa in range(1, PARTICAO_TENTATIVAS + 1):
+        try:
+            with conn.cursor() as cur:
+                cur.execute(f"SET LOCAL lock_timeout = {int(PARTICAO_LOCK_TIMEOUT_MS)}")
+                resultado = passo(cur)
+            conn.commit()
+            return resultado
+        except LockNotAvailable:
+            conn.rollback()
+            if tentativa == PARTICAO_TENTATIVAS:
+                raise
+            tqdm.write(f"[partições] {descricao}: lock ocupado, tentativa {tentativa}/{PARTICAO_TENTATIVAS}")
+            time.sleep(min(30.0, 2.0 ** tentativa))
+
+# --------------------------------------------------------------------------------------
+# API dos importers
+# --------------------------------------------------------------------------------------
+def preparar_particoes(
+    conn,
+    import_id: str,
+    tabelas: Iterable[str] = TABELAS_MENSAIS,
+    retomando: bool = False,
+    descricao: str = "",
+) -> Dict[str, str]:
+    """
+    Garante o destino de cada mensal para import_id e devolve {tabela: destino do COPY}.
+    - partição inexistente: cria e anexa (o COPY vai direto para ela)
+    - partição existente, importação nova: tabela de troca vazia (recriada se sobrou de antes)
+    - retomada: segue na tabela de troca, se houver, senão na partição
+    - tabela não particionada: a própria tabela
+    Faz commit.
+    """
+    destinos: Dict[str, str] = {}
+
+    def passo(cur):
+        for tabela in tabelas:
+            if not particionada(cur, tabela):
+                destinos[tabela] = tabela
+                continue
+            particao = nome_particao(tabela, import_id)
+            troca = particao + SUFIXO_TROCA
+            situacao = _situacao(cur, particao)
+            if retomando and _situacao(cur, troca) == "solta":
+                destinos[tabela] = troca
+            elif situacao is None and not _legado_tem(cur, particao_padrao(cur, tabela), import_id):
+                _criar_solta(cur, tabela, particao, descricao)
+                _anexar(cur, tabela, particao, import_id)
+                destinos[tabela] = particao
+            elif retomando and situacao == "particao":
+                destinos[tabela] = particao
+            else:
+                # reimportação (ou import_id ainda no legado): carrega à parte e troca no fim
+                cur.execute(sql.SQL("DROP TABLE IF EXISTS {}").format(_ident(*_partes(troca))))
+                _criar_solta(cur, tabela, troca, descricao)
+                destinos[tabela] = troca
+        return destinos
+
+    _com_lock_timeout(conn, passo, f"preparar {import_id}")
+    return destinos
+
+def reimportacao(destinos: Dict[str, str]) -> bool:
+    """Algum destino é tabela de troca: a camada já tinha sido importada com este import_id."""
+    return any(d.endswith(SUFIXO_TROCA) for d in destinos.values())
+
+def concluir_particoes(conn, import_id: str, destinos: Dict[str, str]) -> List[str]:
+    """
+    Troca as partições carregadas à parte (destinos de preparar_particoes) numa transação só:
+    DETACH + DROP da antiga (ou DELETE das linhas do import_id na DEFAULT legada), ATTACH da nova.
+    Devolve as tabelas trocadas. Faz commit.
+    """
+    trocas = {t: d for t, d in destinos.items() if d.endswith(SUFIXO_TROCA)}
+    if not trocas:
+        return []
+
+    with conn.cursor() as cur:
+        for tabela, troca in trocas.items():
+            _validar_fks(cur, tabela, troca)
+    conn.commit()
+
+    def passo(cur):
+        for tabela, troca in trocas.items():
+            particao = troca[: -len(SUFIXO_TROCA)]
+            pai = _ident(*_partes(tabela))
+            situacao = _situacao(cur, particao)
+            if situacao == "particao":
+                cur.execute(sql.SQL("ALTER TABLE {} DETACH PARTITION {}").format(pai, _ident(*_partes(particao))))
+            if situacao is not None:
+                cur.execute(sql.SQL("DROP TABLE {}").format(_ident(*_partes(particao))))
+            if situacao != "particao":
+                padrao = particao_padrao(cur, tabela)
+                if padrao:
+                    cur.execute(sql.SQL("DELETE FROM ONLY {} WHERE import_id = %s").format(sql.SQL(padrao)), (import_id,))
+            schema, nome = _partes(particao)
+            cur.execute(sql.SQL("ALTER TABLE {} RENAME TO {}").format(_ident(*_partes(troca)), sql.Identifier(nome)))
+            _anexar(cur, tabela, particao, import_id)
+        return list(trocas)
+
+    trocadas = _com_lock_timeout(conn, passo, f"trocar {import_id}")
+    tqdm.write(f"[partições] {import_id}: {len(trocadas)} partição(ões) trocada(s)")
+    return trocadas
+
+# --------------------------------------------------------------------------------------
+# Legado (linhas de antes do particionamento, na DEFAULT)
+# --------------------------------------------------------------------------------------
+def migrar_legado(conn, tabela: str, import_id: str) -> int:
+    """Move as linhas de import_id da DEFAULT para uma partição própria. Devolve as linhas movidas."""
+    with conn.cursor() as cur:
+        padrao = particao_padrao(cur, tabela)
+        particao = nome_particao(tabela, import_id)
+        troca = particao + SUFIXO_TROCA
+        if not padrao or _situacao(cur, particao) is not None:
+            conn.rollback()
+            return 0
+        cur.execute(sql.SQL("DROP TABLE IF EXISTS {}").format(_ident(*_partes(troca))))
+        _criar_solta(cur, tabela, troca, f"migrada do legado ({import_id})")
+        cur.execute(sql.SQL("INSERT INTO {} SELECT * FROM ONLY {} WHERE import_id = %s")
+                    .format(_ident(*_partes(troca)), sql.SQL(padrao)), (import_id,))
+        movidas = cur.rowcount
+    conn.commit()
+    concluir_particoes(conn, import_id, {tabela: troca})
+    return movidas
+
+def import_ids_legados(conn, tabela: str) -> List[str]:
+    # sem import_id não há partição de destino: a migration 014 as atribui pelo lead_bruto
+    with conn.cursor() as cur:
+        padrao = particao_padrao(cur, tabela)
+        if not padrao:
+            return []
+        cur.execute(sql.SQL("SELECT DISTINCT import_id FROM ONLY {} WHERE import_id IS NOT NULL")
+                    .format(sql.SQL(padrao)))
+        ids = [_valor(r, "import_id") for r in cur.fetchall()]
+    conn.commit()
+    return ids
+
+def restante_legado(conn, tabela: str) -> tuple:
+    """(linhas, linhas sem import_id) ainda na DEFAULT."""
+    with conn.cursor() as cur:
+        padrao = particao_padrao(cur, tabela)
+        if not padrao:
+            conn.commit()
+            return 0, 0
+        cur.execute(sql.SQL("SELECT count(*) AS linhas, count(*) FILTER (WHERE import_id IS NULL) AS sem_id FROM ONLY {}")
+                    .format(sql.SQL(padrao)))
+        row = cur.fetchone()
+    conn.commit()
+    return (row["linhas"], row["sem_id"]) if isinstance(row, dict) else tuple(row)
+
+def main():
+    ap = argparse.ArgumentParser(description="Partições das tabelas mensais")
+    ap.add_argument("--migrar-legado", action="store_true",
+                    help="Move as linhas da partição DEFAULT para partições por import_id")
+    args = ap.parse_args()
+    if not args.migrar_legado:
+        ap.print_help()
+        return
+
+    from packages.database.connection import get_db_connection
+    with get_db_connection() as conn:
+        for tabela in TABELAS_MENSAIS:
+            for import_id in import_ids_legados(conn, tabela):
+                movidas = migrar_legado(conn, tabela, import_id)
+                tqdm.write(f"[partições] {tabela} {import_id}: {movidas} linhas migradas do legado")
+            linhas, sem_id = restante_legado(conn, tabela)
+            aviso = (f" ({sem_id} sem import_id: rode de novo a migration 014, que as atribui pelo lead_bruto)"
+                     if sem_id else "")
+            tqdm.write(f"[partições] {tabela}: {linhas} linhas ainda na DEFAULT{aviso}")
+
+if __name__ == "__main__":
+    main()
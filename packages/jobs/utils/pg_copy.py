@@ -0,0 +1,280 @@
+# packages/jobs/utils/pg_copy.py
+# -*- coding: utf-8 -*-
+"""
+COPY compartilhado pelos importers (lead_bruto, mensais, ponto_notavel).
+
+- FORMAT binary montado direto das colunas NumPy (sem formatar/parsear float em texto)
+- Tipos com encoder binário: int2/int4/int8, float4/float8, bool, date, timestamp, uuid,
+  text/varchar/bpchar, enums (enviados como o rótulo em texto) e float4[] unidimensional
+  (séries mensais compactas; cada valor da coluna é um array, NaN vira elemento NULL)
+- Se alguma coluna do destino tiver tipo sem encoder (numeric, jsonb, geometry...),
+  aquele COPY cai para CSV (o formato do COPY vale para a instrução inteira)
+- O buffer binário é lido pelo psycopg2 em fatias, sem cópia extra em StringIO
+
+Knobs (env):
+- COPY_FORMAT (default "binary"; "csv" volta ao caminho antigo)
+"""
+
+from __future__ import annotations
+import io
+import os
+import struct
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+COPY_FORMAT = os.getenv("COPY_FORMAT", "binary").lower()
+COPY_READ_SIZE = 1 << 20
+
+PGCOPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack("!ii", 0, 0)
+PGCOPY_TRAILER = struct.pack("!h", -1)
+
+_PG_EPOCH_DAY = np.datetime64("2000-01-01", "D")
+_PG_EPOCH_US = np.datetime64("2000-01-01T00:00:00", "us")
+
+_INT_TIPOS = {"int2": ">i2", "int4": ">i4", "int8": ">i8"}
+_FLOAT_TIPOS = {"float4": ">f4", "float8": ">f8"}
+_TEXTO_TIPOS = {"text", "varchar", "bpchar", "name", "enum"}
+TIPOS_BINARIOS = set(_INT_TIPOS) | set(_FLOAT_TIPOS) | _TEXTO_TIPOS | {"bool", "date", "timestamp", "uuid", "_float4"}
+_FLOAT4_OID = 700
+
+# tipos por tabela (tabelas temporárias de staging são LIKE da tabela real, então o nome basta)
+_tipos_cache: Dict[str, Dict[str, str]] = {}
+
+# --------------------------------------------------------------------------------------
+# Introspecção
+# --------------------------------------------------------------------------------------
+def tipos_colunas(cur, table_full: str) -> Dict[str, str]:
+    """Retorna {coluna: typname} do destino; enums viram 'enum'."""
+    if table_full in _tipos_cache:
+        return _tipos_cache[table_full]
+    cur.execute("""
+        SELECT a.attname, CASE WHEN t.typtype = 'e' THEN 'enum' ELSE t.typname END
+        FROM pg_attribute a
+        JOIN pg_type t ON t.oid = a.atttypid
+        WHERE a.attrelid = to_regclass(%s) AND a.attnum > 0 AND NOT a.attisdropped
+    """, (table_full,))
+    tipos = {nome: tipo for nome, tipo in cur.fetchall()}
+    if tipos:
+        _tipos_cache[table_full] = tipos
+    return tipos
+
+# --------------------------------------------------------------------------------------
+# Encoders por coluna: devolvem (comprimentos int32 com -1 = NULL, bytes dos não-nulos)
+# --------------------------------------------------------------------------------------
+def _fixo(valores: np.ndarray, nulos: np.ndarray, dtype: str) -> Tuple[np.ndarray, np.ndarray]:
+    arr = np.ascontiguousarray(valores[~nulos].astype(dtype))
+    largura = np.dtype(dtype).itemsize
+    lens = np.where(nulos, -1, largura).astype(np.int32)
+    return lens, arr.view(np.uint8).ravel()
+
+def _enc_int(serie: pd.Series, nulos: np.ndarray, dtype: str) -> Tuple[np.ndarray, np.ndarray]:
+    validos = serie[~nulos]
+    if pd.api.types.is_integer_dtype(validos):
+        v = validos.to_numpy(dtype="int64")
+    else:
+        f = pd.to_numeric(validos, errors="raise").to_numpy(dtype="float64")
+        if not np.all(f == np.round(f)):
+            raise ValueError(f"Coluna '{serie.name}' tem valores não inteiros para {dtype}")
+        v = f.astype("int64")
+    info = np.iinfo(dtype)
+    if len(v) and (v.min() < info.min or v.max() > info.max):
+        raise ValueError(f"Coluna '{serie.name}' fora do intervalo de {dtype}")
+    cheio = np.zeros(len(serie), dtype="int64")
+    cheio[~nulos] = v
+    return _fixo(cheio, nulos, dtype)
+
+def _enc_float(serie: pd.Series, nulos: np.ndarray, dtype: str) -> Tuple[np.ndarray, np.ndarray]:
+    v = pd.to_numeric(serie, errors="raise").to_numpy(dtype="float64", na_value=np.nan)
+    return _fixo(v, nulos, dtype)
+
+def _enc_bool(serie: pd.Series, nulos: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    v = serie.where(~nulos, False).astype(bool).to_numpy()
+    return _fixo(v, nulos, "u1")
+
+def _enc_date(serie: pd.Series, nulos: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    d = pd.to_datetime(serie, errors="coerce").to_numpy(dtype="datetime64[D]")
+    dias = (d - _PG_EPOCH_DAY).astype("int64")
+    return _fixo(dias, nulos | np.isnat(d), ">i4")
+
+def _enc_timestamp(serie: pd.Series, nulos: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    d = pd.to_datetime(serie, errors="coerce").to_numpy(dtype="datetime64[us]")
+    us = (d - _PG_EPOCH_US).astype("int64")
+    return _fixo(us, nulos | np.isnat(d), ">i8")
+
+def _enc_uuid(serie: pd.Series, nulos: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    validos = serie[~nulos].astype(str)
+    hexes = "".join(validos).replace("-", "")
+    if len(hexes) != 32 * len(validos):
+        raise ValueError(f"Coluna '{serie.name}' tem valores que não são UUID")
+    dados = np.frombuffer(bytes.fromhex(hexes), dtype=np.uint8)
+    lens = np.where(nulos, -1, 16).astype(np.int32)
+    return lens, dados
+
+def _enc_texto(serie: pd.Series, nulos: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # codifica cada valor distinto uma vez (origem, import_id, bairro... repetem muito)
+    codes, distintos = pd.factorize(serie[~nulos].astype(str))
+    partes = [v.encode("utf-8") for v in distintos]
+    tam = np.fromiter(map(len, partes), dtype=np.int64, count=len(partes))
+    inicio = np.cumsum(tam) - tam
+    flat = np.frombuffer(b"".join(partes), dtype=np.uint8)
+
+    lens = np.full(len(serie), -1, dtype=np.int32)
+    lens[~nulos] = tam[codes]
+    tam_linha = tam[codes]
+    total = int(tam_linha.sum())
+    idx = np.repeat(inicio[codes] - (np.cumsum(tam_linha) - tam_linha), tam_linha) + np.arange(total)
+    return lens, flat[idx]
+
+def _enc_array_float4(serie: pd.Series, nulos: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    float4[] de uma dimensão: cabeçalho (ndim, flag de NULL, oid do elemento, tamanho, limite
+    inferior) + (int32 tamanho, float4) por elemento; elemento NaN vai como NULL (só o -1).
+    Todos os arrays da coluna precisam ter o mesmo tamanho.
+    """
+    lens = np.full(len(serie), -1, dtype=np.int32)
+    validos = serie[~nulos].to_numpy()
+    if not len(validos):
+        return lens, np.empty(0, dtype=np.uint8)
+    try:
+        matriz = np.stack(validos).astype(">f4")
+    except ValueError:
+        raise ValueError(f"Coluna '{serie.name}' tem arrays de tamanhos diferentes")
+    m, k = matriz.shape
+    nulo_el = np.isnan(matriz)
+
+    cab = np.empty((m, 5), dtype=">i4")
+    cab[:, 0], cab[:, 1], cab[:, 2], cab[:, 3], cab[:, 4] = 1, nulo_el.any(axis=1), _FLOAT4_OID, k, 1
+    elementos = np.empty((m, k, 2), dtype=">i4")
+    elementos[..., 0] = np.where(nulo_el, -1, 4)
+    elementos[..., 1] = matriz.view(">i4")
+
+    bruto = np.concatenate([cab.view(np.uint8).reshape(m, 20), elementos.view(np.uint8).reshape(m, 8 * k)], axis=1)
+    manter_el = np.ones((m, k, 8), dtype=bool)
+    manter_el[..., 4:] = ~nulo_el[..., None]
+    manter = np.concatenate([np.ones((m, 20), dtype=bool), manter_el.reshape(m, 8 * k)], axis=1)
+    lens[~nulos] = 20 + 8 * k - 4 * nulo_el.sum(axis=1)
+    return lens, bruto[manter]
+
+def _encode_coluna(serie: pd.Series, tipo: str) -> Tuple[np.ndarray, np.ndarray]:
+    serie = serie.reset_index(drop=True)
+    nulos = serie.isna().to_numpy()
+    if tipo in _INT_TIPOS:
+        return _enc_int(serie, nulos, _INT_TIPOS[tipo])
+    if tipo in _FLOAT_TIPOS:
+        return _enc_float(serie, nulos, _FLOAT_TIPOS[tipo])
+    if tipo == "bool":
+        return _enc_bool(serie, nulos)
+    if tipo == "date":
+        return _enc_date(serie, nulos)
+    if tipo == "timestamp":
+        return _enc_timestamp(serie, nulos)
+    if tipo == "uuid":
+        return _enc_uuid(serie, nulos)
+    if tipo == "_float4":
+        return _enc_array_float4(serie, nulos)
+    return _enc_texto(serie, nulos)
+
+# --------------------------------------------------------------------------------------
+# Montagem do buffer
+# --------------------------------------------------------------------------------------
+def _espalhar(buf: np.ndarray, inicios: np.ndarray, lens: np.ndarray, dados: np.ndarray) -> None:
+    """Copia segmentos consecutivos de `dados` (tamanhos `lens`) para buf[inicios[i]:...]."""
+    total = int(lens.sum())
+    if total == 0:
+        return
+    deslocamento = np.cumsum(lens) - lens
+    idx = np.repeat(inicios - deslocamento, lens) + np.arange(total)
+    buf[idx] = dados
+
+def encode_binary(df: pd.DataFrame, columns: List[str], tipos: Dict[str, str]) -> np.ndarray:
+    """Serializa df[columns] no formato binário do COPY (cabeçalho, tuplas e trailer)."""
+    n, k = len(df), len(columns)
+    lens = np.empty((n, k), dtype=np.int64)
+    dados: List[np.ndarray] = []
+    for j, col in enumerate(columns):
+        l, d = _encode_coluna(df[col], tipos[col])
+        lens[:, j] = l
+        dados.append(d)
+
+    campo = 4 + np.maximum(lens, 0)                 # int32 do tamanho + dados
+    linha = 2 + campo.sum(axis=1)                    # int16 com nº de campos
+    inicio_linha = len(PGCOPY_HEADER) + np.cumsum(linha) - linha
+    total = len(PGCOPY_HEADER) + int(linha.sum()) + len(PGCOPY_TRAILER)
+
+    buf = np.empty(total, dtype=np.uint8)
+    buf[:len(PGCOPY_HEADER)] = np.frombuffer(PGCOPY_HEADER, dtype=np.uint8)
+    buf[-len(PGCOPY_TRAILER):] = np.frombuffer(PGCOPY_TRAILER, dtype=np.uint8)
+
+    nfields = np.full(n, k, dtype=">i2").view(np.uint8).reshape(n, 2)
+    buf[inicio_linha[:, None] + np.arange(2)] = nfields
+
+    inicio_campo = inicio_linha[:, None] + 2 + np.cumsum(campo, axis=1) - campo
+    for j in range(k):
+        ini = inicio_campo[:, j]
+        buf[ini[:, None] + np.arange(4)] = lens[:, j].astype(">i4").view(np.uint8).reshape(n, 4)
+        validos = lens[:, j] >= 0
+        _espalhar(buf, ini[validos] + 4, lens[validos, j], dados[j])
+    return buf
+
+class _LeitorBuffer:
+    """Arquivo somente-leitura sobre um buffer NumPy (o psycopg2 só chama read)."""
+
+    def __init__(self, buf: np.ndarray):
+        self._mv = memoryview(buf)
+        self._pos = 0
+
+    def read(self, size: int = -1) -> bytes:
+        fim = len(self._mv) if size is None or size < 0 else min(self._pos + size, len(self._mv))
+        parte = self._mv[self._pos:fim].tobytes()
+        self._pos = fim
+        return parte
+
+# --------------------------------------------------------------------------------------
+# API
+# --------------------------------------------------------------------------------------
+def _literal_array(valor) -> str:
+    """Array (lista/ndarray) -> literal do Postgres ('{1.5,NULL,...}'); NaN vira NULL."""
+    return "{" + ",".join("NULL" if pd.isna(v) else repr(float(v)) for v in valor) + "}"
+
+def _coluna_de_arrays(serie: pd.Series) -> bool:
+    if serie.dtype != object or not serie.notna().any():
+        return False
+    return isinstance(serie.loc[serie.first_valid_index()], (np.ndarray, list))
+
+def copy_csv(cur, df: pd.DataFrame, table_full: str, columns: List[str]) -> int:
+    arrays = [c for c in columns if _coluna_de_arrays(df[c])]
+    if arrays:
+        df = df.assign(**{c: df[c].map(_literal_array, na_action="ignore") for c in arrays})
+    buf = io.StringIO()
+    df.to_csv(buf, index=False, header=False, columns=columns, na_rep='\\N')
+    buf.seek(0)
+    cur.copy_expert(
+        f"COPY {table_full} ({','.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+        buf
+    )
+    return len(df)
+
+def copy_binary(cur, df: pd.DataFrame, table_full: str, columns: List[str], tipos: Dict[str, str]) -> int:
+    buf = encode_binary(df, columns, tipos)
+    cur.copy_expert(
+        f"COPY {table_full} ({','.join(columns)}) FROM STDIN WITH (FORMAT binary)",
+        _LeitorBuffer(buf),
+        size=COPY_READ_SIZE,
+    )
+    return len(df)
+
+def copy_dataframe(cur, df: pd.DataFrame, table_full: str, columns: List[str], formato: str | None = None) -> int:
+    """
+    COPY de df[columns] para table_full. Usa binary quando todas as colunas do destino
+    têm encoder; caso contrário (ou com formato="csv") usa o CSV de sempre.
+    """
+    if df.empty:
+        return 0
+    formato = (formato or COPY_FORMAT).lower()
+    if formato == "binary":
+        tipos = tipos_colunas(cur, table_full)
+        if all(tipos.get(c) in TIPOS_BINARIOS for c in columns):
+            return copy_binary(cur, df, table_full, columns, tipos)
+    return copy_csv(cur, df, table_full, columns)
@@ -1,6 +1,28 @@
 import hashlib
+import json
+from typing import Optional
+
 from packages.database.connection import get_db_cursor
 
+# Checkpoint por import_id (tabela irmã de import_status; ver
+# packages/database/schema/migrations/012_import_checkpoint.sql). Gravado pelo importer no
+# mesmo commit dos dados de cada chunk: um job reenfileirado retoma do último chunk gravado.
+SQL_TABELA_CHECKPOINT = """
+    CREATE TABLE IF NOT EXISTS import_checkpoint (
+        import_id          TEXT PRIMARY KEY,
+        camada             TEXT NOT NULL,
+        layer              TEXT,
+        offset_features    BIGINT NOT NULL DEFAULT 0,
+        linhas_commitadas  BIGINT NOT NULL DEFAULT 0,
+        total_features     BIGINT,
+        concluido          BOOLEAN NOT NULL DEFAULT false,
+        atualizado_em      TIMESTAMPTZ NOT NULL DEFAULT NOW()
+    )
+"""
+_tabela_checkpoint_ok = False
+_coluna_resumo_diff_ok = False
+INDICE_ESPACIAL_SCRIPT = "packages/detectors/indice_espacial.py"
+
 def gerar_import_id(prefixo: str, ano: int, camada: str) -> str:
     """
     Gera um ID único baseado nos dados da importação.
@@ -19,15 +41,33 @@ def registrar_status(
     linhas_processadas: int = None,
     observacoes: str = None,
     import_id: str = None,
+    total_registros: int = None,
+    resumo_diff: dict = None,
 ):
     """
     Registra ou atualiza o status da importação no schema intel_lead.
     Preenche data_inicio quando status = running.
     Preenche data_fim, erro, observacoes e linhas_processadas quando status = completed/failed/no_new_rows.
+    total_registros: total de features da camada; habilita o progresso (%) em import_checkpoint.
+    completed/no_new_rows fecham o checkpoint (a próxima execução começa do zero);
+    failed o mantém para o retry retomar de onde parou.
+    resumo_diff: contagens da reimportação incremental (novas/alteradas/iguais/removidas),
+    gravadas em import_status.resumo_diff (jsonb) no fechamento.
     """
     import_id = import_id or gerar_import_id(prefixo, ano, camada)
 
     with get_db_cursor(commit=True) as cur:
+        if total_registros is not None:
+            # progresso passa a ser visível já no início (0% ou o ponto de retomada)
+            garantir_tabela_checkpoint(cur)
+            cur.execute("""
+                INSERT INTO import_checkpoint (import_id, camada, total_features)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (import_id) DO UPDATE SET
+                    total_features = EXCLUDED.total_features,
+                    atualizado_em = NOW()
+            """, (import_id, camada, total_registros))
+
         if status == "running":
             cur.execute("""
                 INSERT INTO import_status (
@@ -65,6 +105,60 @@ def registrar_status(
                 observacoes,
                 import_id
             ))
+            if resumo_diff is not None:
+                garantir_coluna_resumo_diff(cur)
+                cur.execute(
+                    "UPDATE import_status SET resumo_diff = %s WHERE import_id = %s",
+                    (json.dumps(resumo_diff), import_id),
+                )
+            if status != "failed":
+                garantir_tabela_checkpoint(cur)
+                cur.execute("""
+                    UPDATE import_checkpoint
+                    SET concluido = true, offset_features = COALESCE(total_features, offset_features),
+                        atualizado_em = NOW()
+                    WHERE import_id = %s
+                """, (import_id,))
+                aplicar_resumos(cur, import_id)
+                enfileirar_indice_espacial(cur, import_id)
+
+def aplicar_resumos(cur, import_id: str) -> None:
+    """
+    Deltas da importação nos resumos do dashboard (utils/resumos.py), no mesmo commit do
+    status. Falha aqui não derruba a importação: fica para resumos.py --verificar --corrigir.
+    """
+    from packages.jobs.utils.resumos import aplicar_import
+
+    cur.execute("SAVEPOINT resumos")
+    try:
+        aplicar_import(cur, import_id)
+        cur.execute("RELEASE SAVEPOINT resumos")
+    except Exception as e:
+        cur.execute("ROLLBACK TO SAVEPOINT resumos")
+        print(f"[rastreio] resumos não atualizados para {import_id}: {e}")
+
+def enfileirar_indice_espacial(cur, import_id: str) -> None:
+    """
+    Atualização incremental do índice espacial de UCs (packages/detectors/indice_espacial.py)
+    pela fila, no mesmo commit do status. Só quando o snapshot existe neste host; um job igual
+    ainda na fila não é duplicado.
+    """
+    from packages.detectors.indice_espacial import caminho_snapshot
+
+    if not caminho_snapshot("ucs").exists():
+        return
+    payload = json.dumps({"script": INDICE_ESPACIAL_SCRIPT, "args": ["--import-id", import_id], "env": {}})
+    cur.execute("SAVEPOINT indice_espacial")
+    try:
+        cur.execute("""
+            INSERT INTO import_queue (payload, priority)
+            SELECT %s::jsonb, 5
+            WHERE NOT EXISTS (SELECT 1 FROM import_queue WHERE status = 'queued' AND payload = %s::jsonb)
+        """, (payload, payload))
+        cur.execute("RELEASE SAVEPOINT indice_espacial")
+    except Exception as e:
+        cur.execute("ROLLBACK TO SAVEPOINT indice_espacial")
+        print(f"[rastreio] índice espacial não enfileirado para {import_id}: {e}")
 
 def get_status(prefixo: str, ano: int, camada: str) -> str:
     """
@@ -76,3 +170,97 @@ def get_status(prefixo: str, ano: int, camada: str) -> str:
         cur.execute("SELECT status FROM import_status WHERE import_id = %s", (import_id,))
         row = cur.fetchone()
         return row["status"] if row else None
+
+# --------------------------------------------------------------------------------------
+# Checkpoint / progresso
+# --------------------------------------------------------------------------------------
+def garantir_tabela_checkpoint(cur) -> None:
+    """Cria import_checkpoint se ainda não existir (uma vez por processo)."""
+    global _tabela_checkpoint_ok
+    if not _tabela_checkpoint_ok:
+        # to_regclass antes: com a migration aplicada, o papel do importer não precisa de CREATE
+        cur.execute("SELECT to_regclass('import_checkpoint') IS NOT NULL AS existe")
+        row = cur.fetchone()
+        existe = row["existe"] if isinstance(row, dict) else row[0]
+        if not existe:
+            cur.execute(SQL_TABELA_CHECKPOINT)
+        _tabela_checkpoint_ok = True
+
+def garantir_coluna_resumo_diff(cur) -> None:
+    """import_status.resumo_diff (migration 013); acrescentada aqui se ainda não existir."""
+    global _coluna_resumo_diff_ok
+    if not _coluna_resumo_diff_ok:
+        cur.execute("""
+            SELECT EXISTS (
+                SELECT 1 FROM information_schema.columns
+                WHERE table_name = 'import_status' AND column_name = 'resumo_diff'
+                  AND table_schema = ANY(current_schemas(false))
+            ) AS existe
+        """)
+        row = cur.fetchone()
+        if not (row["existe"] if isinstance(row, dict) else row[0]):
+            cur.execute("ALTER TABLE import_status ADD COLUMN IF NOT EXISTS resumo_diff JSONB")
+        _coluna_resumo_diff_ok = True
+
+def ler_checkpoint(cur, import_id: str) -> Optional[dict]:
+    """
+    Ponto de retomada de uma importação interrompida: {"layer", "offset", "linhas"}.
+    None se não houver checkpoint ou se a última execução terminou.
+    """
+    garantir_tabela_checkpoint(cur)
+    cur.execute("""
+        SELECT layer, offset_features, linhas_commitadas
+        FROM import_checkpoint
+        WHERE import_id = %s AND NOT concluido AND offset_features > 0
+    """, (import_id,))
+    row = cur.fetchone()
+    if not row:
+        return None
+    if isinstance(row, dict):
+        row = (row["layer"], row["offset_features"], row["linhas_commitadas"])
+    return {"layer": row[0], "offset": int(row[1]), "linhas": int(row[2])}
+
+def salvar_checkpoint(
+    cur,
+    import_id: str,
+    camada: str,
+    layer: str,
+    offset: int,
+    linhas: int,
+    total: int = None,
+) -> None:
+    """
+    Grava o checkpoint com o cursor do importer, ANTES do commit do chunk: dados e checkpoint
+    entram (ou somem) juntos. offset = features da camada já lidas e gravadas.
+    """
+    garantir_tabela_checkpoint(cur)
+    cur.execute("""
+        INSERT INTO import_checkpoint (
+            import_id, camada, layer, offset_features, linhas_commitadas, total_features, concluido
+        )
+        VALUES (%s, %s, %s, %s, %s, %s, false)
+        ON CONFLICT (import_id) DO UPDATE SET
+            layer = EXCLUDED.layer,
+            offset_features = EXCLUDED.offset_features,
+            linhas_commitadas = EXCLUDED.linhas_commitadas,
+            total_features = COALESCE(EXCLUDED.total_features, import_checkpoint.total_features),
+            concluido = false,
+            atualizado_em = NOW()
+    """, (import_id, camada, layer, offset, linhas, total))
+
+def get_progresso(prefixo: str, ano: int, camada: str) -> Optional[float]:
+    """
+    Progresso (%) da importação, pelo checkpoint; None se não houver total conhecido.
+    """
+    import_id = gerar_import_id(prefixo, ano, camada)
+
+    with get_db_cursor() as cur:
+        garantir_tabela_checkpoint(cur)
+        cur.execute("""
+            SELECT CASE WHEN concluido THEN 100.0
+                        WHEN total_features > 0 THEN round(100.0 * offset_features / total_features, 1)
+                   END AS progresso
+            FROM import_checkpoint WHERE import_id = %s
+        """, (import_id,))
+        row = cur.fetchone()
+        return float(row["progresso"]) if row and row["progresso"] is not None else None
@@ -0,0 +1,249 @@
+# packages/jobs/utils/resumos.py
+# -*- coding: utf-8 -*-
+"""
+Resumos do dashboard mantidos por importação (deltas), sem refresh global de MV.
+
+- Cada resumo tem uma tabela de totais (resumo_inc_*, lida pelo dashboard) e um razão por
+  import_id (resumo_inc_*_import) com a contribuição de cada importação
+- Ao fechar uma importação (rastreio.registrar_status completed/no_new_rows),
+  aplicar_import() recalcula só as linhas de lead_bruto daquele import_id (índice em
+  import_id), troca a contribuição no razão e soma (nova - antiga) nos totais, na mesma
+  transação do status. Reimportação do mesmo import_id substitui a contribuição anterior
+- Equivalem às MVs resumo_leads_distribuidora, resumo_leads_ano_camada e
+  resumo_energia_municipio (energia das mensais longas, como a MV; média por município =
+  soma_media_energia / leads_com_energia)
+- Mudanças em lead_bruto fora das importações (status do enriquecimento, limpeza de leads)
+  não passam por aqui: verificar() compara os totais com um recálculo completo e
+  reconstruir() refaz razão e totais. Sob demanda:
+    python packages/jobs/utils/resumos.py --verificar [--corrigir]
+    python packages/jobs/utils/resumos.py --import-id ID      # reaplica uma importação
+  (POST /v1/admin/dashboard/resumo/verificar enfileira o --verificar --corrigir)
+"""
+
+from __future__ import annotations
+import argparse
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from tqdm import tqdm
+
+# serializa deltas concorrentes (duas importações fechando ao mesmo tempo)
+LOCK_RESUMOS = 7_231_017
+TOLERANCIA = 1e-6
+
+@dataclass(frozen=True)
+class Resumo:
+    tabela: str
+    chaves: Dict[str, str]           # coluna -> expressão
+    medidas: Dict[str, str]          # coluna -> agregado aditivo (count/sum)
+    origem: str                      # FROM; {filtro_f} = filtro aplicado ao alias f
+
+    @property
+    def razao(self) -> str:
+        return f"{self.tabela}_import"
+
+    def consulta(self, filtro: str, por_import: bool = False) -> str:
+        """SELECT das chaves/medidas; filtro com {a} no lugar do alias de lead_bruto."""
+        chaves = list(self.chaves.values())
+        if por_import:
+            chaves = ["lb.import_id"] + chaves
+        return (f"SELECT {', '.join(chaves + [f'{e} AS {c}' for c, e in self.medidas.items()])} "
+                f"FROM {self.origem.format(filtro_f=filtro.format(a='f'))} "
+                f"WHERE {filtro.format(a='lb')} GROUP BY {', '.join(chaves)}")
+
+RESUMOS: Tuple[Resumo, ...] = (
+    Resumo(
+        "resumo_inc_leads_distribuidora",
+        {"distribuidora_id": "lb.distribuidora_id", "camada": "lb.origem::text", "status": "lb.status"},
+        {"total_leads": "count(*)"},
+        "lead_bruto lb",
+    ),
+    Resumo(
+        "resumo_inc_leads_ano_camada",
+        {"ano": "lb.ano", "camada": "lb.origem::text"},
+        {"total_leads": "count(*)"},
+        "lead_bruto lb",
+    ),
+    Resumo(
+        "resumo_inc_energia_municipio",
+        {"municipio_id": "lb.municipio_id"},
+        {"total_leads": "count(*)", "energia_total": "coalesce(sum(e.soma), 0)::numeric",
+         "soma_media_energia": "coalesce(sum(e.media), 0)::numeric", "leads_com_energia": "count(e.media)"},
+        """lead_bruto lb LEFT JOIN (
+               SELECT m.lead_bruto_id, sum(m.energia_total) AS soma, avg(m.energia_total) AS media
+               FROM lead_energia_mensal m JOIN lead_bruto f ON f.id = m.lead_bruto_id
+               WHERE {filtro_f}
+               GROUP BY m.lead_bruto_id
+           ) e ON e.lead_bruto_id = lb.id""",
+    ),
+)
+
+_TIPOS = {"distribuidora_id": "integer", "camada": "text", "status": "text", "ano": "integer",
+          "municipio_id": "integer", "total_leads": "bigint", "energia_total": "numeric",
+          "soma_media_energia": "numeric", "leads_com_energia": "bigint"}
+_tabelas_ok = False
+
+# --------------------------------------------------------------------------------------
+# DDL (mesma da migration 017; criada sob demanda)
+# --------------------------------------------------------------------------------------
+def ddl(resumo: Resumo) -> List[str]:
+    chaves = ", ".join(f"{c} {_TIPOS[c]}" for c in resumo.chaves)
+    medidas = ", ".join(f"{c} {_TIPOS[c]} NOT NULL DEFAULT 0" for c in resumo.medidas)
+    return [
+        f"CREATE TABLE IF NOT EXISTS {resumo.tabela} ({chaves}, {medidas}, atualizado_em timestamptz NOT NULL DEFAULT now())",
+        f"CREATE TABLE IF NOT EXISTS {resumo.razao} (import_id text, {chaves}, {medidas})",
+        f"CREATE INDEX IF NOT EXISTS {resumo.razao}_import_id_idx ON {resumo.razao} (import_id)",
+    ]
+
+def garantir_tabelas(cur) -> None:
+    global _tabelas_ok
+    if _tabelas_ok:
+        return
+    cur.execute("SELECT to_regclass(%s) IS NOT NULL AS existe", (RESUMOS[-1].razao,))
+    row = cur.fetchone()
+    if not (row["existe"] if isinstance(row, dict) else row[0]):
+        for resumo in RESUMOS:
+            for comando in ddl(resumo):
+                cur.execute(comando)
+    _tabelas_ok = True
+
+# --------------------------------------------------------------------------------------
+# Deltas
+# --------------------------------------------------------------------------------------
+def _filtro_import(import_id: Optional[str]) -> Tuple[str, dict]:
+    if import_id is None:
+        return "{a}.import_id IS NULL", {}
+    return "{a}.import_id = %(import_id)s", {"import_id": import_id}
+
+def _ler(cur, resumo: Resumo, consulta: str, params=None) -> Dict[tuple, tuple]:
+    cur.execute(consulta, params)
+    n = len(resumo.chaves)
+    linhas = {}
+    for row in cur.fetchall():
+        valores = tuple(row.values()) if isinstance(row, dict) else tuple(row)
+        linhas[valores[:n]] = valores[n:]
+    return linhas
+
+def calcular_delta(antigo: Dict[tuple, tuple], novo: Dict[tuple, tuple]) -> Dict[tuple, tuple]:
+    """novo - antigo por chave (chave ausente = zeros); chaves sem variação ficam de fora."""
+    delta = {}
+    for chave in antigo.keys() | novo.keys():
+        a, b = antigo.get(chave), novo.get(chave)
+        largura = len(a if a is not None else b)
+        a = a or (0,) * largura
+        b = b or (0,) * largura
+        d = tuple((y or 0) - (x or 0) for x, y in zip(a, b))
+        if any(d):
+            delta[chave] = d
+    return delta
+
+def _aplicar_delta(cur, resumo: Resumo, delta: Dict[tuple, tuple]) -> None:
+    chaves, medidas = list(resumo.chaves), list(resumo.medidas)
+    soma = ", ".join(f"{m} = {m} + %s" for m in medidas)
+    onde = " AND ".join(f"{c} IS NOT DISTINCT FROM %s" for c in chaves)
+    for chave, d in delta.items():
+        cur.execute(f"UPDATE {resumo.tabela} SET {soma}, atualizado_em = now() WHERE {onde}", d + chave)
+        if cur.rowcount == 0:
+            cur.execute(f"INSERT INTO {resumo.tabela} ({', '.join(chaves + medidas)}) "
+                        f"VALUES ({', '.join(['%s'] * (len(chaves) + len(medidas)))})", chave + d)
+    cur.execute(f"DELETE FROM {resumo.tabela} WHERE total_leads = 0")
+
+def aplicar_import(cur, import_id: Optional[str]) -> Dict[str, int]:
+    """
+    Recalcula a contribuição de import_id em cada resumo e aplica o delta nos totais.
+    Não faz commit (roda na transação de quem chama). Devolve {resumo: chaves alteradas}.
+    """
+    garantir_tabelas(cur)
+    cur.execute("SELECT pg_advisory_xact_lock(%s)", (LOCK_RESUMOS,))
+    filtro, params = _filtro_import(import_id)
+    alteradas = {}
+    for resumo in RESUMOS:
+        colunas = ", ".join(list(resumo.chaves) + list(resumo.medidas))
+        antigo = _ler(cur, resumo, f"SELECT {colunas} FROM {resumo.razao} WHERE import_id IS NOT DISTINCT FROM %s",
+                      (import_id,))
+        novo = _ler(cur, resumo, resumo.consulta(filtro), params)
+        delta = calcular_delta(antigo, novo)
+        if delta:
+            cur.execute(f"DELETE FROM {resumo.razao} WHERE import_id IS NOT DISTINCT FROM %s", (import_id,))
+            for chave, medidas in novo.items():
+                cur.execute(f"INSERT INTO {resumo.razao} (import_id, {colunas}) "
+                            f"VALUES ({', '.join(['%s'] * (1 + len(chave) + len(medidas)))})",
+                            (import_id,) + chave + medidas)
+            _aplicar_delta(cur, resumo, delta)
+        alteradas[resumo.tabela] = len(delta)
+    return alteradas
+
+# --------------------------------------------------------------------------------------
+# Consistência
+# --------------------------------------------------------------------------------------
+def _igual(a, b) -> bool:
+    a, b = a or 0, b or 0
+    if isinstance(a, (float, Decimal)) or isinstance(b, (float, Decimal)):
+        return abs(float(a) - float(b)) <= TOLERANCIA * max(1.0, abs(float(a)), abs(float(b)))
+    return a == b
+
+def verificar(cur) -> Dict[str, List[tuple]]:
+    """
+    Compara os totais com o recálculo completo a partir de lead_bruto.
+    Devolve {resumo: [(chave, total gravado, recalculado), ...]} só com as divergências.
+    """
+    garantir_tabelas(cur)
+    divergencias = {}
+    for resumo in RESUMOS:
+        colunas = ", ".join(list(resumo.chaves) + list(resumo.medidas))
+        gravado = _ler(cur, resumo, f"SELECT {colunas} FROM {resumo.tabela}")
+        completo = _ler(cur, resumo, resumo.consulta("true"))
+        diff = []
+        for chave in gravado.keys() | completo.keys():
+            a, b = gravado.get(chave), completo.get(chave)
+            if a is None or b is None or not all(_igual(x, y) for x, y in zip(a, b)):
+                diff.append((chave, a, b))
+        divergencias[resumo.tabela] = diff
+    return divergencias
+
+def reconstruir(cur) -> None:
+    """Refaz razão e totais do zero (uma passada em lead_bruto por resumo). Não faz commit."""
+    garantir_tabelas(cur)
+    cur.execute("SELECT pg_advisory_xact_lock(%s)", (LOCK_RESUMOS,))
+    for resumo in RESUMOS:
+        colunas = ", ".join(list(resumo.chaves) + list(resumo.medidas))
+        cur.execute(f"DELETE FROM {resumo.razao}")
+        cur.execute(f"INSERT INTO {resumo.razao} (import_id, {colunas}) {resumo.consulta('true', por_import=True)}")
+        cur.execute(f"DELETE FROM {resumo.tabela}")
+        somas = ", ".join(f"sum({m})" for m in resumo.medidas)
+        cur.execute(f"INSERT INTO {resumo.tabela} ({colunas}) "
+                    f"SELECT {', '.join(resumo.chaves)}, {somas} FROM {resumo.razao} "
+                    f"GROUP BY {', '.join(resumo.chaves)}")
+
+def main():
+    from packages.database.connection import get_db_cursor
+
+    ap = argparse.ArgumentParser(description="Resumos incrementais do dashboard")
+    grupo = ap.add_mutually_exclusive_group(required=True)
+    grupo.add_argument("--import-id", help="Reaplica a contribuição de uma importação")
+    grupo.add_argument("--verificar", action="store_true", help="Compara os totais com o recálculo completo")
+    grupo.add_argument("--reconstruir", action="store_true", help="Refaz razão e totais do zero")
+    ap.add_argument("--corrigir", action="store_true", help="Com --verificar: reconstrói se houver divergência")
+    args = ap.parse_args()
+
+    with get_db_cursor(commit=True) as cur:
+        if args.import_id:
+            tqdm.write(f"[resumos] {args.import_id}: {aplicar_import(cur, args.import_id)}")
+        elif args.reconstruir:
+            reconstruir(cur)
+            tqdm.write("[resumos] reconstruídos")
+        else:
+            divergencias = verificar(cur)
+            for tabela, diff in divergencias.items():
+                tqdm.write(f"[resumos] {tabela}: {len(diff)} divergência(s)")
+                for chave, gravado, completo in diff[:20]:
+                    tqdm.write(f"    {chave}: gravado={gravado} recalculado={completo}")
+            if any(divergencias.values()):
+                if not args.corrigir:
+                    raise SystemExit(1)
+                reconstruir(cur)
+                tqdm.write("[resumos] reconstruídos")
+
+if __name__ == "__main__":
+    main()
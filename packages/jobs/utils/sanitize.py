@@ -1,3 +1,12 @@
+import functools
+import hashlib
+import json
+import numbers
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
 import pandas as pd
 import numpy as np
 import re
@@ -6,95 +15,242 @@ import re
 # Decorator: permite que a mesma função aceite escalar OU Series sem quebrar comportamento.
 # --------------------------------------------------------------------------------------
 def safe_series_sanitizer(fn):
+    @functools.wraps(fn)
     def wrapper(serie):
         if isinstance(serie, pd.Series):
             return fn(serie)
         try:
-            return fn(pd.Series([serie])).iloc[0]
+            out = fn(pd.Series([serie]))
+            if isinstance(out.dtype, pd.CategoricalDtype):
+                # escalar mantém o contrato antigo: valor normalizado ou None
+                v = out.iloc[0]
+                return None if pd.isna(v) else v
+            return out.iloc[0]
         except Exception:
             return None
     return wrapper
 
+# --------------------------------------------------------------------------------------
+# Motor por valores distintos: cada valor bruto distinto é normalizado uma vez só
+# (factorize -> normaliza os distintos -> take). Colunas BDGD repetem muito
+# (CLAS_SUB, GRU_TAR, MUN, BRR...), então o custo passa a ser O(distintos) + O(n) em C.
+# --------------------------------------------------------------------------------------
+_TIPOS_NUMERICOS = (numbers.Number, np.bool_)
+
+def _tipos_colidem(serie: pd.Series, uniques) -> bool:
+    """
+    Em coluna object, 1, 1.0 e True têm o mesmo hash e o factorize junta os três,
+    mas str() de cada um é diferente. Se a coluna tiver números de mais de um tipo,
+    não dá para normalizar por distinto com segurança.
+    """
+    if not any(isinstance(u, _TIPOS_NUMERICOS) for u in uniques):
+        return False
+    tipos = {type(v) for v in serie.to_numpy() if isinstance(v, _TIPOS_NUMERICOS)}
+    return len(tipos) > 1
+
+def _distintos(serie: pd.Series):
+    """
+    Retorna (codes, valores) com valores[codes] == serie, onde `valores` são os brutos
+    distintos (no dtype original). Nulos entram como um representante de cada tipo de
+    nulo (None, nan, pd.NA, NaT), porque o str() de cada um difere. None se o
+    factorize não for seguro para a coluna.
+    """
+    codes, uniques = pd.factorize(serie, use_na_sentinel=True)
+    valores = pd.Series(uniques)
+    if valores.dtype == object and _tipos_colidem(serie, uniques):
+        return None
+    nulos = codes < 0
+    if nulos.any():
+        brutos_nulos = serie[nulos]
+        txt = brutos_nulos.astype(str)
+        na_codes, _ = pd.factorize(txt)
+        reps = brutos_nulos[~txt.duplicated().to_numpy()].reset_index(drop=True)
+        codes = codes.copy()
+        codes[nulos] = len(valores) + na_codes
+        valores = pd.concat([valores, reps], ignore_index=True) if len(valores) else reps
+    return codes, valores
+
+def _por_distinto(serie: pd.Series, normalizar) -> pd.Series:
+    """Aplica `normalizar` (Series -> Series, elemento a elemento) só nos distintos."""
+    d = _distintos(serie)
+    if d is None:
+        return normalizar(serie)
+    codes, valores = d
+    out = normalizar(valores)
+    return pd.Series(out.array.take(codes), index=serie.index, name=serie.name)
+
+def _categorico(serie: pd.Series, normalizar, campo: str) -> pd.Series:
+    """
+    Como _por_distinto, mas devolve pd.Categorical (None vira categoria ausente) e
+    consulta o cache de normalização do `campo` antes de normalizar os distintos.
+    """
+    d = _distintos(serie)
+    if d is None:
+        out = normalizar(serie)
+        return pd.Series(pd.Categorical(out), index=serie.index, name=serie.name)
+    codes, valores = d
+    out = _normalizar_com_cache(campo, valores, normalizar)
+    categorias = pd.Index(out.dropna().unique())
+    cat_codes = categorias.get_indexer(out)[codes] if len(codes) else np.array([], dtype=np.int64)
+    return pd.Series(
+        pd.Categorical.from_codes(cat_codes, categories=categorias),
+        index=serie.index, name=serie.name,
+    )
+
 # --------------------------------------------------------------------------------------
 # Numérico
 # --------------------------------------------------------------------------------------
+_NULL_SET = {"", "none", "nan", "-", "***", "n/a", "null", "None", "NaN", "NULL"}
+_NULL_SET_LOWER = {z.lower() for z in _NULL_SET}
+_RE_NAO_NUMERICO = re.compile(r"[^\d.\-eE+]")
+
+def _numeric_texto(serie: pd.Series, errors: str) -> pd.Series:
+    s = (
+        serie.astype(str)
+             .str.replace(",", ".", regex=False)
+             .str.replace(_RE_NAO_NUMERICO, "", regex=True)
+             .str.strip()
+    )
+    s = s.where(~s.str.lower().isin(_NULL_SET_LOWER), np.nan)
+    return pd.to_numeric(s, errors=errors)
+
 def sanitize_numeric(serie, errors="coerce"):
     """
     Limpa strings numéricas com vírgula, traços, textos, 'None', 'nan', etc., e converte para float.
     Suporta notações com erro de OCR ou símbolos diversos. Ideal para PAC, DEM_CONT, SEMRED.
     """
-    null_set = {"", "none", "nan", "-", "***", "n/a", "null", "None", "NaN", "NULL"}
-
     if isinstance(serie, pd.Series):
-        s = (
-            serie.astype(str)
-                 .str.replace(",", ".", regex=False)
-                 .str.replace(r"[^\d.\-eE+]", "", regex=True)
-                 .str.strip()
-        )
-        s = s.apply(lambda x: np.nan if x.lower() in {z.lower() for z in null_set} else x)
-        return pd.to_numeric(s, errors=errors)
+        # float/int nativos: o texto de cada valor volta ao mesmo número; inf não sobrevive à limpeza
+        if serie.dtype == np.float64:
+            arr = serie.to_numpy(dtype="float64", copy=True)
+            arr[np.isinf(arr)] = np.nan
+            return pd.Series(arr, index=serie.index, name=serie.name)
+        if isinstance(serie.dtype, np.dtype) and serie.dtype.kind == "i":
+            return serie.astype("int64")
+        d = _distintos(serie)
+        if d is None:
+            return _numeric_texto(serie, errors)
+        codes, valores = d
+        out = _numeric_texto(valores, errors)
+        return pd.Series(out.to_numpy().take(codes), index=serie.index, name=serie.name)
 
     # escalar
     if serie is None:
         return np.nan
     try:
-        cleaned = re.sub(r"[^\d.\-eE+]", "", str(serie).replace(",", ".")).strip()
-        if cleaned.lower() in {z.lower() for z in null_set} or cleaned == "":
+        cleaned = _RE_NAO_NUMERICO.sub("", str(serie).replace(",", ".")).strip()
+        if cleaned.lower() in _NULL_SET_LOWER or cleaned == "":
             return np.nan
         return float(cleaned)
     except Exception:
         return np.nan
 
 # --------------------------------------------------------------------------------------
-# Strings e inteiros básicos (já eram vetorizadas)
+# Strings e inteiros básicos (já eram vetorizadas; agora uma vez por valor distinto)
 # --------------------------------------------------------------------------------------
-@safe_series_sanitizer
-def sanitize_str(serie):
-    """Remove caracteres de controle e espaços desnecessários."""
+_RE_CONTROLE = re.compile(r"[\r\n\t]+")
+_RE_DIGITOS = re.compile(r"(\d+)")
+_RE_NAO_DIGITO = re.compile(r"[^\d]")
+
+def _str_serie(serie: pd.Series) -> pd.Series:
     return (
         serie.astype(str)
-             .str.replace(r"[\r\n\t]+", " ", regex=True)
+             .str.replace(_RE_CONTROLE, " ", regex=True)
              .str.strip()
     )
 
-@safe_series_sanitizer
-def sanitize_cnae(serie):
-    """Remove traços, barras e converte CNAE para inteiro, quando possível."""
+def _cnae_serie(serie: pd.Series) -> pd.Series:
     return (
         serie.astype(str)
-             .str.extract(r"(\d+)", expand=False)
+             .str.extract(_RE_DIGITOS, expand=False)
              .replace("", np.nan)
              .astype("Int64")
     )
 
-@safe_series_sanitizer
-def sanitize_int(serie):
-    """Remove tudo que não for número e converte para Int64."""
+def _int_serie(serie: pd.Series) -> pd.Series:
     return (
         serie.astype(str)
-             .str.replace(r"[^\d]", "", regex=True)
+             .str.replace(_RE_NAO_DIGITO, "", regex=True)
              .replace("", np.nan)
              .astype("Int64")
     )
 
+@safe_series_sanitizer
+def sanitize_str(serie):
+    """Remove caracteres de controle e espaços desnecessários."""
+    return _por_distinto(serie, _str_serie)
+
+@safe_series_sanitizer
+def sanitize_cnae(serie):
+    """Remove traços, barras e converte CNAE para inteiro, quando possível."""
+    return _por_distinto(serie, _cnae_serie)
+
+@safe_series_sanitizer
+def sanitize_int(serie):
+    """Remove tudo que não for número e converte para Int64."""
+    return _por_distinto(serie, _int_serie)
+
 # --------------------------------------------------------------------------------------
-# Categóricos: agora 100% seguros para Series OU escalares (UCBT não quebra mais)
+# Categóricos: tabelas de lookup pré-compiladas; saída pd.Categorical para Series
+# (escalar continua devolvendo o valor normalizado ou None)
 # --------------------------------------------------------------------------------------
+_NULOS_CAT = {"": None, "NAN": None, "NONE": None}
+
+MAPA_GRUPO_TENSAO = {
+    "AT": "AT4", "AT4": "AT4", "AT3": "AT3", "AT2": "AT2",
+    "MT": "MT3", "MT3": "MT3", "MT2": "MT2", "MT1": "MT1",
+    "BT": "BT2", "BT2": "BT2", "BT1": "BT1",
+}
+MAPA_MODALIDADE = {
+    "CONVENCIONAL": "Convencional", "AZUL": "Azul", "VERDE": "Verde", "BRANCA": "Branca",
+    "B1": "B1", "B2": "B2", "B3": "B3", "B4": "B4",
+    "A1": "A1", "A2": "A2", "A3": "A3", "A3A": "A3a", "A4": "A4", "AS": "AS"
+}
+_RE_SUBGRUPO = re.compile(r"^(A1|A2|A3A|A3|A4|AS|B1|B2|B3|B4)")
+MAPA_TIPO_SISTEMA = {
+    "TRIFÁSICO": "Trifásico", "BIFÁSICO": "Bifásico", "MONOFÁSICO": "Monofásico",
+    "TRIFASICO": "Trifásico", "BIFASICO": "Bifásico", "MONOFASICO": "Monofásico",
+    "RD_INTERLIG": "RD_INTERLIG", "RD_ISOLADA": "RD_ISOLADA",
+    "GER_LOCAL": "GER_LOCAL", "NA": "NA"
+}
+MAPA_SITUACAO = {
+    "AT": "ATIVA", "IN": "INATIVA", "CO": "CORTADA", "SU": "SUPRIMIDA",
+    "EM": "EM_IMPLANTAÇÃO", "DE": "DESATIVADA", "DS": "DESATIVADA",
+    "IM": "EM_IMPLANTAÇÃO",
+    "ATIVA": "ATIVA", "INATIVA": "INATIVA", "CORTADA": "CORTADA",
+    "SUPRIMIDA": "SUPRIMIDA", "EM_IMPLANTAÇÃO": "EM_IMPLANTAÇÃO", "DESATIVADA": "DESATIVADA"
+}
+
+def _mapa_com_fallback(mapa: dict):
+    def normalizar(serie: pd.Series) -> pd.Series:
+        s = serie.astype(str).str.strip().str.upper()
+        s = s.replace(_NULOS_CAT)
+        return s.map(mapa).fillna(s).where(s.notna(), None)
+    return normalizar
+
+_grupo_tensao_serie = _mapa_com_fallback(MAPA_GRUPO_TENSAO)
+_tipo_sistema_serie = _mapa_com_fallback(MAPA_TIPO_SISTEMA)
+_situacao_serie = _mapa_com_fallback(MAPA_SITUACAO)
+
+def _modalidade_serie(serie: pd.Series) -> pd.Series:
+    s = serie.astype(str).str.strip().str.upper()
+    s = s.replace(_NULOS_CAT)
+
+    # Extrai prefixo quando começar por subgrupo A/B
+    prefix = s.str.extract(_RE_SUBGRUPO, expand=False)
+    s2 = prefix.fillna(s)
+
+    # Aplica mapa (respeitando capitalização pedida)
+    out = s2.map(MAPA_MODALIDADE).fillna(s2.str.title())
+    return out.where(s.notna(), None)
+
 @safe_series_sanitizer
 def sanitize_grupo_tensao(serie: pd.Series) -> pd.Series:
     """
     Normaliza GRU_TEN para domínios padronizados.
     Aceita valores como 'AT', 'MT', 'BT' e variantes mapeadas.
     """
-    mapa = {
-        "AT": "AT4", "AT4": "AT4", "AT3": "AT3", "AT2": "AT2",
-        "MT": "MT3", "MT3": "MT3", "MT2": "MT2", "MT1": "MT1",
-        "BT": "BT2", "BT2": "BT2", "BT1": "BT1",
-    }
-    s = serie.astype(str).str.strip().str.upper()
-    s = s.replace({"": None, "NAN": None, "NONE": None})
-    return s.map(mapa).fillna(s).where(s.notna(), None)
+    return _categorico(serie, _grupo_tensao_serie, "grupo_tensao")
 
 @safe_series_sanitizer
 def sanitize_modalidade(serie: pd.Series) -> pd.Series:
@@ -102,113 +258,282 @@ def sanitize_modalidade(serie: pd.Series) -> pd.Series:
     Normaliza modalidade tarifária (grupo/subgrupo).
     Mantém compatibilidade com o comportamento anterior (regex A1, A2, A3A, A3, A4, AS, B1..B4).
     """
-    base_map = {
-        "CONVENCIONAL": "Convencional", "AZUL": "Azul", "VERDE": "Verde", "BRANCA": "Branca",
-        "B1": "B1", "B2": "B2", "B3": "B3", "B4": "B4",
-        "A1": "A1", "A2": "A2", "A3": "A3", "A3A": "A3a", "A4": "A4", "AS": "AS"
-    }
-
-    s = serie.astype(str).str.strip().str.upper()
-    s = s.replace({"": None, "NAN": None, "NONE": None})
-
-    # Extrai prefixo quando começar por subgrupo A/B
-    prefix = s.str.extract(r"^(A1|A2|A3A|A3|A4|AS|B1|B2|B3|B4)", expand=False)
-    s2 = prefix.fillna(s)
-
-    # Aplica mapa (respeitando capitalização pedida)
-    out = s2.map(base_map).fillna(s2.str.title())
-    return out.where(s.notna(), None)
+    return _categorico(serie, _modalidade_serie, "modalidade")
 
 @safe_series_sanitizer
 def sanitize_tipo_sistema(serie: pd.Series) -> pd.Series:
     """
     Normaliza tipo de sistema (TRIFÁSICO/BIFÁSICO/MONOFÁSICO/RD_* etc.).
     """
-    mapa = {
-        "TRIFÁSICO": "Trifásico", "BIFÁSICO": "Bifásico", "MONOFÁSICO": "Monofásico",
-        "TRIFASICO": "Trifásico", "BIFASICO": "Bifásico", "MONOFASICO": "Monofásico",
-        "RD_INTERLIG": "RD_INTERLIG", "RD_ISOLADA": "RD_ISOLADA",
-        "GER_LOCAL": "GER_LOCAL", "NA": "NA"
-    }
-    s = serie.astype(str).str.strip().str.upper()
-    s = s.replace({"": None, "NAN": None, "NONE": None})
-    return s.map(mapa).fillna(s).where(s.notna(), None)
+    return _categorico(serie, _tipo_sistema_serie, "tipo_sistema")
 
 @safe_series_sanitizer
 def sanitize_situacao(serie: pd.Series) -> pd.Series:
     """
     Normaliza situação da UC.
     """
-    mapa = {
-        "AT": "ATIVA", "IN": "INATIVA", "CO": "CORTADA", "SU": "SUPRIMIDA",
-        "EM": "EM_IMPLANTAÇÃO", "DE": "DESATIVADA", "DS": "DESATIVADA",
-        "IM": "EM_IMPLANTAÇÃO",
-        "ATIVA": "ATIVA", "INATIVA": "INATIVA", "CORTADA": "CORTADA",
-        "SUPRIMIDA": "SUPRIMIDA", "EM_IMPLANTAÇÃO": "EM_IMPLANTAÇÃO", "DESATIVADA": "DESATIVADA"
-    }
-    s = serie.astype(str).str.strip().str.upper()
-    s = s.replace({"": None, "NAN": None, "NONE": None})
-    return s.map(mapa).fillna(s).where(s.notna(), None)
+    return _categorico(serie, _situacao_serie, "situacao")
+
+CLASSE_POR_CODIGO = {}
+for _classe, _codigos in (
+    # ordem importa: a primeira lista que contém o código vence (ex.: RUB -> COMERCIAL)
+    ("COMERCIAL", ["CSPS", "RUB", "CPR", "CPRVE", "CPRSP", "CPRVC", "CPRAC", "CPRS", "CP", "COM", "COMERCIAL_1"]),
+    ("RESIDENCIAL", ["RE_BPC", "RE_BEN", "REKQ", "REIND", "RE", "RE1", "RE2", "RE3"]),
+    ("INDUSTRIAL", ["IN", "IN2", "IN3", "IND", "INDUS", "INDUSTRIA"]),
+    ("PODER_PÚBLICO", ["PP", "PP1", "PP2", "P_P", "PÚBLICO", "PODER"]),
+    ("ILUMINAÇÃO_PÚBLICA", ["IP", "ILUM", "ILUMP", "ILUMINAÇÃO"]),
+    ("RURAL", ["RU", "RUR", "RUB", "RU_IRR", "RUAGR", "RURAL_1"]),
+    ("SERVIÇO_PÚBLICO", ["SP", "CSPS", "SERV", "SERVICO", "SERVIÇO"]),
+    ("CONSUMO_PRÓPRIO", ["CPRO", "AUTO", "CONSUMO_PROPRIO", "GERACAO"]),
+):
+    for _codigo in _codigos:
+        CLASSE_POR_CODIGO.setdefault(_codigo, _classe)
+
+CLASSE_POR_PREFIXO = (
+    ("RE", "RESIDENCIAL"), ("CO", "COMERCIAL"), ("CPR", "COMERCIAL"), ("IN", "INDUSTRIAL"),
+    ("PP", "PODER_PÚBLICO"), ("IP", "ILUMINAÇÃO_PÚBLICA"), ("RU", "RURAL"),
+    ("SP", "SERVIÇO_PÚBLICO"), ("CS", "SERVIÇO_PÚBLICO"),
+)
 
 def _sanitize_classe_single(val: str | None) -> str | None:
     if not val:
         return None
     v = str(val).strip().upper()
 
-    if v in ["CSPS", "RUB", "CPR", "CPRVE", "CPRSP", "CPRVC", "CPRAC", "CPRS", "CP", "COM", "COMERCIAL_1"]:
-        return "COMERCIAL"
-    if v in ["RE_BPC", "RE_BEN", "REKQ", "REIND", "RE", "RE1", "RE2", "RE3"]:
-        return "RESIDENCIAL"
-    if v in ["IN", "IN2", "IN3", "IND", "INDUS", "INDUSTRIA"]:
-        return "INDUSTRIAL"
-    if v in ["PP", "PP1", "PP2", "P_P", "PÚBLICO", "PODER"]:
-        return "PODER_PÚBLICO"
-    if v in ["IP", "ILUM", "ILUMP", "ILUMINAÇÃO"]:
-        return "ILUMINAÇÃO_PÚBLICA"
-    if v in ["RU", "RUR", "RUB", "RU_IRR", "RUAGR", "RURAL_1"]:
-        return "RURAL"
-    if v in ["SP", "CSPS", "SERV", "SERVICO", "SERVIÇO"]:
-        return "SERVIÇO_PÚBLICO"
-    if v in ["CPRO", "AUTO", "CONSUMO_PROPRIO", "GERACAO"]:
-        return "CONSUMO_PRÓPRIO"
+    classe = CLASSE_POR_CODIGO.get(v)
+    if classe:
+        return classe
 
     base = ''.join([c for c in v if not c.isdigit()])
 
-    if base.startswith("RE"):
-        return "RESIDENCIAL"
-    if base.startswith("CO") or base.startswith("CPR"):
-        return "COMERCIAL"
-    if base.startswith("IN"):
-        return "INDUSTRIAL"
-    if base.startswith("PP"):
-        return "PODER_PÚBLICO"
-    if base.startswith("IP"):
-        return "ILUMINAÇÃO_PÚBLICA"
-    if base.startswith("RU"):
-        return "RURAL"
-    if base.startswith("SP") or base.startswith("CS"):
-        return "SERVIÇO_PÚBLICO"
+    for prefixo, classe in CLASSE_POR_PREFIXO:
+        if base.startswith(prefixo):
+            return classe
 
     return base or None
 
+def _classe_serie(serie: pd.Series) -> pd.Series:
+    s = serie.where(pd.notnull(serie), None)
+    return s.map(_sanitize_classe_single).astype(object)
+
 @safe_series_sanitizer
 def sanitize_classe(serie: pd.Series) -> pd.Series:
     """
     Normaliza classe da UC. Mantém semântica anterior, porém seguro para Series.
     """
-    s = serie.where(pd.notnull(serie), None)
-    return s.apply(_sanitize_classe_single)
+    return _categorico(serie, _classe_serie, "classe")
+
+# --------------------------------------------------------------------------------------
+# Cache de normalização dos categóricos (um por processo)
+# CLAS_SUB, GRU_TAR, TIP_SIST, SIT_ATIV e GRU_TEN têm dezenas de valores distintos em
+# milhões de UCs: com o cache quente, cada chunk vira factorize + lookup + take.
+# Chave: (campo, valor bruto). Persistível em JSON entre execuções e aquecível com os
+# mapas acima e com as tabelas de domínio do banco.
+#
+# Knobs (env):
+# - SANITIZE_CACHE_PATH (default vazio = não persiste)
+# - SANITIZE_CACHE_MAX (default 100000 entradas por campo; cheio, só deixa de crescer)
+# --------------------------------------------------------------------------------------
+SANITIZE_CACHE_PATH = os.getenv("SANITIZE_CACHE_PATH", "")
+SANITIZE_CACHE_MAX = int(os.getenv("SANITIZE_CACHE_MAX", "100000"))
+
+NORMALIZADORES_CATEGORICOS = {
+    "grupo_tensao": _grupo_tensao_serie,
+    "modalidade": _modalidade_serie,
+    "tipo_sistema": _tipo_sistema_serie,
+    "situacao": _situacao_serie,
+    "classe": _classe_serie,
+}
+MAPAS_CATEGORICOS = {
+    "grupo_tensao": MAPA_GRUPO_TENSAO,
+    "modalidade": MAPA_MODALIDADE,
+    "tipo_sistema": MAPA_TIPO_SISTEMA,
+    "situacao": MAPA_SITUACAO,
+    "classe": CLASSE_POR_CODIGO,
+}
+# campo -> tabela de domínio (BASESQL.txt) cujos ids são os códigos brutos da BDGD
+DOMINIOS_CATEGORICOS = {
+    "grupo_tensao": "grupo_tensao",
+    "modalidade": "modalidade_tarifaria",
+    "tipo_sistema": "tipo_sistema",
+    "situacao": "situacao_uc",
+    "classe": "classe_consumo",
+}
+
+_cache: Dict[str, Dict[tuple, Optional[str]]] = {}
+_cache_stats: Dict[str, Dict[str, int]] = {}
+_cache_lock = threading.Lock()
+
+def _chave_cache(valor, dtype) -> tuple:
+    # o tipo entra na chave (1, 1.0 e "1" normalizam diferente); nos nulos, o dtype da
+    # coluna também (sanitize_classe devolve 'NAN' para NaN em coluna float e None em object)
+    if pd.isna(valor):
+        return ("<NA>", str(valor), dtype.name)
+    return (type(valor), valor)
+
+def _normalizar_com_cache(campo: str, valores: pd.Series, normalizar, contar: bool = True) -> pd.Series:
+    """Normaliza os brutos distintos `valores`, chamando `normalizar` só para os que faltam no cache."""
+    chaves = [_chave_cache(v, valores.dtype) for v in valores]
+    with _cache_lock:
+        cache = _cache.setdefault(campo, {})
+        conhecidos = {k: cache[k] for k in chaves if k in cache}
+        if contar:
+            stats = _cache_stats.setdefault(campo, {"hits": 0, "misses": 0})
+            stats["hits"] += len(conhecidos)
+            stats["misses"] += len(chaves) - len(conhecidos)
+
+    novos: Dict[tuple, Optional[str]] = {}
+    faltam = [i for i, k in enumerate(chaves) if k not in conhecidos]
+    if faltam:
+        out = normalizar(valores.iloc[faltam])
+        novos = {chaves[i]: (None if pd.isna(v) else v) for i, v in zip(faltam, out.tolist())}
+        with _cache_lock:
+            cache = _cache.setdefault(campo, {})
+            for k, v in novos.items():
+                if len(cache) >= SANITIZE_CACHE_MAX:
+                    break
+                cache[k] = v
+
+    return pd.Series([novos[k] if k in novos else conhecidos[k] for k in chaves], dtype=object)
+
+def aquecer_cache_normalizacao(campo: str, valores: Iterable) -> int:
+    """Normaliza valores brutos de `campo` só para popular o cache; devolve quantos entraram."""
+    serie = pd.Series(list(valores), dtype=object).drop_duplicates()
+    antes = len(_cache.get(campo, {}))
+    if len(serie):
+        _normalizar_com_cache(campo, serie, NORMALIZADORES_CATEGORICOS[campo], contar=False)
+    return len(_cache.get(campo, {})) - antes
+
+def aquecer_cache_do_banco(cur, schema: str = "intel_lead") -> int:
+    """Aquece o cache com os ids das tabelas de domínio que existirem no banco."""
+    total = 0
+    for campo, tabela in DOMINIOS_CATEGORICOS.items():
+        cur.execute("SELECT to_regclass(%s)", (f"{schema}.{tabela}",))
+        if cur.fetchone()[0] is None:
+            continue
+        cur.execute(f"SELECT id FROM {schema}.{tabela}")
+        total += aquecer_cache_normalizacao(campo, [r[0] for r in cur.fetchall()])
+    return total
+
+def _assinatura_normalizadores() -> str:
+    # muda quando os mapas/regras mudam; cache salvo com outra assinatura é descartado
+    base = repr((
+        sorted(MAPA_GRUPO_TENSAO.items()), sorted(MAPA_MODALIDADE.items()),
+        sorted(MAPA_TIPO_SISTEMA.items()), sorted(MAPA_SITUACAO.items()),
+        sorted(CLASSE_POR_CODIGO.items()), CLASSE_POR_PREFIXO,
+        _RE_SUBGRUPO.pattern, sorted(_NULOS_CAT),
+    ))
+    return hashlib.sha1(base.encode("utf-8")).hexdigest()[:16]
+
+def salvar_cache_normalizacao(caminho: Optional[str] = None) -> int:
+    """
+    Grava as entradas de chave texto do cache em JSON (SANITIZE_CACHE_PATH por padrão).
+    Devolve quantas entradas foram gravadas; 0 se não houver caminho.
+    """
+    caminho = caminho or SANITIZE_CACHE_PATH
+    if not caminho:
+        return 0
+    with _cache_lock:
+        campos = {
+            campo: [[k[1], v] for k, v in cache.items() if k[0] is str]
+            for campo, cache in _cache.items()
+        }
+    destino = Path(caminho)
+    tmp = destino.with_name(destino.name + ".tmp")
+    try:
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        tmp.write_text(
+            json.dumps({"assinatura": _assinatura_normalizadores(), "campos": campos}, ensure_ascii=False),
+            encoding="utf-8",
+        )
+        os.replace(tmp, destino)
+    except OSError:
+        # cache é só otimização: falha de disco não derruba a importação
+        return 0
+    return sum(len(v) for v in campos.values())
+
+def carregar_cache_normalizacao(caminho: Optional[str] = None) -> int:
+    """Carrega um cache salvo por salvar_cache_normalizacao(); devolve quantas entradas entraram."""
+    caminho = caminho or SANITIZE_CACHE_PATH
+    if not caminho or not Path(caminho).exists():
+        return 0
+    try:
+        dados = json.loads(Path(caminho).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return 0
+    if dados.get("assinatura") != _assinatura_normalizadores():
+        return 0
+    n = 0
+    with _cache_lock:
+        for campo, pares in (dados.get("campos") or {}).items():
+            if campo not in NORMALIZADORES_CATEGORICOS:
+                continue
+            cache = _cache.setdefault(campo, {})
+            for bruto, normalizado in pares:
+                if len(cache) >= SANITIZE_CACHE_MAX:
+                    break
+                if (str, bruto) not in cache:
+                    cache[(str, bruto)] = normalizado
+                    n += 1
+    return n
+
+def preparar_cache_normalizacao(cur=None, caminho: Optional[str] = None) -> int:
+    """
+    Início de importação: carrega o cache do disco e aquece com os mapas e, com `cur`,
+    com as tabelas de domínio. Devolve quantas entradas novas entraram.
+    """
+    n = carregar_cache_normalizacao(caminho)
+    for campo, mapa in MAPAS_CATEGORICOS.items():
+        n += aquecer_cache_normalizacao(campo, mapa.keys())
+    if cur is not None:
+        n += aquecer_cache_do_banco(cur)
+    return n
+
+def estatisticas_cache_normalizacao() -> Dict[str, Dict[str, float]]:
+    """{campo: {hits, misses, tamanho, taxa_acerto}}; hits/misses contam valores distintos por chamada."""
+    with _cache_lock:
+        campos = set(_cache) | set(_cache_stats)
+        out = {}
+        for campo in sorted(campos):
+            st = _cache_stats.get(campo, {"hits": 0, "misses": 0})
+            consultas = st["hits"] + st["misses"]
+            out[campo] = {
+                "hits": st["hits"],
+                "misses": st["misses"],
+                "tamanho": len(_cache.get(campo, {})),
+                "taxa_acerto": st["hits"] / consultas if consultas else 0.0,
+            }
+    return out
+
+def resumo_cache_normalizacao() -> str:
+    partes = [
+        f"{campo} {st['hits']}/{st['hits'] + st['misses']} ({100 * st['taxa_acerto']:.1f}%)"
+        for campo, st in estatisticas_cache_normalizacao().items()
+        if st["hits"] or st["misses"]
+    ]
+    return "cache de normalização: " + (" | ".join(partes) if partes else "sem consultas")
+
+def limpar_cache_normalizacao() -> None:
+    with _cache_lock:
+        _cache.clear()
+        _cache_stats.clear()
 
 # --------------------------------------------------------------------------------------
 # Específicos
 # --------------------------------------------------------------------------------------
+def _pac_serie(serie: pd.Series) -> pd.Series:
+    v = pd.to_numeric(serie, errors="coerce")
+    if v.dtype == object:
+        v = v.astype("float64")
+    arr = v.to_numpy(dtype="float64", na_value=np.nan)
+    ok = (arr > 0) & (arr < 1_000_000)
+    inteiros = np.zeros(len(arr), dtype="int64")
+    inteiros[ok] = np.trunc(arr[ok]).astype("int64")
+    return pd.Series(pd.arrays.IntegerArray(inteiros, ~ok), index=serie.index, name=serie.name)
+
 @safe_series_sanitizer
 def sanitize_pac(serie):
     """
-    Mantido exatamente como estava, apenas com o decorator para aceitar escalar/Series.
+    Inteiro em (0, 1.000.000), truncado; fora disso (ou não numérico) vira <NA>.
     """
-    return (
-        pd.to_numeric(serie, errors="coerce")
-          .apply(lambda x: int(x) if pd.notnull(x) and 0 < x < 1_000_000 else None)
-          .astype("Int64")
-    )
+    return _por_distinto(serie, _pac_serie)
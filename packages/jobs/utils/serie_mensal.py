@@ -0,0 +1,135 @@
+# packages/jobs/utils/serie_mensal.py
+# -*- coding: utf-8 -*-
+"""
+Armazenamento compacto das séries mensais (lead_serie_mensal, migration 015).
+
+- Uma linha por UC por medida, com os 12 meses num real[] (posição 1 = mês 1; mês sem valor =
+  elemento NULL), em vez de 12 linhas por UC em cada mensal longa. ~30% do espaço em disco
+  (heap + índices) e uma única leitura de índice por lead (tests/jobs/bench/bench_serie_mensal.py)
+- Medida = nome da coluna na mensal longa (energia_total, demanda_contratada, dic...); medida
+  sem nenhum mês preenchido não gera linha
+- real é float4: ~7 dígitos significativos, suficiente para kWh/kW/DIC/FIC
+- Particionada por import_id como as mensais (utils/particoes.py), sem partição DEFAULT
+- Os importers montam as séries a partir dos mesmos frames longos (compactar) e gravam com o
+  COPY binário de utils/pg_copy.py (encoder de float4[])
+
+Knobs (env):
+- MENSAL_FORMATO (default "linhas"): "linhas" grava só as mensais longas, "compacto" só
+  lead_serie_mensal, "ambos" as duas (transição; as MVs ainda leem as longas)
+"""
+
+from __future__ import annotations
+import os
+from typing import Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+from packages.jobs.utils.pg_copy import copy_dataframe
+
+TABELA_SERIES = "lead_serie_mensal"
+COLUNAS_SERIES = ["lead_bruto_id", "medida", "valores", "origem", "import_id"]
+FORMATOS = ("linhas", "compacto", "ambos")
+
+# medidas de cada mensal longa (colunas além de id/lead_bruto_id/mes/origem/import_id)
+MEDIDAS: Dict[str, List[str]] = {
+    "lead_energia_mensal": ["energia_ponta", "energia_fora_ponta", "energia_total"],
+    "lead_demanda_mensal": ["demanda_ponta", "demanda_fora_ponta", "demanda_total", "demanda_contratada"],
+    "lead_qualidade_mensal": ["dic", "fic", "sem_rede"],
+}
+
+_tabela_ok = False
+
+# --------------------------------------------------------------------------------------
+# Formato
+# --------------------------------------------------------------------------------------
+def formato_mensal(valor: str | None = None) -> str:
+    formato = (valor or os.getenv("MENSAL_FORMATO", "linhas")).lower()
+    if formato not in FORMATOS:
+        raise ValueError(f"MENSAL_FORMATO inválido: {formato!r} (use {', '.join(FORMATOS)})")
+    return formato
+
+def grava_linhas(formato: str) -> bool:
+    return formato in ("linhas", "ambos")
+
+def grava_compacto(formato: str) -> bool:
+    return formato in ("compacto", "ambos")
+
+def tabelas_destino(formato: str, mensais: Iterable[str], schema: str | None = None) -> List[str]:
+    """Tabelas que a importação grava (para preparar_particoes/concluir_particoes)."""
+    tabelas = list(mensais) if grava_linhas(formato) else []
+    if grava_compacto(formato):
+        tabelas.append(f"{schema}.{TABELA_SERIES}" if schema else TABELA_SERIES)
+    return tabelas
+
+# --------------------------------------------------------------------------------------
+# DDL (mesma da migration 015; criada sob demanda como o uc_hash_index)
+# --------------------------------------------------------------------------------------
+def garantir_tabela_series(cur) -> None:
+    global _tabela_ok
+    if _tabela_ok:
+        return
+    cur.execute("SELECT to_regclass(%s) IS NOT NULL AS existe", (TABELA_SERIES,))
+    row = cur.fetchone()
+    if not (row["existe"] if isinstance(row, dict) else row[0]):
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS lead_serie_mensal (
+                lead_bruto_id uuid NOT NULL,
+                medida        text NOT NULL,
+                valores       real[] NOT NULL CHECK (array_length(valores, 1) = 12),
+                origem        origem_enum,
+                import_id     text NOT NULL
+            ) PARTITION BY LIST (import_id)
+        """)
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS lead_serie_mensal_lead_medida_idx
+            ON lead_serie_mensal (lead_bruto_id, medida)
+        """)
+    _tabela_ok = True
+
+# --------------------------------------------------------------------------------------
+# Montagem
+# --------------------------------------------------------------------------------------
+def compactar(frame: pd.DataFrame, medidas: Iterable[str]) -> pd.DataFrame:
+    """
+    Mensal longa (lead_bruto_id, mes, medidas..., origem, import_id; qualquer ordem de linhas)
+    -> uma linha por (lead_bruto_id, medida) com 'valores' = float32[12].
+    """
+    if frame.empty:
+        return pd.DataFrame(columns=COLUNAS_SERIES)
+    codigos, ids = pd.factorize(frame["lead_bruto_id"])
+    meses = frame["mes"].to_numpy(dtype="int64") - 1
+    if meses.min() < 0 or meses.max() > 11:
+        raise ValueError("mes fora de 1..12 na mensal")
+    primeira = np.unique(codigos, return_index=True)[1]
+    origem = frame["origem"].to_numpy()[primeira]
+    import_id = frame["import_id"].to_numpy()[primeira]
+
+    partes = []
+    for medida in medidas:
+        if medida not in frame.columns:
+            continue
+        matriz = np.full((len(ids), 12), np.nan, dtype=np.float32)
+        matriz[codigos, meses] = pd.to_numeric(frame[medida], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+        ok = ~np.isnan(matriz).all(axis=1)
+        if not ok.any():
+            continue
+        partes.append(pd.DataFrame({
+            "lead_bruto_id": np.asarray(ids)[ok],
+            "medida": medida,
+            "valores": list(matriz[ok]),
+            "origem": origem[ok],
+            "import_id": import_id[ok],
+        }))
+    if not partes:
+        return pd.DataFrame(columns=COLUNAS_SERIES)
+    return pd.concat(partes, ignore_index=True)
+
+def copy_series(cur, frames: Dict[str, pd.DataFrame], destino: str = TABELA_SERIES) -> int:
+    """COPY das séries de {mensal longa: frame com lead_bruto_id já resolvido} para destino."""
+    garantir_tabela_series(cur)
+    total = 0
+    for tabela, frame in frames.items():
+        series = compactar(frame, MEDIDAS[tabela.rsplit(".", 1)[-1]])
+        total += copy_dataframe(cur, series, destino, COLUNAS_SERIES)
+    return total
@@ -0,0 +1,44 @@
+# packages/jobs/utils/staging.py
+# -*- coding: utf-8 -*-
+"""
+Tabelas de staging por sessão para os importers (lead_bruto, ponto_notavel).
+
+- Criadas uma vez por conexão: CREATE TEMP TABLE IF NOT EXISTS ... AS SELECT <colunas>
+  FROM <destino> WITH NO DATA -> mesmos tipos, sem índices, constraints nem defaults
+  (o LIKE ... INCLUDING ALL ON COMMIT DROP de antes recriava todos os índices do destino
+  no catálogo a cada chunk)
+- ON COMMIT DELETE ROWS: a staging é truncada em cada commit, isto é, entre um chunk e
+  o próximo (os importers fazem commit por chunk); quem reaproveita a staging dentro da
+  mesma transação pede limpar=True (TRUNCATE explícito no mesmo comando)
+- O nome leva um hash das colunas: conjuntos de colunas diferentes não colidem
+- Temporárias em vez de UNLOGGED compartilhadas: importers em paralelo (orquestrador)
+  não enxergam a staging um do outro
+- Com o custo fixo por chunk fora do caminho, os chunks podem subir para 50k–200k linhas
+"""
+
+from __future__ import annotations
+import hashlib
+from typing import List
+
+
+def nome_staging(tabela_full: str, colunas: List[str]) -> str:
+    """_stg_<tabela>_<hash das colunas> (cabe nos 63 caracteres de identificador)."""
+    tabela = tabela_full.split(".")[-1]
+    assinatura = hashlib.md5(",".join(colunas).encode()).hexdigest()[:8]
+    return f"_stg_{tabela[:40]}_{assinatura}"
+
+
+def preparar_staging(cur, tabela_full: str, colunas: List[str], limpar: bool = False) -> str:
+    """
+    Garante a staging temporária de tabela_full[colunas] nesta sessão e devolve o nome.
+    Uma ida ao banco; na primeira chamada da conexão cria, nas seguintes é só um NOTICE.
+    """
+    nome = nome_staging(tabela_full, colunas)
+    comando = (
+        f"CREATE TEMP TABLE IF NOT EXISTS {nome} ON COMMIT DELETE ROWS AS "
+        f"SELECT {','.join(colunas)} FROM {tabela_full} WITH NO DATA"
+    )
+    if limpar:
+        comando += f"; TRUNCATE {nome}"
+    cur.execute(comando)
+    return nome
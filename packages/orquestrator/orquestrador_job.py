@@ -1,5 +1,8 @@
 import os
 import sys
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 from tqdm import tqdm
 from subprocess import run
@@ -10,7 +13,7 @@ if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
 # IMPORT CORRETO do rastreio (no seu repo não há "utils.rastreio")
-from packages.jobs.utils.rastreio import get_status
+from packages.jobs.utils.rastreio import get_status, gerar_import_id
 
 # Pasta onde estão os .gdb
 DOWNLOADS_DIR = Path("data/downloads")
@@ -30,6 +33,15 @@ IMPORTERS = {
 # Usa o Python atual da venv para rodar subprocessos
 PYTHON_EXEC = sys.executable
 
+# Modo paralelo: camadas de um GDB e GDBs diferentes ao mesmo tempo.
+# Cada importer mantém uma conexão aberta durante a carga (o rastreio abre e fecha
+# conexões curtas), então o orçamento de conexões é o nº de importers simultâneos.
+ORQ_PARALELO = os.getenv("ORQ_PARALELO", "0") == "1"
+ORQ_MAX_CONEXOES_DB = int(os.getenv("ORQ_MAX_CONEXOES_DB", "4"))
+
+# Ordem de partida no modo paralelo: camadas maiores primeiro (encurta a cauda)
+PESO_CAMADA = {"UCBT": 3, "UCMT": 2, "UCAT": 1, "PONNOT": 0}
+
 
 def _build_args(camada: str, gdb_path: Path, distribuidora: str, ano: int, prefixo: str) -> list[str]:
     """
@@ -39,17 +51,24 @@ def _build_args(camada: str, gdb_path: Path, distribuidora: str, ano: int, prefi
     base = ["--gdb", str(gdb_path), "--distribuidora", distribuidora, "--ano", str(ano)]
     if camada in ("UCAT", "UCMT"):
         return base + ["--prefixo", prefixo, "--modo-debug"]
-    else:
-        return base + ["--modo-debug"]
+    if camada == "UCBT":
+        # mesmo import_id que get_status() procura (UCBT geraria pelo nome da distribuidora)
+        return base + ["--import-id", gerar_import_id(prefixo, ano, camada), "--modo-debug"]
+    return base + ["--modo-debug"]
 
 
 def rodar_importer(
     script_path: str, gdb_path: Path, camada: str, distribuidora: str, ano: int, prefixo: str
-):
+) -> dict:
+    """Roda um importer em subprocesso. Retorna {prefixo, camada, resultado, duracao_s}."""
+    t0 = time.perf_counter()
+    resumo = {"prefixo": prefixo, "camada": camada, "resultado": "ok", "duracao_s": 0.0}
+
     status = get_status(prefixo, ano, camada)
     if status == "completed":
         tqdm.write(f"[OK] Ja importado: {camada} {prefixo}")
-        return
+        resumo["resultado"] = "ja_importado"
+        return resumo
 
     args = _build_args(camada, gdb_path, distribuidora, ano, prefixo)
     tqdm.write(f"[RUN] Importando {camada} para {prefixo}")
@@ -59,7 +78,9 @@ def rodar_importer(
 
     result = run([PYTHON_EXEC, script_path] + args, capture_output=True, text=True, env=env)
 
+    resumo["duracao_s"] = time.perf_counter() - t0
     if result.returncode != 0:
+        resumo["resultado"] = "falhou"
         tqdm.write(f"[ERR] Importacao falhou {camada} ({prefixo})")
         if result.stderr:
             tqdm.write(result.stderr)
@@ -72,11 +93,12 @@ def rodar_importer(
             out = result.stdout.strip()
             if out:
                 tqdm.write(out.splitlines()[-1])
+    return resumo
 
 
-def orquestrar_importacao():
-    tqdm.write("[INFO] Iniciando orquestrador manual (mock)")
-
+def listar_tarefas() -> list[tuple]:
+    """(script, gdb_dir, camada, distribuidora, ano, prefixo) para cada camada de cada GDB."""
+    tarefas = []
     for prefixo in PREFIXOS:
         gdb_dir = DOWNLOADS_DIR / f"{prefixo}.gdb"
 
@@ -92,15 +114,88 @@ def orquestrar_importacao():
             continue
 
         for camada in CAMADAS:
-            script = IMPORTERS[camada]
+            tarefas.append((IMPORTERS[camada], gdb_dir, camada, distribuidora, ano, prefixo))
+    return tarefas
+
+
+def _tamanho_gdb(gdb_dir: Path) -> int:
+    try:
+        return sum(f.stat().st_size for f in gdb_dir.iterdir() if f.is_file())
+    except OSError:
+        return 0
+
+
+def executar_paralelo(tarefas: list[tuple], max_conexoes: int, executor_cls=ProcessPoolExecutor) -> list[dict]:
+    """
+    Roda as tarefas num pool de processos com no máximo `max_conexoes` importers
+    (= conexões de carga) ao mesmo tempo. GDBs maiores e camadas mais pesadas partem primeiro.
+    """
+    tamanhos = {t[1]: _tamanho_gdb(t[1]) for t in tarefas}
+    ordem = sorted(tarefas, key=lambda t: (PESO_CAMADA.get(t[2], 0), tamanhos[t[1]]), reverse=True)
+
+    resultados = []
+    with executor_cls(max_workers=max(1, max_conexoes)) as pool:
+        futuros = {pool.submit(rodar_importer, *t): t for t in ordem}
+        for fut in as_completed(futuros):
+            script, gdb_dir, camada, distribuidora, ano, prefixo = futuros[fut]
             try:
-                rodar_importer(script, gdb_dir, camada, distribuidora, ano, prefixo)
+                resultados.append(fut.result())
             except Exception as e:
                 tqdm.write(f"[ERR] Erro ao rodar {camada} ({prefixo}): {e}")
-                continue
+                resultados.append({"prefixo": prefixo, "camada": camada, "resultado": "erro", "duracao_s": 0.0})
+    return resultados
+
+
+def executar_sequencial(tarefas: list[tuple]) -> list[dict]:
+    resultados = []
+    for script, gdb_dir, camada, distribuidora, ano, prefixo in tarefas:
+        try:
+            resultados.append(rodar_importer(script, gdb_dir, camada, distribuidora, ano, prefixo))
+        except Exception as e:
+            tqdm.write(f"[ERR] Erro ao rodar {camada} ({prefixo}): {e}")
+            resultados.append({"prefixo": prefixo, "camada": camada, "resultado": "erro", "duracao_s": 0.0})
+            continue
+    return resultados
+
+
+def resumo_execucao(resultados: list[dict], parede_s: float) -> list[str]:
+    soma = sum(r["duracao_s"] for r in resultados)
+    contagem = {}
+    for r in resultados:
+        contagem[r["resultado"]] = contagem.get(r["resultado"], 0) + 1
+    linhas = [
+        f"{r['prefixo']:<28} {r['camada']:<7} {r['resultado']:<13} {r['duracao_s']:8.1f}s"
+        for r in sorted(resultados, key=lambda r: (r["prefixo"], r["camada"]))
+    ]
+    linhas.append(" | ".join(f"{k}={v}" for k, v in sorted(contagem.items())))
+    linhas.append(
+        f"Tempo total (parede): {parede_s:.1f}s | soma dos importers: {soma:.1f}s"
+        + (f" | paralelismo efetivo: {soma / parede_s:.2f}x" if parede_s > 0 else "")
+    )
+    return linhas
+
+
+def orquestrar_importacao(paralelo: bool = ORQ_PARALELO, max_conexoes: int = ORQ_MAX_CONEXOES_DB):
+    modo = f"paralelo, ate {max_conexoes} conexoes" if paralelo else "sequencial"
+    tqdm.write(f"[INFO] Iniciando orquestrador manual ({modo})")
+    t0 = time.perf_counter()
+
+    tarefas = listar_tarefas()
+    if paralelo:
+        resultados = executar_paralelo(tarefas, max_conexoes)
+    else:
+        resultados = executar_sequencial(tarefas)
 
-    tqdm.write("[INFO] Orquestracao mock finalizada.")
+    for linha in resumo_execucao(resultados, time.perf_counter() - t0):
+        tqdm.write(f"[INFO] {linha}")
+    tqdm.write("[INFO] Orquestracao finalizada.")
+    return resultados
 
 
 if __name__ == "__main__":
-    orquestrar_importacao()
+    parser = argparse.ArgumentParser(description="Importa todas as camadas dos GDBs em data/downloads")
+    parser.add_argument("--paralelo", action="store_true", default=ORQ_PARALELO)
+    parser.add_argument("--max-conexoes-db", type=int, default=ORQ_MAX_CONEXOES_DB,
+                        help="Importers (conexões de carga) simultâneos no modo paralelo")
+    args = parser.parse_args()
+    orquestrar_importacao(paralelo=args.paralelo, max_conexoes=args.max_conexoes_db)
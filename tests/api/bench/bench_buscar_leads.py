@@ -0,0 +1,150 @@
+# tests/api/bench/bench_buscar_leads.py
+"""
+Listagem de leads: OFFSET + COUNT(*) a cada página (antigo) x cursor keyset + contagem em
+cache (apps/api/services/lead/paginacao.py).
+
+Mede num Postgres local, numa cópia temporária de mv_lead_completo_detalhado com os índices
+da migration 018, a latência (p50/p99) das páginas 1, 100 e 10.000 (limit 50):
+  - antigo: COUNT(*) com os filtros + SELECT ... ORDER BY col OFFSET n LIMIT 50
+  - cursor: SELECT a partir do cursor da página anterior (a contagem sai do cache)
+
+Uso:
+  BENCH_DSN="host=localhost dbname=postgres user=postgres" python tests/api/bench/bench_buscar_leads.py [n_leads] [repeticoes]
+"""
+
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[3]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from apps.api.services.lead import paginacao
+
+LIMIT = 50
+PAGINAS = (1, 100, 10_000)
+TABELA = "mv_lead_completo_detalhado"
+DDL = f"""
+    CREATE TEMP TABLE {TABELA} AS
+    SELECT g::text AS id,
+           'UC' || (g %% 1000003)::text AS uc_id,
+           'DISTRIBUIDORA ' || (g %% 53)::text AS distribuidora_nome,
+           CASE WHEN g %% 5 = 0 THEN NULL ELSE (g * 7919 %% 10007) / 100.0 END::float8 AS media_dic,
+           CASE WHEN g %% 7 = 0 THEN NULL ELSE (g * 104729 %% 1009) / 10.0 END::float8 AS media_fic,
+           (g * 31 %% 5000)::int AS pac,
+           (ARRAY['SP','MG','RJ','BA','PR','RS','PE','CE','PA','SC'])[1 + g %% 10] AS estado,
+           'COMERCIAL' AS classe,
+           NULL::text AS segmento_desc,
+           'BAIRRO ' || (g %% 4999)::text AS bairro,
+           NULL::text AS descricao
+    FROM generate_series(1, %(n)s::bigint) g;
+"""
+CENARIOS = [
+    ("padrao", {}),
+    ("dic_desc", {}),
+    ("potencia_desc", {"estado": "SP"}),
+]
+
+
+def pg(sql: str) -> str:
+    return re.sub(r":(\w+)", r"%(\1)s", sql)
+
+
+def percentis(tempos: list) -> str:
+    ms = np.array(tempos) * 1000
+    return f"p50 {np.percentile(ms, 50):8.2f} ms | p99 {np.percentile(ms, 99):8.2f} ms"
+
+
+def filtros_sql(filtros: dict) -> list:
+    return [f"{col} = :{col}" for col in filtros]
+
+
+def medir(fn, repeticoes: int) -> list:
+    fn()  # aquece
+    tempos = []
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        fn()
+        tempos.append(time.perf_counter() - t0)
+    return tempos
+
+
+def pagina_offset(cur, ordem, filtros, pagina):
+    coluna, desc = paginacao.ordenacao(ordem)
+    where = " AND ".join(filtros_sql(filtros)) or "true"
+    cur.execute(pg(f"SELECT COUNT(*) FROM {TABELA} WHERE {where}"), filtros)
+    cur.fetchone()
+    cur.execute(pg(f"SELECT * FROM {TABELA} WHERE {where} ORDER BY {coluna} {'DESC' if desc else 'ASC'} "
+                   f"OFFSET :skip LIMIT :limit"), {**filtros, "skip": (pagina - 1) * LIMIT, "limit": LIMIT})
+    return cur.fetchall()
+
+
+def pagina_cursor(cur, ordem, filtros, posicao):
+    linhas = []
+    for sql, extras in paginacao.consultas_pagina(TABELA, filtros_sql(filtros), ordem, posicao):
+        faltam = LIMIT + 1 - len(linhas)
+        if faltam <= 0:
+            break
+        cur.execute(pg(sql), {**filtros, **extras, "limit": faltam})
+        linhas += cur.fetchall()
+    return linhas[:LIMIT]
+
+
+def posicao_antes(cur, ordem, filtros, pagina):
+    """(valor, uc_id, id) da última linha da página anterior (montagem, fora da medição)."""
+    if pagina == 1:
+        return None
+    coluna, desc = paginacao.ordenacao(ordem)
+    direcao = "DESC" if desc else "ASC"
+    where = " AND ".join(filtros_sql(filtros)) or "true"
+    cur.execute(pg(f"SELECT {coluna}, uc_id, id FROM {TABELA} WHERE {where} "
+                   f"ORDER BY {coluna} {direcao}, uc_id {direcao}, id {direcao} OFFSET :skip LIMIT 1"),
+                {**filtros, "skip": (pagina - 1) * LIMIT - 1})
+    return cur.fetchone()
+
+
+def bench(dsn: str, n_leads: int, repeticoes: int) -> None:
+    import psycopg2
+    import psycopg2.extras
+
+    with psycopg2.connect(dsn) as conn, conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+        t0 = time.perf_counter()
+        cur.execute(DDL, {"n": n_leads})
+        for coluna in ("distribuidora_nome", "media_dic", "media_fic", "pac"):
+            cur.execute(f"CREATE INDEX ON {TABELA} ({coluna}, uc_id, id)")
+        cur.execute(f"CREATE INDEX ON {TABELA} (estado)")
+        cur.execute(f"ANALYZE {TABELA}")
+        print(f"{n_leads:,} leads (montagem {time.perf_counter() - t0:.1f}s), limit {LIMIT}, {repeticoes} repetições")
+
+        for ordem, filtros in CENARIOS:
+            nome = ordem + (f" {filtros}" if filtros else "")
+            for pagina in PAGINAS:
+                posicao = posicao_antes(cur, ordem, filtros, pagina)
+                if pagina > 1 and posicao is None:
+                    continue
+                if posicao is not None:
+                    posicao = tuple(posicao.values())
+                    # conferência: mesma página pelos dois caminhos (o antigo não desempata: compara só a coluna)
+                    coluna = paginacao.ordenacao(ordem)[0]
+                    a = [r[coluna] for r in pagina_cursor(cur, ordem, filtros, posicao)]
+                    b = [r[coluna] for r in pagina_offset(cur, ordem, filtros, pagina)]
+                    assert a == b, f"{nome} página {pagina}: cursor e OFFSET divergem"
+                antigo = medir(lambda: pagina_offset(cur, ordem, filtros, pagina), repeticoes)
+                cursor = medir(lambda: pagina_cursor(cur, ordem, filtros, posicao), repeticoes)
+                print(f"{nome:<28} página {pagina:>6}  antigo {percentis(antigo)}  ||  cursor {percentis(cursor)}")
+        conn.rollback()
+
+
+if __name__ == "__main__":
+    n_leads = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    repeticoes = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    dsn = os.getenv("BENCH_DSN")
+    if not dsn:
+        print("BENCH_DSN não definido: o benchmark precisa de um Postgres")
+        sys.exit(1)
+    bench(dsn, n_leads, repeticoes)
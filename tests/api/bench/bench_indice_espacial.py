@@ -0,0 +1,94 @@
+# tests/api/bench/bench_indice_espacial.py
+"""
+Índice espacial em memória (packages/detectors/indice_espacial.py).
+
+Gera N pontos sintéticos (capitais densas + pontos espalhados pelo país), e mede:
+  - construção e gravação do snapshot; abertura por mmap
+  - knn (k=10) e raio (500 m) em lote, por consulta, em área densa e esparsa
+  - força bruta (haversine contra todos os pontos) em algumas consultas, como referência
+    do custo de "uma varredura por chamada"
+Também confere o knn contra a força bruta.
+
+Uso:
+  python tests/api/bench/bench_indice_espacial.py [n_pontos] [consultas]
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[3]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from packages.detectors.indice_espacial import IndiceEspacial, haversine
+
+CAPITAIS = [(-23.55, -46.63), (-22.91, -43.17), (-19.92, -43.94), (-12.97, -38.50), (-25.43, -49.27),
+            (-30.03, -51.23), (-8.05, -34.88), (-3.73, -38.52), (-1.46, -48.50), (-15.79, -47.88)]
+
+
+def gerar(rng, n: int) -> tuple[np.ndarray, np.ndarray]:
+    centro = rng.integers(len(CAPITAIS), size=n)
+    lat = np.array([c[0] for c in CAPITAIS])[centro] + rng.normal(0, 0.25, n)
+    lon = np.array([c[1] for c in CAPITAIS])[centro] + rng.normal(0, 0.25, n)
+    espalhados = rng.random(n) < 0.05
+    lat[espalhados] = rng.uniform(-33, 5, espalhados.sum())
+    lon[espalhados] = rng.uniform(-73, -35, espalhados.sum())
+    return lat, lon
+
+
+def por_consulta(segundos: float, n: int) -> str:
+    return f"{segundos / n * 1e6:8.1f} µs/consulta"
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000
+    q = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+    rng = np.random.default_rng(11)
+    lat, lon = gerar(rng, n)
+    ids = np.char.add("UC", np.arange(n).astype(str))
+
+    t0 = time.perf_counter()
+    idx = IndiceEspacial.construir(ids, lat, lon)
+    t_construir = time.perf_counter() - t0
+    with tempfile.TemporaryDirectory() as tmp:
+        caminho = Path(tmp) / "ucs.grid"
+        t0 = time.perf_counter()
+        idx.salvar(caminho)
+        t_salvar = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        idx = IndiceEspacial.carregar(caminho)
+        t_carregar = time.perf_counter() - t0
+        print(f"{n:,} pontos: construir {t_construir:.2f} s | salvar {t_salvar:.2f} s "
+              f"({caminho.stat().st_size / 2**20:.0f} MiB) | abrir (mmap) {t_carregar * 1000:.2f} ms")
+
+        densas = gerar(rng, q)
+        esparsas = (rng.uniform(-33, 5, q // 10), rng.uniform(-73, -35, q // 10))
+        idx.knn(densas[0][:1000], densas[1][:1000], 10)  # aquece (páginas do mmap)
+        for nome, (qlat, qlon) in (("mistas", densas), ("esparsas", esparsas)):
+            t0 = time.perf_counter()
+            idx.knn(qlat, qlon, 10)
+            t_knn = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            idx.raio(qlat, qlon, 500)
+            t_raio = time.perf_counter() - t0
+            print(f"{len(qlat):6d} consultas {nome:9s} knn k=10 {por_consulta(t_knn, len(qlat))} | "
+                  f"raio 500 m {por_consulta(t_raio, len(qlat))}")
+
+        amostra = 20
+        dist, _ = idx.knn(densas[0][:amostra], densas[1][:amostra], 10)
+        t0 = time.perf_counter()
+        iguais = 0
+        for i in range(amostra):
+            d = np.sort(haversine(densas[0][i], densas[1][i], idx.lat, idx.lon))[:10]
+            d[d > 50_000] = np.inf
+            iguais += np.allclose(d, dist[i])
+        t_bruta = time.perf_counter() - t0
+        print(f"força bruta: {por_consulta(t_bruta, amostra)} | knn igual à força bruta: {iguais}/{amostra}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# tests/api/bench/bench_match_uc.py
+"""
+Match de UC por ponto do Detetive (packages/detectors/match_engine.py):
+  - antigo: ST_Distance em geometry 4326 (graus) para todas as linhas + ORDER BY
+  - sem índice: a consulta nova montando a geography na hora (metros, varredura)
+  - KNN: lead_bruto.geog + GiST da migration 020 (geog <-> ponto, ST_DWithin em metros)
+
+Gera N pontos sintéticos em torno de capitais brasileiras num schema descartável, aplica a
+migration 020 e mede p50/p95 por consulta (pontos de consulta a ~20 m de UCs existentes).
+Confere também que o KNN devolve o mesmo vizinho mais próximo que a varredura.
+
+Precisa de um Postgres com PostGIS:
+  BENCH_DSN="host=localhost dbname=postgres user=postgres" python tests/api/bench/bench_match_uc.py [n_pontos] [consultas]
+"""
+
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[3]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from packages.detectors import match_engine
+
+SCHEMA = f"bench_match_{os.getpid()}"
+MIGRATION = ROOT / "packages/database/schema/migrations/020_geo_leads.sql"
+CAPITAIS = [(-23.55, -46.63), (-22.91, -43.17), (-19.92, -43.94), (-12.97, -38.50), (-25.43, -49.27),
+            (-30.03, -51.23), (-8.05, -34.88), (-3.73, -38.52), (-1.46, -48.50), (-15.79, -47.88)]
+# ~1/3 das UCs aparecem em dois anos (mesma coordenada), como em lead_bruto
+DDL = """
+    CREATE TABLE lead_bruto AS
+    SELECT g AS id,
+           'UC' || (CASE WHEN g %% 3 = 0 THEN g - 1 ELSE g END) AS uc_id,
+           c.lat + 0.25 * sqrt(-2 * ln(1 - u1)) * cos(2 * pi() * u2) AS latitude,
+           c.lon + 0.25 * sqrt(-2 * ln(1 - u1)) * sin(2 * pi() * u2) AS longitude
+    FROM generate_series(1, %(n)s::bigint) g
+    CROSS JOIN LATERAL (SELECT random() AS u1, random() AS u2, 1 + (g %% 10)::int AS i) r
+    JOIN unnest(%(lats)s::float8[], %(lons)s::float8[]) WITH ORDINALITY AS c(lat, lon, i) ON c.i = r.i;
+    UPDATE lead_bruto l SET latitude = o.latitude, longitude = o.longitude
+    FROM lead_bruto o WHERE l.id %% 3 = 0 AND o.id = l.id - 1;
+    CREATE INDEX ON lead_bruto (uc_id);
+    CREATE VIEW vw_lead_completo_detalhado AS SELECT id, uc_id, latitude, longitude FROM lead_bruto;
+"""
+SQL_ANTIGO = """
+    SELECT *,
+        ST_Distance(
+            ST_SetSRID(ST_MakePoint(:lng, :lat), 4326),
+            ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)
+        ) AS distancia_metros
+    FROM intel_lead.vw_lead_completo_detalhado
+    WHERE latitude IS NOT NULL AND longitude IS NOT NULL
+    ORDER BY distancia_metros ASC
+    LIMIT 10
+"""
+
+
+def pg(sql: str) -> str:
+    sql = sql.replace("intel_lead.", f"{SCHEMA}.")
+    return re.sub(r"(?<!:):(\w+)", r"%(\1)s", sql)
+
+
+def medir(cur, sql: str, pontos: list) -> tuple[list, list]:
+    tempos, primeiros = [], []
+    for lat, lng in pontos:
+        t0 = time.perf_counter()
+        cur.execute(pg(sql), match_engine.parametros_match(lat, lng, 10, 100.0))
+        rows = cur.fetchall()
+        tempos.append(time.perf_counter() - t0)
+        primeiros.append(rows[0][1] if rows else None)
+    return tempos, primeiros
+
+
+def percentis(tempos: list) -> str:
+    ms = np.array(tempos) * 1000
+    return f"p50 {np.percentile(ms, 50):9.2f} ms | p95 {np.percentile(ms, 95):9.2f} ms"
+
+
+def main():
+    import psycopg2
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    consultas = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    conn = psycopg2.connect(os.getenv("BENCH_DSN", "host=localhost dbname=postgres user=postgres"))
+    conn.autocommit = True
+    cur = conn.cursor()
+    cur.execute(f"CREATE SCHEMA {SCHEMA}")
+    try:
+        cur.execute(f"SET search_path TO {SCHEMA}, public")
+        t0 = time.perf_counter()
+        cur.execute(DDL, {"n": n, "lats": [c[0] for c in CAPITAIS], "lons": [c[1] for c in CAPITAIS]})
+        migration = MIGRATION.read_text().replace("SET search_path TO intel_lead;", "")
+        cur.execute(migration)
+        print(f"{n:,} pontos + migration 020 em {time.perf_counter() - t0:.1f} s")
+
+        # pontos de consulta: UCs sorteadas deslocadas ~20 m
+        cur.execute("SELECT latitude, longitude FROM lead_bruto TABLESAMPLE SYSTEM (1) LIMIT %s", (consultas,))
+        rng = np.random.default_rng(7)
+        pontos = [(lat + rng.normal(0, 0.00018), lon + rng.normal(0, 0.00018)) for lat, lon in cur.fetchall()]
+
+        lentas = pontos[:max(5, consultas // 20)]
+        t_antigo, _ = medir(cur, SQL_ANTIGO, lentas)
+        t_scan, esperados = medir(cur, match_engine.SQL_MATCH_SEM_INDICE, lentas)
+        medir(cur, match_engine.SQL_MATCH, pontos[:20])  # aquece
+        t_knn, obtidos = medir(cur, match_engine.SQL_MATCH, pontos)
+
+        print(f"antigo (graus, varredura)   {len(lentas):5d} consultas: {percentis(t_antigo)}")
+        print(f"geography sem índice        {len(lentas):5d} consultas: {percentis(t_scan)}")
+        print(f"KNN GiST + ST_DWithin       {len(pontos):5d} consultas: {percentis(t_knn)}")
+        iguais = sum(a == b for a, b in zip(esperados, obtidos))
+        print(f"mesmo vizinho mais próximo que a varredura: {iguais}/{len(lentas)}")
+    finally:
+        cur.execute("RESET search_path")
+        cur.execute(f"DROP SCHEMA {SCHEMA} CASCADE")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# tests/api/stub_http.py
+"""Servidor HTTP local para os testes de provedores_http (sem rede externa)."""
+
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+class ServidorStub:
+    """
+    `rotas`: caminho -> fn(query: dict) devolvendo (status, corpo JSON) ou
+    (status, corpo, headers). Registra requisições, conexões (porta do cliente) e a maior
+    quantidade de requisições simultâneas (no total e por caminho).
+    """
+
+    def __init__(self, rotas: dict, demora: float = 0.0):
+        self.rotas = rotas
+        self.demora = demora
+        self.requisicoes = []
+        self.conexoes = set()
+        self.ativas = 0
+        self.max_ativas = 0
+        self.ativas_por = Counter()
+        self.max_ativas_por = Counter()
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                partes = urlsplit(self.path)
+                query = {k: v[0] for k, v in parse_qs(partes.query).items()}
+                with stub._lock:
+                    stub.ativas += 1
+                    stub.max_ativas = max(stub.max_ativas, stub.ativas)
+                    stub.ativas_por[partes.path] += 1
+                    stub.max_ativas_por[partes.path] = max(stub.max_ativas_por[partes.path], stub.ativas_por[partes.path])
+                    stub.requisicoes.append((time.monotonic(), partes.path, query))
+                    stub.conexoes.add(self.client_address[1])
+                try:
+                    time.sleep(stub.demora)
+                    rota = stub.rotas.get(partes.path)
+                    status, corpo, *extra = rota(query) if rota else (404, {"erro": "rota"})
+                finally:
+                    with stub._lock:
+                        stub.ativas -= 1
+                        stub.ativas_por[partes.path] -= 1
+                dados = json.dumps(corpo).encode()
+                self.send_response(status)
+                for nome, valor in (extra[0] if extra else {}).items():
+                    self.send_header(nome, valor)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(dados)))
+                self.end_headers()
+                self.wfile.write(dados)
+
+            def log_message(self, *args):
+                pass
+
+        self._servidor = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._servidor.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._servidor.server_address[1]}"
+
+    def chamadas(self, caminho: str) -> list:
+        return [r for r in self.requisicoes if r[1] == caminho]
+
+    def __enter__(self):
+        threading.Thread(target=self._servidor.serve_forever, args=(0.05,), daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._servidor.shutdown()
+        self._servidor.server_close()
@@ -0,0 +1,143 @@
+# tests/api/test_busca_slo.py
+"""
+SLO da busca textual (apps/api/services/lead/busca_textual.py): aplica a migration 019 num
+schema descartável, sobre uma MV de leads sintética, e mede a latência das consultas da API.
+
+Precisa de um Postgres com pg_trgm/unaccent disponíveis; sem BUSCA_SLO_DSN o teste é pulado.
+  BUSCA_SLO_DSN="host=localhost dbname=postgres user=postgres" python -m pytest -q tests/api/test_busca_slo.py
+Knobs: BUSCA_SLO_LINHAS (default 200000), BUSCA_SLO_P95_MS (default 50).
+"""
+
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from apps.api.services.lead import busca_textual
+
+DSN = os.getenv("BUSCA_SLO_DSN")
+LINHAS = int(os.getenv("BUSCA_SLO_LINHAS", "200000"))
+P95_MS = float(os.getenv("BUSCA_SLO_P95_MS", "50"))
+SCHEMA = f"busca_slo_{os.getpid()}"
+MIGRATION = ROOT / "packages/database/schema/migrations/019_busca_leads.sql"
+
+pytestmark = pytest.mark.skipif(not DSN, reason="BUSCA_SLO_DSN não definido: o SLO precisa de um Postgres")
+
+PREFIXOS = ["Jardim", "Vila", "Parque", "Conjunto", "Residencial", "Chácara", "Núcleo", "Recanto"]
+NOMES = ["São João", "Paulista", "das Flores", "Esperança", "Aurora", "Ipiranga", "Boa Vista",
+         "Santa Luzia", "Bela Vista", "Primavera", "Alvorada", "Industrial", "Nova Conquista",
+         "Monte Alegre", "Santo Antônio", "Campo Belo", "Guanabara", "Itaquerê", "Maracanã", "Sol Nascente"]
+RAZOES = ["Padaria", "Mercado", "Metalúrgica", "Transportes", "Construtora", "Farmácia", "Açougue",
+          "Supermercado", "Indústria", "Comércio", "Têxtil", "Cerâmica", "Oficina", "Hotel"]
+
+# como na MV de produção: bairro repetido entre muitos leads, razão social só nos enriquecidos
+DDL_LEADS = """
+    CREATE TABLE mv_lead_completo_detalhado AS
+    SELECT g::text AS id,
+           'UC' || g AS uc_id,
+           (%(prefixos)s::text[])[1 + g %% 8] || ' ' || (%(nomes)s::text[])[1 + (g / 8) %% 20]
+               || CASE WHEN g %% 3 = 0 THEN ' ' || (g %% 97) ELSE '' END AS bairro,
+           NULL::text AS descricao,
+           CASE WHEN g %% 5 = 0 THEN
+               (%(razoes)s::text[])[1 + (g * 3) %% 14] || ' ' || (%(nomes)s::text[])[1 + (g * 13) %% 20]
+               || ' ' || g || ' LTDA'
+           END AS razao_social,
+           'Município ' || (g %% 500) AS municipio,
+           'SP' AS estado,
+           'DISTRIBUIDORA ' || (g %% 53) AS distribuidora_nome
+    FROM generate_series(1, %(linhas)s) g;
+    CREATE UNIQUE INDEX ON mv_lead_completo_detalhado (id);
+"""
+
+
+def pg(sql: str) -> str:
+    """SQL da API (:param, schema intel_lead) -> psycopg2 no schema descartável."""
+    sql = sql.replace("%", "%%").replace("intel_lead.", f"{SCHEMA}.")
+    return re.sub(r"(?<!:):(\w+)", r"%(\1)s", sql)
+
+
+@pytest.fixture(scope="module")
+def cur():
+    import psycopg2
+    import psycopg2.extras
+
+    conn = psycopg2.connect(DSN)
+    conn.autocommit = True
+    c = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+    try:
+        c.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm WITH SCHEMA public")
+        c.execute("CREATE EXTENSION IF NOT EXISTS unaccent WITH SCHEMA public")
+    except psycopg2.Error as e:
+        conn.close()
+        pytest.skip(f"pg_trgm/unaccent indisponíveis: {e}")
+    c.execute(f"CREATE SCHEMA {SCHEMA}")
+    try:
+        c.execute(f"SET search_path TO {SCHEMA}, public")
+        c.execute(DDL_LEADS, {"prefixos": PREFIXOS, "nomes": NOMES, "razoes": RAZOES, "linhas": LINHAS})
+        migration = MIGRATION.read_text().replace("SET search_path TO intel_lead;", "")
+        c.execute(migration.replace("intel_lead", SCHEMA))
+        c.execute("ANALYZE mv_lead_busca; ANALYZE mv_lead_busca_termo")
+        c.execute("RESET search_path")
+        yield c
+    finally:
+        c.execute(f"DROP SCHEMA {SCHEMA} CASCADE")
+        conn.close()
+
+
+def buscar(cur, q: str, limit: int = 20) -> list:
+    cur.execute(pg(busca_textual.consulta_busca(q)), {"q": q, "tsquery": busca_textual.tsquery_prefixo(q), "limit": limit})
+    return cur.fetchall()
+
+
+def test_prefixo_acento_e_erro_de_digitacao(cur):
+    # prefixo sem acento acha o texto acentuado
+    topo = buscar(cur, "jardim sao jo")
+    assert topo and all("Jardim São João" in r["bairro"] for r in topo)
+    assert topo[0]["score"] >= 1
+    # duas letras trocadas: só a parte aproximada casa
+    aproximado = buscar(cur, "parque ipirnga")
+    assert aproximado and "Parque Ipiranga" in aproximado[0]["bairro"]
+    assert 0 < aproximado[0]["score"] < 1
+    # razão social também entra
+    assert all("Metalúrgica" in r["razao_social"] for r in buscar(cur, "metalurg"))
+    # só prefixo (nenhuma palavra com 3 letras): termos com mais leads primeiro
+    curto = buscar(cur, "jo")
+    assert curto and all(r["score"] == 1 for r in curto)
+
+def test_filtro_busca_usa_texto_normalizado(cur):
+    cur.execute(pg(f"SELECT count(*) AS n FROM intel_lead.mv_lead_completo_detalhado WHERE {busca_textual.FILTRO_BUSCA}"),
+                {"busca": busca_textual.padrao_like("chacara santa")})
+    assert cur.fetchone()["n"] > 0
+    cur.execute(pg(f"SELECT count(*) AS n FROM intel_lead.mv_lead_completo_detalhado WHERE {busca_textual.FILTRO_BUSCA}"),
+                {"busca": busca_textual.padrao_like("100%")})
+    assert cur.fetchone()["n"] == 0
+
+def test_latencia_p95_dentro_do_slo(cur):
+    rng = np.random.default_rng(3)
+    termos = []
+    for _ in range(300):
+        nome = NOMES[rng.integers(len(NOMES))]
+        termo = busca_textual.normalizar(f"{PREFIXOS[rng.integers(len(PREFIXOS))]} {nome}")
+        corte = rng.integers(4, len(termo) + 1)
+        if rng.random() < 0.3:                     # erro de digitação: troca duas letras
+            i = rng.integers(1, corte - 2)
+            termo = termo[:i] + termo[i + 1] + termo[i] + termo[i + 2:]
+        termos.append(termo[:corte])
+    for q in termos[:20]:
+        buscar(cur, q)                             # aquece
+    tempos = []
+    for q in termos:
+        t0 = time.perf_counter()
+        buscar(cur, q)
+        tempos.append((time.perf_counter() - t0) * 1000)
+    p50, p95 = np.percentile(tempos, [50, 95])
+    print(f"\nbusca textual {LINHAS:,} leads: p50 {p50:.1f} ms | p95 {p95:.1f} ms (SLO {P95_MS:.0f} ms)")
+    assert p95 <= P95_MS
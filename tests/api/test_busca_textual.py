@@ -0,0 +1,29 @@
+# tests/api/test_busca_textual.py
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from apps.api.services.lead.busca_textual import (
+    SQL_BUSCA, SQL_BUSCA_PREFIXO, consulta_busca, normalizar, padrao_like, tsquery_prefixo,
+)
+
+
+def test_normaliza_e_monta_tsquery_de_prefixo():
+    assert normalizar("  Jardim  SÃO João ") == "jardim sao joao"
+    assert tsquery_prefixo("Chácara Sta. Luzia") == "chacara:* & sta:* & luzia:*"
+    # nada que vire palavra: sem consulta (e nada de injetar operadores do tsquery)
+    assert tsquery_prefixo("&|!:*()") is None
+    assert tsquery_prefixo("a & b") == "a:* & b:*"
+
+def test_consulta_aproximada_so_com_palavra_de_3_letras():
+    assert consulta_busca("jo") is SQL_BUSCA_PREFIXO
+    assert consulta_busca("vl sj") is SQL_BUSCA_PREFIXO
+    assert consulta_busca("vl são") is SQL_BUSCA
+    assert "<%" in SQL_BUSCA and "<%" not in SQL_BUSCA_PREFIXO
+
+def test_padrao_like_escapa_curingas():
+    assert padrao_like("100%_a\\b") == "100\\%\\_a\\\\b"
@@ -0,0 +1,205 @@
+# tests/api/test_cache_geocode.py
+
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from packages.detectors import cache_geocode
+from packages.detectors.cache_geocode import (
+    METRICAS, LRUComTTL, chave_endereco, extrair_cep, geocodificar, geocodificar_async,
+)
+from packages.detectors.geo_utils import _geocode
+from packages.detectors.provedores_http import Resposta
+
+# Postgres para o teste do banco real (URL SQLAlchemy), ex.:
+#   CACHE_GEOCODE_DB_URL="postgresql+psycopg2://postgres@localhost/postgres" python -m pytest -q tests/api/test_cache_geocode.py
+DB_URL = os.getenv("CACHE_GEOCODE_DB_URL")
+GEO = {"latitude": -23.56, "longitude": -46.65, "cep": "01310-100"}
+
+
+class BancoFalso:
+    """Tabela cache_geocode em memória (chave -> (resultado, expira_em))."""
+
+    def __init__(self):
+        self.linhas = {}
+        self.falhar = False
+        self.rollbacks = 0
+
+    def buscar(self, db, chave):
+        if self.falhar:
+            raise RuntimeError("banco fora")
+        linha = self.linhas.get(chave)
+        if linha is None or linha[1] <= time.time():
+            return cache_geocode._AUSENTE
+        return linha[0], linha[1] - time.time()
+
+    def gravar(self, db, chave, endereco, resultado):
+        if self.falhar:
+            raise RuntimeError("banco fora")
+        self.linhas[chave] = (resultado, time.time() + cache_geocode.ttl_s(resultado))
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+@pytest.fixture
+def ambiente(monkeypatch):
+    banco = BancoFalso()
+    chamadas = []
+
+    def google(endereco):
+        chamadas.append(endereco)
+        if "quebrado" in endereco:
+            raise Exception("Erro na requisição à API do Google Maps")
+        return {} if "inexistente" in endereco.lower() else dict(GEO)
+
+    async def google_async(endereco):
+        return google(endereco)
+
+    monkeypatch.setattr(cache_geocode, "USAR_BANCO", True)
+    monkeypatch.setattr(cache_geocode, "buscar_no_banco", banco.buscar)
+    monkeypatch.setattr(cache_geocode, "gravar_no_banco", banco.gravar)
+    monkeypatch.setattr(cache_geocode, "inferir_coordenadas_endereco", google)
+    monkeypatch.setattr(cache_geocode, "inferir_coordenadas_endereco_async", google_async)
+    cache_geocode.MEMORIA.limpar()
+    METRICAS.zerar()
+    return banco, chamadas
+
+
+def test_chave_normaliza_acento_abreviacao_e_cep():
+    iguais = ["Av. Paulista, nº 1000 - Bela Vista, São Paulo - SP, 01310-100, Brasil",
+              "AVENIDA PAULISTA 1000, BELA VISTA, SAO PAULO/SP - CEP: 01.310-100",
+              "av paulista n. 1000 bela vista são paulo sp 01310100"]
+    assert {chave_endereco(e) for e in iguais} == {"avenida paulista 1000 bela vista sao paulo sp|01310100"}
+    assert chave_endereco("R. Dr. Álvaro Alvim, s/n, Maceió - AL") == "rua doutor alvaro alvim sn maceio al"
+    assert chave_endereco("Al. Santos, 200") == "alameda santos 200"
+    assert chave_endereco("Rua 10 de Maio, 57") == "rua 10 de maio 57"
+    assert chave_endereco("Rua A, 10") != chave_endereco("Rua A, 10, 01000-000")
+    assert extrair_cep("Rua A, 10") == ("Rua A, 10", None)
+
+
+def test_lru_respeita_ttl_e_teto():
+    lru = LRUComTTL(2)
+    lru.guardar("a", 1, 60)
+    lru.guardar("b", 2, 60)
+    lru.obter("a")  # "a" fica mais recente que "b"
+    lru.guardar("c", 3, 60)
+    assert lru.obter("b") is cache_geocode._AUSENTE
+    assert (lru.obter("a"), lru.obter("c")) == (1, 3)
+    lru.guardar("d", 4, 0.01)
+    time.sleep(0.02)
+    assert lru.obter("d") is cache_geocode._AUSENTE  # vencido
+    assert lru.obter("a") is cache_geocode._AUSENTE and len(lru) == 1  # "d" empurrou "a"
+
+
+def test_memoria_banco_google_e_cache_negativo(ambiente):
+    banco, chamadas = ambiente
+    assert geocodificar("Av. Paulista, 1000", db=banco) == GEO
+    assert geocodificar("AVENIDA PAULISTA 1000", db=banco) == GEO  # memória
+    cache_geocode.MEMORIA.limpar()  # outro processo / reinício
+    assert geocodificar("av paulista 1000", db=banco) == GEO  # banco
+    assert geocodificar("Rua Inexistente, 1", db=banco) == {}
+    assert geocodificar("rua inexistente 1", db=banco) == {}  # negativo
+    with pytest.raises(Exception, match="Google"):
+        geocodificar("endereço quebrado", db=banco)
+    with pytest.raises(Exception):
+        geocodificar("endereço quebrado", db=banco)  # erro não é guardado
+
+    assert chamadas == ["Av. Paulista, 1000", "Rua Inexistente, 1", "endereço quebrado", "endereço quebrado"]
+    assert banco.linhas[chave_endereco("Rua Inexistente, 1")][1] - time.time() == pytest.approx(
+        cache_geocode.GEOCODE_CACHE_TTL_NEGATIVO_DIAS * 86400, abs=60)
+    m = METRICAS.resumo()
+    assert (m["consultas"], m["acertos_memoria"], m["acertos_banco"], m["acertos_negativos"]) == (7, 2, 1, 1)
+    assert (m["chamadas_google"], m["erros_google"], m["gravacoes"]) == (4, 2, 2)
+    assert m["taxa_acerto"] == round(3 / 7, 4)
+
+
+def test_async_e_banco_fora(ambiente):
+    banco, chamadas = ambiente
+
+    async def executar_db(fn):
+        return fn(None)
+
+    async def rodar():
+        primeiro = await geocodificar_async("Rua B, 1", executar_db)
+        cache_geocode.MEMORIA.limpar()
+        segundo = await geocodificar_async("RUA B. 1", executar_db)
+        banco.falhar = True
+        cache_geocode.MEMORIA.limpar()
+        terceiro = await geocodificar_async("Rua C, 2", executar_db)
+        return primeiro, segundo, terceiro
+
+    assert asyncio.run(rodar()) == (GEO, GEO, GEO)
+    # banco fora: segue para o Google e fica só na memória
+    assert chamadas == ["Rua B, 1", "Rua C, 2"]
+    assert geocodificar("rua c 2", db=banco) == GEO and banco.rollbacks == 0
+    m = METRICAS.resumo()
+    assert (m["acertos_banco"], m["erros_banco"], m["gravacoes"]) == (1, 1, 1)  # sem gravar depois da falha
+
+
+@pytest.mark.parametrize("status", ["ZERO_RESULTS", "OVER_QUERY_LIMIT", "REQUEST_DENIED", "INVALID_REQUEST"])
+def test_so_zero_results_vira_cache_negativo(ambiente, monkeypatch, status):
+    """O Google devolve HTTP 200 com results vazio nos quatro casos; só ZERO_RESULTS é "não existe"."""
+    banco, _ = ambiente
+    chamadas = []
+
+    def google(endereco):
+        chamadas.append(endereco)
+        corpo = json.dumps({"status": status, "results": [], "error_message": "detalhe"}).encode()
+        return _geocode(Resposta(200, corpo, {}, 0, 1))
+
+    monkeypatch.setattr(cache_geocode, "inferir_coordenadas_endereco", google)
+    for _ in range(2):
+        if status == "ZERO_RESULTS":
+            assert geocodificar("Rua Sem Fim, 1", db=banco) == {}
+        else:
+            with pytest.raises(Exception, match=status):
+                geocodificar("Rua Sem Fim, 1", db=banco)
+
+    if status == "ZERO_RESULTS":
+        assert len(chamadas) == 1 and banco.linhas[chave_endereco("Rua Sem Fim, 1")][0] == {}
+    else:
+        # nada guardado: a segunda chamada volta ao Google
+        assert len(chamadas) == 2 and banco.linhas == {} and len(cache_geocode.MEMORIA) == 0
+
+
+@pytest.mark.skipif(not DB_URL, reason="CACHE_GEOCODE_DB_URL não definido: precisa de um Postgres")
+def test_banco_real_nao_mexe_na_transacao_do_chamador(monkeypatch):
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.orm import Session
+
+    engine = create_engine(DB_URL)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE SCHEMA IF NOT EXISTS intel_lead"))
+    monkeypatch.setattr(cache_geocode, "_tabela_ok", False)
+    chave = f"teste|{os.getpid()}|{time.time()}"
+    try:
+        with Session(engine) as db:
+            # trabalho pendente do chamador (ex.: o Detetive síncrono no meio da requisição)
+            db.execute(text("CREATE TEMP TABLE pendente (x int)"))
+            db.execute(text("INSERT INTO pendente VALUES (1)"))
+            cache_geocode.gravar_no_banco(db, chave, "Rua T, 1", {"latitude": 1.0})
+            assert cache_geocode.buscar_no_banco(db, chave)[0] == {"latitude": 1.0}
+            # leitura que falha desfaz só o savepoint
+            monkeypatch.setattr(cache_geocode, "SQL_BUSCAR", text("SELECT 1/0"))
+            with pytest.raises(Exception):
+                cache_geocode.buscar_no_banco(db, chave)
+            assert db.in_transaction() and db.execute(text("SELECT count(*) FROM pendente")).scalar() == 1
+            db.rollback()
+            # o rollback do chamador levou o pendente, mas não a linha do cache (commit próprio)
+            assert db.execute(text("SELECT to_regclass('pendente')")).scalar() is None
+            monkeypatch.undo()
+            assert cache_geocode.buscar_no_banco(db, chave)[0] == {"latitude": 1.0}
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text("DELETE FROM intel_lead.cache_geocode WHERE chave = :c"), {"c": chave})
+        engine.dispose()
@@ -0,0 +1,99 @@
+# tests/api/test_detetive_lote.py
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from packages.detectors import cache_geocode, detetive_lote, provedores_http
+from packages.detectors.detetive_lote import analisar_lote, ler_prospects
+from packages.detectors.provedores_http import ConfigProvedor, Limite, registrar
+from tests.api.stub_http import ServidorStub
+
+EMPRESA = {"taxId": "12345678000190", "company": {"name": "ACME"},
+           "address": {"street": "Rua A", "number": "10", "district": "Centro", "city": "São Paulo", "state": "SP"}}
+GEOCODE = {"status": "OK", "results": [{"geometry": {"location": {"lat": -23.5, "lng": -46.6}},
+                        "address_components": [{"types": ["postal_code"], "long_name": "01000-000"}]}]}
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    """CNPJá e Google num servidor local; match e diagnóstico falsos."""
+    def geocode(q):
+        # 400 não tem retry: geo_utils levanta "Erro na requisição à API do Google Maps"
+        return (400, {}) if "quebrado" in q["address"] else (200, GEOCODE)
+
+    rotas = {"/companies/12345678000190": lambda q: (200, EMPRESA), "/geocode/json": geocode}
+    monkeypatch.setattr(detetive_lote, "buscar_uc_por_ponto_geografico",
+                        lambda dados, db: [{"uc_id": "UC1", "distancia_metros": 3.0}])
+    monkeypatch.setattr(detetive_lote, "diagnosticar_uc", lambda uc_id, db: {"uc_id": uc_id, "insights": []})
+    monkeypatch.setattr(cache_geocode, "USAR_BANCO", False)
+    cache_geocode.MEMORIA.limpar()
+    with ServidorStub(rotas, demora=0.01) as servidor:
+        yield servidor
+    provedores_http._clientes.clear()
+
+
+async def executar_db(fn):
+    return fn(None)
+
+
+def rodar(stub, prospects, limites):
+    for nome in ("cnpja", "google"):
+        registrar(ConfigProvedor(nome, stub.url, *limites[nome]))
+
+    async def coletar():
+        try:
+            return [item async for item in analisar_lote(prospects, executar_db, limite_db=Limite(*limites["db"]))]
+        finally:
+            await provedores_http.fechar_async()
+    return asyncio.run(coletar())
+
+
+def test_lote_deduplica_e_respeita_limites(stub):
+    prospects = ([{"cnpj": "12.345.678/0001-90"}, {"cnpj": "12345678000190"}] * 20
+                 + [{"endereco": f"Rua B, {i % 5}"} for i in range(30)]
+                 + [{"endereco": "RUA  B. 1"}])
+    saida = rodar(stub, prospects, {"cnpja": (2, 50), "google": (3, 0), "db": (2, 0)})
+
+    resultados, resumo = saida[:-1], saida[-1]["resumo"]
+    assert sorted(r["indice"] for r in resultados) == list(range(len(prospects)))
+    # 40 linhas com o mesmo CNPJ (com e sem máscara) -> 1 chamada; todas as UCs dos CNPJs
+    # caem no mesmo endereço da empresa -> 1 geocodificação; "Rua B, 0..4" -> 5 ("RUA  B. 1" é "Rua B, 1")
+    assert len(stub.chamadas("/companies/12345678000190")) == 1
+    assert len(stub.chamadas("/geocode/json")) == 1 + 5
+    assert stub.max_ativas_por["/geocode/json"] <= 3
+    assert resumo["total"] == len(prospects) and resumo["com_match"] == len(prospects)
+    assert resumo["cnpjs_reaproveitados"] == 39
+    assert all(r["score_confianca"] > 0 for r in resultados)
+
+def test_qps_espaca_as_chamadas(stub):
+    rodar(stub, [{"endereco": f"Rua {i}"} for i in range(6)], {"cnpja": (1, 0), "google": (6, 20), "db": (4, 0)})
+    inicios = sorted(t for t, _, _ in stub.chamadas("/geocode/json"))
+    assert inicios[-1] - inicios[0] >= 5 / 20 * 0.9
+
+def test_erro_fica_no_prospect(stub):
+    saida = rodar(stub, [{"endereco": "endereço quebrado"}, {"endereco": "Rua C, 1"}],
+                  {"cnpja": (1, 0), "google": (2, 0), "db": (1, 0)})
+    por_indice = {r["indice"]: r for r in saida[:-1]}
+    assert any("Erro durante análise" in log for log in por_indice[0]["logs"])
+    assert por_indice[1]["match_principal"]["uc_id"] == "UC1"
+    assert saida[-1]["resumo"]["com_erro"] == 1
+
+def test_ler_prospects_csv_e_json():
+    csv_ = "CNPJ;Nome;Endereco;Latitude;Longitude\n12345678000190;ACME;Rua A, 1;-23,5;-46.6\n;;Rua B;;\n".encode()
+    prospects = ler_prospects(csv_, "text/csv")
+    assert prospects == [
+        {"cnpj": "12345678000190", "nome": "ACME", "endereco": "Rua A, 1", "latitude": -23.5, "longitude": -46.6},
+        {"endereco": "Rua B"},
+    ]
+    assert ler_prospects(b'{"prospects": [{"cnpj": "1"}]}', "application/json") == [{"cnpj": "1"}]
+    with pytest.raises(ValueError, match="lista"):
+        ler_prospects(b'{"x": 1}', "application/json")
+    with pytest.raises(ValueError, match="vazio"):
+        ler_prospects(b"", "text/csv")
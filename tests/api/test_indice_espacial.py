@@ -0,0 +1,125 @@
+# tests/api/test_indice_espacial.py
+
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from packages.detectors import indice_espacial
+from packages.detectors.indice_espacial import IndiceEspacial, haversine
+
+
+@pytest.fixture(scope="module")
+def pontos():
+    rng = np.random.default_rng(5)
+    n = 30_000
+    lat = rng.normal(-23.5, 0.3, n)
+    lon = rng.normal(-46.6, 0.3, n)
+    # alguns pontos isolados pelo país: consultas longe da cidade sobem vários níveis
+    lat[:40] = rng.uniform(-33, 5, 40)
+    lon[:40] = rng.uniform(-73, -35, 40)
+    return np.array([f"UC{i}" for i in range(n)]), lat, lon
+
+
+def consultas(n=300):
+    rng = np.random.default_rng(9)
+    return (np.concatenate([rng.normal(-23.5, 0.4, n), rng.uniform(-33, 5, 30)]),
+            np.concatenate([rng.normal(-46.6, 0.4, n), rng.uniform(-73, -35, 30)]))
+
+
+def test_knn_e_raio_iguais_a_forca_bruta(pontos):
+    ids, lat, lon = pontos
+    idx = IndiceEspacial.construir(ids, lat, lon)
+    qlat, qlon = consultas()
+
+    dist, pos = idx.knn(qlat, qlon, k=5, raio_max_metros=20_000)
+    por_raio = idx.raio(qlat, qlon, 600)
+    for q in range(len(qlat)):
+        d = haversine(qlat[q], qlon[q], idx.lat, idx.lon)
+        esperado = np.sort(d)[:5]
+        esperado[esperado > 20_000] = np.inf
+        np.testing.assert_allclose(dist[q], esperado)
+        assert np.all((pos[q] >= 0) == np.isfinite(esperado))
+        assert set(por_raio[q][0].tolist()) == set(np.nonzero(d <= 600)[0].tolist())
+        assert np.all(np.diff(por_raio[q][1]) >= 0)
+
+def test_construir_descarta_invalidos_e_repetidos():
+    idx = IndiceEspacial.construir(["A", "B", "C", "A", "D"],
+                                   [-23.5, 0.0, np.nan, -22.0, 95.0],
+                                   [-46.6, 0.0, -46.0, -43.0, -46.0])
+    assert len(idx) == 1
+    assert idx.ids[0] == b"A" and idx.lat[0] == -22.0
+
+def test_atualizar_substitui_e_remove(pontos):
+    ids, lat, lon = pontos
+    idx = IndiceEspacial.construir(ids[:1000], lat[:1000], lon[:1000])
+    novo = idx.atualizar(["UC500", "UC_NOVA_LONGA"], [-10.0, -11.0], [-50.0, -51.0], removidos=["UC501"])
+    assert len(novo) == 1000
+    dist, pos = novo.knn([-10.0, -11.0], [-50.0, -51.0], k=1)
+    assert list(novo.ids[pos[:, 0]]) == [b"UC500", b"UC_NOVA_LONGA"] and np.all(dist[:, 0] == 0)
+    assert b"UC501" not in set(novo.ids)
+
+class CursorDict:
+    """Imita o RealDictCursor de get_db_cursor(): COPY das UCs da importação e linhas em dict."""
+
+    def __init__(self, csv_ucs: str, uc_ids_import: list):
+        self.csv_ucs = csv_ucs
+        self.uc_ids_import = uc_ids_import
+
+    def mogrify(self, sql, params):
+        return sql.replace("%s", repr(params[0])).encode()
+
+    def copy_expert(self, sql, buf):
+        buf.write(self.csv_ucs.encode())
+
+    def execute(self, sql, params=None):
+        self.ultimo = sql
+
+    def fetchall(self):
+        return [{"uc_id": uc} for uc in self.uc_ids_import]
+
+def test_atualizar_import_com_cursor_dict(pontos, tmp_path):
+    ids, lat, lon = pontos
+    IndiceEspacial.construir(ids[:100], lat[:100], lon[:100]).salvar(
+        indice_espacial.caminho_snapshot("ucs", tmp_path))
+    # importação trouxe UC5 (nova posição) e UC6 (agora sem coordenada válida)
+    cur = CursorDict("UC5,-10.0,-50.0\n", ["UC5", "UC6"])
+    novo = indice_espacial.atualizar_import(cur, "imp-1", tmp_path)
+    assert "AS uc_id" in cur.ultimo
+    assert len(novo) == 99 and b"UC6" not in set(novo.ids)
+    dist, pos = novo.knn([-10.0], [-50.0], k=1)
+    assert novo.ids[pos[0, 0]] == b"UC5" and dist[0, 0] == 0
+
+def test_snapshot_mmap_e_recarga(pontos, tmp_path, monkeypatch):
+    ids, lat, lon = pontos
+    idx = IndiceEspacial.construir(ids, lat, lon)
+    monkeypatch.setattr(indice_espacial, "_carregados", {})
+    monkeypatch.setattr(indice_espacial, "INDICE_ESPACIAL_RECARGA_S", 0)
+    assert indice_espacial.indice("ucs", tmp_path) is None
+
+    idx.salvar(indice_espacial.caminho_snapshot("ucs", tmp_path))
+    carregado = indice_espacial.indice("ucs", tmp_path)
+    assert isinstance(carregado.lat, np.memmap) and len(carregado) == len(idx)
+    qlat, qlon = consultas(50)
+    np.testing.assert_array_equal(carregado.knn(qlat, qlon, 3)[0], idx.knn(qlat, qlon, 3)[0])
+    assert indice_espacial.indice("ucs", tmp_path) is carregado
+
+    # snapshot regravado (mtime novo): próxima chamada relê
+    menor = idx.atualizar([], [], [], removidos=[ids[0]])
+    caminho = indice_espacial.caminho_snapshot("ucs", tmp_path)
+    menor.salvar(caminho)
+    os.utime(caminho, (1, 1))
+    assert len(indice_espacial.indice("ucs", tmp_path)) == len(idx) - 1
+
+
+@pytest.mark.skipif(bool(os.getenv("INDICE_ESPACIAL_DIR")), reason="INDICE_ESPACIAL_DIR definido")
+def test_diretorio_default_nao_depende_do_cwd():
+    # API (/code/apps/api) e orquestrador (/app) rodam de cwds diferentes
+    assert indice_espacial.INDICE_ESPACIAL_DIR == ROOT / "data" / "indice_espacial"
+    assert indice_espacial.caminho_snapshot("ucs").is_absolute()
@@ -0,0 +1,64 @@
+# tests/api/test_lead_service.py
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from apps.api.services.lead import lead_service
+
+
+class ResultadoFake:
+    def __init__(self, valor):
+        self.valor = valor
+
+    def scalar_one(self):
+        return self.valor
+
+
+class DbFake:
+    def __init__(self, existentes):
+        self.existentes = existentes
+        self.consultas = []
+
+    async def execute(self, query, params=None):
+        self.consultas.append(params["tabela"])
+        return ResultadoFake(params["tabela"] in self.existentes)
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    agora = [1000.0]
+    monkeypatch.setattr(lead_service.time, "monotonic", lambda: agora[0])
+    monkeypatch.setattr(lead_service, "_tabelas", {})
+    return agora
+
+
+def test_tabela_ausente_e_reconsultada_depois_do_ttl(relogio):
+    db = DbFake(set())
+    assert asyncio.run(lead_service._tem_busca_textual(db)) is False
+    relogio[0] += lead_service.RECHECAGEM_TABELA_S - 1
+    assert asyncio.run(lead_service._tem_busca_textual(db)) is False
+    assert len(db.consultas) == 1  # negativo ainda vale
+
+    # migration 019 rodou com a API no ar
+    db.existentes.add("intel_lead.mv_lead_busca_termo")
+    relogio[0] += 2
+    assert asyncio.run(lead_service._tem_busca_textual(db)) is True
+    assert len(db.consultas) == 2
+
+
+def test_tabela_existente_fica_para_o_processo(relogio):
+    db = DbFake({"intel_lead.lead_serie_mensal"})
+    for _ in range(3):
+        assert asyncio.run(lead_service._tem_serie_compacta(db)) is True
+        relogio[0] += lead_service.RECHECAGEM_TABELA_S * 10
+    assert db.consultas == ["intel_lead.lead_serie_mensal"]
+    # cada tabela tem a sua entrada
+    assert asyncio.run(lead_service._tem_busca_textual(db)) is False
+    assert db.consultas[-1] == "intel_lead.mv_lead_busca_termo"
@@ -0,0 +1,91 @@
+# tests/api/test_match_engine.py
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import pytest
+
+from packages.detectors import match_engine
+from packages.detectors.indice_espacial import IndiceEspacial
+
+
+class ResultadoFake:
+    def __init__(self, linhas):
+        self.linhas = linhas
+
+    def scalar(self):
+        return self.linhas
+
+    def mappings(self):
+        return self
+
+    def all(self):
+        return self.linhas
+
+
+class DbFake:
+    def __init__(self, tem_geog, linhas):
+        self.tem_geog = tem_geog
+        self.linhas = linhas
+        self.consultas = []
+
+    def execute(self, query, params=None):
+        self.consultas.append((str(query), params))
+        if "pg_attribute" in str(query):
+            return ResultadoFake(self.tem_geog)
+        return ResultadoFake(self.linhas)
+
+
+@pytest.fixture(autouse=True)
+def sem_snapshot(monkeypatch):
+    monkeypatch.setattr(match_engine, "indice", lambda fonte: None)
+
+
+def test_usa_knn_quando_a_coluna_existe(monkeypatch):
+    monkeypatch.setattr(match_engine, "_geog", None)
+    db = DbFake(True, [{"uc_id": "A", "distancia_metros": 4.2}, {"uc_id": "B", "distancia_metros": 55.0}])
+    matches = match_engine.buscar_uc_por_ponto_geografico({"latitude": -23.5, "longitude": -46.6}, db, limit=5)
+
+    sql, params = db.consultas[-1]
+    assert sql == match_engine.SQL_MATCH and "lb.geog <-> ST_SetSRID" in sql
+    assert params == {"lat": -23.5, "lng": -46.6, "raio": 100.0, "limit": 5, "candidatos": 20}
+    assert [m["nivel_match"] for m in matches] == ["exato", "proximo"]
+
+    # a existência da coluna é consultada uma vez por processo
+    match_engine.buscar_uc_por_ponto_geografico({"latitude": -23.5, "longitude": -46.6}, db)
+    assert sum("pg_attribute" in q for q, _ in db.consultas) == 1
+
+def test_sem_coluna_calcula_geography_e_sem_ponto_nao_consulta(monkeypatch):
+    monkeypatch.setattr(match_engine, "_geog", None)
+    db = DbFake(False, [])
+    assert match_engine.buscar_uc_por_ponto_geografico({"latitude": 0.0, "longitude": -46.6}, db) == []
+    assert db.consultas[-1][0] == match_engine.SQL_MATCH_SEM_INDICE
+
+    db = DbFake(True, [])
+    assert match_engine.buscar_uc_por_ponto_geografico({"latitude": -23.5}, db) == []
+    assert db.consultas == []
+
+
+def test_com_snapshot_vizinhos_saem_do_indice(monkeypatch):
+    # A a ~0 m, B a ~55 m, C a ~111 m (fora do raio), D em outro bairro
+    idx = IndiceEspacial.construir(["A", "B", "C", "D"], [-23.5, -23.5, -23.501, -23.6],
+                                   [-46.6, -46.6 + 0.00054, -46.6, -46.6])
+    monkeypatch.setattr(match_engine, "indice", lambda fonte: idx if fonte == "ucs" else None)
+    # a view devolve fora de ordem e sem a UC que sumiu depois do snapshot
+    db = DbFake(True, [{"uc_id": "B", "nome": "b"}, {"uc_id": "A", "nome": "a"}])
+    matches = match_engine.buscar_uc_por_ponto_geografico({"latitude": -23.5, "longitude": -46.6}, db, limit=5)
+
+    assert len(db.consultas) == 1  # nem pg_attribute nem o KNN no PostGIS
+    sql, params = db.consultas[0]
+    assert sql == match_engine.SQL_DETALHES and sorted(params["ids"]) == ["A", "B"]
+    assert [(m["uc_id"], m["nivel_match"]) for m in matches] == [("A", "exato"), ("B", "proximo")]
+    assert matches[1]["distancia_metros"] == pytest.approx(55, abs=1)
+
+    # nada no raio: nem vai ao banco
+    db = DbFake(True, [])
+    assert match_engine.buscar_uc_por_ponto_geografico({"latitude": -22.0, "longitude": -43.0}, db) == []
+    assert db.consultas == []
@@ -0,0 +1,98 @@
+# tests/api/test_metricas_db.py
+
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import QueuePool
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from packages.database.metricas import (
+    SEM_ROTA, MedeCheckout, MetricasDBMiddleware, RegistroMetricas, instrumentar,
+)
+
+
+class PoolTeste(MedeCheckout, QueuePool):
+    pass
+
+
+def engine_sqlite():
+    engine = create_engine("sqlite://", poolclass=PoolTeste, pool_size=1, max_overflow=0)
+    instrumentar(engine)
+    return engine
+
+
+def chamar(middleware, path="/x", rota=None):
+    enviados = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(mensagem):
+        enviados.append(mensagem)
+
+    scope = {"type": "http", "path": path}
+    if rota:
+        scope["route"] = SimpleNamespace(path=rota)
+    asyncio.run(middleware(scope, receive, send))
+    return enviados
+
+
+def app_com_queries(engine, n, status=200):
+    async def app(scope, receive, send):
+        with engine.connect() as conn:
+            for _ in range(n):
+                conn.execute(text("SELECT 1"))
+        await send({"type": "http.response.start", "status": status, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+    return app
+
+
+def test_middleware_soma_queries_e_tempo_por_rota():
+    engine = engine_sqlite()
+    registro = RegistroMetricas()
+    mw = MetricasDBMiddleware(app_com_queries(engine, 3), registro)
+
+    enviados = chamar(mw, "/v1/leads/UC1", rota="/v1/leads/{uc_id}")
+    chamar(mw, "/v1/leads/UC2", rota="/v1/leads/{uc_id}")
+    chamar(mw, "/nao-existe")
+
+    resumo = registro.resumo()
+    assert set(resumo) == {"/v1/leads/{uc_id}", SEM_ROTA}
+    rota = resumo["/v1/leads/{uc_id}"]
+    assert rota["requisicoes"] == 2 and rota["erros"] == 0
+    assert rota["queries_por_req"] == 3
+    assert 0 < rota["fracao_db"] <= 1
+    cabecalhos = dict(enviados[0]["headers"])
+    assert cabecalhos[b"server-timing"].startswith(b"db;dur=")
+
+    # query fora de requisição não vai para nenhuma rota
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    assert registro.resumo()["/v1/leads/{uc_id}"]["queries_por_req"] == 3
+
+def test_erro_da_rota_conta_como_500():
+    registro = RegistroMetricas()
+
+    async def app(scope, receive, send):
+        raise RuntimeError("falhou")
+
+    with pytest.raises(RuntimeError):
+        chamar(MetricasDBMiddleware(app, registro), rota="/v1/detetive")
+    assert registro.resumo()["/v1/detetive"]["erros"] == 1
+
+def test_pool_mede_checkout_e_estado():
+    engine = engine_sqlite()
+    for _ in range(3):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    estado = engine.pool.estado()
+    assert estado["checkouts"] == 3
+    assert estado["aguardando"] == 0 and estado["max_aguardando"] == 1
+    assert estado["em_uso"] == 0 and estado["tamanho"] == 1
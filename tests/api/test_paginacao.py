@@ -0,0 +1,65 @@
+# tests/api/test_paginacao.py
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from apps.api.services.lead import paginacao
+from apps.api.services.lead.paginacao import (
+    CacheContagem, consultas_pagina, cursor_da_linha, decodificar_cursor, trechos_keyset,
+)
+
+
+def test_cursor_ida_e_volta_e_amarrado_a_busca():
+    filtros = paginacao.assinatura({"estado": "SP"})
+    cursor = cursor_da_linha("dic_desc", filtros, {"media_dic": 12.75, "uc_id": "UC1", "id": "9f"})
+    assert decodificar_cursor(cursor, "dic_desc", filtros) == (12.75, "UC1", "9f")
+    with pytest.raises(ValueError, match="outra"):
+        decodificar_cursor(cursor, "dic_asc", filtros)
+    with pytest.raises(ValueError, match="outra"):
+        decodificar_cursor(cursor, "dic_desc", paginacao.assinatura({"estado": "MG"}))
+    with pytest.raises(ValueError, match="inválido"):
+        decodificar_cursor("nao-e-cursor", "dic_desc", filtros)
+
+def test_trechos_seguem_a_ordem_de_nulos_do_postgres():
+    # ASC: valores e depois nulos; DESC: nulos primeiro
+    asc = trechos_keyset("dic_asc", None)
+    assert [t[0] for t in asc] == ["media_dic IS NOT NULL", "media_dic IS NULL"]
+    desc = trechos_keyset("dic_desc", None)
+    assert [t[0] for t in desc] == ["media_dic IS NULL", "media_dic IS NOT NULL"]
+    assert all(t[1] == "media_dic DESC, uc_id DESC, id DESC" for t in desc)
+
+def test_trechos_a_partir_do_cursor():
+    # cursor no meio dos valores (ASC): resto dos valores e depois todos os nulos
+    condicoes = [t[0] for t in trechos_keyset("potencia_asc", (300, "UC9", "a1"))]
+    assert condicoes == ["(pac, uc_id, id) > (:c_valor, :c_uc_id, :c_id)", "pac IS NULL"]
+    # cursor nos nulos (DESC): resto dos nulos e depois os valores
+    trechos = trechos_keyset("fic_desc", (None, "UC9", "a1"))
+    assert [t[0] for t in trechos] == ["media_fic IS NULL AND (uc_id, id) < (:c_uc_id, :c_id)", "media_fic IS NOT NULL"]
+    assert trechos[0][2] == {"c_valor": None, "c_uc_id": "UC9", "c_id": "a1"}
+    # cursor no fim dos valores (DESC): não volta para os nulos
+    assert len(trechos_keyset("fic_desc", (1.5, "UC9", "a1"))) == 1
+
+    (sql, _), _ = consultas_pagina("mv", ["estado = :estado"], "padrao", None)
+    assert sql == ("SELECT * FROM mv WHERE estado = :estado AND distribuidora_nome IS NOT NULL "
+                   "ORDER BY distribuidora_nome ASC, uc_id ASC, id ASC LIMIT :limit")
+
+def test_cache_de_contagem_expira(monkeypatch):
+    agora = [1000.0]
+    monkeypatch.setattr(paginacao.time, "monotonic", lambda: agora[0])
+    cache = CacheContagem(ttl=60, max_entradas=2)
+    cache.put("a", 10)
+    agora[0] += 30
+    assert cache.get("a") == 10
+    agora[0] += 31
+    assert cache.get("a") is None
+
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.put("c", 3)
+    assert cache.get("a") is None and cache.get("c") == 3
@@ -0,0 +1,161 @@
+# tests/api/test_provedores_http.py
+
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from packages.detectors import provedores_http
+from packages.detectors.cnpj_utils import buscar_dados_empresa, buscar_dados_empresa_async
+from packages.detectors.geo_utils import inferir_coordenadas_endereco
+from packages.detectors.provedores_http import METRICAS, ConfigProvedor, ErroProvedor, Limite, registrar
+from tests.api.stub_http import ServidorStub
+
+EMPRESA = {"taxId": "12345678000190", "company": {"name": "ACME LTDA"}, "alias": "ACME",
+           "mainActivity": {"id": 4711302, "text": "Comércio varejista"},
+           "address": {"street": "Rua A", "number": "10", "district": "Centro", "city": "São Paulo", "state": "SP"}}
+GEOCODE = {"status": "OK", "results": [{"geometry": {"location": {"lat": -23.5, "lng": -46.6}},
+                        "address_components": [{"types": ["postal_code"], "long_name": "01000-000"},
+                                               {"types": ["administrative_area_level_1"], "long_name": "SP"}]}]}
+
+
+def rodar_async(fabrica):
+    async def com_fechamento():
+        try:
+            return await fabrica()
+        finally:
+            await provedores_http.fechar_async()
+    return asyncio.run(com_fechamento())
+
+
+@pytest.fixture(autouse=True)
+def sem_espera(monkeypatch):
+    monkeypatch.setattr(provedores_http, "BACKOFF_BASE_S", 0.01)
+    METRICAS.zerar()
+    yield
+    provedores_http._clientes.clear()
+
+
+def test_keep_alive_e_parsers_contra_o_stub():
+    rotas = {"/companies/12345678000190": lambda q: (200, EMPRESA),
+             "/companies": lambda q: (200, [EMPRESA] if q.get("search") == "ACME & Filhos" else []),
+             "/geocode/json": lambda q: (200, GEOCODE if q["address"] == "Rua A, 10"
+                                         else {"status": "ZERO_RESULTS", "results": []})}
+    with ServidorStub(rotas) as stub:
+        registrar(ConfigProvedor("cnpja", stub.url, concorrencia=2, headers={"Authorization": "Bearer t"}))
+        registrar(ConfigProvedor("google", stub.url, concorrencia=2))
+
+        for _ in range(10):
+            empresa = buscar_dados_empresa({"cnpj": "12.345.678/0001-90"})
+        assert empresa["razao_social"] == "ACME LTDA"
+        assert empresa["endereco"] == "Rua A, 10, Centro, São Paulo - SP"
+        # nome com "&" e espaço vai codificado na query (antes ia cru na URL)
+        assert buscar_dados_empresa({"nome": "ACME & Filhos"})["cnpj"] == "12345678000190"
+        assert inferir_coordenadas_endereco("Rua A, 10") == {
+            "latitude": -23.5, "longitude": -46.6, "cep": "01000-000", "bairro": None, "municipio": None, "uf": "SP"}
+        assert inferir_coordenadas_endereco("Rua Z") == {}
+        assert rodar_async(lambda: buscar_dados_empresa_async({"cnpj": "12345678000190"}))["cnpj"] == "12345678000190"
+
+    # 11 chamadas síncronas à CNPJá numa conexão só; o google abriu a dele
+    assert len(stub.conexoes) == 3
+    metricas = METRICAS.resumo()
+    assert metricas["cnpja"]["empresa"]["chamadas"] == 12
+    assert metricas["cnpja"]["empresa"]["status"] == {"200": 12}
+    assert sum(metricas["google"]["geocode"]["latencia"]["faixas_ms"].values()) == 2
+
+
+def test_retry_com_backoff_em_5xx_e_429():
+    falhas = {"n": 0}
+
+    def instavel(q):
+        falhas["n"] += 1
+        if falhas["n"] == 1:
+            return 503, {}
+        if falhas["n"] == 2:
+            return 429, {}, {"Retry-After": "0.2"}
+        return 200, {"ok": True}
+
+    with ServidorStub({"/x": instavel, "/sempre-500": lambda q: (500, {})}) as stub:
+        c = registrar(ConfigProvedor("teste", stub.url, tentativas=3))
+        inicio = time.monotonic()
+        r = c.get("/x", operacao="x")
+        assert r.status_code == 200 and r.json() == {"ok": True} and r.tentativas == 3
+        assert time.monotonic() - inicio >= 0.2  # respeitou o Retry-After
+        # esgotou as tentativas: devolve a última resposta, como o requests fazia
+        assert c.get("/sempre-500", operacao="y").status_code == 500
+        assert len(stub.chamadas("/sempre-500")) == 3
+
+    x = METRICAS.resumo()["teste"]["x"]
+    assert (x["chamadas"], x["tentativas"], x["retries"]) == (1, 3, 2)
+    assert x["status"] == {"200": 1, "429": 1, "503": 1}
+
+
+def test_erro_de_rede_vira_erro_provedor():
+    with ServidorStub({}) as stub:
+        url = stub.url
+    c = registrar(ConfigProvedor("teste", url, tentativas=2))
+    with pytest.raises(ErroProvedor, match="teste"):
+        c.get("/x", operacao="x")
+    with pytest.raises(ErroProvedor):
+        rodar_async(lambda: c.get_async("/x", operacao="x"))
+    est = METRICAS.resumo()["teste"]["x"]
+    assert (est["falhas"], est["erros_rede"]) == (2, 4)
+
+
+def test_async_respeita_concorrencia_e_qps():
+    with ServidorStub({"/x": lambda q: (200, {"i": q["i"]})}, demora=0.02) as stub:
+        c = registrar(ConfigProvedor("teste", stub.url, concorrencia=3, qps=100))
+
+        respostas = rodar_async(lambda: asyncio.gather(
+            *(c.get_async("/x", params={"i": i}, operacao="x") for i in range(30))))
+    assert [r.json()["i"] for r in respostas] == [str(i) for i in range(30)]
+    assert stub.max_ativas <= 3
+    assert len(stub.conexoes) <= 3  # keep-alive no aiohttp também
+    inicios = sorted(t for t, _, _ in stub.requisicoes)
+    assert inicios[-1] - inicios[0] >= 29 / 100 * 0.9
+
+
+def test_limite_compartilhado_entre_threads_e_event_loop():
+    limite = Limite(2)
+    ativas, maximo, lock = [0], [0], threading.Lock()
+
+    def entrar():
+        with lock:
+            ativas[0] += 1
+            maximo[0] = max(maximo[0], ativas[0])
+
+    def sair():
+        with lock:
+            ativas[0] -= 1
+
+    def thread():
+        for _ in range(20):
+            with limite:
+                entrar()
+                time.sleep(0.001)
+                sair()
+
+    async def corrotina():
+        for _ in range(20):
+            async with limite:
+                entrar()
+                await asyncio.sleep(0.001)
+                sair()
+
+    async def principal():
+        await asyncio.gather(*(corrotina() for _ in range(3)))
+
+    threads = [threading.Thread(target=thread) for _ in range(3)]
+    for t in threads:
+        t.start()
+    asyncio.run(principal())
+    for t in threads:
+        t.join()
+    assert maximo[0] == 2 and limite.ativas == 0
@@ -0,0 +1,111 @@
+# tests/jobs/bench/bench_lead_bruto_ids.py
+"""
+Mapeamento uc_id -> lead_bruto.id por chunk (packages/jobs/utils/lead_bruto.py).
+
+Compara, num schema descartável:
+  - antigo: staging + INSERT ON CONFLICT + SELECT uc_id, id ... WHERE uc_id = ANY(lista)
+  - RETURNING: staging + um INSERT ... RETURNING que já traz novas e existentes
+em dois cenários: carga nova e reimportação (todas as UCs já existem). Conta idas ao
+banco (execute + COPY) e extrapola para 1M UCs.
+
+Uso:
+  python tests/jobs/bench/bench_lead_bruto_ids.py "host=... dbname=... user=..." [n_ucs] [chunk]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+import psycopg2
+
+ROOT = Path(__file__).resolve().parents[3]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from packages.jobs.utils.lead_bruto import inserir_lead_bruto
+from packages.jobs.utils.pg_copy import copy_dataframe
+
+SCHEMA = "bench_lead_bruto"
+COLUNAS = ["uc_id", "import_id", "cod_id", "ano"]
+
+
+class CursorContador:
+    """Repassa ao cursor real contando idas ao banco."""
+
+    def __init__(self, cur):
+        self._cur = cur
+        self.idas = 0
+
+    def execute(self, *a, **kw):
+        self.idas += 1
+        return self._cur.execute(*a, **kw)
+
+    def copy_expert(self, *a, **kw):
+        self.idas += 1
+        return self._cur.copy_expert(*a, **kw)
+
+    def __getattr__(self, nome):
+        return getattr(self._cur, nome)
+
+
+def recriar_schema(conn) -> None:
+    with conn.cursor() as cur:
+        cur.execute(f"""
+            DROP SCHEMA IF EXISTS {SCHEMA} CASCADE;
+            CREATE SCHEMA {SCHEMA};
+            CREATE TABLE {SCHEMA}.lead_bruto (
+                id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+                uc_id text NOT NULL UNIQUE, import_id text, cod_id text, ano int
+            );
+        """)
+    conn.commit()
+
+
+def antigo(cur, df) -> dict:
+    cur.execute(f"CREATE TEMP TABLE _stg_lb (LIKE {SCHEMA}.lead_bruto INCLUDING ALL) ON COMMIT DROP")
+    copy_dataframe(cur, df, "_stg_lb", COLUNAS)
+    cur.execute(f"""
+        INSERT INTO {SCHEMA}.lead_bruto ({','.join(COLUNAS)})
+        SELECT {','.join(COLUNAS)} FROM _stg_lb ON CONFLICT (uc_id) DO NOTHING
+    """)
+    cur.execute(f"SELECT uc_id, id FROM {SCHEMA}.lead_bruto WHERE uc_id = ANY(%s)", (list(df["uc_id"]),))
+    return dict(cur.fetchall())
+
+
+def returning(cur, df) -> dict:
+    return inserir_lead_bruto(cur, df, COLUNAS, SCHEMA)[1]
+
+
+def rodar(conn, nome, fn, n, chunk) -> None:
+    cur = CursorContador(conn.cursor())
+    t0 = time.perf_counter()
+    mapeadas = 0
+    for ini in range(0, n, chunk):
+        df = pd.DataFrame({
+            "uc_id": [f"UC:{i:012d}" for i in range(ini, min(ini + chunk, n))],
+            "import_id": "bench", "cod_id": "x", "ano": 2024,
+        })
+        mapeadas += len(fn(cur, df))
+        conn.commit()
+    dt = time.perf_counter() - t0
+    fator = 1_000_000 / n
+    print(f"{nome:<40} {dt:6.2f}s | {mapeadas:>8} mapeadas | {cur.idas:>4} idas "
+          f"| ~{cur.idas * fator:,.0f} idas e ~{dt * fator:,.1f}s por 1M UCs")
+
+
+if __name__ == "__main__":
+    dsn = sys.argv[1]
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 200_000
+    chunk = int(sys.argv[3]) if len(sys.argv) > 3 else 20_000
+    conn = psycopg2.connect(dsn)
+    try:
+        for nome, fn in (("antigo (INSERT + SELECT ANY)", antigo), ("RETURNING", returning)):
+            recriar_schema(conn)
+            rodar(conn, f"{nome} / carga", fn, n, chunk)
+            rodar(conn, f"{nome} / reimport", fn, n, chunk)
+    finally:
+        with conn.cursor() as cur:
+            cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        conn.commit()
+        conn.close()
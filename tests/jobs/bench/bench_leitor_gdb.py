@@ -0,0 +1,86 @@
+# tests/jobs/bench/bench_leitor_gdb.py
+"""
+Microbenchmark de leitura de FileGDB (packages/jobs/importers/leitor_gdb.py).
+
+Gera um FileGDB sintético no formato da UCBT (atributos + 48 mensais + 30 colunas
+que o importer não usa) e mede linhas/s até DataFrames de 20k linhas:
+  - fiona: um dict por feature, todas as colunas (caminho antigo dos importers)
+  - arrow: lotes pyogrio/Arrow, todas as colunas
+  - arrow: lotes pyogrio/Arrow, só COLUNAS_LEITURA do UCBT
+
+Uso:
+  python tests/jobs/bench/bench_leitor_gdb.py [n_linhas] [caminho.gdb]
+"""
+
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[3]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import fiona
+
+from packages.jobs.importers.importer_ucbt_job import COLUNAS_GDB, COLUNAS_LEITURA
+from packages.jobs.importers.leitor_gdb import ler_chunks_gdb
+
+LAYER = "UCBT_tab"
+CHUNK = 20_000
+TEXTO = {"COD_ID", "CNAE", "DAT_CON", "GRU_TEN", "GRU_TAR", "TIP_SIST", "SIT_ATIV",
+         "CLAS_SUB", "CONJ", "BRR", "CEP", "PN_CON", "DESCR"}
+
+
+def gerar_gdb(caminho: Path, n: int) -> None:
+    props = {c: ("str" if c in TEXTO else "float") for c in COLUNAS_LEITURA}
+    props.update({f"EXTRA_{i:02d}": "str" if i % 2 else "float" for i in range(30)})
+    schema = {"geometry": "None", "properties": props}
+    rng = np.random.default_rng(3)
+    mensais = rng.uniform(0, 1000, size=(n, 48)).round(3)
+    bairros = [f"Bairro {i}" for i in range(500)]
+
+    def registros():
+        for i in range(n):
+            r = {c: (f"{c}-{i % 97}" if props[c] == "str" else float(i % 113)) for c in props}
+            r.update(COD_ID=f"UC{i:09d}", DIST=404.0, BRR=bairros[i % 500], DAT_CON="2019-05-17")
+            r.update(zip(COLUNAS_LEITURA[len(COLUNAS_GDB):], mensais[i].tolist()))
+            yield {"geometry": None, "properties": r}
+
+    with fiona.open(str(caminho), "w", driver="OpenFileGDB", layer=LAYER, schema=schema) as dst:
+        dst.writerecords(registros())
+
+
+def medir(nome: str, **kw) -> None:
+    t0 = time.perf_counter()
+    linhas = colunas = 0
+    for df in ler_chunks_gdb(GDB, LAYER, chunk_size=CHUNK, max_rss_mb=0, **kw):
+        linhas += len(df)
+        colunas = df.shape[1]
+    dt = time.perf_counter() - t0
+    print(f"{nome:<24} {dt:7.2f}s | {linhas / dt:10,.0f} linhas/s | {colunas} colunas")
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    tmp = None
+    if len(sys.argv) > 2:
+        GDB = Path(sys.argv[2])
+    else:
+        tmp = Path(tempfile.mkdtemp())
+        GDB = tmp / "bench.gdb"
+    if not GDB.exists():
+        t0 = time.perf_counter()
+        gerar_gdb(GDB, n)
+        print(f"FileGDB sintético com {n} linhas gerado em {time.perf_counter() - t0:.1f}s")
+
+    try:
+        medir("fiona (dicts, tudo)", leitor="fiona")
+        medir("arrow (tudo)", leitor="arrow")
+        medir("arrow (COLUNAS_LEITURA)", leitor="arrow", colunas=COLUNAS_LEITURA)
+    finally:
+        if tmp:
+            shutil.rmtree(tmp, ignore_errors=True)
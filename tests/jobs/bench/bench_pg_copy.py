@@ -0,0 +1,120 @@
+# tests/jobs/bench/bench_pg_copy.py
+"""
+Microbenchmark COPY CSV x COPY binary (packages/jobs/utils/pg_copy.py).
+
+Mede, para um frame no formato de lead_demanda_mensal:
+  - encode no cliente (s, MB/s do payload)
+  - COPY ponta a ponta num Postgres local (s, MB/s) e CPU do backend (utime+stime via /proc)
+
+Sem banco acessível, roda só a parte de encode.
+
+Uso:
+  BENCH_DSN="host=localhost dbname=postgres user=postgres" python tests/jobs/bench/bench_pg_copy.py [n_linhas]
+"""
+
+import io
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[3]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from packages.jobs.importers.importer_ucbt_job import gerar_uuids
+from packages.jobs.utils.pg_copy import copy_binary, copy_csv, encode_binary
+
+COLUNAS = ["id", "lead_bruto_id", "mes", "demanda_ponta", "demanda_fora_ponta",
+           "demanda_total", "demanda_contratada", "origem", "import_id"]
+TIPOS = {"id": "uuid", "lead_bruto_id": "uuid", "mes": "int4", "demanda_ponta": "float8",
+         "demanda_fora_ponta": "float8", "demanda_total": "float8", "demanda_contratada": "float8",
+         "origem": "text", "import_id": "text"}
+DDL = """
+    CREATE TEMP TABLE _bench_copy (
+        id uuid, lead_bruto_id uuid, mes int, demanda_ponta float8, demanda_fora_ponta float8,
+        demanda_total float8, demanda_contratada float8, origem text, import_id text
+    )
+"""
+
+
+def gerar_frame(n: int) -> pd.DataFrame:
+    rng = np.random.default_rng(7)
+    total = rng.uniform(0, 500, n)
+    total[rng.random(n) < 0.05] = np.nan
+    return pd.DataFrame({
+        "id": gerar_uuids(n),
+        "lead_bruto_id": np.repeat(gerar_uuids(n // 12 + 1), 12)[:n],
+        "mes": np.tile(np.arange(1, 13), n // 12 + 1)[:n],
+        "demanda_ponta": None,
+        "demanda_fora_ponta": None,
+        "demanda_total": total,
+        "demanda_contratada": np.repeat(rng.uniform(0, 80, n // 12 + 1), 12)[:n],
+        "origem": "UCBT",
+        "import_id": "bench",
+    })
+
+
+def cpu_backend(pid: int) -> float | None:
+    try:
+        campos = Path(f"/proc/{pid}/stat").read_text().rsplit(")", 1)[1].split()
+        return (int(campos[11]) + int(campos[12])) / os.sysconf("SC_CLK_TCK")
+    except Exception:
+        return None
+
+
+def bench_encode(df: pd.DataFrame) -> None:
+    t0 = time.perf_counter()
+    buf = io.StringIO()
+    df.to_csv(buf, index=False, header=False, columns=COLUNAS, na_rep="\\N")
+    csv_s, csv_mb = time.perf_counter() - t0, len(buf.getvalue().encode()) / 1e6
+
+    t0 = time.perf_counter()
+    bin_mb = encode_binary(df, COLUNAS, TIPOS).nbytes / 1e6
+    bin_s = time.perf_counter() - t0
+
+    print(f"encode csv    {csv_s:7.3f}s | {csv_mb:8.1f} MB | {csv_mb / csv_s:8.1f} MB/s")
+    print(f"encode binary {bin_s:7.3f}s | {bin_mb:8.1f} MB | {bin_mb / bin_s:8.1f} MB/s")
+
+
+def bench_copy(df: pd.DataFrame, dsn: str, repeticoes: int = 3) -> None:
+    import psycopg2
+
+    with psycopg2.connect(dsn) as conn, conn.cursor() as cur:
+        cur.execute(DDL)
+        cur.execute("SELECT pg_backend_pid()")
+        pid = cur.fetchone()[0]
+        for nome, fn in (("csv", lambda: copy_csv(cur, df, "_bench_copy", COLUNAS)),
+                         ("binary", lambda: copy_binary(cur, df, "_bench_copy", COLUNAS, TIPOS))):
+            tempos, cpus = [], []
+            for _ in range(repeticoes):
+                cur.execute("TRUNCATE _bench_copy")
+                cpu0 = cpu_backend(pid)
+                t0 = time.perf_counter()
+                fn()
+                tempos.append(time.perf_counter() - t0)
+                cpu1 = cpu_backend(pid)
+                if cpu0 is not None and cpu1 is not None:
+                    cpus.append(cpu1 - cpu0)
+            cur.execute("SELECT pg_total_relation_size('_bench_copy')")
+            mb = cur.fetchone()[0] / 1e6
+            t = min(tempos)
+            cpu = f"{min(cpus):6.2f}s" if cpus else "   n/d"
+            print(f"COPY {nome:<7} {t:7.3f}s | {len(df) / t:12,.0f} linhas/s | {mb / t:7.1f} MB/s (heap) | CPU servidor {cpu}")
+        conn.rollback()
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 240_000
+    df = gerar_frame(n)
+    print(f"{n} linhas (lead_demanda_mensal)")
+    bench_encode(df)
+
+    dsn = os.getenv("BENCH_DSN")
+    if dsn:
+        bench_copy(df, dsn)
+    else:
+        print("BENCH_DSN não definido: pulando COPY no banco")
@@ -0,0 +1,98 @@
+# tests/jobs/bench/bench_sanitize.py
+"""
+Microbenchmark dos sanitizadores (packages/jobs/utils/sanitize.py) em colunas de 1M linhas
+com a cardinalidade típica da BDGD (GRU_TEN, GRU_TAR, TIP_SIST, SIT_ATIV, CLAS_SUB, BRR...).
+
+Compara:
+  - apply: `.apply(sanitize_x)` elemento a elemento (caminho antigo dos importers);
+    medido numa amostra e extrapolado para n, porque leva minutos por coluna
+  - vetorizado: `sanitize_x(coluna)` (normaliza cada valor distinto uma vez)
+
+Depois, com as colunas categóricas em chunks de 20k (como nos importers), compara o
+cache de normalização desligado (SANITIZE_CACHE_MAX=0) com o cache aquecido.
+
+Uso:
+  python tests/jobs/bench/bench_sanitize.py [n_linhas] [amostra_apply]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[3]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from packages.jobs.utils import sanitize
+from packages.jobs.utils.sanitize import (
+    sanitize_classe, sanitize_cnae, sanitize_grupo_tensao, sanitize_int, sanitize_modalidade,
+    sanitize_numeric, sanitize_pac, sanitize_situacao, sanitize_str, sanitize_tipo_sistema,
+    estatisticas_cache_normalizacao, limpar_cache_normalizacao, preparar_cache_normalizacao,
+)
+
+CHUNK = 20_000
+CATEGORICAS = ("GRU_TEN", "GRU_TAR", "TIP_SIST", "SIT_ATIV", "CLAS_SUB")
+
+
+def gerar_colunas(n: int) -> dict:
+    rng = np.random.default_rng(7)
+
+    def escolher(valores, p_nulo=0.02):
+        col = pd.Series(rng.choice(np.array(valores, dtype=object), size=n), dtype=object)
+        col[rng.random(n) < p_nulo] = None
+        return col
+
+    return {
+        "GRU_TEN": (sanitize_grupo_tensao, escolher(["BT", "MT", "AT", "bt1", " MT3 "])),
+        "GRU_TAR": (sanitize_modalidade, escolher(["B1", "B2Ru", "B3", "A4 Verde", "AZUL", "Convencional"])),
+        "TIP_SIST": (sanitize_tipo_sistema, escolher(["MONOFASICO", "BIFASICO", "TRIFÁSICO", "RD_INTERLIG"])),
+        "SIT_ATIV": (sanitize_situacao, escolher(["AT", "IN", "CO", "SU", "ativa"])),
+        "CLAS_SUB": (sanitize_classe, escolher(["RE1", "RE_BPC", "CPR", "CO3", "IN", "RU1", "PP2", "IP", "CSPS"])),
+        "BRR": (sanitize_str, escolher([f" Bairro {i}\t" for i in range(3000)])),
+        "MUN": (sanitize_int, escolher([f"{2900000 + i}" for i in range(400)])),
+        "CNAE": (sanitize_cnae, escolher([f"{4700 + i}-{i % 9}/01" for i in range(600)], p_nulo=0.3)),
+        "DEM_CONT": (sanitize_numeric, escolher([f"{i},{i % 10}" for i in range(5000)] + ["***", "-"])),
+        "PAC": (sanitize_pac, escolher([str(i) for i in range(2000)])),
+    }
+
+
+def medir(nome: str, fn, coluna: pd.Series, amostra: int) -> None:
+    parte = coluna.iloc[:amostra]
+    t0 = time.perf_counter()
+    parte.apply(fn)
+    apply_s = (time.perf_counter() - t0) * len(coluna) / len(parte)
+
+    t0 = time.perf_counter()
+    fn(coluna)
+    vet_s = time.perf_counter() - t0
+    print(f"{nome:<9} {coluna.nunique():>6} distintos | apply ~{apply_s:8.1f}s | "
+          f"vetorizado {vet_s:6.3f}s | {apply_s / vet_s:8.0f}x")
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    amostra = int(sys.argv[2]) if len(sys.argv) > 2 else 2_000
+    colunas = gerar_colunas(n)
+    print(f"{n:,} linhas por coluna (apply extrapolado de {amostra:,} linhas)")
+    for nome, (fn, coluna) in colunas.items():
+        medir(nome, fn, coluna, amostra)
+
+    print(f"\ncategóricas em chunks de {CHUNK:,}:")
+    for rotulo, maximo in (("sem cache", 0), ("cache quente", sanitize.SANITIZE_CACHE_MAX)):
+        sanitize.SANITIZE_CACHE_MAX = maximo
+        limpar_cache_normalizacao()
+        preparar_cache_normalizacao()
+        t0 = time.perf_counter()
+        for ini in range(0, n, CHUNK):
+            for nome in CATEGORICAS:
+                fn, coluna = colunas[nome]
+                fn(coluna.iloc[ini:ini + CHUNK])
+        dt = time.perf_counter() - t0
+        st = estatisticas_cache_normalizacao()
+        hits = sum(v["hits"] for v in st.values())
+        consultas = hits + sum(v["misses"] for v in st.values())
+        print(f"{rotulo:<13} {dt:6.2f}s | {1000 * dt / (n / CHUNK):6.1f} ms/chunk (5 colunas) | "
+              f"acerto {100 * hits / max(consultas, 1):5.1f}%")
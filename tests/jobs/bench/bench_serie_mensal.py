@@ -0,0 +1,137 @@
+# tests/jobs/bench/bench_serie_mensal.py
+"""
+Mensais longas (12 linhas por UC em cada tabela) x série compacta (lead_serie_mensal,
+uma linha por UC por medida com real[12]; packages/jobs/utils/serie_mensal.py).
+
+Mede num Postgres local, com as tabelas e índices de produção (temporárias):
+  - tempo de gravação (COPY binary; na compacta inclui compactar())
+  - tamanho em disco (heap + índices, pg_total_relation_size)
+  - latência de leitura por lead (p50/p99): todas as séries e só DIC/FIC (get_qualidade)
+
+Uso:
+  BENCH_DSN="host=localhost dbname=postgres user=postgres" python tests/jobs/bench/bench_serie_mensal.py [n_ucs] [leituras]
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[3]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from packages.jobs.importers.importer_ucbt_job import gerar_uuids
+from packages.jobs.utils.pg_copy import copy_dataframe
+from packages.jobs.utils.serie_mensal import COLUNAS_SERIES, MEDIDAS, compactar
+
+DDL_LONGAS = {
+    "lead_energia_mensal": "energia_ponta float8, energia_fora_ponta float8, energia_total float8",
+    "lead_demanda_mensal": "demanda_ponta float8, demanda_fora_ponta float8, demanda_total float8, demanda_contratada float8",
+    "lead_qualidade_mensal": "dic float8, fic float8, sem_rede float8",
+}
+DDL_SERIE = """
+    CREATE TEMP TABLE lead_serie_mensal (
+        lead_bruto_id uuid NOT NULL, medida text NOT NULL,
+        valores real[] NOT NULL CHECK (array_length(valores, 1) = 12), origem text, import_id text NOT NULL
+    );
+    CREATE INDEX ON lead_serie_mensal (lead_bruto_id, medida);
+"""
+
+
+def gerar_longas(n_ucs: int) -> dict:
+    """Frames longos no formato do importer UCBT (ponta/fora ponta vazios, como na BDGD de BT)."""
+    rng = np.random.default_rng(7)
+    ids = np.repeat(gerar_uuids(n_ucs), 12)
+    mes = np.tile(np.arange(1, 13), n_ucs)
+    base = {"lead_bruto_id": ids, "mes": mes}
+    fim = {"origem": "UCBT", "import_id": "bench"}
+    n = n_ucs * 12
+    return {
+        "lead_energia_mensal": pd.DataFrame({
+            "id": gerar_uuids(n), **base, "energia_ponta": np.nan, "energia_fora_ponta": np.nan,
+            "energia_total": rng.uniform(0, 2000, n), **fim}),
+        "lead_demanda_mensal": pd.DataFrame({
+            "id": gerar_uuids(n), **base, "demanda_ponta": np.nan, "demanda_fora_ponta": np.nan,
+            "demanda_total": rng.uniform(0, 500, n),
+            "demanda_contratada": np.repeat(rng.uniform(0, 80, n_ucs), 12), **fim}),
+        "lead_qualidade_mensal": pd.DataFrame({
+            "id": gerar_uuids(n), **base, "dic": rng.integers(0, 30, n).astype(float),
+            "fic": rng.integers(0, 10, n).astype(float), "sem_rede": np.repeat(rng.integers(0, 2, n_ucs), 12), **fim}),
+    }
+
+
+def percentis(tempos: list) -> str:
+    ms = np.array(tempos) * 1000
+    return f"p50 {np.percentile(ms, 50):6.3f} ms | p99 {np.percentile(ms, 99):6.3f} ms"
+
+
+def ler(cur, consultas: list, ids: np.ndarray) -> list:
+    tempos = []
+    for lead in ids:
+        t0 = time.perf_counter()
+        for consulta, extra in consultas:
+            cur.execute(consulta, (str(lead),) + extra)
+            cur.fetchall()
+        tempos.append(time.perf_counter() - t0)
+    return tempos
+
+
+def bench(dsn: str, n_ucs: int, leituras: int) -> None:
+    import psycopg2
+
+    frames = gerar_longas(n_ucs)
+    with psycopg2.connect(dsn) as conn, conn.cursor() as cur:
+        for tabela, colunas in DDL_LONGAS.items():
+            cur.execute(f"CREATE TEMP TABLE {tabela} (id uuid, lead_bruto_id uuid, mes int, {colunas}, origem text, import_id text)")
+            cur.execute(f"CREATE INDEX ON {tabela} (lead_bruto_id)")
+        cur.execute(DDL_SERIE)
+
+        t0 = time.perf_counter()
+        for tabela, df in frames.items():
+            copy_dataframe(cur, df, tabela, df.columns.tolist())
+        t_longas = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        series = pd.concat([compactar(df, MEDIDAS[t]) for t, df in frames.items()], ignore_index=True)
+        t_compactar = time.perf_counter() - t0
+        copy_dataframe(cur, series, "lead_serie_mensal", COLUNAS_SERIES)
+        t_serie = time.perf_counter() - t0
+
+        cur.execute("ANALYZE")
+        cur.execute("SELECT sum(pg_total_relation_size(t::regclass))::bigint FROM unnest(%s::text[]) t", (list(DDL_LONGAS),))
+        mb_longas = cur.fetchone()[0] / 1e6
+        cur.execute("SELECT pg_total_relation_size('lead_serie_mensal')")
+        mb_serie = cur.fetchone()[0] / 1e6
+
+        n_longas = sum(len(df) for df in frames.values())
+        print(f"{n_ucs} UCs")
+        print(f"longas    {n_longas:>10,} linhas | COPY {t_longas:7.3f}s | {mb_longas:8.1f} MB")
+        print(f"compacta  {len(series):>10,} linhas | COPY {t_serie:7.3f}s (compactar {t_compactar:.3f}s) | "
+              f"{mb_serie:8.1f} MB ({mb_serie / mb_longas:.0%})")
+
+        ids = np.random.default_rng(1).choice(frames["lead_energia_mensal"]["lead_bruto_id"].unique(), leituras)
+        todas_longas = [(f"SELECT * FROM {t} WHERE lead_bruto_id = %s", ()) for t in DDL_LONGAS]
+        todas_serie = [("SELECT medida, valores FROM lead_serie_mensal WHERE lead_bruto_id = %s", ())]
+        qualidade_longas = [("SELECT mes, dic, fic FROM lead_qualidade_mensal WHERE lead_bruto_id = %s", ())]
+        qualidade_serie = [("SELECT medida, valores FROM lead_serie_mensal WHERE lead_bruto_id = %s AND medida = ANY(%s)",
+                            (["dic", "fic"],))]
+        ler(cur, todas_longas + todas_serie, ids[:100])   # aquece cache
+        print(f"leitura todas as séries  longas   {percentis(ler(cur, todas_longas, ids))}")
+        print(f"leitura todas as séries  compacta {percentis(ler(cur, todas_serie, ids))}")
+        print(f"leitura DIC/FIC          longas   {percentis(ler(cur, qualidade_longas, ids))}")
+        print(f"leitura DIC/FIC          compacta {percentis(ler(cur, qualidade_serie, ids))}")
+        conn.rollback()
+
+
+if __name__ == "__main__":
+    n_ucs = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    leituras = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    dsn = os.getenv("BENCH_DSN")
+    if not dsn:
+        print("BENCH_DSN não definido: o benchmark precisa de um Postgres")
+        sys.exit(1)
+    bench(dsn, n_ucs, leituras)
@@ -0,0 +1,88 @@
+# tests/jobs/bench/bench_staging.py
+"""
+Staging por chunk vs. staging da sessão (packages/jobs/utils/staging.py).
+
+Compara, num schema descartável com lead_bruto indexado:
+  - por chunk: CREATE TEMP TABLE (LIKE ... INCLUDING ALL) ON COMMIT DROP + COPY + INSERT
+  - sessão:    CREATE TEMP TABLE IF NOT EXISTS ... ON COMMIT DELETE ROWS + COPY + INSERT
+para vários tamanhos de chunk, e extrapola para 1M linhas.
+
+Uso:
+  python tests/jobs/bench/bench_staging.py "host=... dbname=... user=..." [n_linhas]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+import psycopg2
+
+ROOT = Path(__file__).resolve().parents[3]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from packages.jobs.utils.pg_copy import copy_dataframe
+from packages.jobs.utils.staging import preparar_staging
+
+SCHEMA = "bench_staging"
+TABELA = f"{SCHEMA}.lead_bruto"
+COLUNAS = ["uc_id", "import_id", "cod_id", "ano"]
+
+
+def recriar_schema(conn) -> None:
+    with conn.cursor() as cur:
+        cur.execute(f"""
+            DROP SCHEMA IF EXISTS {SCHEMA} CASCADE;
+            CREATE SCHEMA {SCHEMA};
+            CREATE TABLE {TABELA} (
+                id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+                uc_id text NOT NULL UNIQUE, import_id text, cod_id text, ano int
+            );
+            CREATE INDEX ON {TABELA} (import_id);
+            CREATE INDEX ON {TABELA} (cod_id, ano);
+        """)
+    conn.commit()
+
+
+def por_chunk(cur) -> str:
+    cur.execute(f"CREATE TEMP TABLE _stg_lb (LIKE {TABELA} INCLUDING ALL) ON COMMIT DROP")
+    return "_stg_lb"
+
+
+def sessao(cur) -> str:
+    return preparar_staging(cur, TABELA, COLUNAS)
+
+
+def rodar(dsn, nome, fn, n, chunk) -> None:
+    conn = psycopg2.connect(dsn)
+    recriar_schema(conn)
+    cur = conn.cursor()
+    t0 = time.perf_counter()
+    for ini in range(0, n, chunk):
+        df = pd.DataFrame({
+            "uc_id": [f"UC:{i:012d}" for i in range(ini, min(ini + chunk, n))],
+            "import_id": "bench", "cod_id": "x", "ano": 2024,
+        })
+        stg = fn(cur)
+        copy_dataframe(cur, df, stg, COLUNAS)
+        cur.execute(f"INSERT INTO {TABELA} ({','.join(COLUNAS)}) SELECT {','.join(COLUNAS)} FROM {stg}")
+        conn.commit()
+    dt = time.perf_counter() - t0
+    print(f"{nome:<10} chunk={chunk:>7,} {dt:6.2f}s | ~{dt * 1_000_000 / n:,.1f}s por 1M linhas")
+    conn.close()
+
+
+if __name__ == "__main__":
+    dsn = sys.argv[1]
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 400_000
+    try:
+        for chunk in (5_000, 20_000, 50_000, 200_000):
+            for nome, fn in (("por chunk", por_chunk), ("sessão", sessao)):
+                rodar(dsn, nome, fn, n, chunk)
+    finally:
+        conn = psycopg2.connect(dsn)
+        with conn.cursor() as cur:
+            cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        conn.commit()
+        conn.close()
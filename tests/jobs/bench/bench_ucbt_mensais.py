@@ -0,0 +1,80 @@
+# tests/jobs/bench/bench_ucbt_mensais.py
+"""
+Benchmark da montagem dos mensais UCBT (sem banco):
+  - antes: laço df.iterrows() + sanitize_numeric escalar + uuid.uuid4() por linha
+  - depois: montar_mensais() colunar
+
+Uso: python tests/jobs/bench/bench_ucbt_mensais.py [n_ucs]
+"""
+
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[3]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from packages.jobs.importers.importer_ucbt_job import montar_mensais
+from packages.jobs.utils.sanitize import sanitize_numeric
+
+
+def gerar_chunk(n: int, seed: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    dados = {
+        "uc_id": [f"UC:{i:08x}" for i in range(n)],
+        "DEM_CONT": rng.uniform(0, 50, n).round(2).astype(str),
+        "SEMRED": rng.integers(0, 3, n).astype(str),
+    }
+    # Fiona entrega campos double do FileGDB como float (None -> NaN no DataFrame)
+    for mes in range(1, 13):
+        for prefixo in ("ENE", "DEM", "DIC", "FIC"):
+            col = rng.uniform(0, 900, n).round(3)
+            col[rng.random(n) < 0.05] = np.nan
+            dados[f"{prefixo}_{mes:02d}"] = col
+    return pd.DataFrame(dados)
+
+
+def mensais_por_linha(df: pd.DataFrame, id_map: dict, camada: str, import_id: str):
+    energia, demanda, qualidade = [], [], []
+    dem_contratada = sanitize_numeric(df["DEM_CONT"])
+    sem_rede = sanitize_numeric(df["SEMRED"])
+    for idx, row in df.iterrows():
+        lead_bruto_id = id_map.get(row["uc_id"])
+        if not lead_bruto_id:
+            continue
+        for mes in range(1, 13):
+            energia.append((uuid.uuid4(), lead_bruto_id, mes, None, None,
+                            sanitize_numeric(row.get(f"ENE_{mes:02d}")), camada, import_id))
+        for mes in range(1, 13):
+            demanda.append((uuid.uuid4(), lead_bruto_id, mes, None, None,
+                            sanitize_numeric(row.get(f"DEM_{mes:02d}")), dem_contratada.iloc[idx], camada, import_id))
+        for mes in range(1, 13):
+            qualidade.append((uuid.uuid4(), lead_bruto_id, mes,
+                              sanitize_numeric(row.get(f"DIC_{mes:02d}")), sanitize_numeric(row.get(f"FIC_{mes:02d}")),
+                              sem_rede.iloc[idx], camada, import_id))
+    return pd.DataFrame.from_records(energia), pd.DataFrame.from_records(demanda), pd.DataFrame.from_records(qualidade)
+
+
+def medir(nome: str, fn, n_ucs: int) -> float:
+    t0 = time.perf_counter()
+    fn()
+    dt = time.perf_counter() - t0
+    print(f"{nome:<10} {dt:8.3f}s | {n_ucs / dt:12,.0f} UCs/s | {3 * 12 * n_ucs / dt:14,.0f} linhas mensais/s")
+    return dt
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    df = gerar_chunk(n)
+    id_map = {uc: str(uuid.uuid4()) for uc in df["uc_id"]}
+    lead_ids = df["uc_id"].map(id_map)
+
+    print(f"UCBT mensais: {n} UCs -> {3 * 12 * n} linhas")
+    antes = medir("iterrows", lambda: mensais_por_linha(df, id_map, "UCBT", "bench"), n)
+    depois = medir("colunar", lambda: montar_mensais(df, lead_ids, "UCBT", "bench"), n)
+    print(f"speedup: {antes / depois:.1f}x")
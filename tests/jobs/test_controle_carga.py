@@ -0,0 +1,96 @@
+# tests/jobs/test_controle_carga.py
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from packages.jobs.importers.controle_carga import ControleCarga
+
+
+def _controle(**kw):
+    log = []
+    params = dict(chunk_size=50_000, pausa_ms=100, camada="T", adaptativo=True, chunk_min=5_000,
+                  chunk_max=200_000, pausa_ms_min=0, pausa_ms_max=5_000, utilizacao_alvo=0.8,
+                  commit_alvo_ms=1_000, tolerancia_latencia=2.0, pg_stat=False, log=log.append)
+    params.update(kw)
+    return ControleCarga(**params), log
+
+
+def test_banco_folgado_cresce_ate_o_teto_sem_pausa():
+    c, log = _controle()
+    for _ in range(10):
+        c.registrar(c.chunk_size, escrita_s=c.chunk_size / 100_000, commit_s=0.01)
+    assert c.chunk_size == 200_000
+    assert c.pausa_ms < 50
+    assert c.avancos > 0 and c.recuos == 0
+    assert len(log) == 10 and all(l.startswith("[carga T] chunk ") for l in log)
+
+def test_latencia_subindo_recua_e_aumenta_a_pausa():
+    c, log = _controle()
+    c.registrar(50_000, 0.5, 0.05)
+    d = None
+    for _ in range(5):
+        d = c.registrar(c.chunk_size, c.chunk_size / 100_000 * 4, 0.05)
+    assert c.recuos >= 1 and c.chunk_size < 50_000
+    assert d.sinal == "latência" and d.pausa_ms > 0
+    assert any("recua" in l for l in log[1:])
+
+def test_commit_lento_recua_mesmo_com_latencia_estavel():
+    c, _ = _controle()
+    d = c.registrar(50_000, 0.5, 2.5)
+    assert (d.acao, d.sinal, c.chunk_size) == ("recua", "commit", 25_000)
+    # pausa para utilização 80% (1/4 do tempo ocupado), escalada pela pressão 2.5
+    assert c.pausa_ms == int(3_000 * 0.25 * 2.5)
+
+def test_limites_de_chunk_e_pausa():
+    c, _ = _controle(chunk_size=6_000, pausa_ms_max=300)
+    for _ in range(5):
+        c.registrar(c.chunk_size, 1.0, 10.0)
+    assert c.chunk_size == 5_000 and c.pausa_ms == 300
+
+def test_modo_fixo_nao_decide_nada():
+    dormidas = []
+    c, log = _controle(adaptativo=False, dormir=dormidas.append)
+    assert c.registrar(50_000, 10.0, 10.0) is None
+    c.pausar()
+    assert (c.chunk_size, c.pausa_ms, dormidas, log) == (50_000, 100, [0.1], [])
+
+def test_teto_de_memoria_do_leitor_limita_o_controle():
+    c, _ = _controle()
+    c.limitar_chunk(20_000)
+    for _ in range(5):
+        c.registrar(c.chunk_size, 0.01, 0.01)
+    assert c.chunk_size == 20_000
+
+
+class _Cursor:
+    def __init__(self, linha=None, erro=None):
+        self.linha, self.erro, self.rollbacks = linha, erro, 0
+        self.connection = self
+
+    def execute(self, sql, params=None):
+        if self.erro:
+            raise self.erro
+
+    def fetchone(self):
+        return self.linha
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+def test_pg_stat_sessoes_ativas_viram_pressao():
+    c, _ = _controle(pg_stat=True, max_sessoes_ativas=4)
+    d = c.registrar(50_000, 0.5, 0.05, cur=_Cursor(linha=(8, 0.0)))
+    assert (d.sinal, d.acao) == ("sessões", "recua")
+
+def test_pg_stat_sem_permissao_desliga_e_desfaz_a_transacao():
+    c, log = _controle(pg_stat=True)
+    cur = _Cursor(erro=RuntimeError("permission denied"))
+    d = c.registrar(50_000, 0.5, 0.05, cur=cur)
+    assert cur.rollbacks == 1 and not c.pg_stat
+    assert d.sinal in ("latência", "commit")
+    assert "pg_stat desligado" in log[0]
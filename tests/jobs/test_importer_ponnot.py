@@ -0,0 +1,62 @@
+# tests/jobs/test_importer_ponnot.py
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from packages.jobs.importers.importer_ponnot_job import stable_bigint_id, transformar_chunk
+
+COLS_DB = ["pn_id", "latitude", "longitude", "distribuidora_id", "ano"]
+
+
+def _por_feature(props, geom_xy, dist, ano):
+    """Referência: a regra antiga, uma feature por vez."""
+    def primeiro(keys):
+        for k in keys:
+            v = props.get(k)
+            if v is not None and str(v).strip() not in ("", "nan", "NaN"):
+                return str(v)
+        return None
+
+    def num(v):
+        try:
+            return float(v) if v is not None else None
+        except ValueError:
+            return None
+
+    lon, lat = geom_xy if geom_xy else (None, None)
+    if lat is None:
+        lat = num(primeiro(["LAT", "Latitude", "lat", "Y", "y"]))
+    if lon is None:
+        lon = num(primeiro(["LONG", "Longitude", "long", "X", "x"]))
+    raw = primeiro(["PN_ID", "PNID", "ID_PN", "ID", "COD", "CODIGO"])
+    pn = int(raw) if raw is not None and raw.isdigit() else stable_bigint_id(dist, ano, lat, lon)
+    return pn, lat, lon
+
+
+def test_transformar_equivale_a_regra_por_feature():
+    linhas = [
+        ({"PN_ID": "123", "LAT": None}, (-46.1, -23.2)),
+        ({"PN_ID": " ", "ID": 77}, (-46.3, -23.4)),
+        ({"PN_ID": "A-9", "LAT": "-22.5", "LONG": "-47,1", "X": "-47.2"}, None),
+        ({"COD": "nan", "Y": "abc", "y": "-21.0", "x": -48.0}, None),
+        ({}, None),
+    ]
+    df = pd.DataFrame([props for props, _ in linhas])
+    df["_LON"] = [xy[0] if xy else np.nan for _, xy in linhas]
+    df["_LAT"] = [xy[1] if xy else np.nan for _, xy in linhas]
+
+    out = transformar_chunk(df, COLS_DB, True, "404", 2023)
+
+    esperado = [_por_feature(props, xy, "404", 2023) for props, xy in linhas]
+    assert list(out["pn_id"]) == [e[0] for e in esperado]
+    for col, i in (("latitude", 1), ("longitude", 2)):
+        ref = pd.Series([np.nan if e[i] is None else e[i] for e in esperado], dtype=float)
+        pd.testing.assert_series_equal(out[col], ref, check_names=False)
+    assert list(out.columns) == COLS_DB
+    assert set(out["distribuidora_id"]) == {"404"} and set(out["ano"]) == {2023}
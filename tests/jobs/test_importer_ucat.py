@@ -0,0 +1,35 @@
+# tests/jobs/test_importer_ucat.py
+
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from packages.jobs.importers import importer_ucat_job
+from packages.jobs.importers.importer_ucat_job import colunas_descartadas
+
+CAMADA = pd.DataFrame({
+    "COD_ID": ["1", "2", "3", "4", "5"],
+    "BRR": ["CENTRO", "VILA NOVA", "JARDIM", "YELLOW PARK", "CENTRO"],
+    "DESCR": ["A", "B", "C", "D", "E"],
+    "CEP": ["01000000", "106022", None, "02000000", "03000000"],
+})
+
+
+def test_colunas_descartadas_valem_para_a_camada_inteira(monkeypatch):
+    lidas = []
+
+    def ler_chunks_gdb(gdb_path, layer, chunk_size, max_rss_mb, colunas=None, inicio=0):
+        lidas.append(colunas)
+        for i in range(inicio, len(CAMADA), chunk_size):
+            yield CAMADA.iloc[i:i + chunk_size].reset_index(drop=True)
+
+    monkeypatch.setattr(importer_ucat_job, "ler_chunks_gdb", ler_chunks_gdb)
+    # o resultado não depende do tamanho do chunk (antes: BRR sumia só no chunk com "YELLOW")
+    for chunk_size in (1, 2, 3, 100):
+        assert colunas_descartadas(Path("x.gdb"), "UCAT_tab", chunk_size, 0) == {"BRR", "CEP"}
+    assert lidas[0] == importer_ucat_job.COLUNAS_LEITURA
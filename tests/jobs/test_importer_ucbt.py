@@ -0,0 +1,75 @@
+# tests/jobs/test_importer_ucbt.py
+
+import io
+import uuid
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from packages.jobs.importers.importer_ucbt_job import gerar_uuids, montar_mensais
+from packages.jobs.utils.sanitize import sanitize_numeric
+
+
+def _chunk_exemplo() -> pd.DataFrame:
+    dados = {"uc_id": ["UC:a", "UC:b", "UC:c"], "DEM_CONT": ["10,5", None, "***"], "SEMRED": [1, None, "2"]}
+    for mes in range(1, 13):
+        dados[f"ENE_{mes:02d}"] = [f"{mes},5", None, mes * 10]
+        dados[f"DEM_{mes:02d}"] = ["abc", "nan", "-"]
+        dados[f"DIC_{mes:02d}"] = [0.5 * mes, "", "1e2"]
+        dados[f"FIC_{mes:02d}"] = [float(mes), np.inf, np.nan]  # coluna float (caminho rápido)
+    return pd.DataFrame(dados)
+
+
+def _mensais_por_linha(df, id_map, camada, import_id):
+    """Referência: o laço iterrows antigo (sem o id aleatório)."""
+    energia, demanda, qualidade = [], [], []
+    dem_contratada = sanitize_numeric(df["DEM_CONT"])
+    sem_rede = sanitize_numeric(df["SEMRED"])
+    for idx, row in df.iterrows():
+        lead_bruto_id = id_map.get(row["uc_id"])
+        if not lead_bruto_id:
+            continue
+        for mes in range(1, 13):
+            energia.append((lead_bruto_id, mes, None, None, sanitize_numeric(row.get(f"ENE_{mes:02d}")), camada, import_id))
+        for mes in range(1, 13):
+            demanda.append((lead_bruto_id, mes, None, None, sanitize_numeric(row.get(f"DEM_{mes:02d}")),
+                            dem_contratada.iloc[idx], camada, import_id))
+        for mes in range(1, 13):
+            qualidade.append((lead_bruto_id, mes, sanitize_numeric(row.get(f"DIC_{mes:02d}")),
+                              sanitize_numeric(row.get(f"FIC_{mes:02d}")), sem_rede.iloc[idx], camada, import_id))
+    return energia, demanda, qualidade
+
+
+def _csv(df: pd.DataFrame) -> str:
+    buf = io.StringIO()
+    df.to_csv(buf, index=False, header=False, na_rep="\\N")
+    return buf.getvalue()
+
+
+def test_gerar_uuids_formato_v4():
+    ids = gerar_uuids(1000)
+    assert len(set(ids)) == 1000
+    for s in ids[:50]:
+        u = uuid.UUID(s)
+        assert u.version == 4
+        assert str(u) == s
+
+
+def test_montar_mensais_equivale_ao_laco_por_linha():
+    df = _chunk_exemplo()
+    id_map = {"UC:a": "lb-1", "UC:c": "lb-3"}  # UC:b sem lead_bruto -> ignorada
+
+    energia, demanda, qualidade = montar_mensais(df, df["uc_id"].map(id_map), "UCBT", "imp-1")
+    ref_e, ref_d, ref_q = _mensais_por_linha(df, id_map, "UCBT", "imp-1")
+
+    assert len(energia) == len(demanda) == len(qualidade) == 24
+    assert _csv(energia.drop(columns="id")) == _csv(pd.DataFrame.from_records(ref_e))
+    assert _csv(demanda.drop(columns="id")) == _csv(pd.DataFrame.from_records(ref_d))
+    assert _csv(qualidade.drop(columns="id")) == _csv(pd.DataFrame.from_records(ref_q))
+    assert energia["mes"].tolist()[:12] == list(range(1, 13))
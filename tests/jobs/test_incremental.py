@@ -0,0 +1,62 @@
+# tests/jobs/test_incremental.py
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from packages.jobs.utils.incremental import ALTERADA, IGUAL, NOVA, IndiceHash, hash_chave, hash_conteudo
+from packages.jobs.importers.importer_ucbt_job import filtrar_alteradas, preparar_e_transformar
+
+
+def _ucbt(cod_ids, bairros) -> pd.DataFrame:
+    dados = {"COD_ID": cod_ids, "DIST": 404, "BRR": bairros, "CNAE": "4711302", "PAC": 3, "DEM_CONT": 50.0}
+    for mes in range(1, 13):
+        dados[f"ENE_{mes:02d}"] = [100.0 * mes] * len(cod_ids)
+    return pd.DataFrame(dados)
+
+
+def test_hash_conteudo_nao_depende_do_dtype():
+    a = pd.DataFrame({"pac": [1, 2, None], "classe": ["RE", "CO", None], "ene": [1.0, 2.5, np.nan]})
+    b = pd.DataFrame({
+        "pac": pd.array([1, 2, None], dtype="Int64"),
+        "classe": pd.Categorical(["RE", "CO", None]),
+        "ene": [1, 2.5, None],
+    })
+    colunas = ["pac", "classe", "ene"]
+    assert (hash_conteudo(a, colunas) == hash_conteudo(b, colunas)).all()
+
+def test_hash_muda_com_o_conteudo_e_a_chave_nao():
+    df = pd.DataFrame({"bairro": ["Centro", "Centro"], "ene": [1.0, 1.0]})
+    h = hash_conteudo(df, ["bairro", "ene"])
+    assert h[0] == h[1]
+    df.loc[1, "ene"] = 1.5
+    assert hash_conteudo(df, ["bairro", "ene"])[1] != h[0]
+    assert (hash_chave(pd.Series(["C1", "C2"])) == hash_chave(pd.Series(["C1", "C2"]))).all()
+
+def test_classificar_e_mascara_emitir():
+    indice = IndiceHash(np.array([30, 10, 20]), np.array([3, 1, 2]))
+    chaves, hashes = np.array([10, 20, 40, 10]), np.array([1, 9, 4, 7])
+    assert indice.classificar(chaves, hashes).tolist() == [IGUAL, ALTERADA, NOVA, ALTERADA]
+    # a 2ª ocorrência da chave 10 não entrou no índice agora (COD_ID repetido): não é emitida
+    gravadas = np.array([10, 20, 40])
+    assert indice.mascara_emitir(chaves, hashes, gravadas).tolist() == [False, True, True, True]
+    assert indice.mascara_emitir(chaves, hashes, gravadas[:2]).tolist() == [False, True, False, True]
+
+def test_ucbt_grava_so_novas_e_alteradas():
+    _, base = preparar_e_transformar(_ucbt(["C1", "C2", "C3"], ["A", "B", "C"]), False, "imp1", 2023, "UCBT", 404)
+    indice = IndiceHash(base["hash"]["chave"].to_numpy(), base["hash"]["hash"].to_numpy())
+
+    # outro ano: uc_id muda, o hash das UCs iguais não
+    _, chunk = preparar_e_transformar(_ucbt(["C1", "C2", "C4"], ["A", "X", "D"]), False, "imp2", 2024, "UCBT", 404)
+    filtrado = filtrar_alteradas(chunk, indice, chunk["hash"]["chave"].to_numpy())
+
+    assert filtrado["bruto"]["cod_id"].tolist() == ["C2", "C4"]
+    for nome in ("energia", "demanda", "qualidade"):
+        assert set(filtrado[nome]["lead_bruto_id"]) == set(filtrado["bruto"]["uc_id"])
+        assert len(filtrado[nome]) == 24
@@ -0,0 +1,95 @@
+# tests/jobs/test_lead_bruto.py
+
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from psycopg2.errors import InvalidColumnReference
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from packages.jobs.utils import lead_bruto
+from packages.jobs.utils.lead_bruto import inserir_lead_bruto
+
+COLUNAS = ["uc_id", "import_id"]
+
+
+class _CursorFake:
+    """Simula lead_bruto com uc_id -> id; `sem_unique` faz o ON CONFLICT falhar como no Postgres."""
+
+    def __init__(self, existentes=None, sem_unique=False):
+        self.existentes = dict(existentes or {})
+        self.sem_unique = sem_unique
+        self.comandos = []
+        self.staging = None
+        self._resultado = []
+
+    def execute(self, sql, params=None):
+        self.comandos.append(" ".join(sql.split()))
+        if "ON CONFLICT" in sql and self.sem_unique:
+            raise InvalidColumnReference("there is no unique or exclusion constraint matching")
+        if "INSERT INTO" in sql:
+            novos = [u for u in self.staging if u not in self.existentes]
+            antigos = [(u, self.existentes[u], False) for u in self.staging if u in self.existentes]
+            for u in novos:
+                self.existentes[u] = f"id-{u}"
+            self._resultado = [(u, f"id-{u}", True) for u in novos]
+            if "WITH novos" in sql:
+                self._resultado += antigos
+            else:
+                self._resultado = [(u, i) for u, i, _ in self._resultado]
+
+    def fetchall(self):
+        return self._resultado
+
+
+@pytest.fixture(autouse=True)
+def _sem_cache_de_schema(monkeypatch):
+    monkeypatch.setattr(lead_bruto, "_sem_unique_uc_id", set())
+
+    def copy_fake(cur, df, tabela, colunas):
+        assert not df["uc_id"].duplicated().any()
+        cur.staging = df["uc_id"].tolist()
+        return len(df)
+
+    monkeypatch.setattr(lead_bruto, "copy_dataframe", copy_fake)
+
+
+def _chunk(*uc_ids):
+    return pd.DataFrame({"uc_id": list(uc_ids), "import_id": "imp"})
+
+
+def test_mapa_cobre_novas_e_existentes_num_comando():
+    cur = _CursorFake(existentes={"b": "id-antigo"})
+    inseridas, mapa = inserir_lead_bruto(cur, _chunk("a", "b", "c"), COLUNAS)
+    assert inseridas == 2
+    assert mapa == {"a": "id-a", "b": "id-antigo", "c": "id-c"}
+    assert sum("INSERT INTO" in c for c in cur.comandos) == 1
+    assert not any("ANY(" in c for c in cur.comandos)
+
+def test_uc_id_repetido_no_chunk_fica_a_primeira():
+    cur = _CursorFake()
+    inseridas, mapa = inserir_lead_bruto(cur, _chunk("a", "a", "b"), COLUNAS)
+    assert inseridas == 2 and set(mapa) == {"a", "b"}
+
+def test_sem_unique_volta_ao_savepoint_e_usa_anti_join():
+    cur = _CursorFake(existentes={"a": "id-antigo"}, sem_unique=True)
+    inseridas, mapa = inserir_lead_bruto(cur, _chunk("a", "b"), COLUNAS)
+    assert (inseridas, mapa) == (1, {"a": "id-antigo", "b": "id-b"})
+    assert "ROLLBACK TO SAVEPOINT lb_insert" in cur.comandos
+    assert "NOT EXISTS" in cur.comandos[-1]
+
+    # a escolha fica lembrada: o próximo chunk vai direto ao anti-join
+    cur.comandos.clear()
+    inserir_lead_bruto(cur, _chunk("c"), COLUNAS)
+    assert not any("ON CONFLICT" in c for c in cur.comandos)
+
+def test_modo_simples_nao_usa_on_conflict():
+    cur = _CursorFake()
+    inseridas, mapa = inserir_lead_bruto(cur, _chunk("a", "b"), COLUNAS, idempotente=False)
+    assert (inseridas, mapa) == (2, {"a": "id-a", "b": "id-b"})
+    inserts = [c for c in cur.comandos if "INSERT INTO" in c]
+    assert not any("ON CONFLICT" in c or "NOT EXISTS" in c for c in inserts)
@@ -0,0 +1,102 @@
+# tests/jobs/test_leitor_gdb.py
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+fiona = pytest.importorskip("fiona")
+
+from packages.jobs.importers import leitor_gdb
+from packages.jobs.importers.leitor_gdb import colunas_mensais, contar_registros, ler_chunks_gdb
+
+
+@pytest.fixture
+def gdb_ucmt(tmp_path):
+    caminho = tmp_path / "teste.gdb"
+    schema = {"geometry": "None", "properties": {"COD_ID": "str", "DIST": "int", "ENE_01": "float"}}
+    try:
+        with fiona.open(str(caminho), "w", driver="OpenFileGDB", layer="UCMT_tab", schema=schema) as dst:
+            dst.writerecords(
+                {"geometry": None, "properties": {"COD_ID": f"C{i}", "DIST": 404, "ENE_01": i * 1.5}}
+                for i in range(1203)
+            )
+    except Exception as e:
+        pytest.skip(f"GDAL sem escrita OpenFileGDB: {e}")
+    return caminho
+
+
+LEITORES = ["fiona", pytest.param("arrow", marks=pytest.mark.skipif(
+    leitor_gdb.open_arrow is None, reason="pyogrio não instalado"))]
+
+
+@pytest.mark.parametrize("leitor", LEITORES)
+def test_chunks_cobrem_a_camada(gdb_ucmt, leitor):
+    chunks = list(ler_chunks_gdb(gdb_ucmt, "UCMT_tab", chunk_size=500, max_rss_mb=0, leitor=leitor))
+    assert [len(c) for c in chunks] == [500, 500, 203]
+    assert contar_registros(gdb_ucmt, "UCMT_tab") == 1203
+    assert chunks[-1]["COD_ID"].iloc[-1] == "C1202"
+    assert chunks[-1]["ENE_01"].iloc[-1] == pytest.approx(1202 * 1.5)
+    assert "geometry" not in chunks[0].columns
+
+
+@pytest.mark.parametrize("leitor", LEITORES)
+def test_seleciona_colunas_e_ignora_ausentes(gdb_ucmt, leitor):
+    colunas = ["COD_ID"] + colunas_mensais("ENE_")
+    chunk = next(ler_chunks_gdb(gdb_ucmt, "UCMT_tab", chunk_size=500, max_rss_mb=0, colunas=colunas, leitor=leitor))
+    assert list(chunk.columns) == ["COD_ID", "ENE_01"]
+
+
+@pytest.mark.parametrize("leitor", LEITORES)
+def test_teto_de_rss_reduz_chunk(gdb_ucmt, monkeypatch, leitor):
+    monkeypatch.setattr(leitor_gdb, "CHUNK_MINIMO", 100)
+    monkeypatch.setattr(leitor_gdb, "rss_atual_mb", lambda: 10_000.0)
+    chunks = list(ler_chunks_gdb(gdb_ucmt, "UCMT_tab", chunk_size=400, max_rss_mb=1, colunas=["COD_ID"], leitor=leitor))
+    assert [len(c) for c in chunks][:4] == [400, 200, 100, 100]
+    assert sum(len(c) for c in chunks) == 1203
+    assert list(chunks[0].columns) == ["COD_ID"]
+
+
+@pytest.mark.parametrize("leitor", LEITORES)
+def test_geometria_vira_lon_lat(tmp_path, leitor):
+    caminho = tmp_path / "pontos.gdb"
+    schema = {"geometry": "Point", "properties": {"PN_ID": "str"}}
+    try:
+        with fiona.open(str(caminho), "w", driver="OpenFileGDB", layer="PONNOT", schema=schema, crs="EPSG:4326") as dst:
+            dst.writerecords(
+                {"geometry": {"type": "Point", "coordinates": (-46.5 + i, -23.5)}, "properties": {"PN_ID": str(i)}}
+                for i in range(3)
+            )
+    except Exception as e:
+        pytest.skip(f"GDAL sem escrita OpenFileGDB: {e}")
+    df = next(ler_chunks_gdb(caminho, "PONNOT", max_rss_mb=0, ler_geometria=True, leitor=leitor))
+    assert list(df["_LON"]) == [-46.5, -45.5, -44.5]
+    assert list(df["_LAT"]) == [-23.5] * 3
+
+
+@pytest.mark.parametrize("leitor", LEITORES)
+def test_controle_muda_o_chunk_entre_um_e_outro(gdb_ucmt, monkeypatch, leitor):
+    monkeypatch.setattr(leitor_gdb, "CHUNK_MINIMO", 100)
+
+    class Controle:
+        chunk_size = 300
+
+    tamanhos = []
+    for chunk in ler_chunks_gdb(gdb_ucmt, "UCMT_tab", chunk_size=999, max_rss_mb=0,
+                                colunas=["COD_ID"], leitor=leitor, controle=Controle):
+        tamanhos.append(len(chunk))
+        Controle.chunk_size = 700 if len(tamanhos) == 1 else 100
+    # cresce além do lote inicial do Arrow (junta lotes) e depois encolhe
+    assert tamanhos[:3] == [300, 700, 100]
+    assert sum(tamanhos) == 1203
+
+
+@pytest.mark.parametrize("leitor", LEITORES)
+def test_inicio_retoma_da_feature_indicada(gdb_ucmt, leitor):
+    chunks = list(ler_chunks_gdb(gdb_ucmt, "UCMT_tab", chunk_size=500, max_rss_mb=0,
+                                 colunas=["COD_ID"], leitor=leitor, inicio=1000))
+    assert [len(c) for c in chunks] == [203]
+    assert chunks[0]["COD_ID"].iloc[0] == "C1000"
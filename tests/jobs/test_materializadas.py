@@ -0,0 +1,84 @@
+# tests/jobs/test_materializadas.py
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from packages.jobs.utils.materializadas import (
+    Materializada, Resultado, com_dependentes, executar_grafo, ordem_topologica,
+)
+
+
+def _grafo() -> dict:
+    # detalhado <- top_bairros <- nunca ; resumos independentes
+    return {
+        "mv_lead_completo_detalhado": Materializada("mv_lead_completo_detalhado", True, True),
+        "mv_top_bairros": Materializada("mv_top_bairros", True, False, {"mv_lead_completo_detalhado"}),
+        "mv_nunca": Materializada("mv_nunca", False, False, {"mv_top_bairros"}),
+        "resumo_leads_ano_camada": Materializada("resumo_leads_ano_camada", True, True),
+        "resumo_leads_distribuidora": Materializada("resumo_leads_distribuidora", True, True),
+    }
+
+
+def test_modo_concurrently_so_com_indice_unico_e_populada():
+    g = _grafo()
+    assert g["mv_lead_completo_detalhado"].modo() == "concurrently"
+    assert g["mv_lead_completo_detalhado"].modo(bloqueante=True) == "bloqueante"
+    assert g["mv_top_bairros"].modo() == "bloqueante"
+    assert Materializada("x", False, True).modo() == "bloqueante"
+
+def test_ordem_e_dependentes():
+    g = _grafo()
+    ordem = ordem_topologica(g)
+    assert ordem.index("mv_lead_completo_detalhado") < ordem.index("mv_top_bairros") < ordem.index("mv_nunca")
+    assert com_dependentes(g, ["mv_top_bairros"]) == {"mv_top_bairros", "mv_nunca"}
+    with pytest.raises(ValueError):
+        com_dependentes(g, ["nao_existe"])
+    g["mv_lead_completo_detalhado"].depende_de.add("mv_nunca")
+    with pytest.raises(ValueError, match="Ciclo"):
+        ordem_topologica(g)
+
+def test_executar_grafo_paralelo_respeitando_dependencias():
+    g = _grafo()
+    trava = threading.Lock()
+    rodando, pico, terminadas = [0], [0], []
+
+    def atualizar(mv):
+        with trava:
+            rodando[0] += 1
+            pico[0] = max(pico[0], rodando[0])
+            assert all(d in terminadas for d in mv.depende_de)
+        time.sleep(0.05)
+        with trava:
+            rodando[0] -= 1
+            terminadas.append(mv.nome)
+        return Resultado(mv.nome, mv.modo(), "ok", duracao_ms=50)
+
+    registrados = []
+    resultados = executar_grafo(g, atualizar, paralelo=3, ao_concluir=registrados.append)
+    assert [r.status for r in resultados] == ["ok"] * 5
+    assert pico[0] == 3
+    assert {r.mv for r in registrados} == set(g)
+
+def test_falha_pula_dependentes_e_segue_as_demais():
+    g = _grafo()
+
+    def atualizar(mv):
+        if mv.nome == "mv_lead_completo_detalhado":
+            raise RuntimeError("deadlock detected")
+        return Resultado(mv.nome, mv.modo(), "ok")
+
+    status = {r.mv: r for r in executar_grafo(g, atualizar, paralelo=2)}
+    assert status["mv_lead_completo_detalhado"].status == "erro"
+    assert "deadlock" in status["mv_lead_completo_detalhado"].erro
+    assert status["mv_top_bairros"].status == "pulada"
+    assert status["mv_nunca"].status == "pulada"
+    assert status["resumo_leads_ano_camada"].status == "ok"
+    assert status["resumo_leads_distribuidora"].status == "ok"
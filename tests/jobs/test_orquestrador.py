@@ -47,3 +47,45 @@ def test_orquestrador_roda_todas_camadas(mock_status, mock_run, mock_downloads_d
         assert isinstance(cmd, list)
         assert any(cam in cmd for cam in ["UCAT", "UCMT", "UCBT"])
         assert any(p in cmd for p in ["CPFL_Paulista_2023", "ENEL_SP_2022"])
+
+
+def test_paralelo_respeita_orcamento_de_conexoes(monkeypatch, tmp_path):
+    import threading
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+    from packages.orquestrator import orquestrador_job as orq
+
+    lock = threading.Lock()
+    ativos = {"agora": 0, "max": 0}
+    ordem = []
+
+    def fake_rodar(script, gdb_dir, camada, distribuidora, ano, prefixo):
+        with lock:
+            ativos["agora"] += 1
+            ativos["max"] = max(ativos["max"], ativos["agora"])
+            ordem.append(camada)
+        time.sleep(0.01)
+        with lock:
+            ativos["agora"] -= 1
+        return {"prefixo": prefixo, "camada": camada, "resultado": "ok", "duracao_s": 0.01}
+
+    monkeypatch.setattr(orq, "rodar_importer", fake_rodar)
+    tarefas = [
+        (orq.IMPORTERS[c], tmp_path / f"{p}.gdb", c, p.rsplit("_", 1)[0], 2023, p)
+        for p in ("CPFL_Paulista_2023", "ENEL_SP_2023")
+        for c in orq.CAMADAS
+    ]
+    resultados = orq.executar_paralelo(tarefas, max_conexoes=3, executor_cls=ThreadPoolExecutor)
+
+    assert len(resultados) == 8
+    assert ativos["max"] <= 3
+    assert ordem[:2] == ["UCBT", "UCBT"]  # camadas pesadas partem primeiro
+    assert "Tempo total (parede)" in orq.resumo_execucao(resultados, 0.05)[-1]
+
+
+def test_ucbt_recebe_import_id_do_prefixo():
+    from packages.orquestrator.orquestrador_job import _build_args
+    from packages.jobs.utils.rastreio import gerar_import_id
+
+    args = _build_args("UCBT", Path("x.gdb"), "CPFL_Paulista", 2023, "CPFL_Paulista_2023")
+    assert args[args.index("--import-id") + 1] == gerar_import_id("CPFL_Paulista_2023", 2023, "UCBT")
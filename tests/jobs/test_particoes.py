@@ -0,0 +1,145 @@
+# tests/jobs/test_particoes.py
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from psycopg2 import sql as pgsql
+
+from packages.jobs.utils.particoes import concluir_particoes, nome_particao, preparar_particoes, reimportacao
+
+
+def _texto(comp) -> str:
+    """Renderiza um psycopg2.sql.Composable sem conexão (só para comparar o SQL gerado)."""
+    if isinstance(comp, str):
+        return comp
+    if isinstance(comp, pgsql.Composed):
+        return "".join(_texto(c) for c in comp.seq)
+    if isinstance(comp, pgsql.SQL):
+        return comp.string
+    if isinstance(comp, pgsql.Identifier):
+        return ".".join(f'"{s}"' for s in comp.strings)
+    if isinstance(comp, pgsql.Literal):
+        return f"'{comp.wrapped}'"
+    raise TypeError(comp)
+
+
+class _Catalogo:
+    """Conexão + cursor falsos: responde às consultas de catálogo e guarda o DDL emitido."""
+
+    def __init__(self, particionadas=(), existentes=None, padrao=None, legado=(), fks=None):
+        self.particionadas = set(particionadas)
+        self.fks = dict(fks or {})                 # tabela -> [(nome, definição)]
+        self.existentes = dict(existentes or {})   # nome -> 'particao' | 'solta'
+        self.padrao = padrao
+        self.legado = set(legado)
+        self.ddl = []
+        self.commits = 0
+        self._resultado = None
+
+    # conexão
+    def cursor(self):
+        return self
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+    # cursor
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        texto = " ".join(_texto(sql).split())
+        if "pg_partitioned_table" in texto and "partdefid" in texto:
+            self._resultado = (self.padrao,) if self.padrao and params[0] in self.particionadas else None
+        elif "pg_partitioned_table" in texto:
+            self._resultado = (params[0] in self.particionadas,)
+        elif "relispartition" in texto:
+            situacao = self.existentes.get(params[0])
+            self._resultado = (situacao,) if situacao else None
+        elif "pg_constraint" in texto:
+            self._resultado = list(self.fks.get(params[0], []))
+        elif texto.startswith("SELECT EXISTS (SELECT 1 FROM ONLY"):
+            self._resultado = (params[0] in self.legado,)
+        elif not texto.startswith("SET LOCAL"):
+            self.ddl.append(texto)
+
+    def fetchone(self):
+        return self._resultado
+
+    def fetchall(self):
+        return self._resultado
+
+
+def test_nome_particao():
+    assert nome_particao("intel_lead.lead_energia_mensal", "abc123") == "intel_lead.lead_energia_mensal_abc123"
+    livre = nome_particao("lead_qualidade_mensal", "Minha Carga/2024 " + "x" * 80)
+    assert livre.startswith("lead_qualidade_mensal_minha_carga_2024_")
+    assert len(livre) <= 63 - len("_novo")
+    assert livre == nome_particao("lead_qualidade_mensal", "Minha Carga/2024 " + "x" * 80)
+
+def test_preparar_cria_particao_nova_e_ignora_tabela_nao_particionada():
+    cat = _Catalogo(particionadas={"lead_energia_mensal"})
+    destinos = preparar_particoes(cat, "imp1", ["lead_energia_mensal", "lead_demanda_mensal"], descricao="X 2023 UCBT")
+    assert destinos == {"lead_energia_mensal": "lead_energia_mensal_imp1", "lead_demanda_mensal": "lead_demanda_mensal"}
+    assert cat.ddl[0].startswith('CREATE TABLE "lead_energia_mensal_imp1" (LIKE "lead_energia_mensal"')
+    assert any("ATTACH PARTITION" in c and "FOR VALUES IN ('imp1')" in c for c in cat.ddl)
+    assert not reimportacao(destinos)
+    assert cat.commits == 1
+
+def test_reimportacao_usa_tabela_de_troca_e_retomada_continua_nela():
+    cat = _Catalogo(particionadas={"lead_energia_mensal"}, existentes={"lead_energia_mensal_imp1": "particao"})
+    destinos = preparar_particoes(cat, "imp1", ["lead_energia_mensal"])
+    assert destinos == {"lead_energia_mensal": "lead_energia_mensal_imp1_novo"}
+    assert cat.ddl[0] == 'DROP TABLE IF EXISTS "lead_energia_mensal_imp1_novo"'
+    assert not any("ATTACH" in c for c in cat.ddl)
+    assert reimportacao(destinos)
+
+    cat.existentes["lead_energia_mensal_imp1_novo"] = "solta"
+    cat.ddl.clear()
+    assert preparar_particoes(cat, "imp1", ["lead_energia_mensal"], retomando=True) == destinos
+    assert cat.ddl == []
+
+    # retomada de uma primeira importação: segue na partição
+    del cat.existentes["lead_energia_mensal_imp1_novo"]
+    assert preparar_particoes(cat, "imp1", ["lead_energia_mensal"], retomando=True) == {
+        "lead_energia_mensal": "lead_energia_mensal_imp1"}
+
+def test_import_id_no_legado_vira_troca():
+    cat = _Catalogo(particionadas={"lead_energia_mensal"}, padrao="lead_energia_mensal_legado", legado={"imp1"})
+    assert preparar_particoes(cat, "imp1", ["lead_energia_mensal"]) == {
+        "lead_energia_mensal": "lead_energia_mensal_imp1_novo"}
+
+def test_concluir_troca_detach_drop_rename_attach():
+    fk_lead = ("lead_energia_mensal_lead_bruto_id_fkey", "FOREIGN KEY (lead_bruto_id) REFERENCES lead_bruto(id) ON DELETE CASCADE")
+    fk_status = ("lead_energia_mensal_import_id_fkey", "FOREIGN KEY (import_id) REFERENCES import_status(import_id)")
+    cat = _Catalogo(particionadas={"lead_energia_mensal"}, existentes={"lead_energia_mensal_imp1": "particao"},
+                    fks={"lead_energia_mensal": [fk_status, fk_lead], "lead_energia_mensal_imp1_novo": [fk_status]})
+    destinos = {"lead_energia_mensal": "lead_energia_mensal_imp1_novo", "lead_demanda_mensal": "lead_demanda_mensal"}
+    assert concluir_particoes(cat, "imp1", destinos) == ["lead_energia_mensal"]
+    # FKs do pai criadas e validadas na troca antes (e fora) da transação da troca; a que já existe fica
+    assert cat.ddl[:2] == [
+        'ALTER TABLE "lead_energia_mensal_imp1_novo" ADD CONSTRAINT "lead_energia_mensal_lead_bruto_id_fkey" '
+        'FOREIGN KEY (lead_bruto_id) REFERENCES lead_bruto(id) ON DELETE CASCADE NOT VALID',
+        'ALTER TABLE "lead_energia_mensal_imp1_novo" VALIDATE CONSTRAINT "lead_energia_mensal_lead_bruto_id_fkey"',
+    ]
+    assert cat.commits == 2
+    ordem = [c.split(" (")[0] for c in cat.ddl[2:]]
+    assert ordem == [
+        'ALTER TABLE "lead_energia_mensal" DETACH PARTITION "lead_energia_mensal_imp1"',
+        'DROP TABLE "lead_energia_mensal_imp1"',
+        'ALTER TABLE "lead_energia_mensal_imp1_novo" RENAME TO "lead_energia_mensal_imp1"',
+        'ALTER TABLE "lead_energia_mensal_imp1" ADD CONSTRAINT particao_import_id CHECK',
+        'ALTER TABLE "lead_energia_mensal" ATTACH PARTITION "lead_energia_mensal_imp1" FOR VALUES IN',
+        'ALTER TABLE "lead_energia_mensal_imp1" DROP CONSTRAINT particao_import_id',
+    ]
+    assert concluir_particoes(cat, "imp1", {"lead_demanda_mensal": "lead_demanda_mensal"}) == []
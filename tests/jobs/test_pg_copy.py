@@ -0,0 +1,88 @@
+# tests/jobs/test_pg_copy.py
+
+import struct
+import sys
+import uuid
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from packages.jobs.utils.pg_copy import PGCOPY_HEADER, copy_dataframe, encode_binary
+
+
+def _decodificar(buf: bytes) -> list[list[bytes | None]]:
+    assert buf.startswith(PGCOPY_HEADER)
+    pos, linhas = len(PGCOPY_HEADER), []
+    while True:
+        (nfields,) = struct.unpack_from("!h", buf, pos)
+        pos += 2
+        if nfields == -1:
+            break
+        campos = []
+        for _ in range(nfields):
+            (tam,) = struct.unpack_from("!i", buf, pos)
+            pos += 4
+            if tam == -1:
+                campos.append(None)
+            else:
+                campos.append(buf[pos:pos + tam])
+                pos += tam
+        linhas.append(campos)
+    assert pos == len(buf)
+    return linhas
+
+
+def test_encode_binary_tipos_basicos():
+    u = uuid.uuid4()
+    df = pd.DataFrame({
+        "id": [str(u), None],
+        "mes": [3, None],
+        "valor": [1.5, np.nan],
+        "cod": [2**40, 7],
+        "dia": [date(2000, 1, 2), None],
+        "origem": ["UCBT", "ção"],
+    })
+    tipos = {"id": "uuid", "mes": "int4", "valor": "float8", "cod": "int8", "dia": "date", "origem": "enum"}
+    linhas = _decodificar(encode_binary(df, list(df.columns), tipos).tobytes())
+
+    assert linhas[0] == [u.bytes, struct.pack("!i", 3), struct.pack("!d", 1.5),
+                         struct.pack("!q", 2**40), struct.pack("!i", 1), b"UCBT"]
+    assert linhas[1] == [None, None, None, struct.pack("!q", 7), None, "ção".encode()]
+
+
+def test_encode_binary_rejeita_inteiro_fracionario():
+    df = pd.DataFrame({"mes": [1.5]})
+    with pytest.raises(ValueError):
+        encode_binary(df, ["mes"], {"mes": "int4"})
+
+
+class _CursorFake:
+    def __init__(self, tipos):
+        self.tipos, self.sql = tipos, None
+
+    def execute(self, sql, params=None):
+        pass
+
+    def fetchall(self):
+        return list(self.tipos.items())
+
+    def copy_expert(self, sql, arquivo, size=8192):
+        self.sql = sql
+        arquivo.read(size)
+
+
+def test_copy_dataframe_cai_para_csv_com_tipo_sem_encoder():
+    cur = _CursorFake({"valor": "numeric"})
+    copy_dataframe(cur, pd.DataFrame({"valor": [1.0]}), "_tbl_numeric", ["valor"], formato="binary")
+    assert "FORMAT csv" in cur.sql
+
+    cur = _CursorFake({"valor": "float8"})
+    copy_dataframe(cur, pd.DataFrame({"valor": [1.0]}), "_tbl_float", ["valor"], formato="binary")
+    assert "FORMAT binary" in cur.sql
@@ -0,0 +1,73 @@
+# tests/jobs/test_pipeline.py
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from packages.jobs.importers.pipeline import executar_pipeline
+
+
+def test_grava_na_ordem_de_leitura():
+    gravados = []
+
+    def transformar(x):
+        time.sleep(0.001 * (x % 3))  # transformadores terminam fora de ordem
+        return x * 10
+
+    stats = executar_pipeline(
+        ([i] * 5 for i in range(40)),
+        lambda chunk: transformar(chunk[0]),
+        lambda item: gravados.append(item) or 5,
+        n_transformadores=4,
+        max_em_voo=3,
+    )
+    assert gravados == [i * 10 for i in range(40)]
+    assert stats.etapas["leitura"].linhas == 200
+    assert stats.etapas["gravacao"].linhas == 200
+    assert len(stats.linhas_resumo()) == 6
+
+
+def test_backpressure_limita_chunks_em_voo():
+    lock = threading.Lock()
+    em_voo = {"atual": 0, "max": 0}
+
+    def ler():
+        for i in range(30):
+            with lock:
+                em_voo["atual"] += 1
+                em_voo["max"] = max(em_voo["max"], em_voo["atual"])
+            yield [i]
+
+    def gravar(item):
+        time.sleep(0.002)  # gravador é o gargalo
+        with lock:
+            em_voo["atual"] -= 1
+        return 1
+
+    executar_pipeline(ler(), lambda c: c, gravar, n_transformadores=3, max_em_voo=2)
+    assert em_voo["max"] <= 2
+
+
+def test_erro_no_gravador_interrompe_e_propaga():
+    abertos, fechados = [], []
+
+    def gravar(item):
+        if item[0] == 3:
+            raise RuntimeError("falha no COPY")
+        return 1
+
+    with pytest.raises(RuntimeError, match="falha no COPY"):
+        executar_pipeline(
+            ([i] for i in range(1000)),
+            lambda c: c,
+            gravar,
+            ao_abrir_gravador=lambda: abertos.append(1) or "conn",
+            ao_fechar_gravador=fechados.append,
+        )
+    assert abertos == [1] and fechados == ["conn"]
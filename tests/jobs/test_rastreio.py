@@ -0,0 +1,71 @@
+# tests/jobs/test_rastreio.py
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from packages.jobs.utils import rastreio
+from packages.jobs.utils.rastreio import ler_checkpoint, salvar_checkpoint
+
+
+class _CursorCheckpoint:
+    """Simula import_checkpoint num dict; `existe` controla o to_regclass."""
+
+    def __init__(self, existe=True):
+        self.existe = existe
+        self.linhas = {}
+        self.comandos = []
+        self._resultado = None
+
+    def execute(self, sql, params=None):
+        sql = " ".join(sql.split())
+        self.comandos.append(sql)
+        if "to_regclass" in sql:
+            self._resultado = (self.existe,)
+        elif sql.startswith("CREATE TABLE"):
+            self.existe = True
+        elif sql.startswith("INSERT INTO import_checkpoint"):
+            import_id, camada, layer, offset, linhas, total = params
+            self.linhas[import_id] = (layer, offset, linhas, total, False)
+        elif sql.startswith("SELECT layer"):
+            row = self.linhas.get(params[0])
+            ok = row and not row[4] and row[1] > 0
+            self._resultado = row[:3] if ok else None
+
+    def fetchone(self):
+        return self._resultado
+
+
+@pytest.fixture(autouse=True)
+def _tabela_nao_verificada(monkeypatch):
+    monkeypatch.setattr(rastreio, "_tabela_checkpoint_ok", False)
+
+
+def test_checkpoint_salvo_e_lido_de_volta():
+    cur = _CursorCheckpoint()
+    assert ler_checkpoint(cur, "imp") is None
+    salvar_checkpoint(cur, "imp", "UCBT", "UCBT_tab", offset=1200, linhas=1180, total=1500)
+    assert ler_checkpoint(cur, "imp") == {"layer": "UCBT_tab", "offset": 1200, "linhas": 1180}
+
+def test_tabela_criada_so_se_faltar_e_uma_vez_por_processo():
+    cur = _CursorCheckpoint(existe=False)
+    ler_checkpoint(cur, "imp")
+    salvar_checkpoint(cur, "imp", "UCMT", "UCMT_tab", 10, 10)
+    assert sum(c.startswith("CREATE TABLE") for c in cur.comandos) == 1
+    assert sum("to_regclass" in c for c in cur.comandos) == 1
+
+    cur = _CursorCheckpoint(existe=True)
+    rastreio._tabela_checkpoint_ok = False
+    ler_checkpoint(cur, "imp")
+    assert not any(c.startswith("CREATE TABLE") for c in cur.comandos)
+
+def test_checkpoint_nao_commita_por_conta_propria():
+    cur = _CursorCheckpoint()
+    salvar_checkpoint(cur, "imp", "UCBT", "UCBT_tab", 600, 600, 1500)
+    assert not any(c.upper().startswith("COMMIT") for c in cur.comandos)
+    assert "concluido = false" in cur.comandos[-1]
@@ -0,0 +1,61 @@
+# tests/jobs/test_resumos.py
+
+import sys
+from decimal import Decimal
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from packages.jobs.utils import rastreio, resumos
+from packages.jobs.utils.resumos import RESUMOS, calcular_delta
+
+
+def test_delta_troca_contribuicao_da_importacao():
+    antigo = {(1, "UCBT", "raw"): (100,), (1, "UCBT", "enriquecido"): (5,)}
+    novo = {(1, "UCBT", "raw"): (120,), (1, "UCMT", "raw"): (7,)}
+    assert calcular_delta(antigo, novo) == {
+        (1, "UCBT", "raw"): (20,),
+        (1, "UCBT", "enriquecido"): (-5,),
+        (1, "UCMT", "raw"): (7,),
+    }
+    # reimportação sem mudança não mexe nos totais
+    assert calcular_delta(novo, dict(novo)) == {}
+
+def test_delta_com_medidas_numericas_e_nulas():
+    antigo = {(3550308,): (10, Decimal("100.5"), None, 0)}
+    novo = {(3550308,): (10, Decimal("90.5"), Decimal("7.25"), 2), (None,): (1, 0, 0, 0)}
+    assert calcular_delta(antigo, novo) == {
+        (3550308,): (0, Decimal("-10.0"), Decimal("7.25"), 2),
+        (None,): (1, 0, 0, 0),
+    }
+
+def test_consulta_por_importacao_filtra_lead_bruto_e_energia():
+    energia = next(r for r in RESUMOS if r.tabela == "resumo_inc_energia_municipio")
+    sql = energia.consulta("{a}.import_id = %(import_id)s")
+    assert "WHERE f.import_id = %(import_id)s" in sql
+    assert "WHERE lb.import_id = %(import_id)s GROUP BY lb.municipio_id" in sql
+
+    completo = energia.consulta("true", por_import=True)
+    assert completo.startswith("SELECT lb.import_id, lb.municipio_id,")
+    assert completo.endswith("GROUP BY lb.import_id, lb.municipio_id")
+
+
+class _CursorFalha:
+    def __init__(self):
+        self.comandos = []
+
+    def execute(self, sql, params=None):
+        self.comandos.append(" ".join(sql.split()))
+
+
+def test_falha_nos_resumos_nao_derruba_o_status(monkeypatch):
+    def falha(cur, import_id):
+        cur.execute("SELECT pg_advisory_xact_lock(1)")
+        raise RuntimeError("relation lead_energia_mensal does not exist")
+
+    monkeypatch.setattr(resumos, "aplicar_import", falha)
+    cur = _CursorFalha()
+    rastreio.aplicar_resumos(cur, "imp")
+    assert cur.comandos == ["SAVEPOINT resumos", "SELECT pg_advisory_xact_lock(1)", "ROLLBACK TO SAVEPOINT resumos"]
@@ -0,0 +1,62 @@
+# tests/jobs/test_serie_mensal.py
+
+import struct
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from packages.jobs.utils.pg_copy import PGCOPY_HEADER, _literal_array, encode_binary
+from packages.jobs.utils.serie_mensal import compactar, tabelas_destino
+
+ID_A = "11111111-1111-1111-1111-111111111111"
+ID_B = "22222222-2222-2222-2222-222222222222"
+
+
+def _longa_mes_a_mes() -> pd.DataFrame:
+    # ordem do importer UCMT (mês a mês, todas as UCs), com um mês faltando para B
+    linhas = []
+    for mes in range(1, 13):
+        linhas.append({"lead_bruto_id": ID_A, "mes": mes, "dic": float(mes), "fic": np.nan})
+        if mes != 5:
+            linhas.append({"lead_bruto_id": ID_B, "mes": mes, "dic": 10.0 * mes, "fic": np.nan})
+    df = pd.DataFrame(linhas)
+    return df.assign(origem="UCMT", import_id="imp1")
+
+
+def test_compactar_alinha_meses_e_pula_medida_vazia():
+    series = compactar(_longa_mes_a_mes(), ["dic", "fic", "sem_rede"])
+    assert series["medida"].tolist() == ["dic", "dic"]
+    por_lead = dict(zip(series["lead_bruto_id"], series["valores"]))
+    assert por_lead[ID_A].tolist() == [float(m) for m in range(1, 13)]
+    assert np.isnan(por_lead[ID_B][4]) and por_lead[ID_B][5] == 60.0
+    assert por_lead[ID_B].dtype == np.float32
+    assert set(series["import_id"]) == {"imp1"}
+
+
+def test_encode_binary_float4_array_com_nulos():
+    df = pd.DataFrame({"valores": [np.array([1.5, np.nan, 3.0], dtype=np.float32)]})
+    buf = encode_binary(df, ["valores"], {"valores": "_float4"}).tobytes()
+    corpo = buf[len(PGCOPY_HEADER):]
+    nfields, tamanho = struct.unpack("!hi", corpo[:6])
+    assert nfields == 1 and tamanho == 20 + 8 * 2 + 4
+    ndim, tem_nulo, oid, dim, inferior = struct.unpack("!5i", corpo[6:26])
+    assert (ndim, tem_nulo, oid, dim, inferior) == (1, 1, 700, 3, 1)
+    elementos = corpo[26:26 + tamanho - 20]
+    assert struct.unpack("!if", elementos[:8]) == (4, 1.5)
+    assert struct.unpack("!i", elementos[8:12]) == (-1,)
+    assert struct.unpack("!if", elementos[12:20]) == (4, 3.0)
+    assert corpo[26 + tamanho - 20:] == struct.pack("!h", -1)
+
+
+def test_literal_array_e_tabelas_destino():
+    assert _literal_array(np.array([1.5, np.nan], dtype=np.float32)) == "{1.5,NULL}"
+    mensais = ["x.lead_energia_mensal"]
+    assert tabelas_destino("linhas", mensais, "x") == mensais
+    assert tabelas_destino("compacto", mensais, "x") == ["x.lead_serie_mensal"]
+    assert tabelas_destino("ambos", mensais) == mensais + ["lead_serie_mensal"]
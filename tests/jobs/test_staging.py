@@ -0,0 +1,40 @@
+# tests/jobs/test_staging.py
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from packages.jobs.utils.staging import nome_staging, preparar_staging
+
+
+class _Cursor:
+    def __init__(self):
+        self.comandos = []
+
+    def execute(self, sql, params=None):
+        self.comandos.append(sql)
+
+
+def test_nome_estavel_curto_e_por_conjunto_de_colunas():
+    a = nome_staging("intel_lead.lead_bruto", ["uc_id", "ano"])
+    assert a == nome_staging("intel_lead.lead_bruto", ["uc_id", "ano"])
+    assert a != nome_staging("intel_lead.lead_bruto", ["uc_id"])
+    assert a.startswith("_stg_lead_bruto_")
+    assert len(nome_staging("s." + "x" * 80, ["a"])) <= 63
+
+def test_staging_da_sessao_sem_indices_e_esvaziada_no_commit():
+    cur = _Cursor()
+    nome = preparar_staging(cur, "intel_lead.lead_bruto", ["uc_id", "ano"])
+    (sql,) = cur.comandos
+    assert f"CREATE TEMP TABLE IF NOT EXISTS {nome}" in sql
+    assert "ON COMMIT DELETE ROWS" in sql and "WITH NO DATA" in sql
+    assert "SELECT uc_id,ano FROM intel_lead.lead_bruto" in sql
+    assert "LIKE" not in sql and "TRUNCATE" not in sql
+
+def test_limpar_trunca_no_mesmo_comando():
+    cur = _Cursor()
+    nome = preparar_staging(cur, "intel_lead.lead_bruto", ["uc_id"], limpar=True)
+    assert len(cur.comandos) == 1 and cur.comandos[0].endswith(f"; TRUNCATE {nome}")